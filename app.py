@@ -12,9 +12,13 @@ from blueprints.reports import reports_bp
 from blueprints.admin import admin_bp
 from blueprints.setup import setup_bp
 from blueprints.wells import wells_bp
+from blueprints.jobs import jobs_bp
+from blueprints.ingest import ingest_bp
 
 # Import utility functions
 from utils.date_utils import gregorian_to_jalali
+from database.connection import init_app as init_db_pool
+from database.event_journal import init_app as init_event_journal
 
 # 1. Create the Flask app instance
 app = Flask(__name__)
@@ -23,6 +27,10 @@ app = Flask(__name__)
 app.secret_key = os.urandom(24)
 # Set inactivity timeout to 1 hour (sliding window)
 app.permanent_session_lifetime = timedelta(hours=1)
+# Return pooled DB connections at the end of every request/app context
+init_db_pool(app)
+# Fold the operator's own pending status changes in before serving their next request
+init_event_journal(app)
 
 
 @app.before_request
@@ -90,6 +98,8 @@ app.register_blueprint(pumps_bp)
 app.register_blueprint(records_bp)
 app.register_blueprint(reports_bp)
 app.register_blueprint(wells_bp)
+app.register_blueprint(jobs_bp)
+app.register_blueprint(ingest_bp)
 
 # Default route to redirect to login
 @app.route('/')
@@ -1,12 +1,11 @@
-from flask import Blueprint, render_template, request, session, redirect, flash, send_file
-import pandas as pd
-from datetime import datetime
+from flask import Blueprint, render_template, request, session, redirect, flash, send_file, jsonify
 from database.users import get_all_users, create_new_user, delete_existing_user
 from database.models import get_db_connection
-from database.operations import update_pump_current_status
-from utils.date_utils import jalali_to_gregorian
 from utils.export_utils import create_sample_excel_file
-from database.operations import get_pump_history_from_db
+from utils.import_utils import save_upload_file
+from utils.job_queue import submit_job
+from utils.table_reader import TABLE_SUFFIXES, upload_suffix
+from database.dashboard import get_dashboard_cache_stats
 
 admin_bp = Blueprint('admin', __name__)
 
@@ -80,134 +79,14 @@ def import_history():
             flash('لطفا فایل اکسل را انتخاب کنید', 'error')
             return redirect('/admin/import-history')
         
-        if not file.filename.endswith(('.xlsx', '.xls')):
-            flash('لطفا فایل اکسل معتبر انتخاب کنید (xlsx یا xls)', 'error')
+        if not file.filename.lower().endswith(TABLE_SUFFIXES):
+            flash('لطفا فایل اکسل یا CSV معتبر انتخاب کنید (xlsx، xls یا csv)', 'error')
             return redirect('/admin/import-history')
         
         try:
-            df = pd.read_excel(file)
-            
-            required_columns = ['Pump_Number', 'Action', 'Reason', 'Date_Jalali', 'Time_Jalali']
-            missing_columns = [col for col in required_columns if col not in df.columns]
-            
-            if missing_columns:
-                flash(f'ستون‌های ضروری وجود ندارند: {", ".join(missing_columns)}', 'error')
-                return redirect('/admin/import-history')
-            
-            conn = get_db_connection()
-            success_count = 0
-            error_count = 0
-            error_messages = []
-            
-            pump_groups = {}
-            for index, row in df.iterrows():
-                try:
-                    pump_num = int(row['Pump_Number'])
-                    if pump_num not in pump_groups:
-                        pump_groups[pump_num] = []
-                    
-                    date_jalali = str(row['Date_Jalali']).strip()
-                    time_jalali = str(row['Time_Jalali']).strip()
-                    
-                    if ':' not in time_jalali:
-                        time_jalali += ':00'
-                    elif time_jalali.count(':') == 1:
-                        time_jalali += ':00'
-                    
-                    jalali_datetime = f"{date_jalali} {time_jalali}"
-                    event_time_gregorian = jalali_to_gregorian(jalali_datetime)
-                    
-                    pump_groups[pump_num].append({
-                        'row_index': index + 2,
-                        'action': str(row['Action']).upper().strip(),
-                        'event_time': event_time_gregorian,
-                        'reason': str(row['Reason']).strip(),
-                        'notes': str(row['Notes']) if 'Notes' in df.columns and pd.notna(row['Notes']) else '',
-                        'jalali_time': jalali_datetime,
-                        'source': 'new'
-                    })
-                    
-                except Exception as e:
-                    error_messages.append(f'خط {index+2}: پمپ {pump_num} - خطا در پردازش داده ({str(e)})')
-                    error_count += 1
-            
-            for pump_num, new_events in pump_groups.items():
-                try:
-                    existing_events = get_pump_history_from_db(pump_num)
-                    
-                    all_events = existing_events + new_events
-                    all_events.sort(key=lambda x: x['event_time'])
-                    
-                    timeline_errors = []
-                    for i in range(1, len(all_events)):
-                        prev_action = all_events[i-1]['action']
-                        current_action = all_events[i]['action']
-                        
-                        if prev_action == current_action:
-                            error_event = all_events[i]
-                            prev_event = all_events[i-1]
-                            
-                            timeline_errors.append({
-                                'row_index': error_event.get('row_index', 'موجود'),
-                                'message': f'پمپ {pump_num}: {current_action} در {error_event["jalali_time"]} - مغایرت منطقی (پمپ از {prev_event["jalali_time"]} در حالت {prev_action} بوده)'
-                            })
-                                                
-                    if timeline_errors:
-                        error_count += len(timeline_errors)
-                        for error in timeline_errors:
-                            error_messages.append(f'خط {error["row_index"]}: {error["message"]}')
-                    else:
-                        for event in new_events:
-                            try:
-                                pump = conn.execute(
-                                    'SELECT id FROM pumps WHERE pump_number = ?', (pump_num,)
-                                ).fetchone()
-                                
-                                if pump:
-                                    well = conn.execute('''
-                                        SELECT w.status 
-                                        FROM wells w 
-                                        WHERE w.pump_id = ?
-                                    ''', (pump['id'],)).fetchone()
-                                    
-                                    if well and well['status'] != 'active':
-                                        error_messages.append(f'خط {event["row_index"]}: پمپ {pump_num} - چاه در حالت "{well["status"]}" است و امکان ثبت رکورد ندارد')
-                                        error_count += 1
-                                        continue
-                                    conn.execute(
-                                    '''INSERT INTO pump_history 
-                                    (pump_id, user_id, action, event_time, recorded_time, reason, notes, manual_time) 
-                                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)''',
-                                    (pump['id'], session['user_id'], event['action'], 
-                                    event['event_time'], datetime.now(), event['reason'], event['notes'], True)
-                                )
-                                    success_count += 1
-                                else:
-                                    error_messages.append(f'خط {event["row_index"]}: پمپ با شماره {pump_num} یافت نشد')
-                                    error_count += 1
-                                
-                            except Exception as e:
-                                error_messages.append(f'خط {event["row_index"]}: پمپ {pump_num} - خطا در ذخیره‌سازی ({str(e)})')
-                                error_count += 1
-                
-                except Exception as e:
-                    error_messages.append(f'پمپ {pump_num}: خطا در پردازش - {str(e)}')
-                    error_count += 1
-            
-            if success_count > 0:
-                conn.commit()
-                update_pump_current_status()
-                flash(f'✅ {success_count} رکورد با موفقیت وارد شد', 'success')
-            
-            if error_count > 0:
-                flash(f'❌ {error_count} خطا در پردازش', 'error')
-                for i, error_msg in enumerate(error_messages[:10]):
-                    flash(f'خطا {i+1}: {error_msg}', 'warning')
-                if len(error_messages) > 10:
-                    flash(f'... و {len(error_messages) - 10} خطای دیگر', 'warning')
-            
-            conn.close()
-            return redirect('/admin/import-history')
+            upload_path = save_upload_file(file, suffix=upload_suffix(file.filename))
+            job_id = submit_job('import_history', {'path': upload_path}, session['user_id'])
+            return redirect(f'/jobs/{job_id}')
             
         except Exception as e:
             flash(f'خطا در پردازش فایل: {str(e)}', 'error')
@@ -223,6 +102,14 @@ def download_sample():
     
     return create_sample_excel_file()
 
+@admin_bp.route('/api/admin/dashboard-cache')
+def dashboard_cache_stats():
+    """آمار کش داشبورد (hit/miss و نسخه ناوگان فعلی)"""
+    if 'user_id' not in session or session['role'] != 'admin':
+        return jsonify({'success': False, 'error': 'دسترسی غیر مجاز!'}), 403
+    
+    return jsonify({'success': True, **get_dashboard_cache_stats()})
+
 @admin_bp.route('/admin/deletion-logs')
 def deletion_logs():
     if 'user_id' not in session or session['role'] != 'admin':
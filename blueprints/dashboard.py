@@ -1,78 +1,93 @@
-from flask import Blueprint, render_template, session, redirect
-from database.models import get_all_pumps
-from utils.date_utils import gregorian_to_jalali
+import json
+import time
+from flask import (Blueprint, render_template, session, redirect, request, jsonify,
+                   Response, stream_with_context, get_template_attribute)
+from database.dashboard import (get_dashboard_snapshot, get_dashboard_changes,
+                                get_current_revision, wait_for_revision_change)
 from datetime import datetime
-from database.wells_operations import get_well_by_pump_id
 
 
 dashboard_bp = Blueprint('dashboard', __name__)
 
+# به‌روزرسانی زنده داشبورد
+LONG_POLL_MAX_SECONDS = 30
+STREAM_POLL_SECONDS = 1.0
+STREAM_HEARTBEAT_SECONDS = 15
+STREAM_MAX_SECONDS = 300  # بعد از آن EventSource با Last-Event-ID دوباره وصل می‌شود
+
 @dashboard_bp.route('/')
 def dashboard():
     if 'user_id' not in session:
         return redirect('/login')
     
-    pumps = get_all_pumps()
-    pumps_with_well_status = []
+    data = get_dashboard_snapshot()
     
-    # آمار جدید
-    pumps_on = 0
-    pumps_off = 0
-    pumps_maintenance = 0
-    pumps_inactive = 0
+    return render_template('dashboard.html', 
+                         pumps=data['pumps'],
+                         pump_stats=data['stats'],
+                         dashboard_revision=data.get('revision'))
+
+def _delta_payload(since):
+    """تغییرات نسبت به since به همراه HTML کارت هر پمپ تغییرکرده"""
+    changes = get_dashboard_changes(since)
+    pump_card = get_template_attribute('_pump_card.html', 'pump_card')
+    changes['pumps'] = [
+        {'id': pump['id'], 'status': pump['status'], 'well_status': pump['well_status'],
+         'html': str(pump_card(pump))}
+        for pump in changes['pumps']
+    ]
+    return changes
+
+@dashboard_bp.route('/api/dashboard/state')
+def dashboard_state():
+    """
+    وضعیت داشبورد یا تغییرات آن نسبت به نسخه since.
+    با wait=N (long-poll) تا N ثانیه منتظر تغییر می‌ماند.
+    """
+    if 'user_id' not in session:
+        return jsonify({'success': False, 'error': 'لطفا ابتدا وارد شوید'})
     
-    for pump in pumps:
-        pump_dict = dict(pump)
-        pump_dict['has_history'] = pump['has_history']
-        
-        # دریافت وضعیت چاه مرتبط
-        well = get_well_by_pump_id(pump['id'])
-        if well:
-            pump_dict['well_status'] = well['status']
-            pump_dict['well_id'] = well['id']
-            
-            # محاسبه آمار بر اساس وضعیت چاه
-            if well['status'] == 'active':
-                if pump['status']:  # پمپ روشن
-                    pumps_on += 1
-                else:  # پمپ خاموش
-                    pumps_off += 1
-            elif well['status'] == 'maintenance':
-                pumps_maintenance += 1
-            elif well['status'] == 'inactive':
-                pumps_inactive += 1
-        else:
-            pump_dict['well_status'] = 'active'
-            pump_dict['well_id'] = None
-            # اگر چاه نداره، مثل قبل حساب کن
-            if pump['status']:
-                pumps_on += 1
-            else:
-                pumps_off += 1
-            
-        if pump['last_action']:
-            pump_dict['status'] = 1 if pump['last_action'] == 'ON' else 0
-        else:
-            pump_dict['status'] = 0
-            
-        if pump['last_change']:
-            pump_dict['last_change_jalali'] = gregorian_to_jalali(pump['last_change'])
-        else:
-            pump_dict['last_change_jalali'] = 'بدون تاریخچه'
-            
-        pumps_with_well_status.append(pump_dict)
+    since = request.args.get('since', type=int)
+    wait = min(max(request.args.get('wait', 0, type=int), 0), LONG_POLL_MAX_SECONDS)
+    if wait and since is not None:
+        wait_for_revision_change(since, wait)
+    
+    return jsonify({'success': True, **_delta_payload(since)})
+
+@dashboard_bp.route('/api/dashboard/stream')
+def dashboard_stream():
+    """ارسال تغییرات داشبورد با Server-Sent Events (رویداد delta با id برابر نسخه ناوگان)"""
+    if 'user_id' not in session:
+        return jsonify({'success': False, 'error': 'لطفا ابتدا وارد شوید'}), 401
     
-    total_pumps = len(pumps)
+    since = request.headers.get('Last-Event-ID', type=int)
+    if since is None:
+        since = request.args.get('since', type=int)
     
-    return render_template('dashboard.html', 
-                         pumps=pumps_with_well_status,
-                         pump_stats={
-                             'on': pumps_on,
-                             'off': pumps_off,
-                             'maintenance': pumps_maintenance,
-                             'inactive': pumps_inactive,
-                             'total': total_pumps
-                         })
+    def events(since):
+        yield 'retry: 3000\n\n'
+        started = last_sent = time.monotonic()
+        while time.monotonic() - started < STREAM_MAX_SECONDS:
+            revision = get_current_revision()
+            if revision is None or revision != since:
+                payload = _delta_payload(since)
+                since = payload['revision']
+                last_sent = time.monotonic()
+                data = json.dumps(payload, ensure_ascii=False)
+                yield f'id: {since}\nevent: delta\ndata: {data}\n\n'
+                if since is None:
+                    # دیتابیس بدون شمارنده نسخه: فقط یک بار وضعیت کامل ارسال می‌شود
+                    return
+            elif time.monotonic() - last_sent >= STREAM_HEARTBEAT_SECONDS:
+                last_sent = time.monotonic()
+                yield ': keepalive\n\n'
+            time.sleep(STREAM_POLL_SECONDS)
+    
+    return Response(
+        stream_with_context(events(since)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
 
 def check_deletion_alerts(user_id):
     """نمایش الارم حذف‌ها - یک بار در روز برای هر کاربر"""
@@ -0,0 +1,46 @@
+from flask import Blueprint, request, jsonify
+from config import get_config
+from database.ingest import authenticate_ingest_token, ingest_events
+from utils.ingest_parser import parse_ingest_body
+
+ingest_bp = Blueprint('ingest', __name__)
+
+
+def _request_token():
+    auth = request.headers.get('Authorization', '')
+    if auth.lower().startswith('bearer '):
+        return auth[7:].strip()
+    return request.headers.get('X-Ingest-Token')
+
+
+@ingest_bp.route('/api/ingest/events', methods=['POST'])
+def ingest_pump_events():
+    """
+    دریافت رویدادهای پمپ از PLC/SCADA (JSON lines یا CSV فشرده).
+    احراز هویت: هدر Authorization: Bearer <token> (توکن با scripts/ingest_tokens.py ساخته می‌شود)
+    """
+    token = authenticate_ingest_token(_request_token())
+    if token is None:
+        return jsonify({'success': False, 'error': 'invalid or revoked token'}), 401
+
+    cfg = get_config()
+    max_bytes = getattr(cfg, 'INGEST_MAX_BODY_BYTES', 2 * 1024 * 1024)
+    if request.content_length is None or request.content_length > max_bytes:
+        return jsonify({'success': False, 'error': f'body must be at most {max_bytes} bytes'}), 413
+
+    try:
+        events, errors = parse_ingest_body(request.get_data(as_text=True), request.content_type)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 415
+    max_events = getattr(cfg, 'INGEST_MAX_EVENTS', 5000)
+    if len(events) + len(errors) > max_events:
+        return jsonify({'success': False, 'error': f'at most {max_events} events per request'}), 413
+
+    result = ingest_events(token, events)
+    rejected = sorted(errors + result['rejected'], key=lambda item: item['line'])
+    return jsonify({
+        'success': not rejected,
+        'accepted': result['accepted'],
+        'duplicates': result['duplicates'],
+        'rejected': rejected,
+    })
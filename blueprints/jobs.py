@@ -0,0 +1,90 @@
+from flask import Blueprint, render_template, session, redirect, flash, jsonify, send_file
+from pathlib import Path
+from database.jobs import get_job, list_jobs
+
+jobs_bp = Blueprint('jobs', __name__)
+
+
+def _job_for_session(job_id):
+    """کار با شناسه job_id اگر متعلق به کاربر جاری باشد (یا کاربر مدیر باشد)"""
+    job = get_job(job_id)
+    if job is None:
+        return None
+    if session.get('role') != 'admin' and job['user_id'] != session.get('user_id'):
+        return None
+    return job
+
+
+def job_to_json(job):
+    total = job['progress_total']
+    done = job['progress_done'] or 0
+    percent = None
+    if job['status'] == 'succeeded':
+        percent = 100
+    elif total:
+        percent = min(100, round(done * 100 / total))
+    has_artifact = job['status'] == 'succeeded' and job['artifact_path']
+    return {
+        'id': job['id'],
+        'kind': job['kind'],
+        'status': job['status'],
+        'progress': {'done': done, 'total': total, 'percent': percent},
+        'message': job['message'],
+        'result': job['result'],
+        'error': job['error'],
+        'download_url': f"/jobs/{job['id']}/download" if has_artifact else None,
+        'artifact_name': job['artifact_name'] if has_artifact else None,
+        'created_at': job['created_at'],
+        'started_at': job['started_at'],
+        'finished_at': job['finished_at'],
+    }
+
+
+@jobs_bp.route('/jobs/<job_id>')
+def job_status_page(job_id):
+    if 'user_id' not in session:
+        return redirect('/login')
+
+    job = _job_for_session(job_id)
+    if job is None:
+        flash('کار مورد نظر یافت نشد', 'error')
+        return redirect('/')
+    return render_template('job_status.html', job=job_to_json(job))
+
+
+@jobs_bp.route('/api/jobs/<job_id>')
+def api_job_status(job_id):
+    if 'user_id' not in session:
+        return jsonify({'success': False, 'error': 'لطفا ابتدا وارد شوید'})
+
+    job = _job_for_session(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'کار مورد نظر یافت نشد'}), 404
+    return jsonify({'success': True, 'job': job_to_json(job)})
+
+
+@jobs_bp.route('/api/jobs')
+def api_list_jobs():
+    if 'user_id' not in session:
+        return jsonify({'success': False, 'error': 'لطفا ابتدا وارد شوید'})
+
+    user_id = None if session.get('role') == 'admin' else session['user_id']
+    return jsonify({'success': True, 'jobs': [job_to_json(job) for job in list_jobs(user_id)]})
+
+
+@jobs_bp.route('/jobs/<job_id>/download')
+def download_job_artifact(job_id):
+    if 'user_id' not in session:
+        return redirect('/login')
+
+    job = _job_for_session(job_id)
+    if job is None or job['status'] != 'succeeded' or not job['artifact_path'] \
+            or not Path(job['artifact_path']).exists():
+        flash('فایل خروجی این کار موجود نیست', 'error')
+        return redirect('/')
+    return send_file(
+        job['artifact_path'],
+        as_attachment=True,
+        download_name=job['artifact_name'],
+        mimetype=job['artifact_mimetype']
+    )
@@ -1,5 +1,6 @@
 from flask import Blueprint, request, session, jsonify
-from database.operations import change_pump_status
+from config import get_config
+from database.operations import change_pump_status, batch_change_pump_status
 
 pumps_bp = Blueprint('pumps', __name__)
 
@@ -20,4 +21,26 @@ def change_pump_status_detailed():
         action_time=data.get('action_time')
     )
     
-    return jsonify(result)
\ No newline at end of file
+    return jsonify(result)
+
+
+@pumps_bp.route('/api/pumps/change-status/batch', methods=['POST'])
+def change_pump_status_batch():
+    """
+    تغییر وضعیت چند پمپ در یک درخواست.
+    ورودی JSON: {"items": [{"pump_id", "action", "event_time", "reason", "notes"}, ...], "atomic": true}
+    """
+    if 'user_id' not in session:
+        return jsonify({'success': False, 'error': 'لطفا ابتدا وارد شوید'})
+
+    data = request.get_json(silent=True) or {}
+    items = data.get('items') if isinstance(data, dict) else data
+    if not isinstance(items, list) or not items:
+        return jsonify({'success': False, 'error': 'لیست items خالی یا نامعتبر است'}), 400
+    max_items = getattr(get_config(), 'BATCH_STATUS_MAX_ITEMS', 500)
+    if len(items) > max_items:
+        return jsonify({'success': False, 'error': f'حداکثر {max_items} مورد در هر درخواست مجاز است'}), 400
+
+    atomic = data.get('atomic', True) if isinstance(data, dict) else True
+    result = batch_change_pump_status(items, session['user_id'], atomic=bool(atomic))
+    return jsonify(result)
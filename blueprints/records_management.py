@@ -1,8 +1,9 @@
 from flask import Blueprint, render_template, request, session, redirect, flash, jsonify
 from database.models import get_db_connection, get_all_pumps
-from database.operations import (
-    update_pump_current_status
-)
+from database.daily_hours import refresh_pump_days
+from database.pump_status import refresh_current_status
+from database.fleet_revision import bump_fleet_revision
+from database.event_journal import fold_pending_events, has_pending_event_since
 
 # توابع جدید را مستقیماً در این فایل تعریف می‌کنیم
 def can_delete_record(record_id, user_id, user_role):
@@ -32,7 +33,9 @@ def can_delete_record(record_id, user_id, user_role):
             LIMIT 1
         ''', (record['pump_id'],)).fetchone()
         
-        if not last_record or last_record['id'] != record_id:
+        # رویداد ادغام‌نشده بعد از این رکورد در ژورنال هم آن را از «آخرین» بودن خارج می‌کند
+        if not last_record or last_record['id'] != record_id \
+                or has_pending_event_since(conn, record['pump_id'], record['event_time']):
             return False, "فقط آخرین رکورد قابل حذف است"
         
         # بررسی دسترسی کاربر
@@ -78,7 +81,20 @@ def delete_pump_record(record_id, deletion_reason, deleted_by_user_id):
         
         # ۲. عملیات حذف در یک connection جداگانه
         conn2 = get_db_connection()
-        
+
+        # ادغام ژورنال و بررسی دوباره: شاید بعد از can_delete_record رویداد تازه‌ای ثبت شده باشد
+        fold_pending_events(conn2)
+        last_record = conn2.execute('''
+            SELECT id FROM pump_history
+            WHERE pump_id = ?
+            ORDER BY event_time DESC, id DESC
+            LIMIT 1
+        ''', (record['pump_id'],)).fetchone()
+        if not last_record or last_record['id'] != record_id:
+            conn2.rollback()
+            conn2.close()
+            return False, "فقط آخرین رکورد قابل حذف است"
+
         # ذخیره در لاگ حذف
         conn2.execute('''
             INSERT INTO deletion_logs 
@@ -96,13 +112,15 @@ def delete_pump_record(record_id, deletion_reason, deleted_by_user_id):
         
         # حذف رکورد از تاریخچه
         conn2.execute('DELETE FROM pump_history WHERE id = ?', (record_id,))
+        # بروزرسانی ساعات کارکرد روزهای متأثر
+        refresh_pump_days(conn2, record['pump_id'], record['event_time'])
+        # ۳. بروزرسانی وضعیت همین پمپ در همان تراکنش
+        refresh_current_status(conn2, [record['pump_id']])
+        bump_fleet_revision(conn2)
         
         conn2.commit()
         conn2.close()
         
-        # ۳. بروزرسانی وضعیت پمپ
-        update_pump_current_status()
-        
         return True, "رکورد با موفقیت حذف شد"
         
     except Exception as e:
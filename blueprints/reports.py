@@ -1,6 +1,8 @@
-from flask import Blueprint, render_template, request, session, redirect, send_file
-from database.reports import get_operating_hours_report, get_status_at_time_report, get_full_history_report
-from utils.export_utils import export_operating_hours_to_excel, export_status_report_to_excel, export_full_history_to_excel
+from flask import Blueprint, render_template, request, session, redirect, send_file, jsonify
+from database.models import get_pump_choices
+from database.reports import get_operating_hours_report, get_status_at_time_report, get_full_history_page, get_status_series_report, count_full_history
+from utils.export_utils import export_operating_hours_to_excel, export_status_report_to_excel, export_full_history_to_excel, export_in_background
+from config import get_config
 
 reports_bp = Blueprint('reports', __name__)
 
@@ -8,7 +10,7 @@ reports_bp = Blueprint('reports', __name__)
 def reports_dashboard():
     if 'user_id' not in session:
         return redirect('/login')
-    return render_template('reports.html')
+    return render_template('reports.html', pumps=get_pump_choices())
 
 @reports_bp.route('/report/operating-hours')
 def operating_hours_report():
@@ -36,7 +38,14 @@ def export_operating_hours():
     month_jalali = request.args.get('month')
     report_type = request.args.get('report_type', 'daily')
     
-    return export_operating_hours_to_excel(date_jalali, month_jalali, report_type)
+    export_format = request.args.get('format', 'xlsx')
+    
+    if request.args.get('background'):
+        return export_in_background('operating_hours', {
+            'date_jalali': date_jalali, 'month_jalali': month_jalali, 'report_type': report_type
+        }, export_format, session['user_id'])
+    
+    return export_operating_hours_to_excel(date_jalali, month_jalali, report_type, export_format)
 
 @reports_bp.route('/report/status-at-time')
 def status_at_time_report():
@@ -55,6 +64,22 @@ def status_at_time_report():
                          time=time, 
                          display_type=display_type)
 
+@reports_bp.route('/api/report/status-series')
+def status_series_api():
+    """وضعیت همه پمپ‌ها در لحظه‌های منظم یک روز (برگه تحویل شیفت)"""
+    if 'user_id' not in session:
+        return jsonify({'success': False, 'error': 'لطفا ابتدا وارد شوید'})
+    
+    date_jalali = request.args.get('date')
+    step = request.args.get('step', 60, type=int)
+    
+    try:
+        report = get_status_series_report(date_jalali, step)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)})
+    
+    return jsonify({'success': True, **report})
+
 @reports_bp.route('/report/status-at-time/export')
 def export_status_at_time():
     if 'user_id' not in session:
@@ -64,7 +89,14 @@ def export_status_at_time():
     time = request.args.get('time')
     display_type = request.args.get('display_type', 'off')
     
-    return export_status_report_to_excel(date_jalali, time, display_type)
+    export_format = request.args.get('format', 'xlsx')
+    
+    if request.args.get('background'):
+        return export_in_background('status_at_time', {
+            'date_jalali': date_jalali, 'time': time, 'display_type': display_type
+        }, export_format, session['user_id'])
+    
+    return export_status_report_to_excel(date_jalali, time, display_type, export_format)
 
 @reports_bp.route('/report/full-history')
 def full_history_report():
@@ -75,13 +107,19 @@ def full_history_report():
     to_date_jalali = request.args.get('to_date')
     pump_id = request.args.get('pump_id', 'all')
     
-    results = get_full_history_report(from_date_jalali, to_date_jalali, pump_id)
+    cursor = request.args.get('after')
+    
+    page = get_full_history_page(from_date_jalali, to_date_jalali, pump_id, cursor)
     
     return render_template('full_history_report.html',
-                         results=results,
+                         results=page['rows'],
+                         total=page['total'],
+                         next_cursor=page['next_cursor'],
+                         is_first_page=not cursor,
                          from_date_jalali=from_date_jalali,
                          to_date_jalali=to_date_jalali,
-                         pump_id=pump_id)
+                         pump_id=pump_id,
+                         pumps=get_pump_choices())
 
 @reports_bp.route('/report/full-history/export')
 def export_full_history():
@@ -92,4 +130,14 @@ def export_full_history():
     to_date_jalali = request.args.get('to_date')
     pump_id = request.args.get('pump_id', 'all')
     
-    return export_full_history_to_excel(from_date_jalali, to_date_jalali, pump_id)
\ No newline at end of file
+    export_format = request.args.get('format', 'xlsx')
+    
+    # بازه‌های بزرگ (مثلاً خروجی سالانه) در پس‌زمینه ساخته می‌شوند تا درخواست timeout نشود
+    if request.args.get('background') or \
+            count_full_history(from_date_jalali, to_date_jalali, pump_id) > get_config().EXPORT_SYNC_ROW_LIMIT:
+        return export_in_background('full_history', {
+            'from_date_jalali': from_date_jalali, 'to_date_jalali': to_date_jalali,
+            'pump_id': pump_id, 'with_total': True
+        }, export_format, session['user_id'])
+    
+    return export_full_history_to_excel(from_date_jalali, to_date_jalali, pump_id, export_format)
\ No newline at end of file
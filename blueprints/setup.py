@@ -1,9 +1,9 @@
 from flask import Blueprint, render_template, request, session, redirect, flash, send_file
-from utils.backup_utils import create_backup, list_backups, restore_backup, BACKUP_DIR, DB_PATH
-from utils.import_utils import generate_template_bytes, save_upload_file, parse_and_validate, apply_rows_to_db
-import sqlite3
+from utils.backup_utils import list_backups, BACKUP_DIR
+from utils.import_utils import generate_template_bytes, save_upload_file, stage_upload, staged_upload_preview
+from utils.table_reader import upload_suffix
+from utils.job_queue import submit_job
 from io import BytesIO
-from pathlib import Path
 
 setup_bp = Blueprint('setup', __name__)
 
@@ -26,9 +26,13 @@ def admin_setup_backup():
     if not _is_admin():
         flash('دسترسی غیر مجاز!', 'error')
         return redirect('/')
+    # the online backup runs in the background; the job page shows progress
     try:
-        path = create_backup()
-        flash(f'Backup created: {path}', 'success')
+        if request.form.get('mode') == 'snapshot':
+            job_id = submit_job('snapshot', {}, session['user_id'])
+        else:
+            job_id = submit_job('backup', {'compress': request.form.get('compress') == '1'}, session['user_id'])
+        return redirect(f'/jobs/{job_id}')
     except Exception as e:
         flash(f'Error creating backup: {str(e)}', 'error')
     return redirect('/admin/setup')
@@ -59,33 +63,13 @@ def admin_setup_upload_preview():
         flash('فایل ارسال نشد.', 'error')
         return redirect('/admin/setup')
     try:
-        saved = save_upload_file(f)
-        result = parse_and_validate(saved, max_wells=1000)
-        # dry-run: compare with DB to estimate inserted/updated counts
-        will_insert = 0
-        will_update = 0
-        try:
-            conn = sqlite3.connect(str(DB_PATH))
-            cur = conn.cursor()
-            for r in result.get('rows_preview', []):
-                wid = int(r['well_number'])
-                cur.execute('SELECT id FROM wells WHERE id = ?', (wid,))
-                if cur.fetchone():
-                    will_update += 1
-                else:
-                    will_insert += 1
-        except Exception:
-            # ignore DB errors for preview; set counts to None
-            will_insert = None
-            will_update = None
-        finally:
-            try:
-                conn.close()
-            except Exception:
-                pass
-
-        # pass preview, dry-run counts and saved path to template for apply
-        return render_template('admin_setup_preview.html', preview=result, upload_path=saved, dry_run={'insert': will_insert, 'update': will_update})
+        saved = save_upload_file(f, suffix=upload_suffix(f.filename))
+        # validated rows and the exact insert/update dry-run are stored in the
+        # staging tables; apply-upload consumes them without re-reading the file
+        upload_id = stage_upload(saved, user_id=session['user_id'], max_wells=1000)
+        result = staged_upload_preview(upload_id)
+        return render_template('admin_setup_preview.html', preview=result, upload_id=upload_id,
+                               dry_run=result['dry_run'])
     except Exception as e:
         flash(f'Error processing file: {e}', 'error')
         return redirect('/admin/setup')
@@ -96,22 +80,19 @@ def admin_setup_apply_upload():
     if not _is_admin():
         flash('دسترسی غیر مجاز!', 'error')
         return redirect('/')
-    upload_path = request.form.get('upload_path')
+    upload_id = request.form.get('upload_id')
     policy = request.form.get('policy') or 'merge'
     # Only 'merge' is supported now
     if policy != 'merge':
         flash('Policy نامعتبر است یا پشتیبانی نمی‌شود (only merge).', 'error')
         return redirect('/admin/setup')
-    if not upload_path or not Path(upload_path).exists():
+    if not upload_id or staged_upload_preview(upload_id, preview_limit=0) is None:
         flash('فایل آپلود یافته یافت نشد.', 'error')
         return redirect('/admin/setup')
-    # apply
+    # apply in the background; the job page reports progress and the result
     try:
-        res = apply_rows_to_db(upload_path, policy=policy, max_wells=1000)
-        if not res.get('ok'):
-            flash('خطا در اعمال داده‌ها: ' + str(res.get('msg', 'unknown')), 'error')
-            return redirect('/admin/setup')
-        flash(f"اعمال شد: inserted={res.get('inserted',0)} updated={res.get('updated',0)}", 'success')
+        job_id = submit_job('wells_apply', {'upload_id': upload_id, 'policy': policy}, session['user_id'])
+        return redirect(f'/jobs/{job_id}')
     except Exception as e:
         flash(f'Error applying upload: {e}', 'error')
     return redirect('/admin/setup')
@@ -124,18 +105,17 @@ def admin_setup_restore():
         return redirect('/')
     backup_file = request.form.get('backup_file')
     confirm = request.form.get('confirm')
-    if not backup_file:
+    if not backup_file or backup_file not in list_backups():
         flash('بکاپ نامعتبر است.', 'error')
         return redirect('/admin/setup')
     if confirm != 'true':
         flash('لطفاً بازگردانی را تأیید کنید.', 'warning')
         return redirect('/admin/setup')
+    # restore_backup() checks the file and takes the emergency backup in the
+    # background; requests only wait for the final rename
     try:
-        # restore_backup() already creates an emergency backup internally,
-        # so call it directly and use its returned emergency path. This avoids
-        # creating two backups for a single restore operation.
-        emergency = restore_backup(backup_file)
-        flash(f'Restored from {backup_file}. Emergency backup created: {emergency}', 'success')
+        job_id = submit_job('restore', {'backup_file': backup_file}, session['user_id'])
+        return redirect(f'/jobs/{job_id}')
     except Exception as e:
         flash(f'Error restoring backup: {str(e)}', 'error')
     return redirect('/admin/setup')
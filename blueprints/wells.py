@@ -8,7 +8,7 @@ from database.wells_operations import (
 from database.models import get_db_connection
 import json
 from utils.date_utils import gregorian_to_jalali
-from utils.export_utils import export_wells_to_excel, export_well_history_to_excel
+from utils.export_utils import export_wells_to_excel, export_well_history_to_excel, export_in_background
 
 wells_bp = Blueprint('wells', __name__)
 
@@ -164,13 +164,17 @@ def register_wells_blueprint(app):
 
 @wells_bp.route('/wells/export')
 def wells_export():
-    """Export wells list to Excel file."""
+    """Export wells list to Excel file (or CSV/Parquet via ?format=)."""
     if 'user_id' not in session:
         flash('لطفا ابتدا وارد شوید', 'error')
         return redirect('/login')
 
+    export_format = request.args.get('format', 'xlsx')
+    if request.args.get('background'):
+        return export_in_background('wells', {}, export_format, session['user_id'])
+
     # Delegate to export utility which returns a Flask response
-    return export_wells_to_excel()
+    return export_wells_to_excel(export_format)
 
 
 @wells_bp.route('/wells/<int:well_id>/export_history')
@@ -6,6 +6,12 @@ class Config:
     """
     SECRET_KEY = 'pump_management_secret_key_2024'
     DATABASE_PATH = 'pump_management.db'
+
+    # تنظیمات connection pool و PRAGMAهای SQLite
+    DB_POOL_SIZE = 8                      # حداکثر اتصال بیکار نگه‌داشته‌شده
+    DB_CACHE_SIZE_KB = 16384              # کش صفحات هر اتصال (۱۶ مگابایت)
+    DB_MMAP_SIZE = 128 * 1024 * 1024      # ۱۲۸ مگابایت
+    DB_BUSY_TIMEOUT_MS = 5000
     
     # تنظیمات آپلود فایل
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB
@@ -16,6 +22,41 @@ class Config:
     
     # تنظیمات گزارشات
     REPORTS_PER_PAGE = 50
+    # خروجی تاریخچه کامل با بیش از این تعداد ردیف در پس‌زمینه ساخته می‌شود
+    EXPORT_SYNC_ROW_LIMIT = 50000
+
+    # صف کارهای پس‌زمینه (خروجی‌ها و واردسازی‌ها)
+    JOB_WORKERS = 2
+    JOB_RETENTION_HOURS = 24              # نگهداری نتیجه و فایل خروجی کارها
+
+    # پشتیبان‌گیری آنلاین (SQLite backup API)
+    BACKUP_PAGES_PER_STEP = 256           # صفحات کپی‌شده در هر مرحله
+    BACKUP_STEP_PAUSE = 0.005             # مکث بین مراحل (ثانیه) تا نویسنده‌ها منتظر نمانند
+    BACKUP_COMPRESS = False               # فشرده‌سازی gzip فایل پشتیبان
+
+    # اسنپ‌شات‌های افزایشی (utils/snapshot_store.py): صفحات تکراری فقط یک بار ذخیره می‌شوند
+    SNAPSHOT_CHUNK_PAGES = 64             # تعداد صفحات هر قطعه
+    SNAPSHOT_KEEP_HOURLY = 24             # آخرین اسنپ‌شات هر ساعت در این تعداد ساعت اخیر
+    SNAPSHOT_KEEP_DAILY = 14              # آخرین اسنپ‌شات هر روز در این تعداد روز اخیر
+    SNAPSHOT_KEEP_MONTHLY = 12            # آخرین اسنپ‌شات هر ماه در این تعداد ماه اخیر
+
+    # ژورنال تغییر وضعیت پمپ‌ها (database/event_journal.py)
+    EVENT_JOURNAL_BATCH_SIZE = 200        # حداکثر رویداد در هر commit گروهی
+    EVENT_JOURNAL_MAX_DELAY = 0.005       # حداکثر انتظار (ثانیه) برای جمع شدن یک دسته
+    EVENT_JOURNAL_COMPACT_DELAY = 0.5     # تأخیر ادغام ژورنال در pump_history بعد از هر نوشتن
+    EVENT_JOURNAL_COMPACT_BATCH = 5000    # حداکثر رویداد ادغام‌شده در هر تراکنش
+
+    BATCH_STATUS_MAX_ITEMS = 500          # حداکثر پمپ در هر درخواست /api/pumps/change-status/batch
+
+    # دریافت رویداد از PLC/SCADA (/api/ingest/events)
+    INGEST_MAX_EVENTS = 5000              # حداکثر رویداد در هر درخواست
+    INGEST_MAX_BODY_BYTES = 2 * 1024 * 1024
+    INGEST_MAX_FUTURE_SECONDS = 300       # رویداد با زمان بیش از این مقدار در آینده رد می‌شود
+    INGEST_KEY_RETENTION_DAYS = 7         # مدت نگهداری کلیدهای یکتایی (idempotency)
+
+    # بازگردانی بکاپ
+    RESTORE_QUICK_CHECK = False           # quick_check به جای integrity_check کامل روی فایل بکاپ
+    RESTORE_DRAIN_TIMEOUT = 10            # حداکثر انتظار (ثانیه) برای تمام شدن درخواست‌های در جریان
 
 class DevelopmentConfig(Config):
     DEBUG = True
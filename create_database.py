@@ -5,6 +5,7 @@
 import sqlite3
 import os
 from datetime import datetime
+from database.migrate import apply_migrations
 
 def create_tables(cursor):
     """ایجاد تمام جدول‌های سیستم"""
@@ -166,6 +167,10 @@ def main():
         print("-" * 30)
         
         conn.commit()
+
+        # ایندکس‌ها و تغییرات اسکیما بعد از نسخه پایه
+        apply_migrations(conn)
+        print("-" * 30)
         
         # گزارش نهایی
         print("🎉 دیتابیس با موفقیت ایجاد شد!")
@@ -0,0 +1,301 @@
+# database/connection.py
+"""
+مدیریت اتصال‌های دیتابیس (connection pool)
+
+به جای باز و بسته کردن یک اتصال جدید در هر تابع، اتصال‌ها یک بار با
+تنظیمات PRAGMA (حالت WAL، synchronous=NORMAL، کش صفحات، mmap و busy_timeout)
+باز می‌شوند و بین درخواست‌ها دوباره استفاده می‌شوند.
+
+هر بار فراخوانی get_connection() یک «اجاره» (lease) روی اتصال جاری همان
+درخواست (یا همان thread در اسکریپت‌ها) می‌گیرد؛ فراخوانی‌های تودرتو همان اتصال
+را می‌بینند و close() فقط اجاره را آزاد می‌کند. وقتی آخرین اجاره آزاد شد،
+تراکنش باز (commit نشده) مانند قبل rollback می‌شود و اتصال به pool برمی‌گردد.
+"""
+
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import g, has_app_context
+
+from config import get_config
+
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'temp_store': 'MEMORY',
+}
+
+_thread_slot = threading.local()
+
+
+class _Holder:
+    """اتصال در حال استفاده به همراه تعداد اجاره‌های باز آن"""
+    __slots__ = ('pool', 'conn', 'generation', 'depth')
+
+    def __init__(self, pool, conn, generation):
+        self.pool = pool
+        self.conn = conn
+        self.generation = generation
+        self.depth = 0
+
+
+class PooledConnection:
+    """
+    پوشش نازک روی sqlite3.Connection که close() را به آزادسازی اجاره تبدیل می‌کند.
+    سایر متدها (execute، commit، rollback، cursor و ...) مستقیماً به اتصال اصلی می‌رسند.
+    """
+
+    def __init__(self, pool, holder):
+        object.__setattr__(self, '_pool', pool)
+        object.__setattr__(self, '_holder', holder)
+        object.__setattr__(self, '_closed', False)
+
+    @property
+    def raw(self):
+        """اتصال sqlite3 اصلی (برای APIهایی مثل backup که شیء واقعی لازم دارند)"""
+        return self._holder.conn
+
+    def close(self):
+        if self._closed:
+            return
+        object.__setattr__(self, '_closed', True)
+        self._pool._leave(self._holder)
+
+    def __getattr__(self, name):
+        return getattr(self._holder.conn, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._holder.conn, name, value)
+
+    def __enter__(self):
+        self._holder.conn.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return self._holder.conn.__exit__(exc_type, exc, tb)
+
+
+class ConnectionPool:
+    """
+    pool ساده و thread-safe از اتصال‌های آماده به کار.
+
+    اتصال‌ها با check_same_thread=False باز می‌شوند ولی هر اتصال در هر لحظه فقط
+    در اختیار یک درخواست/thread است.
+    """
+
+    def __init__(self, db_path, max_idle=8, cache_size_kb=16384,
+                 mmap_size=128 * 1024 * 1024, busy_timeout_ms=5000, pragmas=None):
+        self.db_path = str(db_path)
+        self.max_idle = max_idle
+        self.busy_timeout_ms = busy_timeout_ms
+        self.pragmas = dict(DEFAULT_PRAGMAS)
+        self.pragmas['cache_size'] = -int(cache_size_kb)
+        self.pragmas['mmap_size'] = int(mmap_size)
+        self.pragmas['busy_timeout'] = int(busy_timeout_ms)
+        if pragmas:
+            self.pragmas.update(pragmas)
+
+        self._idle = []
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._paused = False
+        self._generation = 0
+        self.stats = {'opened': 0, 'reused': 0, 'in_use': 0}
+
+    @property
+    def generation(self):
+        """با هر drain (مثلاً بازگردانی بکاپ) افزایش می‌یابد"""
+        return self._generation
+
+    @classmethod
+    def from_config(cls, cfg):
+        return cls(
+            getattr(cfg, 'DATABASE_PATH', 'pump_management.db'),
+            max_idle=getattr(cfg, 'DB_POOL_SIZE', 8),
+            cache_size_kb=getattr(cfg, 'DB_CACHE_SIZE_KB', 16384),
+            mmap_size=getattr(cfg, 'DB_MMAP_SIZE', 128 * 1024 * 1024),
+            busy_timeout_ms=getattr(cfg, 'DB_BUSY_TIMEOUT_MS', 5000),
+        )
+
+    def _open(self):
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout_ms / 1000.0,
+            check_same_thread=False,
+        )
+        conn.row_factory = sqlite3.Row
+        for name, value in self.pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def acquire(self):
+        """گرفتن یک اتصال خام از pool (یا باز کردن اتصال جدید)"""
+        with self._lock:
+            while self._paused:
+                self._changed.wait()
+            generation = self._generation
+            self.stats['in_use'] += 1
+            if self._idle:
+                self.stats['reused'] += 1
+                return self._idle.pop(), generation
+            self.stats['opened'] += 1
+        try:
+            return self._open(), generation
+        except Exception:
+            with self._lock:
+                self.stats['in_use'] -= 1
+                self._changed.notify_all()
+            raise
+
+    def release(self, conn, generation):
+        """برگرداندن اتصال به pool؛ تراکنش commit نشده دور ریخته می‌شود"""
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            generation = -1
+
+        with self._lock:
+            self.stats['in_use'] -= 1
+            self._changed.notify_all()
+            if generation == self._generation and len(self._idle) < self.max_idle:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def drain(self):
+        """
+        بستن همه اتصال‌های بیکار. اتصال‌هایی که الان در حال استفاده‌اند
+        هنگام برگشت بسته می‌شوند (به جای برگشت به pool).
+        """
+        with self._lock:
+            self._generation += 1
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+
+    @contextmanager
+    def paused(self, timeout=10.0):
+        """
+        متوقف کردن pool برای جایگزینی فایل دیتابیس (بازگردانی بکاپ).
+
+        درخواست‌های جدید اتصال تا پایان بلوک with منتظر می‌مانند؛ ورود به بلوک
+        تا برگشت همه اتصال‌های در حال استفاده صبر می‌کند (حداکثر timeout ثانیه،
+        وگرنه TimeoutError و pool بدون تغییر ادامه می‌دهد). سپس اتصال‌های بیکار
+        بسته می‌شوند، پس داخل بلوک هیچ اتصالی از این pool روی فایل باز نیست.
+        thread فراخواننده نباید خودش اجاره بازی داشته باشد.
+        """
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            while self._paused:
+                self._changed.wait()
+            self._paused = True
+            while self.stats['in_use'] > 0:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._paused = False
+                    self._changed.notify_all()
+                    raise TimeoutError(
+                        f"{self.stats['in_use']} database connection(s) still in use after {timeout}s"
+                    )
+                self._changed.wait(remaining)
+            self._generation += 1
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._paused = False
+                self._changed.notify_all()
+
+    # --- مدیریت اجاره‌ها -------------------------------------------------
+
+    @staticmethod
+    def _slot():
+        if has_app_context():
+            return g, '_db_holder'
+        return _thread_slot, 'holder'
+
+    def lease(self):
+        owner, attr = self._slot()
+        holder = getattr(owner, attr, None)
+        if holder is None:
+            conn, generation = self.acquire()
+            holder = _Holder(self, conn, generation)
+            setattr(owner, attr, holder)
+        holder.depth += 1
+        return PooledConnection(self, holder)
+
+    def _leave(self, holder):
+        holder.depth -= 1
+        if holder.depth > 0:
+            return
+        owner, attr = self._slot()
+        if getattr(owner, attr, None) is holder:
+            setattr(owner, attr, None)
+        self.release(holder.conn, holder.generation)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """pool سراسری برنامه (بر اساس تنظیمات config.py ساخته می‌شود)"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool.from_config(get_config())
+    return _pool
+
+
+def configure_pool(db_path=None, **options):
+    """
+    جایگزینی pool سراسری (مثلاً برای تست‌ها یا مسیر دیتابیس دیگر).
+    اتصال‌های pool قبلی بسته می‌شوند.
+    """
+    global _pool
+    with _pool_lock:
+        old = _pool
+        cfg = get_config()
+        if db_path is None:
+            db_path = old.db_path if old else getattr(cfg, 'DATABASE_PATH', 'pump_management.db')
+        base = ConnectionPool.from_config(cfg)
+        params = {
+            'max_idle': base.max_idle,
+            'cache_size_kb': -base.pragmas['cache_size'],
+            'mmap_size': base.pragmas['mmap_size'],
+            'busy_timeout_ms': base.busy_timeout_ms,
+        }
+        params.update(options)
+        _pool = ConnectionPool(db_path, **params)
+    if old is not None:
+        old.drain()
+    return _pool
+
+
+def get_connection():
+    """گرفتن اتصال دیتابیس برای درخواست/thread جاری"""
+    return get_pool().lease()
+
+
+def _release_request_connection(exc=None):
+    holder = g.pop('_db_holder', None)
+    if holder is not None:
+        holder.pool.release(holder.conn, holder.generation)
+
+
+def init_app(app):
+    """ثبت آزادسازی خودکار اتصال در پایان هر app context"""
+    app.teardown_appcontext(_release_request_connection)
@@ -0,0 +1,237 @@
+# database/daily_hours.py
+"""
+جدول تجمیعی ساعات کارکرد روزانه (pump_daily_hours)
+
+برای هر پمپ و هر روز شمسی مدت روشن بودن و تعداد دفعات روشن/خاموش شدن از قبل
+محاسبه و ذخیره می‌شود تا گزارش‌ها به جای پیمایش pump_history چند صد ردیف بخوانند.
+
+قرارداد ذخیره‌سازی:
+- فقط روزهای بین اولین و آخرین رویداد هر پمپ پوشش داده می‌شوند و روزهای بدون
+  کارکرد و بدون رویداد (همه مقادیر صفر) ذخیره نمی‌شوند.
+- روزهای بعد از آخرین رویداد ذخیره نمی‌شوند؛ وضعیت آنها همان وضعیت آخرین
+  رویداد است و هنگام خواندن (get_daily_hours) محاسبه می‌شود. به همین دلیل
+  گذشت زمان نیازی به بروزرسانی جدول ندارد.
+
+هر تغییر در pump_history (ثبت وضعیت، واردسازی، حذف رکورد) باید داخل همان
+تراکنش refresh_pump_days را برای پمپ مربوطه صدا بزند.
+"""
+
+from datetime import timedelta
+
+from .models import get_db_connection
+from .operating_hours import (
+    SECONDS_PER_DAY, compute_daily_operating_seconds, jalali_days, parse_jalali_date
+)
+from utils.date_utils import gregorian_to_jalali
+
+REBUILD_CHUNK_DAYS = 92
+
+
+def _jalali_day(event_time):
+    return gregorian_to_jalali(str(event_time))[:10]
+
+
+def rollup_available(conn):
+    """آیا مهاجرت جدول pump_daily_hours روی این دیتابیس اعمال شده است؟"""
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'pump_daily_hours'"
+    ).fetchone() is not None
+
+
+def _store_rows(conn, pump_id, labels, buckets):
+    conn.executemany(
+        '''INSERT OR REPLACE INTO pump_daily_hours
+           (pump_id, jalali_date, seconds_on, on_count, off_count)
+           VALUES (?, ?, ?, ?, ?)''',
+        [
+            (pump_id, label, int(round(seconds)), on_count, off_count)
+            for label, (seconds, on_count, off_count) in zip(labels, buckets)
+            if seconds or on_count or off_count
+        ]
+    )
+
+
+def refresh_pump_days(conn, pump_id, since_time, until_time=None):
+    """
+    محاسبه مجدد روزهای متأثر از تغییر رویدادهای یک پمپ در بازه [since_time, until_time].
+
+    since_time / until_time زمان میلادی (YYYY-MM-DD HH:MM:SS) رویدادهای اضافه/حذف
+    شده هستند (until_time پیش‌فرض برابر since_time). روزهای متأثر از روز آخرین
+    رویداد قبل از since_time تا روز اولین رویداد بعد از until_time هستند (یا
+    تا آخرین رویداد پمپ اگر رویداد بعدی وجود نداشته باشد).
+
+    تابع commit نمی‌کند؛ فراخواننده باید آن را داخل تراکنش خودش صدا بزند.
+    """
+    if not rollup_available(conn):
+        return
+    since_time = str(since_time)
+    until_time = str(until_time) if until_time is not None else since_time
+
+    prev_event = conn.execute('''
+        SELECT event_time FROM pump_history
+        WHERE pump_id = ? AND event_time < ?
+        ORDER BY event_time DESC, id DESC LIMIT 1
+    ''', (pump_id, since_time)).fetchone()
+    next_event = conn.execute('''
+        SELECT event_time FROM pump_history
+        WHERE pump_id = ? AND event_time > ?
+        ORDER BY event_time, id LIMIT 1
+    ''', (pump_id, until_time)).fetchone()
+    last_event = conn.execute('''
+        SELECT MAX(event_time) AS event_time FROM pump_history WHERE pump_id = ?
+    ''', (pump_id,)).fetchone()
+
+    from_day = _jalali_day(prev_event[0] if prev_event else since_time)
+
+    if next_event:
+        to_day = _jalali_day(next_event[0])
+        conn.execute('''
+            DELETE FROM pump_daily_hours
+            WHERE pump_id = ? AND jalali_date BETWEEN ? AND ?
+        ''', (pump_id, from_day, to_day))
+    else:
+        # تغییر در انتهای تاریخچه: ردیف‌های بعد از آخرین رویداد جدید هم نامعتبرند
+        conn.execute(
+            'DELETE FROM pump_daily_hours WHERE pump_id = ? AND jalali_date >= ?',
+            (pump_id, from_day)
+        )
+        if not last_event or last_event[0] is None:
+            return
+        to_day = _jalali_day(last_event[0])
+        if to_day < from_day:
+            return
+
+    labels, per_pump = compute_daily_operating_seconds(from_day, to_day, [pump_id], conn)
+    _store_rows(conn, pump_id, labels, per_pump.get(pump_id, []))
+
+
+def rebuild_daily_hours(conn=None, verbose=False):
+    """
+    بازسازی کامل جدول از روی pump_history (برای پر کردن اولیه یا تعمیر).
+    محاسبه در بازه‌های چندماهه انجام می‌شود تا حافظه محدود بماند.
+    خروجی: تعداد ردیف‌های ذخیره‌شده
+    """
+    own_conn = conn is None
+    if own_conn:
+        conn = get_db_connection()
+
+    try:
+        first_time, last_time = conn.execute(
+            'SELECT MIN(event_time), MAX(event_time) FROM pump_history'
+        ).fetchone()
+        conn.execute('DELETE FROM pump_daily_hours')
+        if first_time is None:
+            if own_conn:
+                conn.commit()
+            return 0
+
+        last_day_by_pump = {
+            pump_id: _jalali_day(last)
+            for pump_id, last in conn.execute(
+                'SELECT pump_id, MAX(event_time) FROM pump_history GROUP BY pump_id'
+            )
+        }
+
+        chunk_start = parse_jalali_date(_jalali_day(first_time))
+        final_day = parse_jalali_date(_jalali_day(last_time))
+        while chunk_start <= final_day:
+            chunk_end = min(chunk_start + timedelta(days=REBUILD_CHUNK_DAYS - 1), final_day)
+            labels, per_pump = compute_daily_operating_seconds(
+                chunk_start, chunk_end, list(last_day_by_pump), conn
+            )
+            for pump_id, buckets in per_pump.items():
+                last_day = last_day_by_pump.get(pump_id)
+                if last_day is None:
+                    continue
+                keep = [i for i, label in enumerate(labels) if label <= last_day]
+                _store_rows(conn, pump_id, [labels[i] for i in keep], [buckets[i] for i in keep])
+            if verbose:
+                print(f"✅ {labels[0]} تا {labels[-1]} محاسبه شد")
+            chunk_start = chunk_end + timedelta(days=1)
+
+        count = conn.execute('SELECT COUNT(*) FROM pump_daily_hours').fetchone()[0]
+        if own_conn:
+            conn.commit()
+        return count
+    except Exception:
+        if own_conn:
+            conn.rollback()
+        raise
+    finally:
+        if own_conn:
+            conn.close()
+
+
+def get_daily_hours(from_jalali, to_jalali, pump_ids=None, conn=None):
+    """
+    خواندن ساعات کارکرد روزانه از جدول تجمیعی با همان خروجی
+    compute_daily_operating_seconds: (days, {pump_id: [[seconds_on, on_count, off_count], ...]})
+
+    روزهای بعد از آخرین رویداد هر پمپ از وضعیت آخرین رویداد پر می‌شوند.
+    اگر جدول هنوز ایجاد نشده باشد مستقیماً از pump_history محاسبه می‌شود.
+    """
+    own_conn = conn is None
+    if own_conn:
+        conn = get_db_connection()
+
+    try:
+        if not rollup_available(conn):
+            return compute_daily_operating_seconds(from_jalali, to_jalali, pump_ids, conn)
+
+        labels = [label for label, _ in jalali_days(from_jalali, to_jalali)]
+        index = {label: i for i, label in enumerate(labels)}
+
+        pump_filter = ''
+        params = []
+        if pump_ids is not None:
+            params = [int(p) for p in pump_ids]
+            if not params:
+                return labels, {}
+            pump_filter = f" AND p.id IN ({', '.join('?' * len(params))})"
+
+        last_events = conn.execute(f'''
+            SELECT p.id AS pump_id, ph.action, ph.event_time
+            FROM pumps p
+            LEFT JOIN pump_history ph ON ph.id = (
+                SELECT id FROM pump_history
+                WHERE pump_id = p.id
+                ORDER BY event_time DESC, id DESC LIMIT 1
+            )
+            WHERE 1 = 1{pump_filter}
+        ''', params).fetchall()
+
+        per_pump = {}
+        for pump_id, action, event_time in last_events:
+            buckets = [[0, 0, 0] for _ in labels]
+            per_pump[pump_id] = buckets
+            if event_time is None or (action or '').upper() != 'ON':
+                continue
+            last_day = _jalali_day(event_time)
+            for i, label in enumerate(labels):
+                if label > last_day:
+                    buckets[i][0] = SECONDS_PER_DAY
+
+        rows = conn.execute(f'''
+            SELECT d.pump_id, d.jalali_date, d.seconds_on, d.on_count, d.off_count
+            FROM pump_daily_hours d
+            JOIN pumps p ON p.id = d.pump_id
+            WHERE d.jalali_date BETWEEN ? AND ?{pump_filter}
+        ''', [labels[0], labels[-1]] + params).fetchall()
+        for pump_id, jalali_date, seconds_on, on_count, off_count in rows:
+            buckets = per_pump.get(pump_id)
+            if buckets is not None:
+                buckets[index[jalali_date]] = [seconds_on, on_count, off_count]
+
+        return labels, per_pump
+    finally:
+        if own_conn:
+            conn.close()
+
+
+def get_operating_hours(from_jalali, to_jalali, pump_ids=None, conn=None):
+    """جمع ساعات کارکرد هر پمپ در بازه از جدول تجمیعی: {pump_id: hours}"""
+    _, per_pump = get_daily_hours(from_jalali, to_jalali, pump_ids, conn)
+    return {
+        pump_id: round(sum(bucket[0] for bucket in buckets) / 3600, 2)
+        for pump_id, buckets in per_pump.items()
+    }
@@ -0,0 +1,235 @@
+# database/dashboard.py
+"""
+مدل خواندنی داشبورد
+
+همه داده‌های صفحه اصلی (پمپ‌ها، وضعیت چاه مرتبط، وجود تاریخچه و آمار کل
+ناوگان) با یک کوئری خوانده می‌شوند. وضعیت پمپ از pumps.status خوانده می‌شود که
+با هر تغییر در pump_history داخل همان تراکنش بروز می‌شود (refresh_current_status).
+
+نتیجه برای همه کاربران در حافظه پروسه کش می‌شود و تا وقتی نسخه ناوگان
+(fleet_revision) تغییر نکرده دوباره محاسبه نمی‌شود. وضعیت پمپ‌ها در چند نسخه
+اخیر هم نگه داشته می‌شود تا کلاینت‌ها فقط تغییرات نسبت به نسخه خود را بگیرند.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from .connection import get_pool
+from .fleet_revision import get_fleet_revision
+from .models import get_db_connection
+from utils.date_utils import gregorian_to_jalali
+
+_STAT_KEYS = ('on', 'off', 'maintenance', 'inactive', 'total')
+DELTA_HISTORY_SIZE = 64
+
+
+def get_dashboard_data(conn=None):
+    """
+    خروجی: {'pumps': [dict, ...], 'stats': {'on', 'off', 'maintenance', 'inactive', 'total'}}
+
+    پمپ بدون چاه مانند چاه فعال شمرده می‌شود. آمار با توابع پنجره‌ای در همان
+    کوئری محاسبه می‌شود.
+    """
+    own_conn = conn is None
+    if own_conn:
+        conn = get_db_connection()
+    try:
+        rows = conn.execute('''
+            WITH fleet AS (
+                SELECT p.id, p.pump_number, p.name, p.location, p.last_change,
+                       CASE WHEN p.status THEN 1 ELSE 0 END AS status,
+                       EXISTS (SELECT 1 FROM pump_history WHERE pump_id = p.id) AS has_history,
+                       w.id AS well_id,
+                       COALESCE(w.status, 'active') AS well_status
+                FROM pumps p
+                LEFT JOIN wells w ON w.id = (
+                    SELECT id FROM wells WHERE pump_id = p.id ORDER BY id LIMIT 1
+                )
+            )
+            SELECT fleet.*,
+                   SUM(well_status = 'active' AND status = 1) OVER () AS stat_on,
+                   SUM(well_status = 'active' AND status = 0) OVER () AS stat_off,
+                   SUM(well_status = 'maintenance') OVER () AS stat_maintenance,
+                   SUM(well_status = 'inactive') OVER () AS stat_inactive,
+                   COUNT(*) OVER () AS stat_total
+            FROM fleet
+            ORDER BY pump_number
+        ''').fetchall()
+    finally:
+        if own_conn:
+            conn.close()
+
+    stats = dict.fromkeys(_STAT_KEYS, 0)
+    if rows:
+        stats = {key: rows[0][f'stat_{key}'] for key in _STAT_KEYS}
+
+    pumps = []
+    for row in rows:
+        pumps.append({
+            'id': row['id'],
+            'pump_number': row['pump_number'],
+            'name': row['name'],
+            'location': row['location'],
+            'status': row['status'],
+            'has_history': row['has_history'],
+            'well_id': row['well_id'],
+            'well_status': row['well_status'],
+            'last_change_jalali': (
+                gregorian_to_jalali(row['last_change'])
+                if row['last_change'] else 'بدون تاریخچه'
+            ),
+        })
+    return {'pumps': pumps, 'stats': stats}
+
+
+class DashboardSnapshotCache:
+    """
+    کش snapshot داشبورد بر اساس (دیتابیس، نسل pool، نسخه ناوگان).
+
+    خواندن فقط نسخه ناوگان را از دیتابیس می‌خواند؛ اگر تغییری نکرده باشد همان
+    snapshot قبلی برگردانده می‌شود. محاسبه مجدد زیر قفل انجام می‌شود تا
+    درخواست‌های همزمان منتظر یک محاسبه بمانند و آن را با هم استفاده کنند.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._entry = (None, None)  # (key, snapshot)
+        self._history = OrderedDict()  # revision -> {pump_id: pump} برای محاسبه تغییرات
+        self._history_source = None
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _current_key(conn):
+        revision = get_fleet_revision(conn)
+        if revision is None:
+            return None
+        pool = get_pool()
+        return (pool.db_path, pool.generation, revision)
+
+    def _count(self, hit):
+        with self._stats_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self):
+        conn = get_db_connection()
+        try:
+            key = self._current_key(conn)
+            cached_key, snapshot = self._entry
+            if key is not None and key == cached_key:
+                self._count(hit=True)
+                return snapshot
+
+            with self._lock:
+                cached_key, snapshot = self._entry
+                if key is not None and key == cached_key:
+                    self._count(hit=True)
+                    return snapshot
+                self._count(hit=False)
+                snapshot = get_dashboard_data(conn)
+                snapshot['revision'] = key[2] if key else None
+                if key is not None:
+                    self._entry = (key, snapshot)
+                    self._remember(key, snapshot)
+                return snapshot
+        finally:
+            conn.close()
+
+    def _remember(self, key, snapshot):
+        # با عوض شدن دیتابیس یا بازگردانی بکاپ نسخه‌های قبلی قابل مقایسه نیستند
+        if self._history_source != key[:2]:
+            self._history_source = key[:2]
+            self._history.clear()
+        self._history[key[2]] = {pump['id']: pump for pump in snapshot['pumps']}
+        while len(self._history) > DELTA_HISTORY_SIZE:
+            self._history.popitem(last=False)
+
+    def changes_since(self, since):
+        """
+        تغییرات داشبورد نسبت به نسخه since:
+        {'revision', 'full', 'pumps': [پمپ‌های تغییرکرده], 'removed': [id], 'stats'}
+
+        اگر since نامعلوم یا خیلی قدیمی باشد full=True است و همه پمپ‌ها برگردانده می‌شوند.
+        """
+        snapshot = self.get()
+        revision = snapshot['revision']
+        with self._lock:
+            previous = self._history.get(since) if since is not None else None
+            current = self._history.get(revision)
+
+        if revision is not None and since == revision:
+            pumps, removed, full = [], [], False
+        elif previous is None or current is None:
+            pumps, removed, full = snapshot['pumps'], [], True
+        else:
+            pumps = [pump for pump in snapshot['pumps'] if previous.get(pump['id']) != pump]
+            removed = [pump_id for pump_id in previous if pump_id not in current]
+            full = False
+
+        return {
+            'revision': revision,
+            'full': full,
+            'pumps': pumps,
+            'removed': removed,
+            'stats': snapshot['stats'],
+        }
+
+    def invalidate(self):
+        self._entry = (None, None)
+
+    def stats(self):
+        with self._stats_lock:
+            hits, misses = self.hits, self.misses
+        cached_key = self._entry[0]
+        total = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': round(hits / total, 3) if total else 0.0,
+            'revision': cached_key[2] if cached_key else None,
+        }
+
+
+_snapshot_cache = DashboardSnapshotCache()
+
+
+def get_dashboard_snapshot():
+    """داده داشبورد از کش (همان ساختار get_dashboard_data به همراه revision)"""
+    return _snapshot_cache.get()
+
+
+def get_dashboard_cache_stats():
+    """شمارنده‌های hit/miss کش داشبورد برای صفحه مدیریت"""
+    return _snapshot_cache.stats()
+
+
+def get_dashboard_changes(since):
+    """تغییرات داشبورد نسبت به نسخه since (برای به‌روزرسانی زنده صفحه)"""
+    return _snapshot_cache.changes_since(since)
+
+
+def get_current_revision():
+    """نسخه فعلی ناوگان (یک کوئری سبک، بدون محاسبه داشبورد)"""
+    conn = get_db_connection()
+    try:
+        return get_fleet_revision(conn)
+    finally:
+        conn.close()
+
+
+def wait_for_revision_change(since, timeout, interval=0.5):
+    """
+    منتظر ماندن تا نسخه ناوگان با since فرق کند یا timeout ثانیه بگذرد.
+    خروجی: نسخه فعلی
+    """
+    deadline = time.monotonic() + timeout
+    revision = get_current_revision()
+    while revision == since and time.monotonic() < deadline:
+        time.sleep(min(interval, max(0.0, deadline - time.monotonic())))
+        revision = get_current_revision()
+    return revision
@@ -0,0 +1,563 @@
+# database/event_journal.py
+"""
+ژورنال رویدادهای پمپ: مسیر نوشتن سریع تغییر وضعیت
+
+هر تغییر وضعیت به جای خواندن و نوشتن جداگانه pumps و pump_history، فقط یک
+ردیف به جدول pump_event_journal اضافه می‌کند:
+
+- نویسنده گروهی (group commit): درخواست‌های هم‌زمان در یک thread پس‌زمینه
+  جمع می‌شوند (حداکثر EVENT_JOURNAL_BATCH_SIZE مورد یا EVENT_JOURNAL_MAX_DELAY
+  ثانیه)، با یک کوئری نسبت به وضعیت «پیش‌بینی‌شده» پمپ‌ها (pumps به اضافه
+  رویدادهای ادغام‌نشده ژورنال) بررسی و در یک تراکنش commit می‌شوند. فراخواننده
+  تا commit شدن ژورنال منتظر می‌ماند، پس «ثبت شد» یعنی ماندگار شد.
+- ادغام‌کننده (compactor): یک thread دیگر رویدادهای ژورنال را به ترتیب دسته‌ای
+  به pump_history منتقل می‌کند و در همان تراکنش pumps، جدول تجمیعی روزانه و
+  نسخه ناوگان را بروز می‌کند؛ ردیف‌های ادغام‌شده از ژورنال حذف می‌شوند.
+- خواندن نوشته‌های خود (read-your-writes): شناسه آخرین رویداد هر اپراتور در
+  session (یا برای اسکریپت‌ها در thread) نگه داشته می‌شود و catch_up() قبل از هر
+  درخواست، اگر آن رویداد هنوز ادغام نشده باشد، ادغام را همان‌جا انجام می‌دهد.
+  بقیه کاربران تغییر را حداکثر بعد از EVENT_JOURNAL_COMPACT_DELAY ثانیه می‌بینند.
+  رویدادی که هنگام ادغام رد شود با flash به همان اپراتور نشان داده می‌شود.
+- کدهایی که pump_history را مستقیم تغییر می‌دهند پیش از بررسی‌هایشان
+  fold_pending_events را داخل تراکنش خود صدا می‌زنند.
+
+رویدادهای باقی‌مانده از اجرای قبلی برنامه با اولین نوشتن یا catch_up ادغام می‌شوند.
+"""
+
+import json
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime
+
+from flask import flash, has_request_context, session
+
+from config import get_config
+from .connection import get_pool
+from .daily_hours import refresh_pump_days
+from .fleet_revision import bump_fleet_revision
+from .pump_status import refresh_current_status
+from utils.date_utils import gregorian_to_jalali
+
+logger = logging.getLogger(__name__)
+
+_thread_slot = threading.local()
+_compact_lock = threading.Lock()
+_writer_lock = threading.Lock()
+_compactor_lock = threading.Lock()
+
+# رد شده‌ها (برای بررسی) این مدت در ژورنال می‌مانند
+REJECTED_RETENTION = '-7 days'
+
+
+def _setting(name, default):
+    return getattr(get_config(), name, default)
+
+
+class _JournalConnection:
+    """اتصال جداگانه از pool (نه اجاره thread جاری)، مثل database.jobs"""
+
+    def __init__(self):
+        self.pool = get_pool()
+
+    def __enter__(self):
+        self.conn, self.generation = self.pool.acquire()
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.pool.release(self.conn, self.generation)
+
+
+INVALID_TIME_ERROR = 'زمان نامعتبر است'
+
+
+def _valid_event_time(value):
+    """آیا value زمان میلادی معتبر با قالب YYYY-MM-DD HH:MM:SS است؟"""
+    try:
+        datetime.strptime(value, '%Y-%m-%d %H:%M:%S')
+    except (TypeError, ValueError):
+        return False
+    return True
+
+
+def _format_error(state, entry):
+    """پیام خطای اعتبارسنجی یک رویداد، یا None اگر معتبر باشد"""
+    if state is None:
+        return 'پمپ پیدا نشد'
+    if entry['action'] not in ('ON', 'OFF'):
+        return 'عملیات نامعتبر است'
+    if not _valid_event_time(entry.get('event_time')):
+        return INVALID_TIME_ERROR
+    new_status = entry['action'] == 'ON'
+    if state['status'] == new_status and state['last_event_time']:
+        return f'پمپ در حال حاضر {"روشن" if state["status"] else "خاموش"} است'
+    if state['well_status'] and state['well_status'] != 'active':
+        return f'امکان تغییر وضعیت وجود ندارد. چاه در حالت "{state["well_status"]}" است.'
+    if entry.get('manual_time') and state['last_event_time'] \
+            and entry['event_time'] <= state['last_event_time']:
+        last_event_jalali = gregorian_to_jalali(state['last_event_time'])
+        return f'تاریخ انتخاب شده باید بعد از آخرین ثبت ({last_event_jalali[:16]}) باشد'
+    return None
+
+
+def load_projected_state(conn, pump_ids):
+    """
+    وضعیت فعلی پمپ‌ها با احتساب رویدادهای ادغام‌نشده ژورنال، با یک کوئری.
+    خروجی: {pump_id: {'status', 'last_event_time', 'well_status'}}؛ پمپ ناموجود در خروجی نیست
+    """
+    ids = sorted({int(p) for p in pump_ids})
+    if not ids:
+        return {}
+    rows = conn.execute('''
+        SELECT p.id, p.status,
+               (SELECT w.status FROM wells w WHERE w.pump_id = p.id LIMIT 1) AS well_status,
+               (SELECT MAX(event_time) FROM pump_history WHERE pump_id = p.id) AS history_time,
+               j.action AS pending_action,
+               j.event_time AS pending_time
+        FROM pumps p
+        LEFT JOIN pump_event_journal j ON j.id = (
+            SELECT id FROM pump_event_journal
+            WHERE pump_id = p.id AND status = 'pending'
+            ORDER BY event_time DESC, id DESC LIMIT 1
+        )
+        WHERE p.id IN (SELECT value FROM json_each(?))
+    ''', (json.dumps(ids),)).fetchall()
+    state = {}
+    for row in rows:
+        times = [t for t in (row['history_time'], row['pending_time']) if t]
+        # رویداد ادغام‌نشده‌ای که (مثلاً از PLC) دیر رسیده و قبل از آخرین رویداد
+        # تاریخچه است وضعیت فعلی را تعیین نمی‌کند
+        if row['pending_action'] and (not row['history_time'] or row['pending_time'] >= row['history_time']):
+            status = row['pending_action'] == 'ON'
+        else:
+            status = bool(row['status'])
+        state[row['id']] = {
+            'status': status,
+            'last_event_time': max(times) if times else None,
+            'well_status': row['well_status'],
+        }
+    return state
+
+
+def validate_events(conn, entries, state=None):
+    """
+    بررسی ترتیبی رویدادها نسبت به وضعیت پیش‌بینی‌شده پمپ‌ها.
+    هر رویداد معتبر روی وضعیت رویداد بعدی همان پمپ اثر می‌گذارد.
+    خروجی: لیست پیام خطا (None برای رویداد معتبر) به ترتیب ورودی
+    """
+    if state is None:
+        state = load_projected_state(conn, [e['pump_id'] for e in entries])
+    errors = []
+    for entry in entries:
+        current = state.get(entry['pump_id'])
+        error = _format_error(current, entry)
+        errors.append(error)
+        if error is None:
+            current['status'] = entry['action'] == 'ON'
+            if not current['last_event_time'] or entry['event_time'] > current['last_event_time']:
+                current['last_event_time'] = entry['event_time']
+    return errors
+
+
+_INSERT_JOURNAL = '''
+    INSERT INTO pump_event_journal
+    (pump_id, user_id, action, event_time, recorded_time, reason, notes, manual_time, source)
+    VALUES (:pump_id, :user_id, :action, :event_time, :recorded_time, :reason, :notes, :manual_time, :source)
+'''
+_JOURNAL_DEFAULTS = {'user_id': None, 'reason': None, 'notes': None, 'manual_time': False, 'source': 'manual'}
+
+
+def insert_events(conn, entries):
+    """
+    افزودن رویدادها به ژورنال بدون بررسی وضعیت (مثلاً داده PLC که ترتیبش ممکن
+    است به هم ریخته باشد)، داخل تراکنش جاری. رویدادها در ادغام در جای درست
+    تاریخچه قرار می‌گیرند و pumps.status از آخرین رویداد هر پمپ محاسبه می‌شود.
+    """
+    conn.executemany(_INSERT_JOURNAL, [{**_JOURNAL_DEFAULTS, **entry} for entry in entries])
+
+
+# خطای موارد معتبر یک دسته اتمی که مورد دیگری از آن رد شده
+NOT_APPLIED_ERROR = 'به دلیل خطای سایر موارد این دسته ثبت نشد'
+
+
+def write_events(conn, entries, atomic=False, state=None):
+    """
+    بررسی و افزودن رویدادها به ژورنال داخل تراکنش جاری (commit نمی‌کند).
+
+    atomic: اگر یکی از رویدادها رد شود هیچ‌کدام ثبت نمی‌شوند.
+    state: وضعیت پیش‌بینی‌شده مشترک بین چند فراخوانی (load_projected_state)؛
+    رویدادهای ثبت‌شده روی آن اعمال می‌شوند.
+    خروجی: برای هر رویداد {'success': True, 'journal_id'} یا {'success': False, 'error'}
+    """
+    if state is None:
+        state = load_projected_state(conn, [e['pump_id'] for e in entries])
+    before = {e['pump_id']: dict(state[e['pump_id']]) for e in entries if e['pump_id'] in state}
+    errors = validate_events(conn, entries, state)
+    if atomic and any(errors):
+        state.update(before)
+        return [{'success': False, 'error': error or NOT_APPLIED_ERROR} for error in errors]
+
+    results = []
+    for entry, error in zip(entries, errors):
+        if error:
+            results.append({'success': False, 'error': error})
+            continue
+        cur = conn.execute(_INSERT_JOURNAL, {**_JOURNAL_DEFAULTS, **entry})
+        results.append({'success': True, 'journal_id': cur.lastrowid})
+    return results
+
+
+class JournalWriter:
+    """thread نویسنده گروهی ژورنال"""
+
+    def __init__(self, batch_size=200, max_delay=0.005):
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='event-journal-writer', daemon=True)
+        self._thread.start()
+
+    def submit(self, entries, atomic=False):
+        """افزودن رویدادها و انتظار تا commit شدن آنها"""
+        future = Future()
+        self._queue.put((entries, atomic, future))
+        return future.result()
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        size = len(batch[0][0])
+        deadline = time.monotonic() + self.max_delay
+        while size < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(item)
+            size += len(item[0])
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            journal = _JournalConnection()
+            try:
+                with journal as conn:
+                    conn.execute('BEGIN IMMEDIATE')
+                    try:
+                        state = load_projected_state(
+                            conn, [e['pump_id'] for entries, _, _ in batch for e in entries])
+                        results = [write_events(conn, entries, atomic, state)
+                                   for entries, atomic, _ in batch]
+                        conn.commit()
+                    except BaseException:
+                        conn.rollback()
+                        raise
+            except Exception as e:
+                for _, _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, _, future), result in zip(batch, results):
+                future.set_result(result)
+            if any(r['success'] for result in results for r in result):
+                _get_compactor().poke(journal.pool)
+
+
+class JournalCompactor:
+    """thread ادغام‌کننده؛ بعد از هر نوشتن با کمی تأخیر ژورنال را ادغام می‌کند"""
+
+    def __init__(self, delay=0.5):
+        self.delay = delay
+        self._wake = threading.Event()
+        self._pool = None
+        self._thread = threading.Thread(target=self._run, name='event-journal-compactor', daemon=True)
+        self._thread.start()
+
+    def poke(self, pool):
+        self._pool = pool
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            time.sleep(self.delay)
+            self._wake.clear()
+            # ژورنال متعلق به همان دیتابیسی است که در آن نوشته شده
+            if self._pool is not get_pool():
+                continue
+            try:
+                limit = _setting('EVENT_JOURNAL_COMPACT_BATCH', 5000)
+                while sum(compact_journal(limit).values()) >= limit:
+                    pass
+            except Exception:
+                logger.exception('event journal compaction failed')
+
+
+_writer = None
+_compactor = None
+
+
+def _get_writer():
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = JournalWriter(
+                    batch_size=_setting('EVENT_JOURNAL_BATCH_SIZE', 200),
+                    max_delay=_setting('EVENT_JOURNAL_MAX_DELAY', 0.005),
+                )
+                # رویدادهای باقی‌مانده از اجرای قبلی
+                _get_compactor().poke(get_pool())
+    return _writer
+
+
+def _get_compactor():
+    global _compactor
+    if _compactor is None:
+        with _compactor_lock:
+            if _compactor is None:
+                _compactor = JournalCompactor(delay=_setting('EVENT_JOURNAL_COMPACT_DELAY', 0.5))
+    return _compactor
+
+
+def schedule_compaction():
+    """درخواست ادغام پس‌زمینه (برای نویسنده‌هایی که مستقیم insert_events را صدا می‌زنند)"""
+    _get_compactor().poke(get_pool())
+
+
+def append_events(entries, atomic=False):
+    """
+    ثبت رویدادها در ژورنال از طریق نویسنده گروهی.
+
+    entries: لیست dict با pump_id، action ('ON'/'OFF')، event_time و recorded_time
+    (میلادی YYYY-MM-DD HH:MM:SS) و اختیاری user_id، reason، notes، manual_time، source.
+    atomic: همه یا هیچ (مانند write_events).
+    نباید داخل تراکنش نوشتنی باز همین thread صدا زده شود.
+    خروجی: لیست نتیجه به ترتیب ورودی (مانند write_events)
+    """
+    if not entries:
+        return []
+    return _get_writer().submit(list(entries), atomic)
+
+
+def _apply_to_history(conn, rows, spans):
+    """درج رویدادها در pump_history و بروزرسانی جدول روزانه و وضعیت پمپ‌های spans"""
+    conn.executemany('''
+        INSERT INTO pump_history
+        (pump_id, user_id, action, event_time, recorded_time, reason, notes, manual_time)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ''', [(r['pump_id'], r['user_id'], r['action'], r['event_time'], r['recorded_time'],
+           r['reason'], r['notes'], r['manual_time']) for r in rows])
+    for pump_id, (first, last) in spans.items():
+        refresh_pump_days(conn, pump_id, first, last)
+    refresh_current_status(conn, spans)
+
+
+def _compact_batch(conn, limit):
+    """
+    ادغام حداکثر limit رویداد در انتظار (به ترتیب ثبت) داخل تراکنش نوشتنی جاری conn.
+
+    رویدادی که قابل ادغام نیست (زمان نامعتبر، یا خطای ادغام پمپ آن) رد می‌شود و
+    بقیه دسته را متوقف نمی‌کند؛ در غیر این صورت یک ردیف خراب کل ژورنال را نگه می‌داشت.
+    خروجی: (تعداد ادغام‌شده، لیست (خطا، شناسه) رد شده‌ها)
+    """
+    rows = conn.execute('''
+        SELECT * FROM pump_event_journal WHERE status = 'pending' ORDER BY id LIMIT ?
+    ''', (limit,)).fetchall()
+    if not rows:
+        return 0, []
+
+    pump_ids = sorted({row['pump_id'] for row in rows})
+    last_time = dict(conn.execute('''
+        SELECT j.value, (SELECT MAX(event_time) FROM pump_history WHERE pump_id = j.value)
+        FROM json_each(?) j
+    ''', (json.dumps(pump_ids),)).fetchall())
+
+    by_pump, rejected = {}, []
+    for row in rows:
+        if not _valid_event_time(row['event_time']):
+            rejected.append((INVALID_TIME_ERROR, row['id']))
+            continue
+        previous = last_time.get(row['pump_id'])
+        if row['manual_time'] and previous and row['event_time'] <= previous:
+            error = f'تاریخ باید بعد از آخرین ثبت ({gregorian_to_jalali(previous)[:16]}) باشد'
+            rejected.append((error, row['id']))
+            continue
+        by_pump.setdefault(row['pump_id'], []).append(row)
+        if not previous or row['event_time'] > previous:
+            last_time[row['pump_id']] = row['event_time']
+
+    def span(pump_rows):
+        times = [r['event_time'] for r in pump_rows]
+        return min(times), max(times)
+
+    applied = [row for pump_rows in by_pump.values() for row in pump_rows]
+    conn.execute('SAVEPOINT compact_batch')
+    try:
+        _apply_to_history(conn, applied, {p: span(r) for p, r in by_pump.items()})
+        conn.execute('RELEASE compact_batch')
+    except sqlite3.OperationalError:
+        # قفل/دیسک: خطای گذرا، کل دسته بعداً دوباره امتحان می‌شود
+        raise
+    except Exception:
+        # یک پمپ خطا دارد: پمپ به پمپ دوباره، و رد کردن فقط رویدادهای همان پمپ
+        conn.execute('ROLLBACK TO compact_batch')
+        conn.execute('RELEASE compact_batch')
+        applied = []
+        for pump_id, pump_rows in by_pump.items():
+            conn.execute('SAVEPOINT compact_pump')
+            try:
+                _apply_to_history(conn, pump_rows, {pump_id: span(pump_rows)})
+                conn.execute('RELEASE compact_pump')
+            except sqlite3.OperationalError:
+                raise
+            except Exception as e:
+                conn.execute('ROLLBACK TO compact_pump')
+                conn.execute('RELEASE compact_pump')
+                logger.exception('event journal: pump %s could not be compacted', pump_id)
+                rejected.extend((f'خطا در ادغام: {e}', r['id']) for r in pump_rows)
+                continue
+            applied.extend(pump_rows)
+
+    if applied:
+        bump_fleet_revision(conn)
+    conn.executemany('DELETE FROM pump_event_journal WHERE id = ?', [(r['id'],) for r in applied])
+    conn.executemany('''
+        UPDATE pump_event_journal SET status = 'rejected', error = ? WHERE id = ?
+    ''', rejected)
+    return len(applied), rejected
+
+
+def _log_rejected(rejected):
+    for error, journal_id in rejected:
+        logger.warning('event journal entry %s rejected: %s', journal_id, error)
+
+
+def compact_journal(limit=None):
+    """
+    ادغام رویدادهای ژورنال (به ترتیب ثبت) در pump_history و pumps در یک تراکنش.
+
+    رویداد دستی که زمانش دیگر بعد از آخرین رویداد ثبت‌شده پمپ نیست رد و با پیام
+    خطا در ژورنال نگه داشته می‌شود (catch_up آن را به ثبت‌کننده نشان می‌دهد).
+    خروجی: {'applied': n, 'rejected': m}
+    """
+    limit = limit or _setting('EVENT_JOURNAL_COMPACT_BATCH', 5000)
+    with _compact_lock, _JournalConnection() as conn:
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            applied, rejected = _compact_batch(conn, limit)
+            if not applied and not rejected:
+                conn.rollback()
+                return {'applied': 0, 'rejected': 0}
+            conn.execute('''
+                DELETE FROM pump_event_journal
+                WHERE status = 'rejected' AND created_at < datetime('now', ?)
+            ''', (REJECTED_RETENTION,))
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+
+    _log_rejected(rejected)
+    return {'applied': applied, 'rejected': len(rejected)}
+
+
+def fold_pending_events(conn):
+    """
+    ادغام همه رویدادهای در انتظار ژورنال داخل تراکنش جاری conn.
+
+    کدی که pump_history را مستقیم تغییر می‌دهد (واردسازی تاریخچه، حذف رکورد) باید
+    پیش از بررسی و نوشتن این تابع را صدا بزند: بررسی‌هایش رویدادهای ثبت‌شده ولی
+    ادغام‌نشده را هم می‌بیند و ادغام‌کننده بعداً آنها را رد نمی‌کند. قفل نوشتن
+    دیتابیس همین‌جا گرفته می‌شود، پس تا پایان تراکنش رویداد تازه‌ای به ژورنال
+    اضافه نمی‌شود. commit نمی‌کند.
+    خروجی: {'applied': n, 'rejected': m}
+    """
+    # نوشتن بی‌اثر فقط برای گرفتن قفل نوشتن (تراکنش را در صورت نیاز شروع می‌کند)
+    conn.execute('UPDATE pump_event_journal SET status = status WHERE 0')
+    limit = _setting('EVENT_JOURNAL_COMPACT_BATCH', 5000)
+    totals = {'applied': 0, 'rejected': 0}
+    while True:
+        applied, rejected = _compact_batch(conn, limit)
+        if not applied and not rejected:
+            return totals
+        _log_rejected(rejected)
+        totals['applied'] += applied
+        totals['rejected'] += len(rejected)
+
+
+def has_pending_event_since(conn, pump_id, event_time):
+    """آیا رویداد ادغام‌نشده‌ای برای پمپ در زمان event_time یا بعد از آن در ژورنال هست؟ (فقط خواندن)"""
+    return conn.execute('''
+        SELECT 1 FROM pump_event_journal
+        WHERE pump_id = ? AND status = 'pending' AND event_time >= ?
+        LIMIT 1
+    ''', (pump_id, event_time)).fetchone() is not None
+
+
+def pending_through(journal_id):
+    """آیا رویداد ادغام‌نشده‌ای با شناسه کوچک‌تر یا مساوی journal_id وجود دارد؟"""
+    with _JournalConnection() as conn:
+        row = conn.execute('''
+            SELECT 1 FROM pump_event_journal WHERE status = 'pending' AND id <= ? LIMIT 1
+        ''', (journal_id,)).fetchone()
+    return row is not None
+
+
+def note_own_write(journal_id):
+    """ثبت آخرین رویداد کاربر جاری (session) یا thread جاری برای catch_up"""
+    if has_request_context():
+        session['journal_seq'] = max(session.get('journal_seq') or 0, journal_id)
+    else:
+        _thread_slot.seq = max(getattr(_thread_slot, 'seq', 0), journal_id)
+
+
+def catch_up():
+    """ادغام فوری ژورنال اگر آخرین رویداد ثبت‌شده کاربر/thread جاری هنوز ادغام نشده باشد"""
+    if has_request_context():
+        journal_id = session.get('journal_seq')
+    else:
+        journal_id = getattr(_thread_slot, 'seq', None)
+    if not journal_id:
+        return
+    try:
+        while pending_through(journal_id):
+            compact_journal()
+    except Exception:
+        # صفحه با داده کمی قدیمی‌تر نمایش داده می‌شود؛ ادغام پس‌زمینه دوباره تلاش می‌کند
+        logger.exception('event journal catch-up failed')
+        return
+    if has_request_context():
+        _flash_rejected(journal_id)
+        session.pop('journal_seq', None)
+    else:
+        _thread_slot.seq = 0
+
+
+def _flash_rejected(journal_id):
+    """نمایش رویدادهای رد‌شده کاربر جاری (تا journal_id) که هنوز به او گفته نشده‌اند"""
+    notified = session.get('journal_notified') or 0
+    user_id = session.get('user_id')
+    if user_id is None or journal_id <= notified:
+        return
+    with _JournalConnection() as conn:
+        rows = conn.execute('''
+            SELECT j.action, j.event_time, j.error, p.pump_number
+            FROM pump_event_journal j LEFT JOIN pumps p ON p.id = j.pump_id
+            WHERE j.status = 'rejected' AND j.user_id = ? AND j.id > ? AND j.id <= ?
+            ORDER BY j.id
+        ''', (user_id, notified, journal_id)).fetchall()
+    for row in rows:
+        flash(f"ثبت {row['action']} پمپ {row['pump_number']} در "
+              f"{gregorian_to_jalali(row['event_time'])[:16]} انجام نشد: {row['error']}", 'error')
+    session['journal_notified'] = journal_id
+
+
+def init_app(app):
+    """ثبت catch_up قبل از هر درخواست (خواندن نوشته‌های خود اپراتور)"""
+    app.before_request(catch_up)
@@ -0,0 +1,37 @@
+# database/fleet_revision.py
+"""
+شمارنده یکنواخت نسخه وضعیت ناوگان
+
+هر نوشتنی که داده داشبورد (وضعیت پمپ‌ها، تاریخچه، مشخصات و وضعیت چاه‌ها) را
+تغییر می‌دهد باید داخل همان تراکنش bump_fleet_revision را صدا بزند. چون شمارنده
+در خود دیتابیس است، با rollback تراکنش برمی‌گردد و بین چند پروسه هم معتبر است.
+کش‌ها با مقایسه نسخه فعلی با نسخه ذخیره‌شده اعتبار خود را بررسی می‌کنند.
+"""
+
+import sqlite3
+
+
+def _table_exists(conn):
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'fleet_revision'"
+    ).fetchone() is not None
+
+
+def bump_fleet_revision(conn):
+    """
+    افزایش نسخه ناوگان داخل تراکنش جاری (commit نمی‌کند).
+    خروجی: نسخه جدید، یا None اگر مهاجرت 017 هنوز اعمال نشده باشد
+    """
+    if not _table_exists(conn):
+        return None
+    conn.execute('UPDATE fleet_revision SET revision = revision + 1 WHERE id = 1')
+    return get_fleet_revision(conn)
+
+
+def get_fleet_revision(conn):
+    """نسخه فعلی ناوگان، یا None اگر جدول وجود نداشته باشد"""
+    try:
+        row = conn.execute('SELECT revision FROM fleet_revision WHERE id = 1').fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return row[0] if row else None
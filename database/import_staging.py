@@ -0,0 +1,135 @@
+# database/import_staging.py
+"""
+جدول‌های مرحله پیش‌نمایش واردسازی چاه‌ها (import_uploads / import_staged_wells)
+
+پیش‌نمایش فایل را یک بار بررسی و ردیف‌های معتبر را همراه با نتیجه dry-run
+(insert یا update) اینجا ذخیره می‌کند؛ مرحله اعمال به جای خواندن و بررسی دوباره
+فایل از همین ردیف‌ها استفاده می‌کند. آپلود با hash فایل هم قابل جستجوست تا
+پیش‌نمایش دوباره همان فایل از نتیجه قبلی استفاده کند.
+"""
+
+import json
+
+# آپلودهای اعمال‌نشده قدیمی‌تر از این (ساعت) پاک می‌شوند
+STAGED_UPLOAD_RETENTION_HOURS = 24
+
+
+def wells_signature(conn):
+    """
+    امضای مجموعه شناسه چاه‌ها؛ نتیجه dry-run (insert/update) فقط به همین بستگی
+    دارد و با تغییر امضا باید دوباره محاسبه شود.
+    """
+    row = conn.execute('SELECT COUNT(*), COALESCE(MAX(id), 0), COALESCE(SUM(id), 0) FROM wells').fetchone()
+    return f'{row[0]}:{row[1]}:{row[2]}'
+
+
+def create_staged_upload(conn, upload_id, file_hash, upload_path, user_id, max_wells):
+    conn.execute('''
+        INSERT INTO import_uploads (id, file_hash, upload_path, user_id, max_wells)
+        VALUES (?, ?, ?, ?, ?)
+    ''', (upload_id, file_hash, upload_path, user_id, max_wells))
+
+
+def stage_well_rows(conn, upload_id, rows):
+    """
+    افزودن ردیف‌های معتبر یک تکه؛ برای شماره چاه تکراری ردیف آخر فایل برنده است
+    (همان نتیجه‌ای که اعمال ردیف به ردیف داشت).
+    """
+    conn.executemany('''
+        INSERT OR REPLACE INTO import_staged_wells
+        (upload_id, well_number, row_number, well_name, well_location, total_depth, pump_number)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', [
+        (upload_id, row['well_number'], row['row_number'], row['well_name'],
+         row['well_location'], row['total_depth'], row['pump_number'])
+        for row in rows
+    ])
+
+
+def finish_staged_upload(conn, upload_id, total_rows, valid_rows, errors):
+    conn.execute('''
+        UPDATE import_uploads SET total_rows = ?, valid_rows = ?, errors = ?
+        WHERE id = ?
+    ''', (total_rows, valid_rows, json.dumps(errors, ensure_ascii=False), upload_id))
+    compute_staged_diff(conn, upload_id)
+
+
+def compute_staged_diff(conn, upload_id):
+    """محاسبه insert/update همه ردیف‌ها با یک UPDATE و ثبت امضای فعلی چاه‌ها"""
+    conn.execute('''
+        UPDATE import_staged_wells
+        SET action = CASE WHEN EXISTS (SELECT 1 FROM wells w WHERE w.id = import_staged_wells.well_number)
+                          THEN 'update' ELSE 'insert' END
+        WHERE upload_id = ?
+    ''', (upload_id,))
+    conn.execute('UPDATE import_uploads SET wells_signature = ? WHERE id = ?',
+                 (wells_signature(conn), upload_id))
+
+
+def get_staged_upload(conn, upload_id):
+    """
+    آپلود ذخیره‌شده با خلاصه، خطاها و شمارش dry-run، یا None.
+    اگر چاه‌ها از زمان پیش‌نمایش تغییر کرده باشند dry-run دوباره محاسبه می‌شود
+    (commit با فراخواننده).
+    """
+    row = conn.execute('SELECT * FROM import_uploads WHERE id = ?', (upload_id,)).fetchone()
+    if row is None:
+        return None
+    upload = dict(row)
+    upload['errors'] = json.loads(upload['errors']) if upload['errors'] else []
+    if upload['applied_at'] is None and upload['wells_signature'] != wells_signature(conn):
+        compute_staged_diff(conn, upload_id)
+    counts = dict(conn.execute('''
+        SELECT action, COUNT(*) FROM import_staged_wells
+        WHERE upload_id = ? GROUP BY action
+    ''', (upload_id,)).fetchall())
+    upload['insert_count'] = counts.get('insert', 0)
+    upload['update_count'] = counts.get('update', 0)
+    return upload
+
+
+def find_staged_upload(conn, file_hash, max_wells):
+    """شناسه آخرین آپلود اعمال‌نشده با همین محتوا، یا None"""
+    row = conn.execute('''
+        SELECT id FROM import_uploads
+        WHERE file_hash = ? AND max_wells = ? AND applied_at IS NULL
+        ORDER BY created_at DESC LIMIT 1
+    ''', (file_hash, max_wells)).fetchone()
+    return row['id'] if row else None
+
+
+def iter_staged_wells(conn, upload_id, limit=None):
+    """ردیف‌های ذخیره‌شده به ترتیب فایل"""
+    query = '''
+        SELECT well_number, row_number, well_name, well_location, total_depth, pump_number, action
+        FROM import_staged_wells
+        WHERE upload_id = ?
+        ORDER BY row_number
+    '''
+    params = [upload_id]
+    if limit is not None:
+        query += ' LIMIT ?'
+        params.append(limit)
+    return [dict(row) for row in conn.execute(query, params)]
+
+
+def mark_upload_applied(conn, upload_id):
+    """ثبت زمان اعمال و حذف ردیف‌های موقت (خلاصه آپلود برای سابقه باقی می‌ماند)"""
+    conn.execute('UPDATE import_uploads SET applied_at = CURRENT_TIMESTAMP WHERE id = ?', (upload_id,))
+    conn.execute('DELETE FROM import_staged_wells WHERE upload_id = ?', (upload_id,))
+
+
+def purge_staged_uploads(conn, older_than_hours=STAGED_UPLOAD_RETENTION_HOURS):
+    """
+    حذف آپلودهای اعمال‌نشده قدیمی و ردیف‌هایشان.
+    خروجی: مسیر فایل‌های آپلود آنها (حذف فایل‌ها با فراخواننده است)
+    """
+    cutoff = f'-{float(older_than_hours)} hours'
+    rows = conn.execute('''
+        SELECT id, upload_path FROM import_uploads
+        WHERE applied_at IS NULL AND created_at < datetime('now', ?)
+    ''', (cutoff,)).fetchall()
+    for row in rows:
+        conn.execute('DELETE FROM import_staged_wells WHERE upload_id = ?', (row['id'],))
+        conn.execute('DELETE FROM import_uploads WHERE id = ?', (row['id'],))
+    return [row['upload_path'] for row in rows]
@@ -0,0 +1,178 @@
+# database/ingest.py
+"""
+دریافت رویدادهای پمپ از دستگاه‌ها (PLC/SCADA)
+
+هر دستگاه یک توکن دارد (فقط هش SHA-256 آن ذخیره می‌شود) که به یک کاربر متصل
+است؛ رویدادهای دستگاه به نام همان کاربر در تاریخچه ثبت می‌شوند.
+
+هر درخواست در یک تراکنش کوتاه فقط به ژورنال رویدادها اضافه می‌شود
+(database/event_journal.py)؛ ادغام‌کننده ژورنال رویدادها را به صورت دسته‌ای،
+حتی اگر دیر یا بی‌ترتیب رسیده باشند، در جای درست تاریخچه قرار می‌دهد و
+pumps.status را از آخرین رویداد هر پمپ محاسبه می‌کند.
+
+تکرار ارسال: رویدادی با کلید (key) تکراری برای همان توکن، یا رویدادی که عیناً
+(پمپ، زمان، عملیات) در تاریخچه یا ژورنال هست، دوباره ثبت نمی‌شود.
+"""
+
+import hashlib
+import json
+import secrets
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from config import get_config
+from .connection import get_pool
+from .event_journal import insert_events, schedule_compaction
+
+INGEST_SOURCE_PREFIX = 'plc:'
+
+
+def _hash_token(token):
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+
+@contextmanager
+def _ingest_connection():
+    pool = get_pool()
+    conn, generation = pool.acquire()
+    try:
+        yield conn
+    finally:
+        pool.release(conn, generation)
+
+
+def create_ingest_token(name, user_id):
+    """
+    ساخت توکن جدید برای یک دستگاه/سامانه.
+    خروجی: خود توکن (فقط همین یک بار قابل مشاهده است)
+    """
+    token = secrets.token_urlsafe(32)
+    with _ingest_connection() as conn:
+        conn.execute(
+            'INSERT INTO ingest_tokens (name, token_hash, user_id) VALUES (?, ?, ?)',
+            (name, _hash_token(token), user_id)
+        )
+        conn.commit()
+    return token
+
+
+def revoke_ingest_token(name):
+    """باطل کردن توکن؛ خروجی: True اگر توکن فعالی با این نام بود"""
+    with _ingest_connection() as conn:
+        cur = conn.execute(
+            'UPDATE ingest_tokens SET revoked_at = CURRENT_TIMESTAMP WHERE name = ? AND revoked_at IS NULL',
+            (name,)
+        )
+        conn.commit()
+    return cur.rowcount > 0
+
+
+def list_ingest_tokens():
+    with _ingest_connection() as conn:
+        return [dict(row) for row in conn.execute('''
+            SELECT t.id, t.name, u.username, t.created_at, t.last_used_at, t.revoked_at
+            FROM ingest_tokens t LEFT JOIN users u ON u.id = t.user_id
+            ORDER BY t.id
+        ''')]
+
+
+def authenticate_ingest_token(token):
+    """توکن فعال متناظر (dict با id، name و user_id)، یا None"""
+    if not token:
+        return None
+    with _ingest_connection() as conn:
+        row = conn.execute('''
+            SELECT id, name, user_id FROM ingest_tokens
+            WHERE token_hash = ? AND revoked_at IS NULL
+        ''', (_hash_token(token),)).fetchone()
+    return dict(row) if row else None
+
+
+def ingest_events(token, events):
+    """
+    ثبت رویدادهای تجزیه‌شده یک درخواست (خروجی utils.ingest_parser) در ژورنال.
+
+    token: خروجی authenticate_ingest_token
+    خروجی: {'accepted', 'duplicates', 'rejected': [{'line', 'key', 'error'}]}
+    """
+    cfg = get_config()
+    now = datetime.now()
+    recorded_time = now.strftime('%Y-%m-%d %H:%M:%S')
+    latest_allowed = (now + timedelta(seconds=getattr(cfg, 'INGEST_MAX_FUTURE_SECONDS', 300))) \
+        .strftime('%Y-%m-%d %H:%M:%S')
+    key_cutoff = (now - timedelta(days=getattr(cfg, 'INGEST_KEY_RETENTION_DAYS', 7))) \
+        .strftime('%Y-%m-%d %H:%M:%S')
+
+    accepted, new_keys, rejected = [], [], []
+    duplicates = 0
+    with _ingest_connection() as conn:
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            keys = [e['key'] for e in events if e['key']]
+            seen_keys = {row[0] for row in conn.execute('''
+                SELECT key FROM ingest_keys
+                WHERE token_id = ? AND key IN (SELECT value FROM json_each(?))
+            ''', (token['id'], json.dumps(keys)))} if keys else set()
+            known_pumps = {row[0] for row in conn.execute(
+                'SELECT id FROM pumps WHERE id IN (SELECT value FROM json_each(?))',
+                (json.dumps(sorted({e['pump_id'] for e in events})),)
+            )}
+            # رویدادهایی که عیناً ثبت شده‌اند (ارسال دوباره بدون کلید)
+            recorded = {tuple(row) for row in conn.execute('''
+                SELECT json_extract(e.value, '$[0]'), json_extract(e.value, '$[1]'), json_extract(e.value, '$[2]')
+                FROM json_each(?) e
+                WHERE EXISTS (
+                    SELECT 1 FROM pump_history h
+                    WHERE h.pump_id = json_extract(e.value, '$[0]')
+                      AND h.event_time = json_extract(e.value, '$[1]')
+                      AND h.action = json_extract(e.value, '$[2]')
+                ) OR EXISTS (
+                    SELECT 1 FROM pump_event_journal j
+                    WHERE j.pump_id = json_extract(e.value, '$[0]')
+                      AND j.event_time = json_extract(e.value, '$[1]')
+                      AND j.action = json_extract(e.value, '$[2]')
+                      AND j.status = 'pending'
+                )
+            ''', (json.dumps([[e['pump_id'], e['event_time'], e['action']] for e in events]),))}
+
+            for event in events:
+                identity = (event['pump_id'], event['event_time'], event['action'])
+                if event['key'] and event['key'] in seen_keys or identity in recorded:
+                    duplicates += 1
+                    continue
+                if event['pump_id'] not in known_pumps:
+                    error = 'unknown pump_id'
+                elif event['event_time'] > latest_allowed:
+                    error = 'time is in the future'
+                else:
+                    error = None
+                if error:
+                    rejected.append({'line': event['line'], 'key': event['key'], 'error': error})
+                    continue
+                recorded.add(identity)
+                if event['key']:
+                    seen_keys.add(event['key'])
+                    new_keys.append((token['id'], event['key'], recorded_time))
+                accepted.append({
+                    'pump_id': event['pump_id'],
+                    'user_id': token['user_id'],
+                    'action': event['action'],
+                    'event_time': event['event_time'],
+                    'recorded_time': recorded_time,
+                    'reason': event.get('reason') or 'PLC',
+                    'notes': event.get('notes') or '',
+                    'source': INGEST_SOURCE_PREFIX + token['name'],
+                })
+
+            insert_events(conn, accepted)
+            conn.executemany('INSERT INTO ingest_keys (token_id, key, created_at) VALUES (?, ?, ?)', new_keys)
+            conn.execute('DELETE FROM ingest_keys WHERE created_at < ?', (key_cutoff,))
+            conn.execute('UPDATE ingest_tokens SET last_used_at = ? WHERE id = ?', (recorded_time, token['id']))
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+
+    if accepted:
+        schedule_compaction()
+    return {'accepted': len(accepted), 'duplicates': duplicates, 'rejected': rejected}
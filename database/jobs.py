@@ -0,0 +1,146 @@
+# database/jobs.py
+"""
+جدول کارهای پس‌زمینه (jobs)
+
+هر کار یک ردیف با وضعیت queued → running → succeeded/failed دارد؛ پیشرفت،
+نتیجه (JSON) و فایل خروجی آن هم همین‌جا ثبت می‌شود تا درخواست‌های بعدی (و
+پروسه‌های دیگر) بتوانند وضعیت را بخوانند.
+
+نوشتن روی این جدول همیشه با یک اتصال جداگانه از pool انجام می‌شود، نه اجاره
+thread جاری؛ در غیر این صورت commit گزارش پیشرفت، تراکنش نیمه‌کاره خود کار
+(مثلاً یک واردسازی) را هم commit می‌کرد.
+"""
+
+import json
+from contextlib import contextmanager
+from uuid import uuid4
+
+from .connection import get_pool
+
+JOB_STATUSES = ('queued', 'running', 'succeeded', 'failed')
+
+
+@contextmanager
+def _job_connection():
+    pool = get_pool()
+    conn, generation = pool.acquire()
+    try:
+        yield conn
+    finally:
+        pool.release(conn, generation)
+
+
+def _decode(row):
+    if row is None:
+        return None
+    job = dict(row)
+    for key in ('params', 'result'):
+        job[key] = json.loads(job[key]) if job[key] else None
+    return job
+
+
+def create_job(kind, params=None, user_id=None):
+    """ثبت کار جدید در وضعیت queued؛ خروجی: شناسه کار"""
+    job_id = uuid4().hex
+    with _job_connection() as conn:
+        conn.execute(
+            'INSERT INTO jobs (id, kind, user_id, params) VALUES (?, ?, ?, ?)',
+            (job_id, kind, user_id, json.dumps(params or {}, ensure_ascii=False))
+        )
+        conn.commit()
+    return job_id
+
+
+def get_job(job_id):
+    """یک کار (params و result به صورت dict)، یا None"""
+    with _job_connection() as conn:
+        return _decode(conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone())
+
+
+def list_jobs(user_id=None, limit=20):
+    """آخرین کارها (همه کاربران یا فقط یک کاربر)"""
+    query = 'SELECT * FROM jobs'
+    params = []
+    if user_id is not None:
+        query += ' WHERE user_id = ?'
+        params.append(user_id)
+    query += ' ORDER BY created_at DESC, rowid DESC LIMIT ?'
+    params.append(limit)
+    with _job_connection() as conn:
+        return [_decode(row) for row in conn.execute(query, params)]
+
+
+def mark_job_running(job_id):
+    with _job_connection() as conn:
+        conn.execute(
+            "UPDATE jobs SET status = 'running', started_at = CURRENT_TIMESTAMP WHERE id = ?",
+            (job_id,)
+        )
+        conn.commit()
+
+
+def update_job_progress(job_id, done, total=None, message=None):
+    """ثبت پیشرفت (total و message اگر None باشند تغییر نمی‌کنند)"""
+    with _job_connection() as conn:
+        conn.execute('''
+            UPDATE jobs SET progress_done = ?,
+                            progress_total = COALESCE(?, progress_total),
+                            message = COALESCE(?, message)
+            WHERE id = ?
+        ''', (int(done), total, message, job_id))
+        conn.commit()
+
+
+def finish_job(job_id, result=None, artifact=None):
+    """
+    پایان موفق کار. artifact: اختیاری، (مسیر فایل، نام دانلود، mimetype)
+    """
+    path, name, mimetype = artifact or (None, None, None)
+    with _job_connection() as conn:
+        conn.execute('''
+            UPDATE jobs SET status = 'succeeded', finished_at = CURRENT_TIMESTAMP,
+                            progress_done = COALESCE(progress_total, progress_done),
+                            result = ?, artifact_path = ?, artifact_name = ?, artifact_mimetype = ?
+            WHERE id = ?
+        ''', (json.dumps(result, ensure_ascii=False) if result is not None else None,
+              path, name, mimetype, job_id))
+        conn.commit()
+
+
+def fail_job(job_id, error):
+    with _job_connection() as conn:
+        conn.execute('''
+            UPDATE jobs SET status = 'failed', finished_at = CURRENT_TIMESTAMP, error = ?
+            WHERE id = ?
+        ''', (str(error), job_id))
+        conn.commit()
+
+
+def fail_interrupted_jobs(reason='کار با راه‌اندازی مجدد برنامه متوقف شد'):
+    """
+    کارهای queued/running به‌جامانده از اجرای قبلی برنامه را failed می‌کند
+    (صف در حافظه است و بعد از راه‌اندازی مجدد ادامه پیدا نمی‌کنند).
+    """
+    with _job_connection() as conn:
+        cur = conn.execute('''
+            UPDATE jobs SET status = 'failed', finished_at = CURRENT_TIMESTAMP, error = ?
+            WHERE status IN ('queued', 'running')
+        ''', (reason,))
+        conn.commit()
+        return cur.rowcount
+
+
+def purge_jobs(older_than_hours):
+    """
+    حذف کارهای تمام‌شده قدیمی‌تر از older_than_hours ساعت.
+    خروجی: مسیر فایل‌های خروجی آنها (حذف فایل‌ها با فراخواننده است)
+    """
+    cutoff = f'-{float(older_than_hours)} hours'
+    with _job_connection() as conn:
+        rows = conn.execute('''
+            SELECT id, artifact_path FROM jobs
+            WHERE status IN ('succeeded', 'failed') AND finished_at < datetime('now', ?)
+        ''', (cutoff,)).fetchall()
+        conn.executemany('DELETE FROM jobs WHERE id = ?', [(row['id'],) for row in rows])
+        conn.commit()
+    return [row['artifact_path'] for row in rows if row['artifact_path']]
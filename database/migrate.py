@@ -0,0 +1,135 @@
+# database/migrate.py
+"""
+اجرای مهاجرت‌های نسخه‌دار اسکیمای دیتابیس
+
+هر فایل در database/migrations با الگوی NNN_description.py یک مهاجرت است و
+یک تابع upgrade(conn) دارد. نسخه‌های اعمال‌شده در جدول schema_migrations ثبت
+می‌شوند و هر مهاجرت فقط یک بار، داخل یک تراکنش، اجرا می‌شود.
+
+اجرا از خط فرمان:
+    python -m database.migrate            # اعمال مهاجرت‌های باقی‌مانده
+    python -m database.migrate --status   # فقط نمایش وضعیت
+"""
+
+import importlib.util
+import re
+import sys
+from pathlib import Path
+
+MIGRATIONS_DIR = Path(__file__).resolve().parent / 'migrations'
+_FILENAME_RE = re.compile(r'^(\d{3,})_(\w+)\.py$')
+
+
+def discover_migrations():
+    """لیست مهاجرت‌های موجود به صورت (version, name, path) و به ترتیب نسخه"""
+    found = []
+    for path in MIGRATIONS_DIR.glob('*.py'):
+        match = _FILENAME_RE.match(path.name)
+        if match:
+            found.append((int(match.group(1)), match.group(2), path))
+    found.sort(key=lambda m: m[0])
+
+    versions = [m[0] for m in found]
+    if len(versions) != len(set(versions)):
+        raise RuntimeError(f'شماره نسخه تکراری در {MIGRATIONS_DIR}')
+    return found
+
+
+def _load_upgrade(version, path):
+    spec = importlib.util.spec_from_file_location(f'database.migrations.m{version:03d}', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    if not hasattr(module, 'upgrade'):
+        raise RuntimeError(f'مهاجرت {path.name} تابع upgrade(conn) ندارد')
+    return module.upgrade
+
+
+def ensure_migrations_table(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.commit()
+
+
+def get_applied_versions(conn):
+    ensure_migrations_table(conn)
+    return {row[0] for row in conn.execute('SELECT version FROM schema_migrations')}
+
+
+def pending_migrations(conn):
+    """مهاجرت‌هایی که هنوز روی این دیتابیس اعمال نشده‌اند"""
+    applied = get_applied_versions(conn)
+    return [m for m in discover_migrations() if m[0] not in applied]
+
+
+def apply_migrations(conn=None, verbose=True):
+    """
+    اعمال همه مهاجرت‌های باقی‌مانده به ترتیب نسخه.
+    اگر conn داده نشود از connection pool برنامه استفاده می‌شود.
+    خروجی: لیست نسخه‌های اعمال‌شده
+    """
+    own_conn = conn is None
+    if own_conn:
+        from .models import get_db_connection
+        conn = get_db_connection()
+
+    applied_now = []
+    try:
+        if conn.in_transaction:
+            conn.commit()
+        for version, name, path in pending_migrations(conn):
+            upgrade = _load_upgrade(version, path)
+            conn.execute('BEGIN')
+            try:
+                upgrade(conn)
+                conn.execute(
+                    'INSERT INTO schema_migrations (version, name) VALUES (?, ?)',
+                    (version, name)
+                )
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+            applied_now.append(version)
+            if verbose:
+                print(f"✅ مهاجرت {version:03d}_{name} اعمال شد")
+        return applied_now
+    finally:
+        if own_conn:
+            conn.close()
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    from .models import get_db_connection
+
+    conn = get_db_connection()
+    try:
+        has_schema = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'pump_history'"
+        ).fetchone()
+        if not has_schema:
+            print("❌ اسکیمای پایه وجود ندارد. ابتدا create_database.py را اجرا کنید.")
+            return 1
+
+        if '--status' in argv:
+            applied = get_applied_versions(conn)
+            for version, name, _ in discover_migrations():
+                mark = '✅' if version in applied else '⏳'
+                print(f"{mark} {version:03d}_{name}")
+            return 0
+
+        applied = apply_migrations(conn)
+        if not applied:
+            print("ℹ️ دیتابیس به‌روز است؛ مهاجرتی برای اعمال وجود ندارد")
+        return 0
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
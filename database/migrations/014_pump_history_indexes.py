@@ -0,0 +1,41 @@
+"""
+Migration برای ایندکس‌های مسیرهای پرتکرار (pump_history، wells_history، deletion_logs)
+Version: 014
+"""
+
+
+def upgrade(conn):
+    """ایجاد ایندکس‌های ترکیبی برای کوئری‌های آخرین رویداد، بازه زمانی و گزارش‌ها"""
+    # آخرین رویداد / رویدادهای بازه برای یک پمپ:
+    # WHERE pump_id = ? ORDER BY event_time, id  — ستون action هم اضافه شده تا
+    # کوئری‌های وضعیت (last_action) بدون مراجعه به جدول از خود ایندکس جواب بگیرند.
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_pump_history_pump_time
+        ON pump_history (pump_id, event_time, id, action)
+    ''')
+
+    # گزارش تاریخچه کامل برای همه پمپ‌ها (فیلتر بازه روی event_time)
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_pump_history_event_time
+        ON pump_history (event_time, id)
+    ''')
+
+    # تاریخچه عملیات یک چاه: WHERE well_id = ? ORDER BY operation_date DESC, id DESC
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_wells_history_well_date
+        ON wells_history (well_id, operation_date, id)
+    ''')
+
+    # صفحه لاگ‌های حذف و الارم ۲۴ ساعت گذشته
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_deletion_logs_deleted_at
+        ON deletion_logs (deleted_at)
+    ''')
+
+    # اتصال چاه به پمپ (داشبورد و بررسی وضعیت چاه هنگام تغییر وضعیت پمپ)
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_wells_pump_id
+        ON wells (pump_id)
+    ''')
+
+    conn.execute('ANALYZE')
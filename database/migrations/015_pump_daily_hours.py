@@ -0,0 +1,94 @@
+"""
+Migration برای جدول تجمیعی ساعات کارکرد روزانه پمپ‌ها
+Version: 015
+"""
+
+from datetime import datetime, timedelta
+
+import jdatetime
+
+# منطق پر کردن اولیه در همین فایل ثابت نگه داشته می‌شود تا تغییر
+# database/daily_hours.py رفتار این مهاجرت را (روی دیتابیس جدید یا بکاپ قدیمی) عوض نکند
+
+
+def _day_label(day):
+    return jdatetime.date.fromgregorian(date=day).strftime('%Y/%m/%d')
+
+
+def _add_on_interval(buckets, start, end):
+    """افزودن بازه روشن [start, end) به روزهای میلادی (مرز روز شمسی و میلادی یکی است)"""
+    while start < end:
+        midnight = datetime(start.year, start.month, start.day) + timedelta(days=1)
+        chunk_end = min(end, midnight)
+        buckets.setdefault(start.date(), [0.0, 0, 0])[0] += (chunk_end - start).total_seconds()
+        start = chunk_end
+
+
+def _store_pump(conn, pump_id, buckets):
+    conn.executemany(
+        '''INSERT OR REPLACE INTO pump_daily_hours
+           (pump_id, jalali_date, seconds_on, on_count, off_count)
+           VALUES (?, ?, ?, ?, ?)''',
+        [
+            (pump_id, _day_label(day), int(round(seconds)), on_count, off_count)
+            for day, (seconds, on_count, off_count) in sorted(buckets.items())
+            if seconds or on_count or off_count
+        ]
+    )
+
+
+def _backfill(conn):
+    """
+    پر کردن جدول از pump_history: برای هر پمپ روزهای اولین تا آخرین رویداد؛ روز
+    آخرین رویداد اگر پمپ روشن مانده تا پایان همان روز حساب می‌شود.
+    """
+    conn.execute('DELETE FROM pump_daily_hours')
+    pump_id, buckets, is_on, cursor = None, None, False, None
+
+    def close_pump():
+        if pump_id is not None:
+            if is_on:
+                _add_on_interval(buckets, cursor, datetime(cursor.year, cursor.month, cursor.day) + timedelta(days=1))
+            _store_pump(conn, pump_id, buckets)
+
+    rows = conn.execute('''
+        SELECT pump_id, action, event_time FROM pump_history
+        ORDER BY pump_id, event_time, id
+    ''')
+    for row_pump, action, event_time in rows:
+        if row_pump != pump_id:
+            close_pump()
+            pump_id, buckets, is_on, cursor = row_pump, {}, False, None
+        at = datetime.fromisoformat(str(event_time))
+        if is_on:
+            _add_on_interval(buckets, cursor, at)
+        bucket = buckets.setdefault(at.date(), [0.0, 0, 0])
+        if (action or '').upper() == 'ON':
+            bucket[1] += 1
+            is_on = True
+        else:
+            bucket[2] += 1
+            is_on = False
+        cursor = at
+    close_pump()
+
+
+def upgrade(conn):
+    """ایجاد جدول pump_daily_hours و پر کردن آن از روی pump_history موجود"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS pump_daily_hours (
+            pump_id INTEGER NOT NULL,
+            jalali_date TEXT NOT NULL,
+            seconds_on INTEGER NOT NULL DEFAULT 0,
+            on_count INTEGER NOT NULL DEFAULT 0,
+            off_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (pump_id, jalali_date)
+        ) WITHOUT ROWID
+    ''')
+    # گزارش‌های کل ناوگان بر اساس بازه تاریخ
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_pump_daily_hours_date
+        ON pump_daily_hours (jalali_date)
+    ''')
+
+    _backfill(conn)
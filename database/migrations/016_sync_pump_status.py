@@ -0,0 +1,25 @@
+"""
+Migration برای همگام‌سازی یک‌باره وضعیت فعلی پمپ‌ها
+Version: 016
+
+از این نسخه به بعد pumps.status فقط برای پمپ‌های متأثر از هر تغییر بروز می‌شود
+و داشبورد مستقیماً آن را می‌خواند؛ داده‌های قدیمی یک بار با تاریخچه همگام می‌شوند.
+SQL در همین فایل ثابت است (مستقل از database/pump_status.py).
+"""
+
+
+def upgrade(conn):
+    """status و last_change هر پمپ از آخرین رویدادش؛ پمپ بدون رویداد خاموش می‌شود"""
+    conn.execute('''
+        UPDATE pumps SET
+            status = COALESCE((
+                SELECT CASE WHEN UPPER(action) = 'ON' THEN 1 ELSE 0 END FROM pump_history
+                WHERE pump_id = pumps.id
+                ORDER BY event_time DESC, id DESC LIMIT 1
+            ), 0),
+            last_change = COALESCE((
+                SELECT event_time FROM pump_history
+                WHERE pump_id = pumps.id
+                ORDER BY event_time DESC, id DESC LIMIT 1
+            ), last_change, CURRENT_TIMESTAMP)
+    ''')
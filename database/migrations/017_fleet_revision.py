@@ -0,0 +1,15 @@
+"""
+Migration برای شمارنده نسخه وضعیت ناوگان (fleet revision)
+Version: 017
+"""
+
+
+def upgrade(conn):
+    """جدول تک‌ردیفی fleet_revision که هر نوشتن روی پمپ‌ها/چاه‌ها آن را یک واحد افزایش می‌دهد"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS fleet_revision (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            revision INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    conn.execute('INSERT OR IGNORE INTO fleet_revision (id, revision) VALUES (1, 0)')
@@ -0,0 +1,32 @@
+"""
+Migration برای صف کارهای پس‌زمینه (خروجی‌های سنگین و واردسازی‌ها)
+Version: 018
+"""
+
+
+def upgrade(conn):
+    """جدول jobs: وضعیت، پیشرفت، نتیجه و فایل خروجی هر کار پس‌زمینه"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            kind TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'queued'
+                CHECK (status IN ('queued', 'running', 'succeeded', 'failed')),
+            user_id INTEGER,
+            params TEXT,
+            progress_done INTEGER NOT NULL DEFAULT 0,
+            progress_total INTEGER,
+            message TEXT,
+            result TEXT,
+            error TEXT,
+            artifact_path TEXT,
+            artifact_name TEXT,
+            artifact_mimetype TEXT,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            started_at DATETIME,
+            finished_at DATETIME,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_jobs_user ON jobs (user_id, created_at)')
@@ -0,0 +1,43 @@
+"""
+Migration برای مرحله پیش‌نمایش (dry-run) واردسازی چاه‌ها از اکسل
+Version: 019
+"""
+
+
+def upgrade(conn):
+    """
+    import_uploads: یک ردیف برای هر فایل بررسی‌شده (شناسه آپلود، hash فایل، خلاصه و خطاها)
+    import_staged_wells: ردیف‌های معتبر و نرمال‌شده همان فایل به‌همراه نتیجه dry-run
+    (insert یا update) که مرحله اعمال مستقیماً از آن می‌خواند.
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS import_uploads (
+            id TEXT PRIMARY KEY,
+            file_hash TEXT NOT NULL,
+            upload_path TEXT NOT NULL,
+            user_id INTEGER,
+            max_wells INTEGER NOT NULL,
+            total_rows INTEGER NOT NULL DEFAULT 0,
+            valid_rows INTEGER NOT NULL DEFAULT 0,
+            errors TEXT,
+            wells_signature TEXT,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            applied_at DATETIME,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_import_uploads_hash ON import_uploads (file_hash, max_wells)')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS import_staged_wells (
+            upload_id TEXT NOT NULL,
+            well_number INTEGER NOT NULL,
+            row_number INTEGER NOT NULL,
+            well_name TEXT NOT NULL,
+            well_location TEXT,
+            total_depth TEXT,
+            pump_number INTEGER NOT NULL,
+            action TEXT CHECK (action IN ('insert', 'update')),
+            PRIMARY KEY (upload_id, well_number),
+            FOREIGN KEY (upload_id) REFERENCES import_uploads (id)
+        )
+    ''')
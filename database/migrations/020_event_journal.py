@@ -0,0 +1,30 @@
+"""
+Migration برای ژورنال رویدادهای پمپ (مسیر نوشتن گروهی تغییر وضعیت)
+Version: 020
+"""
+
+
+def upgrade(conn):
+    """جدول pump_event_journal: تغییر وضعیت‌های ثبت‌شده که هنوز در pump_history ادغام نشده‌اند"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS pump_event_journal (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            pump_id INTEGER NOT NULL,
+            user_id INTEGER,
+            action TEXT NOT NULL CHECK (action IN ('ON', 'OFF')),
+            event_time DATETIME NOT NULL,
+            recorded_time DATETIME NOT NULL,
+            reason TEXT,
+            notes TEXT,
+            manual_time BOOLEAN NOT NULL DEFAULT 0,
+            source TEXT NOT NULL DEFAULT 'manual',
+            status TEXT NOT NULL DEFAULT 'pending' CHECK (status IN ('pending', 'rejected')),
+            error TEXT,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_event_journal_pending
+        ON pump_event_journal (pump_id, id) WHERE status = 'pending'
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_event_journal_status ON pump_event_journal (status, id)')
@@ -0,0 +1,29 @@
+"""
+Migration برای API دریافت رویداد از PLC/SCADA
+Version: 021
+"""
+
+
+def upgrade(conn):
+    """توکن‌های دسترسی دستگاه‌ها و کلیدهای یکتایی (idempotency) رویدادهای دریافتی"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS ingest_tokens (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE,
+            token_hash TEXT NOT NULL UNIQUE,
+            user_id INTEGER NOT NULL,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            last_used_at DATETIME,
+            revoked_at DATETIME,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS ingest_keys (
+            token_id INTEGER NOT NULL,
+            key TEXT NOT NULL,
+            created_at DATETIME NOT NULL,
+            PRIMARY KEY (token_id, key)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_ingest_keys_created ON ingest_keys (created_at)')
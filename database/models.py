@@ -1,11 +1,9 @@
-import sqlite3
 from datetime import datetime
+from .connection import get_connection
 
 def get_db_connection():
-    """ایجاد اتصال به دیتابیس"""
-    conn = sqlite3.connect('pump_management.db')
-    conn.row_factory = sqlite3.Row
-    return conn
+    """گرفتن اتصال دیتابیس از connection pool (close() اتصال را به pool برمی‌گرداند)"""
+    return get_connection()
 
 def get_pump_by_id(pump_id):
     """دریافت اطلاعات یک پمپ بر اساس ID"""
@@ -22,13 +20,22 @@ def get_all_pumps():
                (SELECT action FROM pump_history 
                 WHERE pump_id = p.id 
                 ORDER BY event_time DESC, id DESC LIMIT 1) as last_action,
-               (SELECT COUNT(*) FROM pump_history WHERE pump_id = p.id) as has_history
+               EXISTS (SELECT 1 FROM pump_history WHERE pump_id = p.id) as has_history
         FROM pumps p 
         ORDER BY p.pump_number
     ''').fetchall()
     conn.close()
     return pumps
 
+def get_pump_choices():
+    """لیست سبک پمپ‌ها (شناسه، شماره، نام) برای فیلترها و لیست‌های انتخاب"""
+    conn = get_db_connection()
+    pumps = conn.execute(
+        'SELECT id, pump_number, name FROM pumps ORDER BY pump_number'
+    ).fetchall()
+    conn.close()
+    return pumps
+
 def get_user_by_credentials(username, password):
     """احراز هویت کاربر"""
     # Backwards-compatible helper: check hashed password
@@ -0,0 +1,194 @@
+# database/operating_hours.py
+"""
+موتور محاسبه ساعات کارکرد پمپ‌ها
+
+به جای محاسبه جداگانه هر روز برای هر پمپ (دو کوئری برای هر روز/پمپ)، همه
+رویدادهای بازه برای همه پمپ‌ها با یک کوئری مرتب خوانده می‌شوند، وضعیت هر پمپ
+قبل از شروع بازه با یک کوئری دیگر به دست می‌آید و سپس رویدادها یک بار پیمایش
+می‌شوند تا مدت روشن بودن هر پمپ در هر روز (شمسی) محاسبه شود.
+"""
+
+from bisect import bisect_right
+from datetime import datetime, timedelta
+
+import jdatetime
+
+from .models import get_db_connection
+from utils.date_utils import gregorian_to_jalali_many
+
+SECONDS_PER_DAY = 24 * 3600
+_EPOCH = datetime(1970, 1, 1)
+
+
+def parse_jalali_date(date_jalali):
+    """تبدیل رشته YYYY/MM/DD شمسی به jdatetime.date (در صورت نامعتبر بودن ValueError)"""
+    try:
+        year, month, day = map(int, str(date_jalali).strip().split('/'))
+        return jdatetime.date(year, month, day)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f'تاریخ شمسی نامعتبر: {date_jalali}') from e
+
+
+def jalali_month_bounds(month_jalali):
+    """اولین و آخرین روز یک ماه شمسی (ورودی YYYY/MM)"""
+    try:
+        year, month = map(int, str(month_jalali).strip().split('/'))
+        first = jdatetime.date(year, month, 1)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f'ماه شمسی نامعتبر: {month_jalali}') from e
+
+    if month == 12:
+        next_first = jdatetime.date(year + 1, 1, 1)
+    else:
+        next_first = jdatetime.date(year, month + 1, 1)
+    return first, next_first - timedelta(days=1)
+
+
+def jalali_days(from_jalali, to_jalali):
+    """
+    لیست روزهای بازه (شامل دو سر) به صورت (برچسب شمسی، شروع روز میلادی).
+    مرز روزهای شمسی و میلادی یکی است (نیمه‌شب)، فقط برچسب‌ها فرق دارند.
+    """
+    start = parse_jalali_date(from_jalali) if not isinstance(from_jalali, jdatetime.date) else from_jalali
+    end = parse_jalali_date(to_jalali) if not isinstance(to_jalali, jdatetime.date) else to_jalali
+    if end < start:
+        raise ValueError('تاریخ پایان قبل از تاریخ شروع است')
+
+    first_gregorian = start.togregorian()
+    count = (end.togregorian() - first_gregorian).days + 1
+    first_day = datetime(first_gregorian.year, first_gregorian.month, first_gregorian.day)
+    starts = [first_day + timedelta(days=offset) for offset in range(count)]
+    return list(zip(gregorian_to_jalali_many(starts, include_time=False), starts))
+
+
+def _to_seconds(value):
+    """تبدیل زمان رویداد (رشته یا datetime) به ثانیه نسبت به مبدأ ثابت"""
+    if not isinstance(value, datetime):
+        value = datetime.fromisoformat(str(value))
+    return (value - _EPOCH).total_seconds()
+
+
+def _fmt(dt):
+    return dt.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def compute_daily_operating_seconds(from_jalali, to_jalali, pump_ids=None, conn=None):
+    """
+    محاسبه مدت روشن بودن هر پمپ در هر روز شمسی بازه [from_jalali, to_jalali].
+
+    خروجی: (days, per_pump)
+      days: لیست برچسب روزهای شمسی به ترتیب
+      per_pump: {pump_id: [[seconds_on, on_count, off_count], ...]} هم‌طول با days
+
+    فقط دو کوئری اجرا می‌شود: وضعیت هر پمپ درست قبل از شروع بازه، و همه
+    رویدادهای داخل بازه به ترتیب (pump_id, event_time, id).
+    """
+    days = jalali_days(from_jalali, to_jalali)
+    labels = [label for label, _ in days]
+    boundaries = [_to_seconds(start) for _, start in days]
+    boundaries.append(boundaries[-1] + SECONDS_PER_DAY)
+    window_start, window_end = days[0][1], days[-1][1] + timedelta(days=1)
+
+    own_conn = conn is None
+    if own_conn:
+        conn = get_db_connection()
+
+    try:
+        pump_filter = ''
+        params = []
+        if pump_ids is not None:
+            pump_ids = [int(p) for p in pump_ids]
+            if not pump_ids:
+                return labels, {}
+            pump_filter = f" AND {{col}} IN ({', '.join('?' * len(pump_ids))})"
+            params = pump_ids
+
+        # وضعیت هر پمپ قبل از شروع بازه (با ایندکس pump_id, event_time, id)
+        initial_rows = conn.execute(f'''
+            SELECT p.id AS pump_id,
+                   (SELECT ph.action FROM pump_history ph
+                    WHERE ph.pump_id = p.id AND ph.event_time < ?
+                    ORDER BY ph.event_time DESC, ph.id DESC LIMIT 1) AS action
+            FROM pumps p
+            WHERE 1 = 1{pump_filter.format(col='p.id')}
+        ''', [_fmt(window_start)] + params).fetchall()
+
+        events = conn.execute(f'''
+            SELECT pump_id, action, event_time
+            FROM pump_history
+            WHERE event_time >= ? AND event_time < ?{pump_filter.format(col='pump_id')}
+            ORDER BY pump_id, event_time, id
+        ''', [_fmt(window_start), _fmt(window_end)] + params).fetchall()
+    finally:
+        if own_conn:
+            conn.close()
+
+    day_count = len(labels)
+    window_end_s = boundaries[-1]
+    per_pump = {}
+    state_on = {}
+    for pump_id, action in initial_rows:
+        per_pump[pump_id] = [[0, 0, 0] for _ in range(day_count)]
+        state_on[pump_id] = (action or '').upper() == 'ON'
+
+    def add_on_interval(buckets, start_s, end_s):
+        idx = bisect_right(boundaries, start_s) - 1
+        while start_s < end_s and idx < day_count:
+            chunk_end = min(end_s, boundaries[idx + 1])
+            buckets[idx][0] += chunk_end - start_s
+            start_s = chunk_end
+            idx += 1
+
+    current_pump = None
+    buckets = None
+    is_on = False
+    cursor = boundaries[0]
+
+    def close_pump():
+        if current_pump is not None and is_on:
+            add_on_interval(buckets, cursor, window_end_s)
+
+    for pump_id, action, event_time in events:
+        if pump_id != current_pump:
+            close_pump()
+            current_pump = pump_id
+            if pump_id not in per_pump:
+                # رویداد برای پمپی که در جدول pumps نیست؛ با وضعیت خاموش شروع می‌شود
+                per_pump[pump_id] = [[0, 0, 0] for _ in range(day_count)]
+                state_on[pump_id] = False
+            buckets = per_pump[pump_id]
+            is_on = state_on[pump_id]
+            cursor = boundaries[0]
+
+        at = _to_seconds(event_time)
+        if is_on:
+            add_on_interval(buckets, cursor, at)
+
+        day_idx = bisect_right(boundaries, at) - 1
+        if (action or '').upper() == 'ON':
+            buckets[day_idx][1] += 1
+            is_on = True
+        else:
+            buckets[day_idx][2] += 1
+            is_on = False
+        cursor = at
+        state_on[pump_id] = is_on
+    close_pump()
+
+    # پمپ‌هایی که در بازه رویدادی ندارند: وضعیت قبل از بازه برای کل بازه برقرار است
+    seen = {row[0] for row in events}
+    for pump_id, on in state_on.items():
+        if on and pump_id not in seen:
+            for bucket in per_pump[pump_id]:
+                bucket[0] = SECONDS_PER_DAY
+
+    return labels, per_pump
+
+
+def compute_operating_hours(from_jalali, to_jalali, pump_ids=None, conn=None):
+    """جمع ساعات کارکرد هر پمپ در بازه: {pump_id: hours} (گرد شده تا دو رقم اعشار)"""
+    _, per_pump = compute_daily_operating_seconds(from_jalali, to_jalali, pump_ids, conn)
+    return {
+        pump_id: round(sum(bucket[0] for bucket in buckets) / 3600, 2)
+        for pump_id, buckets in per_pump.items()
+    }
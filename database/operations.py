@@ -1,78 +1,118 @@
 from datetime import datetime
 from .models import get_db_connection
-from utils.date_utils import jalali_to_gregorian, gregorian_to_jalali
+from .daily_hours import refresh_pump_days
+from .pump_status import refresh_current_status
+from .fleet_revision import bump_fleet_revision
+from .event_journal import NOT_APPLIED_ERROR, append_events, fold_pending_events, has_pending_event_since, note_own_write
+from utils.date_utils import jalali_to_gregorian, parse_jalali_datetime
+
 
 def change_pump_status(pump_id, action, user_id, reason, notes, manual_time=False, action_date_jalali=None, action_time=None):
-    """تغییر وضعیت پمپ"""
-    conn = get_db_connection()
-    
-    try:
-        current_pump = conn.execute(
-            'SELECT status FROM pumps WHERE id = ?', (pump_id,)
-        ).fetchone()
-        
-        if not current_pump:
-            return {'success': False, 'error': 'پمپ پیدا نشد'}
-        
-        current_status = current_pump['status']
-        new_status = True if action.upper() == 'ON' else False
-        
-        if current_status == new_status and get_last_pump_event_time(pump_id):
-            return {
-                'success': False, 
-                'error': f'پمپ در حال حاضر {"روشن" if current_status else "خاموش"} است'
-            }
-        well = conn.execute('''
-            SELECT w.status 
-            FROM wells w 
-            WHERE w.pump_id = ?
-        ''', (pump_id,)).fetchone()
+    """
+    تغییر وضعیت پمپ.
 
-        if well and well['status'] != 'active':
-            return {
-                'success': False, 
-                'error': f'امکان تغییر وضعیت وجود ندارد. چاه در حالت "{well["status"]}" است.'
-            }
-        
+    رویداد پس از بررسی در ژورنال رویدادها ثبت می‌شود (database/event_journal.py) و
+    کمی بعد در pumps و pump_history ادغام می‌شود؛ درخواست‌های بعدی همین کاربر
+    تغییر را بلافاصله می‌بینند.
+    """
+    try:
+        action = (action or '').upper()
         event_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        recorded_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        recorded_time = event_time
 
-        if manual_time and action_date_jalali and action_time:
+        manual_time = bool(manual_time and action_date_jalali and action_time)
+        if manual_time:
             jalali_datetime_str = f"{action_date_jalali} {action_time}:00"
             event_time = jalali_to_gregorian(jalali_datetime_str)
-            
-            last_event_time = get_last_pump_event_time(pump_id)
-            if last_event_time and event_time <= last_event_time:
-                last_event_jalali = gregorian_to_jalali(last_event_time)
-                return {
-                    'success': False, 
-                    'error': f'تاریخ انتخاب شده باید بعد از آخرین ثبت ({last_event_jalali[:16]}) باشد'
-                }
 
-        conn.execute(
-            'UPDATE pumps SET status = ?, last_change = ? WHERE id = ?',
-            (new_status, event_time, pump_id)
-        )
-        
-        conn.execute(
-            '''INSERT INTO pump_history 
-            (pump_id, user_id, action, event_time, recorded_time, reason, notes, manual_time) 
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)''',
-            (pump_id, user_id, action.upper(), event_time, recorded_time, reason, notes, manual_time)
-        )
-        
-        conn.commit()
-        
+        try:
+            pump_id = int(pump_id)
+        except (TypeError, ValueError):
+            return {'success': False, 'error': 'پمپ پیدا نشد'}
+
+        result = append_events([{
+            'pump_id': pump_id,
+            'user_id': user_id,
+            'action': action,
+            'event_time': event_time,
+            'recorded_time': recorded_time,
+            'reason': reason,
+            'notes': notes,
+            'manual_time': manual_time,
+        }])[0]
+        if not result['success']:
+            return result
+
+        note_own_write(result['journal_id'])
         return {
-            'success': True, 
-            'message': f'پمپ با موفقیت {"روشن" if new_status else "خاموش"} شد'
+            'success': True,
+            'message': f'پمپ با موفقیت {"روشن" if action == "ON" else "خاموش"} شد',
+            'journal_id': result['journal_id'],
         }
-        
+
     except Exception as e:
-        conn.rollback()
         return {'success': False, 'error': str(e)}
-    finally:
-        conn.close()
+
+def batch_change_pump_status(items, user_id, atomic=True):
+    """
+    تغییر وضعیت چند پمپ با یک درخواست (مثلاً خاموش کردن یک منطقه هنگام قطع برق).
+
+    items: لیست dict با pump_id، action ('ON'/'OFF')، reason، اختیاری notes و
+    event_time (شمسی YYYY/MM/DD HH:MM[:SS]؛ بدون آن زمان فعلی ثبت می‌شود).
+    همه موارد با یک کوئری نسبت به وضعیت فعلی پمپ‌ها و چاه‌ها بررسی و در یک تراکنش
+    در ژورنال رویدادها ثبت می‌شوند. atomic: اگر یک مورد رد شود هیچ‌کدام ثبت نمی‌شوند.
+    خروجی: {'success', 'applied', 'results': [{'pump_id', 'success', 'error' | 'journal_id'}]}
+    """
+    now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    entries, results = [], []
+    for item in items:
+        item = item if isinstance(item, dict) else {}
+        result = {'pump_id': item.get('pump_id'), 'success': False}
+        results.append(result)
+        try:
+            pump_id = int(item.get('pump_id'))
+        except (TypeError, ValueError):
+            result['error'] = 'پمپ پیدا نشد'
+            continue
+
+        event_time, manual_time = now, False
+        if item.get('event_time'):
+            event_time = parse_jalali_datetime(item['event_time'])
+            if event_time is None:
+                result['error'] = 'زمان نامعتبر است'
+                continue
+            manual_time = True
+
+        entries.append((result, {
+            'pump_id': pump_id,
+            'user_id': user_id,
+            'action': str(item.get('action') or '').upper(),
+            'event_time': event_time,
+            'recorded_time': now,
+            'reason': item.get('reason'),
+            'notes': item.get('notes', ''),
+            'manual_time': manual_time,
+        }))
+
+    if atomic and len(entries) < len(results):
+        for result, _ in entries:
+            result['error'] = NOT_APPLIED_ERROR
+        entries = []
+
+    try:
+        written = append_events([entry for _, entry in entries], atomic=atomic)
+    except Exception as e:
+        return {'success': False, 'error': str(e), 'applied': 0, 'results': results}
+    for (result, _), outcome in zip(entries, written):
+        result.update(outcome)
+    applied = [r['journal_id'] for r in results if r['success']]
+    if applied:
+        note_own_write(max(applied))
+    return {
+        'success': len(applied) == len(results),
+        'applied': len(applied),
+        'results': results,
+    }
 
 def get_last_pump_event_time(pump_id):
     """دریافت آخرین زمان رویداد پمپ"""
@@ -85,32 +125,20 @@ def get_last_pump_event_time(pump_id):
     return last_event['event_time'] if last_event else None
 
 def update_pump_current_status():
-    """بروزرسانی وضعیت فعلی پمپ‌ها بر اساس آخرین رویداد"""
+    """
+    تعمیر: همگام کردن وضعیت فعلی همه پمپ‌ها با آخرین رویدادشان.
+    مسیرهای عادی نوشتن فقط پمپ‌های متأثر را بروز می‌کنند (refresh_current_status)؛
+    این تابع فقط از طریق scripts/repair_pump_status.py استفاده می‌شود.
+    خروجی: تعداد پمپ‌های اصلاح‌شده
+    """
     conn = get_db_connection()
     
     try:
-        for pump_id in range(1, 59):
-            last_event = conn.execute('''
-                SELECT action, event_time 
-                FROM pump_history 
-                WHERE pump_id = ? 
-                ORDER BY event_time DESC, id DESC
-                LIMIT 1
-            ''', (pump_id,)).fetchone()
-            
-            if last_event:
-                current_status = 1 if last_event['action'].upper() == 'ON' else 0
-                conn.execute(
-                    'UPDATE pumps SET status = ?, last_change = ? WHERE id = ?',
-                    (current_status, last_event['event_time'], pump_id)
-                )
-            else:
-                conn.execute(
-                    'UPDATE pumps SET status = 0, last_change = CURRENT_TIMESTAMP WHERE id = ?',
-                    (pump_id,)
-                )
-        
+        fixed = refresh_current_status(conn)
+        if fixed:
+            bump_fleet_revision(conn)
         conn.commit()
+        return fixed
         
     except Exception as e:
         conn.rollback()
@@ -223,7 +251,9 @@ def can_delete_record(record_id, user_id, user_role):
             LIMIT 1
         ''', (record['pump_id'],)).fetchone()
         
-        if not last_record or last_record['id'] != record_id:
+        # رویداد ادغام‌نشده بعد از این رکورد در ژورنال هم آن را از «آخرین» بودن خارج می‌کند
+        if not last_record or last_record['id'] != record_id \
+                or has_pending_event_since(conn, record['pump_id'], record['event_time']):
             return False, "فقط آخرین رکورد قابل حذف است"
         
         # بررسی دسترسی کاربر
@@ -255,6 +285,8 @@ def delete_pump_record(record_id, deletion_reason, deleted_by_user_id):
     try:
         # شروع تراکنش
         conn.execute('BEGIN TRANSACTION')
+        # رویدادهای ژورنال قبل از بررسی «آخرین رکورد» ادغام می‌شوند (قفل نوشتن هم گرفته می‌شود)
+        fold_pending_events(conn)
         
         # ۱. دریافت اطلاعات کامل رکورد قبل از حذف
         record = conn.execute('''
@@ -269,6 +301,15 @@ def delete_pump_record(record_id, deletion_reason, deleted_by_user_id):
         
         if not record:
             raise Exception("رکورد یافت نشد")
+
+        last_record = conn.execute('''
+            SELECT id FROM pump_history
+            WHERE pump_id = ?
+            ORDER BY event_time DESC, id DESC
+            LIMIT 1
+        ''', (record['pump_id'],)).fetchone()
+        if not last_record or last_record['id'] != record_id:
+            raise Exception("فقط آخرین رکورد قابل حذف است")
         
         # ۲. ذخیره در لاگ حذف
         conn.execute('''
@@ -287,9 +328,11 @@ def delete_pump_record(record_id, deletion_reason, deleted_by_user_id):
         
         # ۳. حذف رکورد از تاریخچه
         conn.execute('DELETE FROM pump_history WHERE id = ?', (record_id,))
+        refresh_pump_days(conn, record['pump_id'], record['event_time'])
         
-        # ۴. بروزرسانی وضعیت پمپ
-        update_pump_current_status()
+        # ۴. بروزرسانی وضعیت همین پمپ
+        refresh_current_status(conn, [record['pump_id']])
+        bump_fleet_revision(conn)
         
         # تأیید تراکنش
         conn.commit()
@@ -0,0 +1,146 @@
+# database/pump_status.py
+"""
+وضعیت پمپ‌ها در یک لحظه یا مجموعه‌ای از لحظه‌ها
+
+به جای یک کوئری جداگانه برای هر پمپ، وضعیت همه پمپ‌ها با یک کوئری (آخرین
+رویداد هر پمپ تا زمان مشخص، از روی ایندکس pump_id, event_time, id) به دست
+می‌آید. نسخه دسته‌ای برای چند لحظه (مثلاً هر ساعت یک روز برای برگه تحویل شیفت)
+وضعیت اولیه را یک بار می‌خواند و رویدادهای بین لحظه‌ها را یک بار پیمایش می‌کند.
+
+وضعیت فعلی ذخیره‌شده در pumps (status, last_change) هم از همین‌جا نگهداری
+می‌شود: هر تغییر در pump_history باید داخل همان تراکنش refresh_current_status
+را فقط برای پمپ‌های متأثر صدا بزند.
+"""
+
+from .models import get_db_connection
+
+
+def _state_from_row(row):
+    return {
+        'pump_id': row['pump_id'],
+        'pump_number': row['pump_number'],
+        'name': row['name'],
+        'status': 'ON' if (row['action'] or '').upper() == 'ON' else 'OFF',
+        'event_time': row['event_time'],
+        'reason': row['reason'],
+        'notes': row['notes'],
+    }
+
+
+def get_fleet_status_at(at_time, conn=None):
+    """
+    وضعیت همه پمپ‌ها در زمان at_time (میلادی، YYYY-MM-DD HH:MM:SS).
+    پمپ‌هایی که تا آن زمان هیچ رویدادی ندارند در خروجی نیستند.
+    خروجی: لیست dict به ترتیب شماره پمپ
+    """
+    own_conn = conn is None
+    if own_conn:
+        conn = get_db_connection()
+    try:
+        rows = conn.execute('''
+            SELECT p.id AS pump_id, p.pump_number, p.name,
+                   ph.action, ph.event_time, ph.reason, ph.notes
+            FROM pumps p
+            JOIN pump_history ph ON ph.id = (
+                SELECT id FROM pump_history
+                WHERE pump_id = p.id AND event_time <= ?
+                ORDER BY event_time DESC, id DESC LIMIT 1
+            )
+            ORDER BY p.pump_number
+        ''', (str(at_time),)).fetchall()
+        return [_state_from_row(row) for row in rows]
+    finally:
+        if own_conn:
+            conn.close()
+
+
+def get_fleet_status_series(times, conn=None):
+    """
+    وضعیت همه پمپ‌ها در چند لحظه با دو کوئری.
+    خروجی: {at_time: {pump_id: state_dict}} برای هر زمان ورودی
+    """
+    ordered = sorted({str(t) for t in times})
+    if not ordered:
+        return {}
+
+    own_conn = conn is None
+    if own_conn:
+        conn = get_db_connection()
+    try:
+        current = {state['pump_id']: state for state in get_fleet_status_at(ordered[0], conn)}
+        pumps = {
+            row['id']: row
+            for row in conn.execute('SELECT id, pump_number, name FROM pumps')
+        }
+        events = conn.execute('''
+            SELECT pump_id, action, event_time, reason, notes
+            FROM pump_history
+            WHERE event_time > ? AND event_time <= ?
+            ORDER BY event_time, id
+        ''', (ordered[0], ordered[-1])).fetchall()
+    finally:
+        if own_conn:
+            conn.close()
+
+    series = {ordered[0]: dict(current)}
+    position = 0
+    for at_time in ordered[1:]:
+        while position < len(events) and events[position]['event_time'] <= at_time:
+            event = events[position]
+            position += 1
+            pump = pumps.get(event['pump_id'])
+            if pump is None:
+                continue
+            current[event['pump_id']] = {
+                'pump_id': event['pump_id'],
+                'pump_number': pump['pump_number'],
+                'name': pump['name'],
+                'status': 'ON' if (event['action'] or '').upper() == 'ON' else 'OFF',
+                'event_time': event['event_time'],
+                'reason': event['reason'],
+                'notes': event['notes'],
+            }
+        series[at_time] = dict(current)
+    return series
+
+
+_LATEST_EVENT = '''
+    SELECT {column} FROM pump_history
+    WHERE pump_id = pumps.id
+    ORDER BY event_time DESC, id DESC LIMIT 1
+'''
+
+
+def refresh_current_status(conn, pump_ids=None):
+    """
+    همگام کردن pumps.status و pumps.last_change با آخرین رویداد هر پمپ.
+
+    pump_ids: پمپ‌های متأثر از تغییر؛ None یعنی همه پمپ‌ها (فقط برای تعمیر).
+    پمپی که رویدادی ندارد خاموش و (اگر last_change نداشته باشد) با زمان فعلی ثبت می‌شود.
+    پمپ‌هایی که وضعیتشان با آخرین رویداد یکی است بازنویسی نمی‌شوند.
+
+    تابع commit نمی‌کند؛ فراخواننده باید آن را داخل تراکنش خودش صدا بزند.
+    خروجی: تعداد ردیف‌های بروزرسانی‌شده
+    """
+    status_sql = f"""COALESCE(({_LATEST_EVENT.format(
+        column="CASE WHEN UPPER(action) = 'ON' THEN 1 ELSE 0 END")}), 0)"""
+    time_sql = f"({_LATEST_EVENT.format(column='event_time')})"
+
+    # پمپ بدون رویداد فقط اگر روشن مانده یا last_change ندارد بازنویسی می‌شود
+    where = (f"(status IS NOT {status_sql}"
+             f" OR ({time_sql} IS NULL AND last_change IS NULL)"
+             f" OR ({time_sql} IS NOT NULL AND last_change IS NOT {time_sql}))")
+    params = []
+    if pump_ids is not None:
+        params = sorted({int(p) for p in pump_ids})
+        if not params:
+            return 0
+        where += f" AND id IN ({', '.join('?' * len(params))})"
+
+    cur = conn.execute(f'''
+        UPDATE pumps SET
+            status = {status_sql},
+            last_change = COALESCE({time_sql}, CURRENT_TIMESTAMP)
+        WHERE {where}
+    ''', params)
+    return cur.rowcount
@@ -1,187 +1,230 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 from .models import get_db_connection
-from .operations import get_last_event_before, get_pump_events_in_range
-from utils.date_utils import jalali_to_gregorian, gregorian_to_jalali
+from .operating_hours import jalali_days, jalali_month_bounds
+from .pump_status import get_fleet_status_at, get_fleet_status_series
+from .daily_hours import get_operating_hours
+from utils.date_utils import jalali_to_gregorian, gregorian_to_jalali, gregorian_to_jalali_many
 
 def calculate_daily_operating_hours(pump_id, target_date_jalali):
     """محاسبه ساعات کارکرد روزانه پمپ"""
     try:
-        start_of_day_str = jalali_to_gregorian(f"{target_date_jalali} 00:00:00")
-        end_of_day_str = jalali_to_gregorian(f"{target_date_jalali} 23:59:59")
-        
-        start_of_day = datetime.strptime(start_of_day_str, '%Y-%m-%d %H:%M:%S')
-        end_of_day = datetime.strptime(end_of_day_str, '%Y-%m-%d %H:%M:%S')
-        
-        last_event_before = get_last_event_before(pump_id, start_of_day)
-        days_events = get_pump_events_in_range(pump_id, start_of_day, end_of_day)
-        
-        if last_event_before:
-            current_status = last_event_before['action']
-        else:
-            current_status = 'OFF'
-        
-        if not days_events:
-            return 24.0 if current_status == 'ON' else 0.0
-        
-        total_seconds = 0
-        current_time = start_of_day
-        
-        all_events = days_events + [{'event_time': end_of_day, 'action': 'END'}]
-        
-        for event in all_events:
-            if current_status == 'ON':
-                time_diff = (event['event_time'] - current_time).total_seconds()
-                total_seconds += time_diff
-            
-            if event['action'] != 'END':
-                current_status = event['action']
-                current_time = event['event_time']
-        
-        hours = total_seconds / 3600
-        return round(hours, 2)
-        
+        hours = get_operating_hours(target_date_jalali, target_date_jalali, [pump_id])
+        return hours.get(int(pump_id), 0.0)
     except Exception as e:
         return 0.0
 
 def calculate_monthly_operating_hours(pump_id, target_month_jalali):
     """محاسبه ساعات کارکرد ماهانه پمپ"""
     try:
-        year, month = map(int, target_month_jalali.split('/'))
-        total_hours = 0
-        
-        for day in range(1, 32):
-            try:
-                date_jalali = f"{year}/{month:02d}/{day:02d}"
-                daily_hours = calculate_daily_operating_hours(pump_id, date_jalali)
-                total_hours += daily_hours
-            except Exception:
-                continue
-        
-        return round(total_hours, 2)
-        
+        first_day, last_day = jalali_month_bounds(target_month_jalali)
+        hours = get_operating_hours(first_day, last_day, [pump_id])
+        return hours.get(int(pump_id), 0.0)
     except Exception as e:
         return 0.0
 
 def get_operating_hours_report(date_jalali, month_jalali, report_type):
-    """گزارش ساعات کارکرد"""
-    results = []
-    
-    if report_type == 'daily' and date_jalali:
-        for pump_id in range(1, 59):
-            pump_hours = calculate_daily_operating_hours(pump_id, date_jalali)
-            
-            conn = get_db_connection()
-            pump = conn.execute(
-                'SELECT pump_number, name FROM pumps WHERE id = ?', (pump_id,)
-            ).fetchone()
-            conn.close()
-            
-            if pump:
-                results.append({
-                    'pump_number': pump['pump_number'],
-                    'operating_hours': pump_hours
-                })
-                
-    elif report_type == 'monthly' and month_jalali:
-        for pump_id in range(1, 59):
-            pump_hours = calculate_monthly_operating_hours(pump_id, month_jalali)
-            
-            conn = get_db_connection()
-            pump = conn.execute(
-                'SELECT pump_number, name FROM pumps WHERE id = ?', (pump_id,)
-            ).fetchone()
-            conn.close()
-            
-            if pump:
-                results.append({
-                    'pump_number': pump['pump_number'],
-                    'operating_hours': pump_hours
-                })
-    
-    results.sort(key=lambda x: x['pump_number'])
-    return results
+    """گزارش ساعات کارکرد (از جدول تجمیعی pump_daily_hours)"""
+    try:
+        if report_type == 'daily' and date_jalali:
+            from_day, to_day = date_jalali, date_jalali
+        elif report_type == 'monthly' and month_jalali:
+            from_day, to_day = jalali_month_bounds(month_jalali)
+        else:
+            return []
+    except ValueError:
+        return []
+
+    conn = get_db_connection()
+    try:
+        pumps = conn.execute(
+            'SELECT id, pump_number FROM pumps ORDER BY pump_number'
+        ).fetchall()
+        hours = get_operating_hours(from_day, to_day, conn=conn)
+    except ValueError:
+        return []
+    finally:
+        conn.close()
+
+    return [
+        {'pump_number': pump['pump_number'], 'operating_hours': hours.get(pump['id'], 0.0)}
+        for pump in pumps
+    ]
 
 def get_status_at_time_report(date_jalali, time, display_type):
-    """گزارش وضعیت در زمان خاص"""
+    """گزارش وضعیت در زمان خاص (یک کوئری برای همه پمپ‌ها)"""
     target_datetime_jalali = f"{date_jalali} {time}:00"
     target_datetime_gregorian = jalali_to_gregorian(target_datetime_jalali)
 
-    conn = get_db_connection()
     results = []
+    for state in get_fleet_status_at(target_datetime_gregorian):
+        status = state['status']
+        if display_type == 'all' or (display_type == 'on' and status == 'ON') or (display_type == 'off' and status == 'OFF'):
+            results.append({
+                'pump_number': state['pump_number'],
+                'name': state['name'],
+                'status': status,
+                'last_change': gregorian_to_jalali(state['event_time']),
+                'reason': state['reason'],
+                'notes': state['notes']
+            })
 
-    for pump_id in range(1, 59):
-        last_event = conn.execute('''
-            SELECT ph.action, ph.event_time, ph.reason, ph.notes, p.pump_number, p.name
-            FROM pump_history ph
-            JOIN pumps p ON ph.pump_id = p.id
-            WHERE ph.pump_id = ? AND ph.event_time <= ?
-            ORDER BY ph.event_time DESC 
-            LIMIT 1
-        ''', (pump_id, target_datetime_gregorian)).fetchone()
-        
-        if last_event:
-            status = 'ON' if last_event['action'].upper() == 'ON' else 'OFF'
-            last_change_jalali = gregorian_to_jalali(last_event['event_time'])
-            
-            if display_type == 'all' or (display_type == 'on' and status == 'ON') or (display_type == 'off' and status == 'OFF'):
-                results.append({
-                    'pump_number': last_event['pump_number'],
-                    'name': last_event['name'],
-                    'status': status,
-                    'last_change': last_change_jalali,
-                    'reason': last_event['reason'],
-                    'notes': last_event['notes']
-                })
-
-    conn.close()
     return results
 
-def get_full_history_report(from_date_jalali, to_date_jalali, pump_id):
-    """گزارش تاریخچه کامل"""
+def get_status_series_report(date_jalali, step_minutes=60):
+    """
+    وضعیت همه پمپ‌ها در لحظه‌های منظم یک روز (مثلاً هر ساعت) برای برگه تحویل شیفت.
+    خروجی: {'times': ['00:00', ...], 'rows': [{'pump_number', 'name', 'statuses': [...]}, ...]}
+    """
+    day_start = jalali_days(date_jalali, date_jalali)[0][1]
+    step_minutes = max(1, int(step_minutes))
+
+    labels = []
+    times = []
+    for minutes in range(0, 24 * 60, step_minutes):
+        moment = day_start + timedelta(minutes=minutes)
+        labels.append(f"{minutes // 60:02d}:{minutes % 60:02d}")
+        times.append(moment.strftime('%Y-%m-%d %H:%M:%S'))
+
+    series = get_fleet_status_series(times)
+
+    conn = get_db_connection()
+    try:
+        pumps = conn.execute('SELECT id, pump_number, name FROM pumps ORDER BY pump_number').fetchall()
+    finally:
+        conn.close()
+
+    rows = []
+    for pump in pumps:
+        statuses = []
+        for at_time in times:
+            state = series[at_time].get(pump['id'])
+            statuses.append(state['status'] if state else None)
+        rows.append({'pump_number': pump['pump_number'], 'name': pump['name'], 'statuses': statuses})
+
+    return {'times': labels, 'rows': rows}
+
+FULL_HISTORY_PAGE_SIZE = 200
+FULL_HISTORY_BATCH_SIZE = 1000
+
+def _full_history_filter(from_date_jalali, to_date_jalali, pump_id):
+    """شرط WHERE و پارامترهای گزارش تاریخچه کامل (None برای ورودی ناقص)"""
     if not from_date_jalali or not to_date_jalali:
-        return []
+        return None
     
     start_date = jalali_to_gregorian(f"{from_date_jalali} 00:00:00")
     end_date = jalali_to_gregorian(f"{to_date_jalali} 23:59:59")
     
-    conn = get_db_connection()
-    
     if pump_id == 'all':
-        query = '''
-            SELECT p.pump_number, p.name, ph.action, ph.event_time, 
-                   ph.reason, ph.notes, COALESCE(u.full_name, 'کاربر حذف‌شده') as user_name
-            FROM pump_history ph
-            JOIN pumps p ON ph.pump_id = p.id
-            LEFT JOIN users u ON ph.user_id = u.id
-            WHERE ph.event_time BETWEEN ? AND ?
-            ORDER BY ph.event_time DESC
-        '''
-        params = (start_date, end_date)
-    else:
-        query = '''
-            SELECT p.pump_number, p.name, ph.action, ph.event_time, 
-                   ph.reason, ph.notes, COALESCE(u.full_name, 'کاربر حذف‌شده') as user_name
-            FROM pump_history ph
-            JOIN pumps p ON ph.pump_id = p.id
-            LEFT JOIN users u ON ph.user_id = u.id
-            WHERE p.pump_number = ? AND ph.event_time BETWEEN ? AND ?
-            ORDER BY ph.event_time DESC
-        '''
-        params = (pump_id, start_date, end_date)
-    
-    results = conn.execute(query, params).fetchall()
-    conn.close()
-    
-    formatted_results = []
-    for row in results:
+        return 'ph.event_time BETWEEN ? AND ?', [start_date, end_date]
+    # پیدا کردن شناسه پمپ قبل از پیمایش تا ایندکس (pump_id, event_time, id) استفاده شود
+    return ('ph.pump_id = (SELECT id FROM pumps WHERE pump_number = ?) AND ph.event_time BETWEEN ? AND ?',
+            [pump_id, start_date, end_date])
+
+def _fetch_full_history_batch(where, params, after, limit, conn):
+    """یک صفحه از رویدادها به ترتیب (event_time, id) نزولی، بعد از کلید after"""
+    keyset = ''
+    if after is not None:
+        keyset = ' AND (ph.event_time, ph.id) < (?, ?)'
+        params = params + list(after)
+    return conn.execute(f'''
+        SELECT ph.id, p.pump_number, p.name, ph.action, ph.event_time, 
+               ph.reason, ph.notes, COALESCE(u.full_name, 'کاربر حذف‌شده') as user_name
+        FROM pump_history ph
+        JOIN pumps p ON ph.pump_id = p.id
+        LEFT JOIN users u ON ph.user_id = u.id
+        WHERE {where}{keyset}
+        ORDER BY ph.event_time DESC, ph.id DESC
+        LIMIT ?
+    ''', params + [limit]).fetchall()
+
+def _format_history_rows(rows):
+    jalali_times = gregorian_to_jalali_many([row['event_time'] for row in rows])
+    formatted = []
+    for row, jalali_datetime in zip(rows, jalali_times):
         row_dict = dict(row)
-        
-        jalali_datetime = gregorian_to_jalali(row['event_time'])
         jalali_parts = jalali_datetime.split(' ')
         row_dict['action_date'] = jalali_parts[0]
         row_dict['action_time'] = jalali_parts[1][:5] if len(jalali_parts) > 1 else '00:00'
         row_dict['action_persian'] = 'روشن' if row['action'].upper() == 'ON' else 'خاموش'
-        
-        formatted_results.append(row_dict)
+        formatted.append(row_dict)
+    return formatted
+
+def encode_history_cursor(row):
+    """کلید صفحه بعد (آخرین ردیف صفحه فعلی) به صورت رشته قابل استفاده در URL"""
+    return f"{row['event_time']}|{row['id']}"
+
+def decode_history_cursor(cursor):
+    """تبدیل رشته cursor به (event_time, id)؛ در صورت نامعتبر بودن None"""
+    if not cursor:
+        return None
+    event_time, _, record_id = str(cursor).rpartition('|')
+    if not event_time or not record_id.isdigit():
+        return None
+    return event_time, int(record_id)
+
+def iter_full_history(from_date_jalali, to_date_jalali, pump_id='all', batch_size=None):
+    """
+    پیمایش تدریجی تاریخچه کامل (جدیدترین اول) بدون بارگذاری کل بازه در حافظه.
+    هر دسته با صفحه‌بندی keyset روی (event_time, id) و یک اتصال کوتاه‌مدت خوانده
+    می‌شود، پس مصرف‌کننده کند اتصال یا تراکنشی را باز نگه نمی‌دارد.
+    """
+    query = _full_history_filter(from_date_jalali, to_date_jalali, pump_id)
+    if query is None:
+        return
+    where, params = query
+    batch_size = batch_size or FULL_HISTORY_BATCH_SIZE
     
-    return formatted_results
\ No newline at end of file
+    after = None
+    while True:
+        conn = get_db_connection()
+        try:
+            rows = _fetch_full_history_batch(where, params, after, batch_size, conn)
+        finally:
+            conn.close()
+        if not rows:
+            return
+        yield from _format_history_rows(rows)
+        if len(rows) < batch_size:
+            return
+        after = (rows[-1]['event_time'], rows[-1]['id'])
+
+def count_full_history(from_date_jalali, to_date_jalali, pump_id='all'):
+    """تعداد رویدادهای گزارش تاریخچه کامل"""
+    query = _full_history_filter(from_date_jalali, to_date_jalali, pump_id)
+    if query is None:
+        return 0
+    where, params = query
+    conn = get_db_connection()
+    try:
+        return conn.execute(f'SELECT COUNT(*) FROM pump_history ph WHERE {where}', params).fetchone()[0]
+    finally:
+        conn.close()
+
+def get_full_history_page(from_date_jalali, to_date_jalali, pump_id='all', cursor=None,
+                          page_size=None):
+    """
+    یک صفحه از گزارش تاریخچه کامل.
+    خروجی: {'rows', 'next_cursor' (None در صفحه آخر), 'total'}
+    """
+    query = _full_history_filter(from_date_jalali, to_date_jalali, pump_id)
+    if query is None:
+        return {'rows': [], 'next_cursor': None, 'total': 0}
+    where, params = query
+    page_size = page_size or FULL_HISTORY_PAGE_SIZE
+    
+    conn = get_db_connection()
+    try:
+        total = conn.execute(
+            f'SELECT COUNT(*) FROM pump_history ph WHERE {where}', params
+        ).fetchone()[0]
+        # یک ردیف بیشتر برای تشخیص وجود صفحه بعد
+        rows = _fetch_full_history_batch(where, params, decode_history_cursor(cursor), page_size + 1, conn)
+    finally:
+        conn.close()
+    
+    next_cursor = encode_history_cursor(rows[page_size - 1]) if len(rows) > page_size else None
+    return {'rows': _format_history_rows(rows[:page_size]), 'next_cursor': next_cursor, 'total': total}
+
+def get_full_history_report(from_date_jalali, to_date_jalali, pump_id):
+    """گزارش تاریخچه کامل (همه ردیف‌ها؛ برای بازه‌های بزرگ از iter_full_history استفاده کنید)"""
+    return list(iter_full_history(from_date_jalali, to_date_jalali, pump_id))
@@ -4,6 +4,7 @@
 """
 
 from .models import get_db_connection
+from .fleet_revision import bump_fleet_revision
 from datetime import datetime
 import json
 
@@ -251,6 +252,10 @@ def record_well_event(event_data):
         cursor = conn.execute(sql, params_subset)
         history_id = cursor.lastrowid
 
+        if updates_to_apply:
+            # مشخصات/وضعیت چاه (و نام/موقعیت پمپ) تغییر کرده و داشبورد باید بروز شود
+            bump_fleet_revision(conn)
+
         conn.execute('COMMIT')
 
         return {
@@ -11,9 +11,38 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from app import app
 from config import get_config
 
+def check_pending_migrations(conn=None):
+    """
+    بررسی مهاجرت‌های اعمال‌نشده (اسکیما به صورت خودکار تغییر داده نمی‌شود).
+    خروجی: True اگر دیتابیس به‌روز باشد؛ در غیر این صورت پیام راهنما چاپ می‌شود
+    """
+    from database.models import get_db_connection
+    from database.migrate import pending_migrations
+
+    own_conn = conn is None
+    if own_conn:
+        conn = get_db_connection()
+    try:
+        pending = pending_migrations(conn)
+    except Exception as e:
+        print(f"❌ بررسی مهاجرت‌ها ممکن نشد: {e}")
+        return False
+    finally:
+        if own_conn:
+            conn.close()
+
+    if pending:
+        names = ", ".join(f"{v:03d}_{n}" for v, n, _ in pending)
+        print(f"❌ مهاجرت‌های اعمال‌نشده: {names}")
+        print("   برنامه بدون این جدول‌ها کار نمی‌کند. بعد از بکاپ اجرا کنید: py -m database.migrate")
+        return False
+    return True
+
 def main():
     """تابع اصلی اجرای برنامه"""
     app.config.from_object(get_config())
+    if not check_pending_migrations():
+        sys.exit(1)
     
     print("🚀 سیستم مدیریت پمپ‌ها در حال اجراست...")
     print("📧 برای ورود: http://localhost:5000/login")
@@ -0,0 +1,72 @@
+"""
+بنچمارک تبدیل تاریخ میلادی/شمسی: مسیر قدیمی jdatetime در برابر جدول روزها و API دسته‌ای
+
+استفاده (از ریشه پروژه):
+    python scripts/benchmark_date_utils.py            # 200,000 زمان در یک سال
+    python scripts/benchmark_date_utils.py --count 1000000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from utils import date_utils
+
+
+def timed(label, func, count, baseline=None):
+    started = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - started
+    speedup = f'{baseline / elapsed:7.1f}x' if baseline else '       '
+    print(f"  {label:<36} {elapsed * 1000:9.1f} ms  {elapsed * 1e6 / count:6.2f} µs/row  {speedup}")
+    return elapsed, result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='بنچمارک تبدیل تاریخ شمسی')
+    parser.add_argument('--count', type=int, default=200000)
+    args = parser.parse_args(argv)
+
+    rnd = random.Random(1403)
+    start = datetime(2024, 3, 20)
+    stamps = [
+        (start + timedelta(seconds=rnd.randrange(365 * 86400))).strftime('%Y-%m-%d %H:%M:%S')
+        for _ in range(args.count)
+    ]
+    jalali_stamps = [date_utils._jdatetime_gregorian_to_jalali(s) for s in stamps[:args.count // 10]]
+    count = len(stamps)
+
+    print(f"📊 میلادی → شمسی ({count:,} رکورد، یک سال)")
+    base, expected = timed('jdatetime (مسیر قدیمی)',
+                           lambda: [date_utils._jdatetime_gregorian_to_jalali(s) for s in stamps], count)
+    date_utils._jalali_date_label.cache_clear()
+    _, fast = timed('gregorian_to_jalali', lambda: [date_utils.gregorian_to_jalali(s) for s in stamps],
+                    count, base)
+    _, many = timed('gregorian_to_jalali_many', lambda: date_utils.gregorian_to_jalali_many(stamps),
+                    count, base)
+    series = pd.Series(stamps)
+    _, from_strings = timed('gregorian_to_jalali_array (str)',
+                            lambda: date_utils.gregorian_to_jalali_array(series), count, base)
+    datetimes = pd.to_datetime(series)
+    _, from_datetimes = timed('gregorian_to_jalali_array (datetime64)',
+                              lambda: date_utils.gregorian_to_jalali_array(datetimes), count, base)
+    assert fast == many == list(from_strings) == list(from_datetimes) == expected
+
+    count = len(jalali_stamps)
+    print(f"\n📊 شمسی → میلادی ({count:,} رکورد)")
+    base, expected = timed('jdatetime (مسیر قدیمی)',
+                           lambda: [date_utils._jdatetime_jalali_to_gregorian(s) for s in jalali_stamps], count)
+    _, fast = timed('jalali_to_gregorian', lambda: date_utils.jalali_to_gregorian_many(jalali_stamps),
+                    count, base)
+    assert fast == expected
+    print("\n✅ خروجی همه روش‌ها یکسان است")
+
+
+if __name__ == '__main__':
+    main()
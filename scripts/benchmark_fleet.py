@@ -0,0 +1,169 @@
+"""
+بنچمارک عملیات سراسری (کل ناوگان پمپ‌ها) روی داده مصنوعی
+
+یک دیتابیس موقت با تعداد مشخصی پمپ و چند سال رویداد روشن/خاموش ساخته می‌شود و
+زمان و تعداد دستورات SQL عملیات اصلی (بروزرسانی وضعیت، داشبورد، گزارش‌ها) در چند
+اندازه ناوگان اندازه‌گیری می‌شود. تعداد دستورات (به جز بازسازی جدول تجمیعی که
+برای هر ردیف یک درج دارد) باید مستقل از تعداد پمپ‌ها بماند و زمان اجرا تقریباً
+خطی رشد کند.
+
+استفاده (از ریشه پروژه):
+    python scripts/benchmark_fleet.py                      # 250، 500 و 1000 پمپ × 5 سال
+    python scripts/benchmark_fleet.py --pumps 200 --years 1
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import create_database as cd
+from database import connection
+from database.migrate import apply_migrations
+from database.dashboard import get_dashboard_data
+from database.operations import update_pump_current_status
+from database.pump_status import get_fleet_status_at
+from database.reports import (
+    get_operating_hours_report, get_status_at_time_report, get_status_series_report
+)
+from utils.date_utils import gregorian_to_jalali
+
+END_TIME = datetime(2025, 3, 21)
+INSERT_CHUNK = 50000
+
+
+def _generate_events(pump_count, years, seed):
+    """برای هر پمپ و هر روز یک بار روشن (صبح) و یک بار خاموش (عصر)"""
+    rnd = random.Random(seed)
+    first_day = END_TIME - timedelta(days=int(365.25 * years))
+    day_count = (END_TIME - first_day).days
+    for pump_id in range(1, pump_count + 1):
+        for offset in range(day_count):
+            day = first_day + timedelta(days=offset)
+            on_at = day + timedelta(minutes=rnd.randrange(0, 12 * 60))
+            off_at = day + timedelta(minutes=rnd.randrange(12 * 60, 24 * 60))
+            for action, at in (('ON', on_at), ('OFF', off_at)):
+                stamp = at.strftime('%Y-%m-%d %H:%M:%S')
+                yield (pump_id, action, stamp, stamp)
+
+
+def build_database(db_path, pump_count, years, seed=1403):
+    connection.configure_pool(str(db_path), max_idle=1)
+    conn = connection.get_connection()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            cd.create_tables(conn)
+        conn.execute(
+            "INSERT INTO users (id, username, password, full_name, role) "
+            "VALUES (1, 'bench', 'x', 'بنچمارک', 'admin')"
+        )
+        conn.executemany(
+            'INSERT INTO pumps (id, pump_number, name) VALUES (?, ?, ?)',
+            [(i, i, f'پمپ {i}') for i in range(1, pump_count + 1)]
+        )
+
+        batch = []
+        for row in _generate_events(pump_count, years, seed):
+            batch.append(row)
+            if len(batch) >= INSERT_CHUNK:
+                _insert_events(conn, batch)
+                batch = []
+        _insert_events(conn, batch)
+        conn.commit()
+        event_count = conn.execute('SELECT COUNT(*) FROM pump_history').fetchone()[0]
+    finally:
+        conn.close()
+    return event_count
+
+
+def _insert_events(conn, rows):
+    conn.executemany(
+        '''INSERT INTO pump_history
+           (pump_id, user_id, action, event_time, recorded_time, reason, notes, manual_time)
+           VALUES (?, 1, ?, ?, ?, 'benchmark', '', 1)''',
+        rows
+    )
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, statement):
+        if statement.lstrip().upper().startswith(('SELECT', 'UPDATE', 'INSERT', 'DELETE', 'WITH')):
+            self.count += 1
+
+
+def measure(label, func):
+    counter = QueryCounter()
+    conn = connection.get_connection()
+    conn.raw.set_trace_callback(counter)
+    try:
+        started = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - started
+    finally:
+        conn.raw.set_trace_callback(None)
+        conn.close()
+    return label, elapsed, counter.count
+
+
+def run_size(workdir, pump_count, years):
+    db_path = Path(workdir) / f'bench_{pump_count}.db'
+    started = time.perf_counter()
+    event_count = build_database(db_path, pump_count, years)
+    print(f"\n📊 {pump_count} پمپ، {event_count:,} رویداد (ساخت داده: {time.perf_counter() - started:.1f}s)")
+
+    probe = END_TIME - timedelta(days=10, hours=-9)
+    probe_jalali = gregorian_to_jalali(probe.strftime('%Y-%m-%d %H:%M:%S'))
+    day_jalali = probe_jalali[:10]
+    month_jalali = probe_jalali[:7]
+
+    results = [
+        measure('migrate + rollup rebuild', lambda: apply_migrations(verbose=False)),
+        measure('update_pump_current_status', update_pump_current_status),
+        measure('dashboard read model', get_dashboard_data),
+        measure('fleet status at time', lambda: get_fleet_status_at(probe)),
+        measure('status-at-time report', lambda: get_status_at_time_report(day_jalali, '09:00', 'all')),
+        measure('status series (hourly)', lambda: get_status_series_report(day_jalali, 60)),
+        measure('operating hours daily', lambda: get_operating_hours_report(day_jalali, None, 'daily')),
+        measure('operating hours monthly', lambda: get_operating_hours_report(None, month_jalali, 'monthly')),
+    ]
+    for label, elapsed, queries in results:
+        print(f"  {label:<28} {elapsed * 1000:10.1f} ms  {queries:6d} stmts  "
+              f"{elapsed * 1e6 / pump_count:8.1f} µs/pump")
+    connection.get_pool().drain()
+    return {label: elapsed for label, elapsed, _ in results}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='بنچمارک عملیات سراسری ناوگان پمپ‌ها')
+    parser.add_argument('--pumps', type=int, default=1000, help='بزرگ‌ترین اندازه ناوگان')
+    parser.add_argument('--years', type=float, default=5, help='طول تاریخچه مصنوعی (سال)')
+    parser.add_argument('--steps', type=int, default=3,
+                        help='تعداد اندازه‌ها (pumps/4، pumps/2، pumps ...)')
+    args = parser.parse_args(argv)
+
+    sizes = sorted({max(1, args.pumps >> shift) for shift in range(args.steps)})
+    with tempfile.TemporaryDirectory() as workdir:
+        timings = {size: run_size(workdir, size, args.years) for size in sizes}
+
+    if len(sizes) > 1:
+        smallest, largest = sizes[0], sizes[-1]
+        print(f"\n📈 نسبت زمان {largest} به {smallest} پمپ (خطی ≈ {largest / smallest:.1f})")
+        for label, elapsed in timings[largest].items():
+            base = timings[smallest][label]
+            ratio = elapsed / base if base else float('inf')
+            print(f"  {label:<28} {ratio:6.1f}x")
+    connection.configure_pool('pump_management.db')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+"""
+مدیریت توکن‌های API دریافت رویداد از PLC/SCADA
+
+استفاده (از ریشه پروژه):
+    python scripts/ingest_tokens.py create plc-zone1 --user admin
+    python scripts/ingest_tokens.py list
+    python scripts/ingest_tokens.py revoke plc-zone1
+"""
+import argparse
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.ingest import create_ingest_token, list_ingest_tokens, revoke_ingest_token
+from database.models import get_db_connection
+
+
+def main():
+    parser = argparse.ArgumentParser(description='توکن‌های API دریافت رویداد')
+    sub = parser.add_subparsers(dest='command', required=True)
+    create = sub.add_parser('create', help='ساخت توکن جدید')
+    create.add_argument('name')
+    create.add_argument('--user', default='admin', help='کاربری که رویدادها به نام او ثبت می‌شوند')
+    revoke = sub.add_parser('revoke', help='باطل کردن توکن')
+    revoke.add_argument('name')
+    sub.add_parser('list', help='نمایش توکن‌ها')
+    args = parser.parse_args()
+
+    if args.command == 'create':
+        conn = get_db_connection()
+        user = conn.execute('SELECT id FROM users WHERE username = ?', (args.user,)).fetchone()
+        conn.close()
+        if user is None:
+            sys.exit(f"❌ کاربر {args.user} پیدا نشد")
+        token = create_ingest_token(args.name, user['id'])
+        print(f"✅ توکن {args.name} ساخته شد (فقط همین یک بار نمایش داده می‌شود):")
+        print(token)
+    elif args.command == 'revoke':
+        if revoke_ingest_token(args.name):
+            print(f"✅ توکن {args.name} باطل شد")
+        else:
+            sys.exit(f"❌ توکن فعالی با نام {args.name} وجود ندارد")
+    else:
+        for token in list_ingest_tokens():
+            state = 'باطل‌شده' if token['revoked_at'] else 'فعال'
+            print(f"  {token['name']:<20} {token['username'] or '-':<12} {state:<8} "
+                  f"آخرین استفاده: {token['last_used_at'] or '-'}")
+
+
+if __name__ == '__main__':
+    main()
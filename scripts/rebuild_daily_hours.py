@@ -0,0 +1,20 @@
+"""
+بازسازی کامل جدول تجمیعی pump_daily_hours از روی pump_history
+
+استفاده (از ریشه پروژه):
+    python scripts/rebuild_daily_hours.py
+"""
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.daily_hours import rebuild_daily_hours
+
+
+def main():
+    count = rebuild_daily_hours(verbose=True)
+    print(f"🎉 بازسازی انجام شد: {count} ردیف در pump_daily_hours")
+
+
+if __name__ == '__main__':
+    main()
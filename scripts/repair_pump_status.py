@@ -0,0 +1,23 @@
+"""
+تعمیر وضعیت فعلی پمپ‌ها (pumps.status و pumps.last_change) از روی آخرین رویداد
+
+مسیرهای عادی برنامه فقط پمپ‌های متأثر از هر تغییر را بروز می‌کنند؛ این اسکریپت
+برای اصلاح داده‌ای است که خارج از برنامه (مثلاً با ویرایش مستقیم دیتابیس) تغییر کرده.
+
+استفاده (از ریشه پروژه):
+    python scripts/repair_pump_status.py
+"""
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.operations import update_pump_current_status
+
+
+def main():
+    fixed = update_pump_current_status()
+    print(f"🎉 وضعیت {fixed} پمپ اصلاح شد")
+
+
+if __name__ == '__main__':
+    main()
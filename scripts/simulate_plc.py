@@ -0,0 +1,275 @@
+"""
+شبیه‌ساز PLC/SCADA برای تست بار API دریافت رویداد (/api/ingest/events)
+
+چند «کنترلر» هم‌زمان (thread) هر کدام گروهی از پمپ‌ها را روشن/خاموش می‌کنند و
+رویدادها را دسته‌ای (JSON lines یا CSV) ارسال می‌کنند. بخشی از رویدادها عمداً با
+تأخیر و بی‌ترتیب فرستاده می‌شوند و بخشی از دسته‌ها (مثل قطع شبکه) دوباره با همان
+کلیدها ارسال می‌شوند. در پایان تعداد رویدادهای پذیرفته/تکراری/ردشده، زمان پاسخ و
+نرخ واقعی (رویداد در دقیقه) گزارش می‌شود.
+
+حالت --local بدون سرور اجرا می‌شود: یک دیتابیس موقت ساخته، درخواست‌ها از طریق
+test client فلسک فرستاده و در پایان، بعد از ادغام ژورنال، درستی تاریخچه و
+pumps.status بررسی می‌شود.
+
+استفاده (از ریشه پروژه):
+    python scripts/simulate_plc.py --local --rate 6000 --duration 30
+    python scripts/simulate_plc.py --url http://127.0.0.1:5000 --token <TOKEN> --pumps 300
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+INGEST_PATH = '/api/ingest/events'
+
+
+class Controller(threading.Thread):
+    """یک PLC شبیه‌سازی‌شده که پمپ‌های pump_ids را کنترل می‌کند"""
+
+    def __init__(self, name, pump_ids, send, args, stats, seed):
+        super().__init__(name=name, daemon=True)
+        self.pump_ids = pump_ids
+        self.send = send
+        self.args = args
+        self.stats = stats
+        self.random = random.Random(seed)
+        self.state = {pump_id: False for pump_id in pump_ids}
+        # زمان شبیه‌سازی: از یک روز قبل شروع و با هر رویداد جلو می‌رود
+        self.clock = datetime.now() - timedelta(days=1)
+        self.sequence = 0
+        self.late = []
+
+    def _next_event(self):
+        pump_id = self.random.choice(self.pump_ids)
+        self.state[pump_id] = not self.state[pump_id]
+        self.clock += timedelta(seconds=self.random.randint(1, 20))
+        self.sequence += 1
+        return {
+            'key': f'{self.name}-{self.sequence}',
+            'pump_id': pump_id,
+            'action': 'ON' if self.state[pump_id] else 'OFF',
+            'time': self.clock.strftime('%Y-%m-%d %H:%M:%S'),
+        }
+
+    def _batch(self, size):
+        batch = []
+        for _ in range(size):
+            event = self._next_event()
+            if self.random.random() < self.args.late:
+                self.late.append(event)
+            else:
+                batch.append(event)
+        # رویدادهای عقب‌افتاده در یکی از دسته‌های بعدی می‌رسند
+        if self.late and self.random.random() < 0.5:
+            batch.extend(self.late)
+            self.stats.add('late', len(self.late))
+            self.late = []
+        return batch
+
+    def run(self):
+        per_controller = self.args.rate / 60.0 / self.args.controllers
+        interval = self.args.batch / per_controller if per_controller else 0
+        deadline = time.monotonic() + self.args.duration
+        next_send = time.monotonic()
+        while time.monotonic() < deadline:
+            batch = self._batch(self.args.batch)
+            self._post(batch)
+            if self.random.random() < self.args.retry:
+                self.stats.add('retried', len(batch))
+                self._post(batch)
+            next_send += interval
+            time.sleep(max(0.0, next_send - time.monotonic()))
+        if self.late:
+            self.stats.add('late', len(self.late))
+            self._post(self.late)
+
+    def _post(self, batch):
+        if not batch:
+            return
+        if self.args.format == 'csv':
+            body = '\n'.join(f"{e['key']},{e['pump_id']},{e['action']},{e['time']}" for e in batch)
+            content_type = 'text/csv'
+        else:
+            body = '\n'.join(json.dumps(e) for e in batch)
+            content_type = 'application/x-ndjson'
+        started = time.perf_counter()
+        try:
+            status, result = self.send(body.encode('utf-8'), content_type)
+        except Exception as e:  # شبکه/سرور در دسترس نیست
+            status, result = None, {'error': str(e)}
+        self.stats.record(len(batch), time.perf_counter() - started, status, result)
+
+
+class Stats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {'sent': 0, 'accepted': 0, 'duplicates': 0, 'rejected': 0,
+                       'late': 0, 'retried': 0, 'failed_requests': 0}
+        self.latencies = []
+        self.errors = []
+
+    def add(self, name, value):
+        with self._lock:
+            self.counts[name] += value
+
+    def record(self, sent, elapsed, status, result):
+        with self._lock:
+            self.counts['sent'] += sent
+            self.latencies.append(elapsed)
+            if status != 200:
+                self.counts['failed_requests'] += 1
+                if len(self.errors) < 5:
+                    self.errors.append((status, result.get('error')))
+                return
+            self.counts['accepted'] += result['accepted']
+            self.counts['duplicates'] += result['duplicates']
+            self.counts['rejected'] += len(result['rejected'])
+
+
+def http_sender(url, token):
+    def send(body, content_type):
+        request = urllib.request.Request(url.rstrip('/') + INGEST_PATH, data=body, method='POST', headers={
+            'Authorization': f'Bearer {token}',
+            'Content-Type': content_type,
+        })
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                return response.status, json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            return e.code, json.loads(e.read() or b'{}')
+    return send
+
+
+def local_setup(workdir, pump_count):
+    """دیتابیس موقت، توکن و test client برای حالت --local"""
+    import create_database as cd
+    from app import app
+    from database import connection
+    from database.ingest import create_ingest_token
+    from database.migrate import apply_migrations
+
+    connection.configure_pool(os.path.join(workdir, 'simulate.db'))
+    conn = connection.get_connection()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            cd.create_tables(conn)
+            conn.commit()
+            apply_migrations(conn, verbose=False)
+        conn.execute(
+            "INSERT INTO users (id, username, password, full_name, role) "
+            "VALUES (1, 'plc', 'x', 'شبیه‌ساز', 'user')"
+        )
+        conn.executemany(
+            'INSERT INTO pumps (id, pump_number, name) VALUES (?, ?, ?)',
+            [(i, i, f'پمپ {i}') for i in range(1, pump_count + 1)]
+        )
+        conn.commit()
+    finally:
+        conn.close()
+    token = create_ingest_token('simulator', 1)
+    lock = threading.Lock()
+
+    def send(body, content_type):
+        with lock:
+            client = app.test_client()
+        response = client.post(INGEST_PATH, data=body, content_type=content_type,
+                               headers={'Authorization': f'Bearer {token}'})
+        return response.status_code, response.get_json()
+    return send
+
+
+def local_verify():
+    """انتظار برای ادغام ژورنال و بررسی سازگاری تاریخچه و pumps.status"""
+    from database import connection
+    from database.event_journal import compact_journal
+
+    started = time.perf_counter()
+    while sum(compact_journal().values()):
+        pass
+    drain = time.perf_counter() - started
+    conn = connection.get_connection()
+    try:
+        history = conn.execute('SELECT COUNT(*) FROM pump_history').fetchone()[0]
+        mismatched = conn.execute('''
+            SELECT COUNT(*) FROM pumps p
+            WHERE p.status IS NOT COALESCE((
+                SELECT CASE WHEN action = 'ON' THEN 1 ELSE 0 END FROM pump_history
+                WHERE pump_id = p.id ORDER BY event_time DESC, id DESC LIMIT 1), 0)
+        ''').fetchone()[0]
+        pending = conn.execute('SELECT COUNT(*) FROM pump_event_journal').fetchone()[0]
+    finally:
+        conn.close()
+    return {'history_rows': history, 'status_mismatches': mismatched,
+            'journal_left': pending, 'final_drain_s': round(drain, 3)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='شبیه‌ساز PLC برای تست بار API دریافت رویداد')
+    parser.add_argument('--url', default='http://127.0.0.1:5000')
+    parser.add_argument('--token', help='توکن (scripts/ingest_tokens.py create ...)')
+    parser.add_argument('--local', action='store_true', help='اجرا روی دیتابیس موقت بدون سرور')
+    parser.add_argument('--pumps', type=int, default=200)
+    parser.add_argument('--controllers', type=int, default=4, help='تعداد PLCهای هم‌زمان')
+    parser.add_argument('--rate', type=float, default=6000, help='رویداد در دقیقه (مجموع)')
+    parser.add_argument('--duration', type=float, default=30, help='ثانیه')
+    parser.add_argument('--batch', type=int, default=100, help='رویداد در هر درخواست')
+    parser.add_argument('--late', type=float, default=0.05, help='سهم رویدادهای با تأخیر/بی‌ترتیب')
+    parser.add_argument('--retry', type=float, default=0.02, help='سهم دسته‌هایی که دوباره ارسال می‌شوند')
+    parser.add_argument('--format', choices=('jsonl', 'csv'), default='jsonl')
+    parser.add_argument('--seed', type=int, default=1403)
+    args = parser.parse_args(argv)
+
+    workdir = None
+    if args.local:
+        workdir = tempfile.TemporaryDirectory()
+        send = local_setup(workdir.name, args.pumps)
+    elif args.token:
+        send = http_sender(args.url, args.token)
+    else:
+        parser.error('--token یا --local لازم است')
+
+    pump_ids = list(range(1, args.pumps + 1))
+    stats = Stats()
+    controllers = [
+        Controller(f'plc{i + 1}', pump_ids[i::args.controllers], send, args, stats, args.seed + i)
+        for i in range(args.controllers)
+    ]
+    started = time.perf_counter()
+    for controller in controllers:
+        controller.start()
+    for controller in controllers:
+        controller.join()
+    elapsed = time.perf_counter() - started
+
+    counts = stats.counts
+    latencies = sorted(stats.latencies) or [0.0]
+    print(f"⏱️ {elapsed:.1f}s، {len(stats.latencies)} درخواست، "
+          f"{counts['sent'] / elapsed * 60:,.0f} رویداد در دقیقه ارسال شد")
+    print(f"  sent={counts['sent']} accepted={counts['accepted']} duplicates={counts['duplicates']} "
+          f"rejected={counts['rejected']} late={counts['late']} retried={counts['retried']} "
+          f"failed_requests={counts['failed_requests']}")
+    print(f"  latency p50={latencies[len(latencies) // 2] * 1000:.1f}ms "
+          f"p95={latencies[int(len(latencies) * 0.95)] * 1000:.1f}ms max={latencies[-1] * 1000:.1f}ms")
+    for status, error in stats.errors:
+        print(f"  ❌ {status}: {error}")
+
+    if args.local:
+        print(f"  {local_verify()}")
+        from database import connection
+        connection.configure_pool('pump_management.db')
+        workdir.cleanup()
+
+
+if __name__ == '__main__':
+    main()
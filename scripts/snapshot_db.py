@@ -0,0 +1,40 @@
+"""
+گرفتن اسنپ‌شات افزایشی از دیتابیس، اعمال سیاست نگهداری و حذف قطعه‌های بی‌استفاده
+
+برای اجرای ساعتی (Task Scheduler / cron) از ریشه پروژه:
+    python scripts/snapshot_db.py
+    python scripts/snapshot_db.py --list
+"""
+import argparse
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.snapshot_store import list_snapshots, snapshot_and_prune, store_usage
+
+
+def _mb(size):
+    return f"{size / 1048576:.1f} MB"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='اسنپ‌شات افزایشی دیتابیس')
+    parser.add_argument('--list', action='store_true', help='فقط نمایش اسنپ‌شات‌های موجود')
+    args = parser.parse_args()
+
+    if not args.list:
+        result = snapshot_and_prune()
+        print(f"✅ اسنپ‌شات {result['id']}: {result['new_chunks']}/{result['chunks']} قطعه جدید "
+              f"({_mb(result['new_bytes'])})")
+        if result['pruned']:
+            print(f"🗑️ {len(result['pruned'])} اسنپ‌شات قدیمی حذف شد، "
+                  f"{result['removed_chunks']} قطعه ({_mb(result['freed_bytes'])}) آزاد شد")
+
+    for manifest in list_snapshots():
+        print(f"  {manifest['id']}  {manifest['created_at']}  {_mb(manifest['size'])}")
+    count, logical, stored = store_usage()
+    print(f"📦 {count} اسنپ‌شات، حجم منطقی {_mb(logical)}، حجم روی دیسک {_mb(stored)}")
+
+
+if __name__ == '__main__':
+    main()
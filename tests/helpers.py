@@ -0,0 +1,61 @@
+"""Shared fixtures for tests that need an isolated SQLite database."""
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import create_database as cd
+from database import connection
+from database.migrate import apply_migrations
+from utils.date_utils import jalali_to_gregorian
+
+
+class TempDatabaseTestCase(unittest.TestCase):
+    """Points the connection pool at a fresh, fully migrated temp database."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = Path(self.tmpdir.name) / 'test.db'
+        connection.configure_pool(str(self.db_path))
+        self.conn = connection.get_connection()
+        cd.create_tables(self.conn)
+        self.conn.commit()
+        apply_migrations(self.conn, verbose=False)
+        self.conn.execute(
+            "INSERT INTO users (id, username, password, full_name, role) "
+            "VALUES (1, 'admin', 'x', 'مدیر', 'admin')"
+        )
+        self.conn.commit()
+
+    def tearDown(self):
+        self.conn.close()
+        connection.configure_pool('pump_management.db')
+        self.tmpdir.cleanup()
+
+    def add_pump(self, pump_id, well_status=None):
+        self.conn.execute(
+            'INSERT INTO pumps (id, pump_number, name) VALUES (?, ?, ?)',
+            (pump_id, pump_id, f'پمپ {pump_id}')
+        )
+        if well_status is not None:
+            self.conn.execute(
+                'INSERT INTO wells (id, well_number, name, pump_id, status) VALUES (?, ?, ?, ?, ?)',
+                (pump_id, pump_id, f'چاه {pump_id}', pump_id, well_status)
+            )
+        self.conn.commit()
+
+    def add_event(self, pump_id, action, jalali_datetime):
+        """Insert a raw pump_history row; `jalali_datetime` is 'YYYY/MM/DD HH:MM'."""
+        event_time = jalali_to_gregorian(f'{jalali_datetime}:00')
+        cur = self.conn.execute(
+            '''INSERT INTO pump_history
+               (pump_id, user_id, action, event_time, recorded_time, reason, notes, manual_time)
+               VALUES (?, 1, ?, ?, ?, 'test', '', 1)''',
+            (pump_id, action, event_time, event_time)
+        )
+        self.conn.commit()
+        return cur.lastrowid
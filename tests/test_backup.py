@@ -0,0 +1,237 @@
+import gzip
+import sqlite3
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from tests.helpers import TempDatabaseTestCase
+from utils import backup_utils
+from utils.backup_utils import create_backup, list_backups, restore_backup, verify_database_file
+
+
+class BackupTestCase(TempDatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.backups = tempfile.TemporaryDirectory()
+        self.addCleanup(self.backups.cleanup)
+        patcher = mock.patch.object(backup_utils, 'BACKUP_DIR', Path(self.backups.name))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        for pump_id in range(1, 51):
+            self.add_pump(pump_id, well_status='active')
+
+    def pump_count(self, path):
+        conn = sqlite3.connect(path)
+        try:
+            return conn.execute('SELECT COUNT(*) FROM pumps').fetchone()[0]
+        finally:
+            conn.close()
+
+
+class OnlineBackupTest(BackupTestCase):
+    def test_backup_is_verified_standalone_copy(self):
+        steps = []
+        path = create_backup(progress=lambda done, total: steps.append((done, total)),
+                             pages_per_step=2, pause=0)
+
+        self.assertIsNone(verify_database_file(path))
+        self.assertEqual(self.pump_count(path), 50)
+        conn = sqlite3.connect(path)
+        self.assertEqual(conn.execute('PRAGMA journal_mode').fetchone()[0], 'delete')
+        conn.close()
+        self.assertGreater(len(steps), 1)
+        self.assertEqual(steps[-1][0], steps[-1][1])
+        self.assertEqual(list_backups(), [path])
+
+    def test_compressed_backup_and_restore(self):
+        path = create_backup(compress=True, pause=0)
+        self.assertTrue(path.endswith('.gz'))
+        with gzip.open(path, 'rb') as f:
+            self.assertEqual(f.read(16), b'SQLite format 3\x00')
+        self.assertEqual(sorted(p.name for p in Path(self.backups.name).iterdir()), [Path(path).name])
+
+        self.conn.execute('DELETE FROM pumps')
+        self.conn.commit()
+        self.conn.close()
+        restore_backup(path)
+        self.assertEqual(self.pump_count(str(self.db_path)), 50)
+
+    def test_backup_finishes_while_another_connection_writes(self):
+        stop = threading.Event()
+
+        def writer():
+            conn = sqlite3.connect(str(self.db_path), timeout=5)
+            number = 1000
+            while not stop.is_set():
+                conn.execute('INSERT INTO pumps (id, pump_number, name) VALUES (?, ?, ?)',
+                             (number, number, 'x'))
+                conn.commit()
+                number += 1
+            conn.close()
+
+        thread = threading.Thread(target=writer)
+        thread.start()
+        try:
+            path = create_backup(pages_per_step=1, pause=0.001)
+        finally:
+            stop.set()
+            thread.join()
+        self.assertIsNone(verify_database_file(path))
+        self.assertGreaterEqual(self.pump_count(path), 50)
+
+    def test_verify_reports_damaged_file(self):
+        damaged = Path(self.backups.name) / 'damaged.db'
+        damaged.write_bytes(b'SQLite format 3\x00' + b'\xff' * 4096)
+        self.assertIsNotNone(verify_database_file(damaged))
+
+
+class RestoreTest(BackupTestCase):
+    def revision(self):
+        conn = sqlite3.connect(str(self.db_path))
+        try:
+            return conn.execute('SELECT revision FROM fleet_revision WHERE id = 1').fetchone()[0]
+        finally:
+            conn.close()
+
+    def test_restore_swaps_verified_file_and_reports_timings(self):
+        path = create_backup(pause=0)
+        self.conn.execute('DELETE FROM pumps')
+        self.conn.execute('UPDATE fleet_revision SET revision = 40 WHERE id = 1')
+        self.conn.execute("INSERT INTO jobs (id, kind) VALUES ('job-1', 'restore')")
+        self.conn.commit()
+        self.conn.close()
+
+        steps = []
+        result = restore_backup(path, progress=lambda done, total, message: steps.append(done))
+
+        self.assertEqual(self.pump_count(str(self.db_path)), 50)
+        self.assertEqual(set(result['timings']),
+                         {'stage', 'verify', 'emergency_backup', 'drain', 'swap', 'total'})
+        self.assertEqual(steps, [0, 1, 2, 3, 4])
+        self.assertEqual(self.pump_count(result['emergency']), 0)
+        # the job table and fleet revision follow the live database
+        self.assertEqual(self.revision(), 41)
+        conn = sqlite3.connect(str(self.db_path))
+        self.assertEqual(conn.execute('SELECT id FROM jobs').fetchall(), [('job-1',)])
+        conn.close()
+        self.assertEqual([p.name for p in self.db_path.parent.glob('.*restore')], [])
+
+    def test_pre_migration_backup_is_upgraded_before_swap(self):
+        import create_database as cd
+        from database.event_journal import compact_journal
+        from database.migrate import discover_migrations, pending_migrations
+        from database.operations import change_pump_status
+
+        # a backup taken before any versioned migration existed
+        old = Path(self.backups.name) / 'pump_management.db.bak_20230101000000'
+        conn = sqlite3.connect(str(old))
+        cd.create_tables(conn)
+        conn.execute("INSERT INTO users (id, username, password, full_name, role) "
+                     "VALUES (1, 'admin', 'x', 'مدیر', 'admin')")
+        conn.executemany('INSERT INTO pumps (id, pump_number, name) VALUES (?, ?, ?)',
+                         [(i, i, f'پمپ {i}') for i in range(1, 6)])
+        conn.commit()
+        conn.close()
+        self.conn.execute("INSERT INTO jobs (id, kind) VALUES ('job-1', 'restore')")
+        self.conn.commit()
+        self.conn.close()
+
+        result = restore_backup(str(old))
+
+        self.assertEqual(result['migrated'], [m[0] for m in discover_migrations()])
+        conn = sqlite3.connect(str(self.db_path))
+        try:
+            self.assertEqual(pending_migrations(conn), [])
+            self.assertEqual(conn.execute('SELECT id FROM jobs').fetchall(), [('job-1',)])
+        finally:
+            conn.close()
+        self.assertEqual(self.pump_count(str(self.db_path)), 5)
+        self.assertTrue(change_pump_status(1, 'ON', 1, 'تست', '')['success'])
+        self.assertEqual(compact_journal()['applied'], 1)
+
+    def test_restore_replaces_the_pool_database(self):
+        import os
+        from database import connection
+
+        path = create_backup(pause=0)
+        self.conn.execute('DELETE FROM pumps')
+        self.conn.commit()
+        self.conn.close()
+        # the app may be started from any directory: the pool opens a relative path
+        cwd = os.getcwd()
+        os.chdir(self.tmpdir.name)
+        try:
+            connection.configure_pool('test.db')
+            self.assertEqual(backup_utils.live_database_path(), self.db_path.resolve())
+            restore_backup(path)
+        finally:
+            os.chdir(cwd)
+            connection.configure_pool(str(self.db_path))
+        self.assertEqual(self.pump_count(str(self.db_path)), 50)
+
+    def test_damaged_backup_leaves_live_database_untouched(self):
+        damaged = Path(self.backups.name) / 'pump_management.db.bak_damaged'
+        damaged.write_bytes(b'SQLite format 3\x00' + b'\xff' * 4096)
+        self.conn.close()
+
+        with self.assertRaises(Exception):
+            restore_backup(str(damaged))
+        self.assertEqual(self.pump_count(str(self.db_path)), 50)
+        self.assertEqual(list_backups(), [str(damaged)])  # no emergency backup either
+
+    def test_restore_waits_for_connections_in_use(self):
+        path = create_backup(pause=0)
+        self.conn.execute('DELETE FROM pumps')
+        self.conn.commit()
+        # self.conn is still leased by this thread
+        with self.assertRaises(TimeoutError):
+            restore_backup(path, drain_timeout=0.1)
+        self.assertEqual(self.pump_count(str(self.db_path)), 0)
+
+
+class BackupJobTest(BackupTestCase):
+    def test_backup_route_runs_as_job(self):
+        from app import app
+        from utils import job_queue
+        queue = job_queue.JobQueue(max_workers=1)
+        self.addCleanup(queue.shutdown)
+        with mock.patch.object(job_queue, '_queue', queue):
+            client = app.test_client()
+            with client.session_transaction() as sess:
+                sess['user_id'] = 1
+                sess['role'] = 'admin'
+            response = client.post('/admin/setup/backup', data={'compress': '1'})
+            job = queue.wait(response.location.rsplit('/', 1)[1], timeout=10)
+
+        self.assertEqual(job['status'], 'succeeded')
+        self.assertTrue(job['result']['path'].endswith('.gz'))
+        self.assertEqual(list_backups(), [job['result']['path']])
+
+    def test_restore_route_runs_as_job(self):
+        from app import app
+        from utils import job_queue
+        path = create_backup(pause=0)
+        self.conn.execute('DELETE FROM pumps')
+        self.conn.commit()
+        self.conn.close()
+        queue = job_queue.JobQueue(max_workers=1)
+        self.addCleanup(queue.shutdown)
+        with mock.patch.object(job_queue, '_queue', queue):
+            client = app.test_client()
+            with client.session_transaction() as sess:
+                sess['user_id'] = 1
+                sess['role'] = 'admin'
+            rejected = client.post('/admin/setup/restore', data={'backup_file': '/etc/passwd', 'confirm': 'true'})
+            self.assertEqual(rejected.location, '/admin/setup')
+            response = client.post('/admin/setup/restore', data={'backup_file': path, 'confirm': 'true'})
+            job = queue.wait(response.location.rsplit('/', 1)[1], timeout=10)
+
+        self.assertEqual(job['status'], 'succeeded', job['error'])
+        self.assertEqual(job['result']['restored_from'], path)
+        self.assertEqual(self.pump_count(str(self.db_path)), 50)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import unittest
+from unittest import mock
+
+from tests.helpers import TempDatabaseTestCase
+from database import event_journal
+from database.event_journal import NOT_APPLIED_ERROR, catch_up
+from database.operations import batch_change_pump_status
+from utils.date_utils import jalali_to_gregorian
+
+
+class BatchStatusTest(TempDatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        for pump_id in range(1, 6):
+            self.add_pump(pump_id, well_status='active')
+        self.add_pump(6, well_status='inactive')
+
+    def statuses(self):
+        self.conn.rollback()
+        return dict(self.conn.execute('SELECT id, status FROM pumps').fetchall())
+
+    def test_zone_switched_with_one_bulk_read(self):
+        items = [{'pump_id': p, 'action': 'ON', 'reason': 'test'} for p in range(1, 6)]
+        with mock.patch.object(event_journal, 'load_projected_state',
+                               wraps=event_journal.load_projected_state) as load:
+            result = batch_change_pump_status(items, 1)
+        self.assertEqual(load.call_count, 1)
+        self.assertTrue(result['success'])
+        self.assertEqual(result['applied'], 5)
+        self.assertEqual([r['pump_id'] for r in result['results']], [1, 2, 3, 4, 5])
+
+        catch_up()
+        self.assertEqual([self.statuses()[p] for p in range(1, 6)], [1] * 5)
+
+    def test_atomic_batch_rejects_everything_on_one_error(self):
+        result = batch_change_pump_status([
+            {'pump_id': 1, 'action': 'ON', 'reason': 'test'},
+            {'pump_id': 6, 'action': 'ON', 'reason': 'test'},
+            {'pump_id': 99, 'action': 'ON', 'reason': 'test'},
+        ], 1)
+        self.assertFalse(result['success'])
+        self.assertEqual(result['applied'], 0)
+        errors = [r['error'] for r in result['results']]
+        self.assertEqual(errors[0], NOT_APPLIED_ERROR)
+        self.assertIn('inactive', errors[1])
+        self.assertEqual(errors[2], 'پمپ پیدا نشد')
+        self.assertEqual(self.conn.execute('SELECT COUNT(*) FROM pump_event_journal').fetchone()[0], 0)
+
+        # the rejected batch must not leak into the state seen by the next one
+        again = batch_change_pump_status([{'pump_id': 1, 'action': 'ON', 'reason': 'test'}], 1)
+        self.assertTrue(again['success'], again)
+
+    def test_partial_batch_and_event_times(self):
+        result = batch_change_pump_status([
+            {'pump_id': 2, 'action': 'ON', 'event_time': '1403/07/01 08:00', 'reason': 'outage'},
+            {'pump_id': 2, 'action': 'OFF', 'event_time': '1403/07/01 09:30:00', 'reason': 'outage'},
+            {'pump_id': 2, 'action': 'ON', 'event_time': '1403/07/01 09:00', 'reason': 'outage'},
+            {'pump_id': 3, 'action': 'ON', 'event_time': 'yesterday', 'reason': 'outage'},
+            {'pump_id': 3, 'action': 'ON', 'event_time': '2024-99-99 99:99:99', 'reason': 'outage'},
+            {'pump_id': 3, 'action': 'ON', 'event_time': '1403/13/40 10:00', 'reason': 'outage'},
+            {'pump_id': 3, 'action': 'ON', 'event_time': '1403/07/01 24:00', 'reason': 'outage'},
+        ], 1, atomic=False)
+        self.assertEqual([r['success'] for r in result['results']],
+                         [True, True, False, False, False, False, False])
+        for r in result['results'][3:]:
+            self.assertEqual(r['error'], 'زمان نامعتبر است')
+        pending = self.conn.execute(
+            'SELECT COUNT(*) FROM pump_event_journal WHERE pump_id = 3'
+        ).fetchone()[0]
+        self.assertEqual(pending, 0)
+
+        catch_up()
+        self.conn.rollback()
+        history = self.conn.execute(
+            'SELECT action, event_time, manual_time FROM pump_history WHERE pump_id = 2 ORDER BY event_time'
+        ).fetchall()
+        self.assertEqual([tuple(r) for r in history], [
+            ('ON', jalali_to_gregorian('1403/07/01 08:00:00'), 1),
+            ('OFF', jalali_to_gregorian('1403/07/01 09:30:00'), 1),
+        ])
+        self.assertEqual(self.statuses()[2], 0)
+
+    def test_route(self):
+        from app import app
+        client = app.test_client()
+        url = '/api/pumps/change-status/batch'
+        self.assertFalse(client.post(url, json={'items': []}).get_json()['success'])
+
+        with client.session_transaction() as sess:
+            sess['user_id'] = 1
+            sess['role'] = 'user'
+        self.assertEqual(client.post(url, json={'items': 'x'}).status_code, 400)
+        with mock.patch('config.Config.BATCH_STATUS_MAX_ITEMS', 2, create=True):
+            self.assertEqual(client.post(url, json={'items': [{}] * 3}).status_code, 400)
+
+        response = client.post(url, json={'items': [
+            {'pump_id': 4, 'action': 'OFF', 'reason': 'power cut'},
+            {'pump_id': 5, 'action': 'ON', 'reason': 'power cut'},
+        ]}).get_json()
+        self.assertTrue(response['success'], response)
+        client.get('/api/jobs')  # the operator's next request sees the change
+        self.assertEqual(self.statuses()[5], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
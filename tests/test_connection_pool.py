@@ -0,0 +1,105 @@
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from database import connection
+from database.models import get_db_connection
+
+
+class ConnectionPoolTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = Path(self.tmpdir.name) / 'pool_test.db'
+        self.pool = connection.configure_pool(str(self.db_path), max_idle=2)
+        conn = get_db_connection()
+        conn.execute('CREATE TABLE t (id INTEGER PRIMARY KEY, v TEXT)')
+        conn.commit()
+        conn.close()
+
+    def tearDown(self):
+        connection.configure_pool('pump_management.db')
+        self.tmpdir.cleanup()
+
+    def test_pragmas_applied(self):
+        conn = get_db_connection()
+        try:
+            self.assertEqual(conn.execute('PRAGMA journal_mode').fetchone()[0], 'wal')
+            self.assertEqual(conn.execute('PRAGMA synchronous').fetchone()[0], 1)  # NORMAL
+            self.assertEqual(conn.execute('PRAGMA busy_timeout').fetchone()[0], 5000)
+        finally:
+            conn.close()
+
+    def test_connection_is_reused(self):
+        first = get_db_connection()
+        raw = first.raw
+        first.close()
+        second = get_db_connection()
+        self.assertIs(second.raw, raw)
+        second.close()
+        self.assertEqual(self.pool.stats['opened'], 1)
+
+    def test_nested_leases_share_connection_and_transaction(self):
+        outer = get_db_connection()
+        outer.execute("INSERT INTO t (v) VALUES ('a')")
+        inner = get_db_connection()
+        self.assertIs(inner.raw, outer.raw)
+        inner.close()
+        # closing the inner lease must not discard the outer transaction
+        self.assertTrue(outer.in_transaction)
+        outer.commit()
+        outer.close()
+
+        conn = get_db_connection()
+        self.assertEqual(conn.execute('SELECT COUNT(*) FROM t').fetchone()[0], 1)
+        conn.close()
+
+    def test_uncommitted_work_is_rolled_back_on_close(self):
+        conn = get_db_connection()
+        conn.execute("INSERT INTO t (v) VALUES ('lost')")
+        conn.close()
+
+        conn = get_db_connection()
+        self.assertFalse(conn.in_transaction)
+        self.assertEqual(conn.execute('SELECT COUNT(*) FROM t').fetchone()[0], 0)
+        conn.close()
+
+    def test_request_context_releases_leaked_connection(self):
+        from flask import Flask
+        app = Flask(__name__)
+        connection.init_app(app)
+        with app.app_context():
+            get_db_connection()  # never closed
+            self.assertEqual(self.pool.stats['in_use'], 1)
+        self.assertEqual(self.pool.stats['in_use'], 0)
+
+    def test_pause_waits_for_leases_and_blocks_new_ones(self):
+        conn = get_db_connection()
+        with self.assertRaises(TimeoutError):
+            with self.pool.paused(timeout=0.05):
+                pass
+        conn.close()
+
+        acquired = threading.Event()
+
+        def worker():
+            lease = get_db_connection()
+            acquired.set()
+            lease.close()
+
+        with self.pool.paused(timeout=1):
+            self.assertEqual(self.pool._idle, [])
+            thread = threading.Thread(target=worker)
+            thread.start()
+            self.assertFalse(acquired.wait(0.1))
+        thread.join(timeout=5)
+        self.assertTrue(acquired.is_set())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import random
+import unittest
+
+from tests.helpers import TempDatabaseTestCase
+from database.daily_hours import get_daily_hours, rebuild_daily_hours, refresh_pump_days
+from database.operating_hours import compute_daily_operating_seconds
+from database.event_journal import catch_up
+from database.operations import change_pump_status
+
+
+class DailyHoursRollupTest(TempDatabaseTestCase):
+    RANGE = ('1403/06/25', '1403/08/05')
+
+    def setUp(self):
+        super().setUp()
+        for pump_id in (1, 2, 3):
+            self.add_pump(pump_id)
+
+    def assertRollupMatchesEngine(self):
+        expected = compute_daily_operating_seconds(*self.RANGE)
+        self.assertEqual(get_daily_hours(*self.RANGE), expected)
+
+    def insert_and_refresh(self, pump_id, action, jalali_datetime):
+        record_id = self.add_event(pump_id, action, jalali_datetime)
+        event_time = self.conn.execute(
+            'SELECT event_time FROM pump_history WHERE id = ?', (record_id,)
+        ).fetchone()[0]
+        refresh_pump_days(self.conn, pump_id, event_time)
+        self.conn.commit()
+        return record_id, event_time
+
+    def test_change_pump_status_maintains_rollup(self):
+        for action, when in [('ON', ('1403/07/01', '08:00')),
+                             ('OFF', ('1403/07/03', '17:30')),
+                             ('ON', ('1403/07/10', '06:00'))]:
+            result = change_pump_status(1, action, 1, 'test', '', manual_time=True,
+                                        action_date_jalali=when[0], action_time=when[1])
+            self.assertTrue(result['success'], result)
+        catch_up()
+        self.assertRollupMatchesEngine()
+
+    def test_out_of_order_insert_and_delete(self):
+        self.insert_and_refresh(2, 'ON', '1403/07/01 08:00')
+        self.insert_and_refresh(2, 'OFF', '1403/07/20 08:00')
+        # back-filled pair in the middle of an existing ON interval
+        self.insert_and_refresh(2, 'OFF', '1403/07/05 10:00')
+        record_id, event_time = self.insert_and_refresh(2, 'ON', '1403/07/07 11:00')
+        self.assertRollupMatchesEngine()
+
+        self.conn.execute('DELETE FROM pump_history WHERE id = ?', (record_id,))
+        refresh_pump_days(self.conn, 2, event_time)
+        self.conn.commit()
+        self.assertRollupMatchesEngine()
+
+    def test_deleting_last_event_drops_trailing_days(self):
+        self.insert_and_refresh(3, 'ON', '1403/07/01 08:00')
+        record_id, event_time = self.insert_and_refresh(3, 'OFF', '1403/07/15 08:00')
+        self.conn.execute('DELETE FROM pump_history WHERE id = ?', (record_id,))
+        refresh_pump_days(self.conn, 3, event_time)
+        self.conn.commit()
+        self.assertRollupMatchesEngine()
+
+    def test_rebuild_matches_engine(self):
+        rng = random.Random(7)
+        for pump_id in (1, 2, 3):
+            on = False
+            for day in sorted(rng.sample(range(1, 31), 8)):
+                on = not on
+                self.add_event(pump_id, 'ON' if on else 'OFF',
+                               f'1403/07/{day:02d} {rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}')
+        self.assertGreater(rebuild_daily_hours(), 0)
+        self.assertRollupMatchesEngine()
+
+    def test_migration_backfill_matches_rebuild(self):
+        from database.migrate import discover_migrations, _load_upgrade
+
+        rng = random.Random(11)
+        for pump_id in (1, 2, 3):
+            on = rng.random() < 0.5
+            for day in sorted(rng.sample(range(1, 31), 9)):
+                on = not on
+                self.add_event(pump_id, 'ON' if on else 'OFF',
+                               f'1403/07/{day:02d} {rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}')
+        rows = 'SELECT * FROM pump_daily_hours ORDER BY pump_id, jalali_date'
+        rebuild_daily_hours()
+        expected = [tuple(r) for r in self.conn.execute(rows)]
+        self.assertGreater(len(expected), 20)
+
+        version, _, path = next(m for m in discover_migrations() if m[0] == 15)
+        _load_upgrade(version, path)(self.conn)
+        self.conn.commit()
+        self.assertEqual([tuple(r) for r in self.conn.execute(rows)], expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
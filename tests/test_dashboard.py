@@ -0,0 +1,156 @@
+import threading
+import unittest
+
+from tests.helpers import TempDatabaseTestCase
+from database.dashboard import DashboardSnapshotCache, get_dashboard_data
+from database.wells_operations import record_well_event
+from database.event_journal import catch_up
+from database.operations import change_pump_status
+
+
+class DashboardReadModelTest(TempDatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.add_pump(1, well_status='active')
+        self.add_pump(2, well_status='active')
+        self.add_pump(3, well_status='maintenance')
+        self.add_pump(4, well_status='inactive')
+        self.add_pump(5)  # no well: counted as an active well
+        for pump_id in (1, 5):
+            result = change_pump_status(pump_id, 'ON', 1, 'test', '')
+            self.assertTrue(result['success'], result)
+        catch_up()
+
+    def test_pumps_and_stats(self):
+        data = get_dashboard_data()
+        self.assertEqual(data['stats'], {'on': 2, 'off': 1, 'maintenance': 1, 'inactive': 1, 'total': 5})
+
+        pumps = {p['pump_number']: p for p in data['pumps']}
+        self.assertEqual(list(pumps), [1, 2, 3, 4, 5])
+        self.assertEqual((pumps[1]['status'], pumps[1]['has_history']), (1, 1))
+        self.assertEqual((pumps[2]['status'], pumps[2]['has_history']), (0, 0))
+        self.assertEqual(pumps[2]['last_change_jalali'], 'بدون تاریخچه')
+        self.assertEqual((pumps[3]['well_id'], pumps[3]['well_status']), (3, 'maintenance'))
+        self.assertEqual((pumps[5]['well_id'], pumps[5]['well_status']), (None, 'active'))
+
+    def test_single_query(self):
+        statements = []
+        self.conn.raw.set_trace_callback(statements.append)
+        try:
+            get_dashboard_data(self.conn)
+        finally:
+            self.conn.raw.set_trace_callback(None)
+        self.assertEqual(len(statements), 1)
+
+    def test_empty_fleet(self):
+        self.conn.execute('DELETE FROM pumps')
+        self.conn.commit()
+        data = get_dashboard_data()
+        self.assertEqual(data, {'pumps': [], 'stats': {
+            'on': 0, 'off': 0, 'maintenance': 0, 'inactive': 0, 'total': 0}})
+
+
+class DashboardSnapshotCacheTest(TempDatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.add_pump(1, well_status='active')
+        self.add_pump(2, well_status='active')
+        self.cache = DashboardSnapshotCache()
+
+    def test_reuses_snapshot_until_a_write(self):
+        first = self.cache.get()
+        self.assertIs(self.cache.get(), first)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+        change_pump_status(1, 'ON', 1, 'test', '')
+        catch_up()
+        second = self.cache.get()
+        self.assertIsNot(second, first)
+        self.assertEqual(second['revision'], first['revision'] + 1)
+        self.assertEqual(second['stats']['on'], 1)
+
+        record_well_event({
+            'well_id': 2, 'recorded_by_user_id': 1, 'operation_type': 'maintenance',
+            'operation_date': '1403/07/01', 'well_updates': {'status': 'maintenance'},
+        })
+        third = self.cache.get()
+        self.assertEqual(third['stats']['maintenance'], 1)
+        self.assertEqual(self.cache.stats()['misses'], 3)
+
+    def test_failed_write_does_not_invalidate(self):
+        snapshot = self.cache.get()
+        result = change_pump_status(99, 'ON', 1, 'test', '')
+        self.assertFalse(result['success'])
+        self.assertIs(self.cache.get(), snapshot)
+
+    def test_concurrent_readers_share_one_computation(self):
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self.cache.get())) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(self.cache.misses, 1)
+        self.assertTrue(all(r is results[0] for r in results))
+
+    def test_changes_since_returns_only_changed_pumps(self):
+        revision = self.cache.get()['revision']
+        change_pump_status(2, 'ON', 1, 'test', '')
+        catch_up()
+
+        delta = self.cache.changes_since(revision)
+        self.assertFalse(delta['full'])
+        self.assertEqual([p['id'] for p in delta['pumps']], [2])
+        self.assertEqual(delta['stats']['on'], 1)
+
+        self.assertEqual(self.cache.changes_since(delta['revision'])['pumps'], [])
+        # unknown or expired revisions fall back to the full state
+        for since in (None, revision - 100):
+            delta = self.cache.changes_since(since)
+            self.assertTrue(delta['full'])
+            self.assertEqual(len(delta['pumps']), 2)
+
+
+class DashboardLiveApiTest(TempDatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.add_pump(1, well_status='active')
+        self.add_pump(2, well_status='active')
+        from app import app
+        self.client = app.test_client()
+        with self.client.session_transaction() as sess:
+            sess['user_id'] = 1
+            sess['role'] = 'admin'
+
+    def test_state_delta_after_status_change(self):
+        state = self.client.get('/api/dashboard/state').get_json()
+        self.assertTrue(state['full'])
+        self.assertIn('data-pump-col="1"', state['pumps'][0]['html'])
+
+        change_pump_status(1, 'ON', 1, 'test', '')
+        catch_up()
+        delta = self.client.get(f"/api/dashboard/state?since={state['revision']}").get_json()
+        self.assertEqual(delta['revision'], state['revision'] + 1)
+        self.assertEqual([(p['id'], p['status']) for p in delta['pumps']], [(1, 1)])
+
+    def test_long_poll_times_out_without_changes(self):
+        revision = self.client.get('/api/dashboard/state').get_json()['revision']
+        delta = self.client.get(f'/api/dashboard/state?since={revision}&wait=1').get_json()
+        self.assertEqual((delta['revision'], delta['pumps'], delta['full']), (revision, [], False))
+
+    def test_stream_sends_delta_event(self):
+        revision = self.client.get('/api/dashboard/state').get_json()['revision']
+        change_pump_status(2, 'ON', 1, 'test', '')
+        catch_up()
+        response = self.client.get('/api/dashboard/stream', headers={'Last-Event-ID': str(revision)})
+        self.assertEqual(response.mimetype, 'text/event-stream')
+        chunks = response.response
+        self.assertEqual(next(chunks), b'retry: 3000\n\n')
+        event = next(chunks).decode('utf-8')
+        response.close()
+        self.assertTrue(event.startswith(f'id: {revision + 1}\nevent: delta\n'))
+        self.assertIn('"removed": []', event)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import random
+import sys
+import unittest
+from datetime import datetime, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import numpy as np
+import pandas as pd
+
+from utils import date_utils
+from utils.date_utils import (
+    gregorian_to_jalali, gregorian_to_jalali_array, gregorian_to_jalali_many,
+    jalali_to_gregorian, parse_jalali_datetime,
+)
+
+
+class FastConversionTest(unittest.TestCase):
+    def test_matches_jdatetime_path(self):
+        rnd = random.Random(7)
+        start = datetime(1921, 3, 21)
+        for _ in range(5000):
+            moment = start + timedelta(seconds=rnd.randrange(200 * 365 * 86400))
+            text = moment.strftime('%Y-%m-%d %H:%M:%S')
+            expected = date_utils._jdatetime_gregorian_to_jalali(text)
+            self.assertEqual(gregorian_to_jalali(text), expected)
+            self.assertEqual(gregorian_to_jalali(moment), expected)
+            self.assertEqual(jalali_to_gregorian(expected), text)
+
+    def test_known_dates(self):
+        self.assertEqual(gregorian_to_jalali('2024-09-22 14:00:00'), '1403/07/01 14:00:00')
+        self.assertEqual(gregorian_to_jalali('2024-09-22'), '1403/07/01 00:00:00')
+        self.assertEqual(gregorian_to_jalali('2024-09-22 14:00:00', include_time=False), '1403/07/01')
+        self.assertEqual(jalali_to_gregorian('1403/12/30 23:59:59'), '2025-03-20 23:59:59')  # leap Esfand
+        self.assertEqual(jalali_to_gregorian('1403/06/31'), '2024-09-21 00:00:00')
+
+    def test_invalid_input_falls_back_unchanged(self):
+        for value in ('2024-02-30 10:00:00', '2024-02-01 24:00:00', 'x', '2024-10-01 08:00:00.123'):
+            self.assertEqual(gregorian_to_jalali(value), value)
+        for value in ('1402/12/30', '1403/07/31 10:00:00', '1403/13/01'):
+            self.assertEqual(jalali_to_gregorian(value), value)
+
+    def test_outside_table_uses_jdatetime(self):
+        self.assertEqual(gregorian_to_jalali('1900-03-21 00:00:00'),
+                         date_utils._jdatetime_gregorian_to_jalali('1900-03-21 00:00:00'))
+        self.assertEqual(jalali_to_gregorian('1200/01/01'), '1821-03-21 00:00:00')
+
+
+class BatchConversionTest(unittest.TestCase):
+    stamps = ['2024-09-22 14:00:00', None, '2024-09-23 00:00:05', '2024-09-22 14:00:00']
+    expected = ['1403/07/01 14:00:00', None, '1403/07/02 00:00:05', '1403/07/01 14:00:00']
+
+    def test_list(self):
+        self.assertEqual(gregorian_to_jalali_many(self.stamps), self.expected)
+
+    def test_series_of_strings_keeps_index(self):
+        series = pd.Series(self.stamps, index=[10, 11, 12, 13], name='event_time')
+        result = gregorian_to_jalali_array(series)
+        self.assertEqual(list(result), self.expected)
+        self.assertEqual(list(result.index), [10, 11, 12, 13])
+        self.assertEqual(result.name, 'event_time')
+
+    def test_datetime64(self):
+        series = pd.to_datetime(pd.Series(self.stamps))
+        self.assertEqual(list(gregorian_to_jalali_array(series)), self.expected)
+        dates = gregorian_to_jalali_array(series.to_numpy(), include_time=False)
+        self.assertIsInstance(dates, np.ndarray)
+        self.assertEqual(list(dates), ['1403/07/01', None, '1403/07/02', '1403/07/01'])
+
+
+class StrictParseTest(unittest.TestCase):
+    def test_valid(self):
+        self.assertEqual(parse_jalali_datetime('1403/07/01 08:00'), jalali_to_gregorian('1403/07/01 08:00:00'))
+        self.assertEqual(parse_jalali_datetime(' 1403/7/1 8:05:09 '), jalali_to_gregorian('1403/07/01 08:05:09'))
+
+    def test_invalid(self):
+        for text in ('yesterday', '2024-99-99 99:99:99', '1403/13/40 10:00', '1403/07/01 24:00',
+                     '1403/07/01 10:60', '1403/12/31 10:00', '1403/07/01', '', None):
+            self.assertIsNone(parse_jalali_datetime(text), text)
+
+
+if __name__ == '__main__':
+    unittest.main()
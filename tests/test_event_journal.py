@@ -0,0 +1,241 @@
+import threading
+import time
+import unittest
+from unittest import mock
+
+from tests.helpers import TempDatabaseTestCase
+from database import event_journal
+from database.event_journal import JournalWriter, append_events, catch_up, compact_journal
+from database.operations import change_pump_status
+from utils.date_utils import jalali_to_gregorian
+
+
+class EventJournalTest(TempDatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        for pump_id in (1, 2, 3):
+            self.add_pump(pump_id, well_status='active')
+        self.add_pump(4, well_status='maintenance')
+
+    def pump_status(self, pump_id):
+        return self.conn.execute('SELECT status FROM pumps WHERE id = ?', (pump_id,)).fetchone()[0]
+
+    def history(self, pump_id):
+        return [tuple(r) for r in self.conn.execute(
+            'SELECT action, event_time FROM pump_history WHERE pump_id = ? ORDER BY event_time', (pump_id,))]
+
+    def pending(self):
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM pump_event_journal WHERE status = 'pending'").fetchone()[0]
+
+    def test_validates_against_pending_events(self):
+        self.assertTrue(change_pump_status(1, 'ON', 1, 'test', '')['success'])
+        # the first ON is still only in the journal
+        again = change_pump_status(1, 'ON', 1, 'test', '')
+        self.assertEqual(again, {'success': False, 'error': 'پمپ در حال حاضر روشن است'})
+        self.assertTrue(change_pump_status(1, 'OFF', 1, 'test', '')['success'])
+
+        self.assertIn('maintenance', change_pump_status(4, 'ON', 1, 'test', '')['error'])
+        self.assertEqual(change_pump_status(99, 'ON', 1, 'test', '')['error'], 'پمپ پیدا نشد')
+        self.assertFalse(change_pump_status(2, 'START', 1, 'test', '')['success'])
+
+        catch_up()
+        self.assertEqual(self.pending(), 0)
+        self.assertEqual([a for a, _ in self.history(1)], ['ON', 'OFF'])
+        self.assertEqual(self.pump_status(1), 0)
+
+    def test_manual_time_must_follow_pending_event(self):
+        ok = change_pump_status(2, 'ON', 1, 'test', '', manual_time=True,
+                                action_date_jalali='1403/07/10', action_time='08:00')
+        self.assertTrue(ok['success'], ok)
+        earlier = change_pump_status(2, 'OFF', 1, 'test', '', manual_time=True,
+                                     action_date_jalali='1403/07/09', action_time='08:00')
+        self.assertIn('1403/07/10 08:00', earlier['error'])
+
+    def test_compaction_folds_into_history_and_pumps(self):
+        revision = self.conn.execute('SELECT revision FROM fleet_revision').fetchone()[0]
+        for pump_id in (1, 2, 3):
+            self.assertTrue(change_pump_status(pump_id, 'ON', 1, 'test', '')['success'])
+
+        self.assertEqual(compact_journal(), {'applied': 3, 'rejected': 0})
+        self.conn.rollback()
+        self.assertEqual([self.pump_status(p) for p in (1, 2, 3)], [1, 1, 1])
+        self.assertEqual(self.pending(), 0)
+        self.assertEqual(self.conn.execute('SELECT revision FROM fleet_revision').fetchone()[0],
+                         revision + 1)
+        self.assertEqual(compact_journal(), {'applied': 0, 'rejected': 0})
+
+    def test_compaction_rejects_manual_event_overtaken_by_history(self):
+        self.assertTrue(change_pump_status(3, 'ON', 1, 'test', '', manual_time=True,
+                                           action_date_jalali='1403/07/10', action_time='08:00')['success'])
+        # history edited directly between journaling and compaction
+        self.add_event(3, 'ON', '1403/07/12 08:00')
+
+        self.assertEqual(compact_journal(), {'applied': 0, 'rejected': 1})
+        self.conn.rollback()
+        self.assertEqual(self.history(3), [('ON', jalali_to_gregorian('1403/07/12 08:00:00'))])
+        error = self.conn.execute("SELECT error FROM pump_event_journal WHERE status = 'rejected'").fetchone()[0]
+        self.assertIn('1403/07/12', error)
+
+    def test_invalid_manual_time_is_not_journaled(self):
+        result = change_pump_status(1, 'ON', 1, 'test', '', manual_time=True,
+                                    action_date_jalali='1403/13/40', action_time='10:00')
+        self.assertEqual(result, {'success': False, 'error': 'زمان نامعتبر است'})
+        self.assertEqual(self.pending(), 0)
+
+    def test_unusable_row_does_not_block_the_journal(self):
+        from database.event_journal import insert_events
+
+        now = '2024-10-01 08:00:00'
+        insert_events(self.conn, [
+            {'pump_id': 1, 'action': 'ON', 'event_time': '1403/13/40 10:00:00', 'recorded_time': now, 'user_id': 1, 'reason': 'test'},
+            {'pump_id': 2, 'action': 'ON', 'event_time': now, 'recorded_time': now, 'user_id': 1, 'reason': 'test'},
+        ])
+        self.conn.commit()
+        self.assertEqual(compact_journal(), {'applied': 1, 'rejected': 1})
+        self.conn.rollback()
+        self.assertEqual(self.pump_status(2), 1)
+        self.assertEqual(self.history(1), [])
+        error = self.conn.execute("SELECT error FROM pump_event_journal WHERE status = 'rejected'").fetchone()[0]
+        self.assertEqual(error, 'زمان نامعتبر است')
+
+        # a pump whose compaction fails only rejects its own events
+        insert_events(self.conn, [
+            {'pump_id': 1, 'action': 'ON', 'event_time': now, 'recorded_time': now, 'user_id': 1, 'reason': 'test'},
+            {'pump_id': 3, 'action': 'ON', 'event_time': now, 'recorded_time': now, 'user_id': 1, 'reason': 'test'},
+        ])
+        self.conn.commit()
+        real_refresh = event_journal.refresh_pump_days
+
+        def refresh(conn, pump_id, *args):
+            if pump_id == 3:
+                raise ValueError('broken')
+            return real_refresh(conn, pump_id, *args)
+
+        with mock.patch.object(event_journal, 'refresh_pump_days', side_effect=refresh):
+            self.assertEqual(compact_journal(), {'applied': 1, 'rejected': 1})
+        self.conn.rollback()
+        self.assertEqual((self.pump_status(1), self.pump_status(3)), (1, 0))
+        self.assertEqual(self.history(3), [])
+        self.assertEqual(self.pending(), 0)
+
+    def test_background_compactor_applies_events(self):
+        self.assertTrue(change_pump_status(2, 'ON', 1, 'test', '')['success'])
+        deadline = time.monotonic() + 5
+        while self.pending() and time.monotonic() < deadline:
+            self.conn.rollback()
+            time.sleep(0.05)
+        self.assertEqual(self.pending(), 0)
+        self.assertEqual(self.pump_status(2), 1)
+
+    def test_concurrent_submissions_are_group_committed(self):
+        writer = JournalWriter(batch_size=100, max_delay=0.2)
+        now = '2024-01-01 08:00:00'
+        results = []
+        with mock.patch.object(event_journal, 'load_projected_state', wraps=event_journal.load_projected_state) as load:
+            threads = [threading.Thread(target=lambda i=i: results.extend(writer.submit([{
+                'pump_id': 1 + i % 3, 'action': 'ON' if i < 3 else 'OFF',
+                'event_time': now, 'recorded_time': now,
+            }]))) for i in range(6)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        self.assertEqual(len(results), 6)
+        self.assertEqual(sum(r['success'] for r in results), 6)
+        self.assertLess(load.call_count, 6)
+
+    def test_operator_reads_own_write_on_next_request(self):
+        from app import app
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess['user_id'] = 1
+            sess['role'] = 'admin'
+        with mock.patch.object(event_journal, '_get_compactor') as compactor:
+            response = client.post('/pump/change-status', json={'pump_id': 1, 'action': 'ON', 'reason': 'test'})
+            self.assertTrue(response.get_json()['success'])
+            compactor.return_value.poke.assert_called()
+            self.assertEqual(self.pending(), 1)
+            self.conn.rollback()
+
+            client.get('/api/jobs')
+        self.assertEqual(self.pending(), 0)
+        self.assertEqual(self.pump_status(1), 1)
+        with client.session_transaction() as sess:
+            self.assertNotIn('journal_seq', sess)
+
+    def test_history_import_sees_pending_events(self):
+        import pandas as pd
+        from utils.history_import import import_history_dataframe
+
+        ok = change_pump_status(1, 'ON', 1, 'test', '', manual_time=True,
+                                action_date_jalali='1403/07/02', action_time='10:00')
+        self.assertTrue(ok['success'], ok)
+        df = pd.DataFrame([[1, 'ON', '1403/07/03', '08:00', 'r']],
+                          columns=['Pump_Number', 'Action', 'Date_Jalali', 'Time_Jalali', 'Reason'])
+        result = import_history_dataframe(df, user_id=1)
+
+        self.assertEqual(result['success_count'], 0)
+        self.assertTrue(any('مغایرت منطقی' in e for e in result['errors']), result['errors'])
+        # the import was checked against the operator's event, which is still applied
+        self.assertEqual(compact_journal(), {'applied': 1, 'rejected': 0})
+        self.conn.rollback()
+        self.assertEqual(self.history(1), [('ON', jalali_to_gregorian('1403/07/02 10:00:00'))])
+
+    def test_record_delete_sees_pending_events(self):
+        from blueprints.records_management import can_delete_record, delete_pump_record
+
+        record_id = self.add_event(1, 'ON', '1403/07/01 08:00')
+        self.conn.execute('UPDATE pumps SET status = 1 WHERE id = 1')
+        self.conn.commit()
+        self.assertTrue(change_pump_status(1, 'OFF', 1, 'test', '')['success'])
+
+        # the permission check only reads: the journal is left to the compactor
+        self.assertEqual(can_delete_record(record_id, 1, 'admin'), (False, 'فقط آخرین رکورد قابل حذف است'))
+        self.assertEqual(self.pending(), 1)
+        self.assertEqual(delete_pump_record(record_id, 'test', 1), (False, 'فقط آخرین رکورد قابل حذف است'))
+        self.conn.rollback()
+        self.assertEqual(self.pending(), 1)
+        compact_journal()
+        self.assertEqual([a for a, _ in self.history(1)], ['ON', 'OFF'])
+        self.assertEqual(self.pump_status(1), 0)
+
+    def test_rejected_event_is_shown_to_operator(self):
+        from app import app
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess['user_id'] = 1
+            sess['role'] = 'admin'
+        with mock.patch.object(event_journal, '_get_compactor'):
+            response = client.post('/pump/change-status', json={
+                'pump_id': 3, 'action': 'ON', 'reason': 'test', 'manual_time': True,
+                'action_date_jalali': '1403/07/10', 'action_time': '08:00'})
+            self.assertTrue(response.get_json()['success'], response.get_json())
+            # a direct history write that bypassed the journal
+            self.add_event(3, 'ON', '1403/07/12 08:00')
+
+            client.get('/api/jobs')
+            with client.session_transaction() as sess:
+                flashes = sess.get('_flashes', [])
+                sess.pop('_flashes', None)
+            self.assertEqual(len(flashes), 1)
+            self.assertEqual(flashes[0][0], 'error')
+            self.assertIn('1403/07/10 08:00', flashes[0][1])
+
+            client.get('/api/jobs')
+            with client.session_transaction() as sess:
+                self.assertNotIn('_flashes', sess)
+
+    def test_append_events_returns_results_in_order(self):
+        now = '2024-01-01 08:00:00'
+        results = append_events([
+            {'pump_id': 1, 'action': 'ON', 'event_time': now, 'recorded_time': now, 'user_id': 1, 'reason': 'test'},
+            {'pump_id': 1, 'action': 'ON', 'event_time': now, 'recorded_time': now, 'user_id': 1, 'reason': 'test'},
+            {'pump_id': 2, 'action': 'ON', 'event_time': now, 'recorded_time': now, 'source': 'plc'},
+        ])
+        self.assertEqual([r['success'] for r in results], [True, False, True])
+        self.assertLess(results[0]['journal_id'], results[2]['journal_id'])
+
+
+if __name__ == '__main__':
+    unittest.main()
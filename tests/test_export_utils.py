@@ -0,0 +1,136 @@
+import csv
+import importlib.util
+import io
+import unittest
+from unittest import mock
+
+from openpyxl import load_workbook
+
+from tests.helpers import TempDatabaseTestCase
+from utils import export_utils
+from utils.export_utils import write_arrow_stream, write_excel_stream
+
+HAS_PYARROW = importlib.util.find_spec('pyarrow') is not None
+
+
+class ExcelStreamTest(unittest.TestCase):
+    def test_title_header_rows_and_widths(self):
+        rows = ([i, f'پمپ {i}', None] for i in range(1, 6))
+        with write_excel_stream(['شماره', 'نام', 'توضیحات'], rows, 'عنوان', 'برگه',
+                                highlights={1: {1}}) as output:
+            sheet = load_workbook(output)['برگه']
+
+        self.assertEqual(sheet['A1'].value, 'عنوان')
+        self.assertTrue(sheet['A1'].font.bold)
+        self.assertEqual([str(r) for r in sheet.merged_cells.ranges], ['A1:C1'])
+        self.assertEqual([c.value for c in sheet[2]], ['شماره', 'نام', 'توضیحات'])
+        self.assertEqual([c.value for c in sheet[4]], [2, 'پمپ 2', None])
+        self.assertEqual(sheet.max_row, 7)
+        self.assertEqual(sheet['B4'].fill.fgColor.rgb, '00FFFF00')
+        self.assertNotEqual(sheet['B3'].fill.fgColor.rgb, '00FFFF00')
+        self.assertEqual(sheet.column_dimensions['B'].width, len('پمپ 1') + 2)
+        self.assertEqual(sheet.column_dimensions['C'].width, len('توضیحات') + 2)
+
+    def test_widths_use_only_sampled_rows(self):
+        rows = [['x'], ['x' * 5], ['x' * 40]]
+        with mock.patch.object(export_utils, 'WIDTH_SAMPLE_ROWS', 2), \
+                write_excel_stream(['c'], rows, 't', 's') as output:
+            sheet = load_workbook(output)['s']
+        self.assertEqual(sheet.column_dimensions['A'].width, 7)
+        self.assertEqual(sheet['A5'].value, 'x' * 40)
+
+
+@unittest.skipUnless(HAS_PYARROW, 'pyarrow is not installed')
+class ArrowStreamTest(unittest.TestCase):
+    def test_parquet_batches_and_mixed_columns(self):
+        import pyarrow.parquet as pq
+
+        rows = [[i, '' if i % 2 else i * 1.5, None] for i in range(7)]
+        with mock.patch.object(export_utils, 'ARROW_BATCH_ROWS', 3), \
+                write_arrow_stream(['n', 'mixed', 'empty'], rows, 'parquet') as output:
+            table = pq.read_table(output)
+        self.assertEqual(table.column('n').to_pylist(), list(range(7)))
+        self.assertEqual(str(table.schema.field('mixed').type), 'string')
+        self.assertEqual(table.column('mixed').to_pylist()[:2], ['0.0', ''])
+        self.assertEqual(table.column('empty').null_count, 7)
+
+    def test_arrow_ipc_file(self):
+        import pyarrow as pa
+
+        with write_arrow_stream(['شماره', 'نام'], [[1, 'الف'], [2, 'ب']], 'arrow') as output:
+            table = pa.ipc.open_file(output).read_all()
+        self.assertEqual(table.to_pydict(), {'شماره': [1, 2], 'نام': ['الف', 'ب']})
+
+
+class FullHistoryExportTest(TempDatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        from app import app
+        self.client = app.test_client()
+        with self.client.session_transaction() as sess:
+            sess['user_id'] = 1
+            sess['role'] = 'admin'
+
+    def test_export_streams_all_rows(self):
+        self.add_pump(1)
+        for day in range(1, 11):
+            self.add_event(1, 'ON', f'1403/07/{day:02d} 08:00')
+        # several keyset batches must be stitched into one sheet
+        with mock.patch('database.reports.FULL_HISTORY_BATCH_SIZE', 3):
+            response = self.client.get(
+                '/report/full-history/export?from_date=1403/07/01&to_date=1403/07/30&pump_id=all'
+            )
+        self.assertEqual(response.status_code, 200)
+        sheet = load_workbook(io.BytesIO(response.data)).active
+        response.close()
+        self.assertEqual(sheet.max_row, 12)
+        self.assertEqual(sheet['A2'].value, 'شماره پمپ')
+        self.assertEqual(sheet['D3'].value, '1403/07/10')
+
+    def test_csv_is_streamed_with_bom(self):
+        self.add_pump(1)
+        for day in range(1, 6):
+            self.add_event(1, 'OFF', f'1403/07/{day:02d} 08:00')
+        with mock.patch.object(export_utils, 'CSV_CHUNK_ROWS', 2):
+            response = self.client.get('/report/full-history/export?from_date=1403/07/01'
+                                       '&to_date=1403/07/30&pump_id=all&format=csv')
+        self.assertTrue(response.is_streamed)
+        self.assertIn('full_history_1403-07-01_to_1403-07-30.csv', response.headers['Content-Disposition'])
+        self.assertTrue(response.data.startswith('\ufeff'.encode('utf-8')))
+        rows = list(csv.reader(io.StringIO(response.data.decode('utf-8-sig'))))
+        self.assertEqual(rows[0], export_utils.FULL_HISTORY_COLUMNS)
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(rows[1][:4], ['1', 'پمپ 1', 'خاموش', '1403/07/05'])
+
+    def test_csv_download_name_is_encoded(self):
+        with self.client.application.test_request_context():
+            response = export_utils.send_export(['a'], [[1]], 't', 's', 'گزارش "1403/07/01"', 'csv')
+        header = response.headers['Content-Disposition']
+        self.assertIn('filename=" \\"1403/07/01\\".csv"', header)
+        self.assertIn("filename*=UTF-8''%DA%AF%D8%B2%D8%A7%D8%B1%D8%B4%20%221403%2F07%2F01%22.csv", header)
+        response.close()
+
+    def test_unknown_format_redirects(self):
+        self.add_pump(1)
+        self.add_event(1, 'ON', '1403/07/01 08:00')
+        response = self.client.get('/report/full-history/export?from_date=1403/07/01'
+                                   '&to_date=1403/07/30&pump_id=all&format=xml')
+        self.assertEqual(response.status_code, 302)
+
+    def test_parquet_without_pyarrow_redirects(self):
+        self.add_pump(1)
+        self.add_event(1, 'ON', '1403/07/01 08:00')
+        with mock.patch.object(export_utils, '_load_pyarrow', return_value=None):
+            response = self.client.get('/report/full-history/export?from_date=1403/07/01'
+                                       '&to_date=1403/07/30&pump_id=all&format=parquet')
+        self.assertEqual(response.status_code, 302)
+
+    def test_empty_range_redirects(self):
+        response = self.client.get(
+            '/report/full-history/export?from_date=1403/07/01&to_date=1403/07/30&pump_id=all'
+        )
+        self.assertEqual(response.status_code, 302)
+
+
+if __name__ == '__main__':
+    unittest.main()
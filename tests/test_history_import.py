@@ -0,0 +1,149 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import pandas as pd
+
+from tests.helpers import TempDatabaseTestCase
+from utils.history_import import import_history_dataframe, import_history_file, normalize_history_frame
+from utils.import_utils import parse_and_validate
+from utils.table_reader import iter_table_chunks
+
+
+def history_frame(rows):
+    return pd.DataFrame(rows, columns=['Pump_Number', 'Action', 'Date_Jalali', 'Time_Jalali', 'Reason'])
+
+
+class NormalizeHistoryFrameTest(unittest.TestCase):
+    def test_normalizes_and_reports_bad_rows(self):
+        df = history_frame([
+            [1, ' on ', '1403/7/1', '8:05', 'r'],
+            ['x', 'ON', '1403/07/01', '08:00', 'r'],
+            [2, 'START', '1403/07/01', '08:00', 'r'],
+            [3, 'OFF', '1403/13/01', '08:00', 'r'],
+            [4, 'OFF', '1403/07/01', '25:00', 'r'],
+            [5.0, 'OFF', '1403/07/01', '23:59:59', 'r'],
+        ])
+        events, errors = normalize_history_frame(df)
+
+        self.assertEqual(list(events['pump_number']), [1, 5])
+        first = events.iloc[0]
+        self.assertEqual(first['action'], 'ON')
+        self.assertEqual(first['jalali_time'], '1403/07/01 08:05:00')
+        self.assertEqual(first['event_time'], '2024-09-22 08:05:00')
+        self.assertEqual([row for row, _ in errors], [3, 4, 5, 6])
+
+
+class ImportHistoryDataFrameTest(TempDatabaseTestCase):
+    def test_merges_with_existing_timeline_and_inserts_in_bulk(self):
+        self.add_pump(1, well_status='active')
+        self.add_pump(2, well_status='active')
+        self.add_pump(3, well_status='inactive')
+        self.add_event(1, 'ON', '1403/07/01 08:00')
+        self.add_event(1, 'OFF', '1403/07/05 08:00')
+        self.add_event(2, 'ON', '1403/07/01 08:00')
+
+        df = history_frame([
+            [1, 'OFF', '1403/07/02', '08:00', 'r'],   # between existing ON and ON below
+            [1, 'ON', '1403/07/03', '08:00', 'r'],
+            [2, 'ON', '1403/07/02', '08:00', 'r'],    # ON after existing ON
+            [3, 'ON', '1403/07/02', '08:00', 'r'],    # inactive well
+            [9, 'ON', '1403/07/02', '08:00', 'r'],    # unknown pump
+        ])
+        result = import_history_dataframe(df, user_id=1)
+
+        self.assertEqual(result['success_count'], 2)
+        self.assertEqual(result['error_count'], 3)
+        self.assertTrue(any('مغایرت منطقی' in e and 'خط 4' in e for e in result['errors']))
+        rows = self.conn.execute(
+            'SELECT pump_id, action FROM pump_history ORDER BY pump_id, event_time, id'
+        ).fetchall()
+        self.assertEqual([tuple(r) for r in rows],
+                         [(1, 'ON'), (1, 'OFF'), (1, 'ON'), (1, 'OFF'), (2, 'ON')])
+        days = self.conn.execute('SELECT COUNT(*) FROM pump_daily_hours WHERE pump_id = 1').fetchone()[0]
+        self.assertGreater(days, 0)
+
+    def test_conflict_rejects_all_rows_of_that_pump(self):
+        self.add_pump(1, well_status='active')
+        self.add_event(1, 'OFF', '1403/07/10 08:00')
+        df = history_frame([
+            [1, 'ON', '1403/07/01', '08:00', 'r'],
+            [1, 'OFF', '1403/07/02', '08:00', 'r'],   # followed by the existing OFF
+        ])
+        result = import_history_dataframe(df, user_id=1)
+
+        self.assertEqual(result['success_count'], 0)
+        self.assertEqual(result['error_count'], 1)
+        self.assertIn('خط موجود', result['errors'][0])
+        count = self.conn.execute('SELECT COUNT(*) FROM pump_history').fetchone()[0]
+        self.assertEqual(count, 1)
+
+
+class StreamingReaderTest(TempDatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.files = tempfile.TemporaryDirectory()
+        self.addCleanup(self.files.cleanup)
+
+    def path(self, name):
+        return str(Path(self.files.name) / name)
+
+    def test_chunks_keep_source_row_numbers(self):
+        path = self.path('wells.csv')
+        pd.DataFrame({'well_number': range(1, 8)}).to_csv(path, index=False)
+        chunks = [df for _, df in iter_table_chunks(path, chunk_rows=3)]
+        self.assertEqual([len(df) for df in chunks], [3, 3, 1])
+        self.assertEqual(list(chunks[-1].index + 2), [8])
+
+        path = self.path('wells.xlsx')
+        pd.DataFrame({'well_number': [1, None, 3, 'x']}).to_excel(path, index=False)
+        chunks = [df for _, df in iter_table_chunks(path, chunk_rows=2)]
+        # the empty row 3 is skipped, numbering is unchanged
+        self.assertEqual([list(df.index + 2) for df in chunks], [[2, 4], [5]])
+
+        result = parse_and_validate(path, chunk_rows=2, preview_limit=1)
+        self.assertEqual(result['summary'], {'total_rows': 3, 'valid_rows': 2, 'error_count': 1})
+        self.assertEqual(result['errors'][0]['row'], 5)
+        self.assertEqual(len(result['rows_preview']), 1)
+
+    def test_imports_every_data_sheet_of_a_workbook(self):
+        self.add_pump(1, well_status='active')
+        self.add_pump(2, well_status='active')
+        path = self.path('history.xlsx')
+        with pd.ExcelWriter(path) as writer:
+            pd.DataFrame({'راهنما': ['...']}).to_excel(writer, sheet_name='help', index=False)
+            history_frame([
+                [1, 'ON', '1403/07/01', '08:00', 'r'],
+                [1, 'OFF', '1403/07/01', '09:00', 'r'],
+            ]).to_excel(writer, sheet_name='mehr', index=False)
+            history_frame([
+                [2, 'ON', '1403/08/01', '08:00', 'r'],
+                [2, 'ON', '1403/08/02', '08:00', 'r'],
+                [1, 'ON', '1403/08/01', 'bad', 'r'],
+            ]).to_excel(writer, sheet_name='aban', index=False)
+
+        result = import_history_file(path, user_id=1, chunk_rows=1)
+
+        self.assertEqual(result['success_count'], 2)
+        self.assertEqual(result['error_count'], 2)
+        self.assertIn('خط 4 (شیت aban)', result['errors'][0])
+        self.assertIn('خط 3 (شیت aban)', result['errors'][1])
+
+    def test_csv_input_and_missing_columns(self):
+        self.add_pump(1, well_status='active')
+        path = self.path('history.csv')
+        history_frame([
+            [1, 'ON', '1403/07/01', '08:00', 'r'],
+            [1, 'OFF', '1403/07/01', '09:30', 'r'],
+        ]).to_csv(path, index=False, encoding='utf-8-sig')
+
+        result = import_history_file(path, user_id=1)
+        self.assertEqual((result['success_count'], result['error_count']), (2, 0))
+
+        pd.DataFrame({'Pump_Number': [1], 'Action': ['ON']}).to_csv(path, index=False)
+        with self.assertRaisesRegex(ValueError, 'Reason'):
+            import_history_file(path, user_id=1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import io
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import pandas as pd
+
+from tests.helpers import TempDatabaseTestCase
+from utils import import_utils
+from utils.import_utils import apply_staged_upload, stage_upload, staged_upload_preview
+
+
+class ImportStagingTest(TempDatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.files = tempfile.TemporaryDirectory()
+        self.addCleanup(self.files.cleanup)
+        self.add_pump(1, well_status='active')
+
+    def write_upload(self, rows, name='wells.xlsx'):
+        path = Path(self.files.name) / name
+        pd.DataFrame(rows).to_excel(path, index=False)
+        return str(path)
+
+    def test_preview_stages_rows_and_exact_dry_run(self):
+        path = self.write_upload([
+            {'well_number': 1, 'well_name': 'اول', 'well_location': 'a'},
+            {'well_number': 2, 'well_name': 'دوم', 'well_location': 'b'},
+            {'well_number': 2, 'well_name': 'دوم (اصلاح)', 'well_location': 'b'},
+            {'well_number': 3, 'well_name': None, 'well_location': 'c'},
+        ])
+        upload_id = stage_upload(path, user_id=1)
+        preview = staged_upload_preview(upload_id)
+
+        self.assertEqual(preview['summary'], {'total_rows': 4, 'valid_rows': 4, 'error_count': 0})
+        self.assertEqual(preview['dry_run'], {'insert': 2, 'update': 1})
+        self.assertEqual([(r['well_number'], r['action']) for r in preview['rows_preview']],
+                         [(1, 'update'), (2, 'insert'), (3, 'insert')])
+        self.assertEqual(preview['rows_preview'][1]['well_name'], 'دوم (اصلاح)')
+
+        # the same content is not parsed again
+        with mock.patch.object(import_utils, 'iter_validated_chunks') as reread:
+            self.assertEqual(stage_upload(path, user_id=1), upload_id)
+        reread.assert_not_called()
+
+        with mock.patch.object(import_utils, 'iter_table_chunks') as reread:
+            result = apply_staged_upload(upload_id)
+        reread.assert_not_called()
+        self.assertEqual((result['inserted'], result['updated'], result['unchanged']), (2, 1, 0))
+        names = dict(self.conn.execute('SELECT id, name FROM wells ORDER BY id').fetchall())
+        self.assertEqual(names, {1: 'اول', 2: 'دوم (اصلاح)', 3: 'چاه شماره 3'})
+        staged = self.conn.execute('SELECT COUNT(*) FROM import_staged_wells').fetchone()[0]
+        self.assertEqual(staged, 0)
+        self.assertFalse(apply_staged_upload(upload_id)['ok'])
+
+    def test_reapplying_unchanged_rows_touches_nothing(self):
+        rows = [{'well_number': 2, 'well_name': 'دوم', 'well_location': 'b'},
+                {'well_number': 3, 'well_name': 'سوم', 'well_location': 'c'}]
+        result = apply_staged_upload(stage_upload(self.write_upload(rows, 'first.xlsx')))
+        self.assertEqual((result['inserted'], result['updated'], result['unchanged']), (2, 0, 0))
+        self.conn.execute("UPDATE wells SET updated_at = '2000-01-01 00:00:00'")
+        self.conn.commit()
+        revision = self.conn.execute('SELECT revision FROM fleet_revision').fetchone()[0]
+
+        result = apply_staged_upload(stage_upload(self.write_upload(rows, 'again.xlsx')))
+        self.assertEqual((result['inserted'], result['updated'], result['unchanged']), (0, 0, 2))
+        self.assertEqual(self.conn.execute('SELECT revision FROM fleet_revision').fetchone()[0], revision)
+
+        rows[1]['well_location'] = 'c2'
+        result = apply_staged_upload(stage_upload(self.write_upload(rows, 'changed.xlsx')))
+        self.assertEqual((result['inserted'], result['updated'], result['unchanged']), (0, 1, 1))
+        stamps = dict(self.conn.execute('SELECT id, updated_at FROM wells WHERE id IN (2, 3)').fetchall())
+        self.assertEqual(stamps[2], '2000-01-01 00:00:00')
+        self.assertNotEqual(stamps[3], '2000-01-01 00:00:00')
+        pump = self.conn.execute('SELECT name, location FROM pumps WHERE id = 3').fetchone()
+        self.assertEqual(tuple(pump), ('پمپ شماره 3', 'c2'))
+
+    def test_dry_run_is_refreshed_when_wells_change(self):
+        upload_id = stage_upload(self.write_upload([{'well_number': 2}, {'well_number': 3}]))
+        self.assertEqual(staged_upload_preview(upload_id)['dry_run'], {'insert': 2, 'update': 0})
+        self.add_pump(2, well_status='active')
+        self.assertEqual(staged_upload_preview(upload_id)['dry_run'], {'insert': 1, 'update': 1})
+
+    def test_validation_errors_block_apply(self):
+        upload_id = stage_upload(self.write_upload([{'well_number': 5000}]))
+        preview = staged_upload_preview(upload_id)
+        self.assertEqual(preview['summary']['error_count'], 1)
+        result = apply_staged_upload(upload_id)
+        self.assertFalse(result['ok'])
+        self.assertEqual(result['errors'][0]['row'], 2)
+
+    def test_preview_route_renders_upload_id(self):
+        from app import app
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess['user_id'] = 1
+            sess['role'] = 'admin'
+        csv_body = 'well_number,well_name\n1,x\n4,y\n'.encode('utf-8')
+        with mock.patch.object(import_utils, 'BACKUP_DIR', self.files.name):
+            response = client.post('/admin/setup/upload-preview',
+                                   data={'wells_file': (io.BytesIO(csv_body), 'wells.csv')},
+                                   content_type='multipart/form-data')
+        page = response.get_data(as_text=True)
+        upload_id = self.conn.execute('SELECT id FROM import_uploads').fetchone()[0]
+        self.assertIn(f'value="{upload_id}"', page)
+        self.assertIn('Insert: 1', page)
+        self.assertIn('Update: 1', page)
+
+
+if __name__ == '__main__':
+    unittest.main()
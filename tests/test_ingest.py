@@ -0,0 +1,149 @@
+import json
+import unittest
+
+from tests.helpers import TempDatabaseTestCase
+from database.daily_hours import get_daily_hours
+from database.event_journal import compact_journal
+from database.ingest import create_ingest_token, revoke_ingest_token
+from database.operating_hours import compute_daily_operating_seconds
+from utils.date_utils import jalali_to_gregorian
+from utils.ingest_parser import parse_ingest_body, parse_event_time
+
+URL = '/api/ingest/events'
+
+
+def g(jalali):
+    return jalali_to_gregorian(f'{jalali}:00')
+
+
+class IngestParserTest(unittest.TestCase):
+    def test_formats_and_errors(self):
+        events, errors = parse_ingest_body(
+            'key,pump_id,action,time\n'
+            'a1,3,on,2024-05-01 08:00:00\n'
+            '\n'
+            ',4,OFF,2024-05-01T09:00:00\n'
+            'a3,x,ON,2024-05-01 10:00:00\n'
+            'a4,5,START,2024-05-01 10:00:00\n', 'text/csv; charset=utf-8')
+        self.assertEqual([(e['line'], e['key'], e['pump_id'], e['action'], e['event_time']) for e in events], [
+            (2, 'a1', 3, 'ON', '2024-05-01 08:00:00'),
+            (4, None, 4, 'OFF', '2024-05-01 09:00:00'),
+        ])
+        self.assertEqual(errors, [{'line': 5, 'error': 'invalid pump_id'},
+                                  {'line': 6, 'error': 'action must be ON or OFF'}])
+
+        events, errors = parse_ingest_body('{"pump_id": 1, "action": "ON", "time": "2024-05-01 08:00"}\n{oops\n',
+                                           'application/x-ndjson')
+        self.assertEqual(len(events), 1)
+        self.assertEqual(errors, [{'line': 2, 'error': 'invalid JSON'}])
+        with self.assertRaises(ValueError):
+            parse_ingest_body('', 'application/xml')
+
+    def test_event_time_forms(self):
+        self.assertEqual(parse_event_time('2024-05-01 08:00:05'), '2024-05-01 08:00:05')
+        self.assertEqual(parse_event_time('2024-05-01T08:00:05.250'), '2024-05-01 08:00:05')
+        local = parse_event_time(1714550400)
+        self.assertEqual(parse_event_time('2024-05-01T08:00:00+00:00'), local)
+        with self.assertRaises(ValueError):
+            parse_event_time('yesterday')
+
+
+class IngestApiTest(TempDatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        for pump_id in (1, 2, 3):
+            self.add_pump(pump_id, well_status='active')
+        self.token = create_ingest_token('plc-zone1', 1)
+        from app import app
+        self.client = app.test_client()
+
+    def post(self, body, content_type='application/x-ndjson', token=None):
+        if isinstance(body, list):
+            body = '\n'.join(json.dumps(item) for item in body)
+        return self.client.post(URL, data=body, content_type=content_type,
+                                headers={'Authorization': f'Bearer {token or self.token}'})
+
+    def history(self, pump_id):
+        self.conn.rollback()
+        return [tuple(r) for r in self.conn.execute(
+            'SELECT action, event_time FROM pump_history WHERE pump_id = ? ORDER BY event_time', (pump_id,))]
+
+    def pump_status(self, pump_id):
+        return self.conn.execute('SELECT status FROM pumps WHERE id = ?', (pump_id,)).fetchone()[0]
+
+    def test_requires_valid_token(self):
+        self.assertEqual(self.client.post(URL, data='', content_type='text/csv').status_code, 401)
+        self.assertEqual(self.post('', token='wrong').status_code, 401)
+        revoke_ingest_token('plc-zone1')
+        self.assertEqual(self.post([{'pump_id': 1, 'action': 'ON', 'time': g('1403/07/01 08:00')}]).status_code, 401)
+
+    def test_out_of_order_events_land_in_timeline(self):
+        self.add_event(1, 'ON', '1403/07/01 08:00')
+        self.add_event(1, 'OFF', '1403/07/05 08:00')
+        response = self.post([
+            # late pair in the middle of the existing ON interval
+            {'key': 'k1', 'pump_id': 1, 'action': 'OFF', 'time': g('1403/07/02 10:00')},
+            {'key': 'k2', 'pump_id': 1, 'action': 'ON', 'time': g('1403/07/03 12:00')},
+            # newest event arrives before an older one
+            {'key': 'k3', 'pump_id': 2, 'action': 'OFF', 'time': g('1403/07/04 09:00')},
+            {'key': 'k4', 'pump_id': 2, 'action': 'ON', 'time': g('1403/07/03 09:00')},
+        ]).get_json()
+        self.assertEqual((response['accepted'], response['duplicates'], response['rejected']), (4, 0, []))
+
+        self.assertEqual(compact_journal(), {'applied': 4, 'rejected': 0})
+        self.assertEqual([a for a, _ in self.history(1)], ['ON', 'OFF', 'ON', 'OFF'])
+        self.assertEqual(self.history(2), [('ON', g('1403/07/03 09:00')), ('OFF', g('1403/07/04 09:00'))])
+        self.assertEqual((self.pump_status(1), self.pump_status(2)), (0, 0))
+        self.assertEqual(get_daily_hours('1403/07/01', '1403/07/06'),
+                         compute_daily_operating_seconds('1403/07/01', '1403/07/06'))
+
+        late = self.post([{'key': 'k5', 'pump_id': 3, 'action': 'ON', 'time': g('1403/07/04 09:00')},
+                          {'key': 'k6', 'pump_id': 3, 'action': 'OFF', 'time': g('1403/07/02 09:00')}]).get_json()
+        self.assertEqual(late['accepted'], 2)
+        compact_journal()
+        self.assertEqual(self.pump_status(3), 1)
+
+    def test_retries_are_idempotent(self):
+        batch = [{'key': 'r1', 'pump_id': 1, 'action': 'ON', 'time': g('1403/07/01 08:00')},
+                 {'pump_id': 2, 'action': 'ON', 'time': g('1403/07/01 08:00')}]
+        self.assertEqual(self.post(batch).get_json()['accepted'], 2)
+        # resent before and after compaction, and duplicated inside one body
+        self.assertEqual(self.post(batch).get_json()['duplicates'], 2)
+        compact_journal()
+        again = self.post(batch + batch).get_json()
+        self.assertEqual((again['accepted'], again['duplicates']), (0, 4))
+        self.assertEqual(len(self.history(1)) + len(self.history(2)), 2)
+
+        # the same key from another controller is a different event
+        other = create_ingest_token('plc-zone2', 1)
+        moved = [{'key': 'r1', 'pump_id': 1, 'action': 'OFF', 'time': g('1403/07/01 09:00')}]
+        self.assertEqual(self.post(moved, token=other).get_json()['accepted'], 1)
+
+    def test_csv_body_reports_rejected_lines(self):
+        body = ('key,pump_id,action,time\n'
+                f'c1,1,ON,{g("1403/07/01 08:00")}\n'
+                f'c2,99,ON,{g("1403/07/01 08:00")}\n'
+                f'c3,2,ON,2999-01-01 00:00:00\n'
+                'c4,2,ON,not-a-time\n')
+        response = self.post(body, 'text/csv')
+        self.assertEqual(response.status_code, 200)
+        result = response.get_json()
+        self.assertFalse(result['success'])
+        self.assertEqual(result['accepted'], 1)
+        self.assertEqual([(r['line'], r['error']) for r in result['rejected']],
+                         [(3, 'unknown pump_id'), (4, 'time is in the future'), (5, 'invalid time')])
+
+        compact_journal()
+        source, user_id = self.conn.execute(
+            'SELECT reason, user_id FROM pump_history WHERE pump_id = 1').fetchone()
+        self.assertEqual((source, user_id), ('PLC', 1))
+
+    def test_limits(self):
+        self.assertEqual(self.post('{}', 'application/xml').status_code, 415)
+        from unittest import mock
+        with mock.patch('config.Config.INGEST_MAX_EVENTS', 1, create=True):
+            self.assertEqual(self.post('{}\n{}').status_code, 413)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,220 @@
+import csv
+import io
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import pandas as pd
+
+from tests.helpers import TempDatabaseTestCase
+from database import jobs as job_store
+from utils import import_utils, job_queue
+from utils.job_queue import JobQueue, job_handler
+
+
+@job_handler('test_echo')
+def _echo_job(ctx):
+    for done in range(3):
+        ctx.progress(done, 3, 'working', force=True)
+    if ctx.params.get('fail'):
+        path = ctx.artifact_path('.txt')
+        ctx.set_artifact(path, 'partial.txt', 'text/plain')
+        path.write_text('partial')
+        raise ValueError('boom')
+    path = ctx.artifact_path('.txt')
+    path.write_text(ctx.params['text'])
+    ctx.set_artifact(path, 'echo.txt', 'text/plain')
+    return {'length': len(ctx.params['text'])}
+
+
+class JobsTestCase(TempDatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.artifacts = tempfile.TemporaryDirectory()
+        patcher = mock.patch.object(job_queue, 'JOBS_DIR', Path(self.artifacts.name) / 'jobs')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(import_utils, 'BACKUP_DIR', Path(self.artifacts.name))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.queue = JobQueue(max_workers=1)
+        patcher = mock.patch.object(job_queue, '_queue', self.queue)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.queue.shutdown()
+        super().tearDown()
+        self.artifacts.cleanup()
+
+
+class JobQueueTest(JobsTestCase):
+    def test_successful_job_records_result_and_artifact(self):
+        job_id = self.queue.submit('test_echo', {'text': 'سلام'}, user_id=1)
+        job = self.queue.wait(job_id, timeout=10)
+        self.assertEqual(job['status'], 'succeeded')
+        self.assertEqual(job['result'], {'length': 4})
+        self.assertEqual((job['progress_done'], job['progress_total']), (3, 3))
+        self.assertEqual(Path(job['artifact_path']).read_text(), 'سلام')
+        self.assertEqual(job['artifact_name'], 'echo.txt')
+
+    def test_failed_job_keeps_error_and_removes_partial_artifact(self):
+        job_id = self.queue.submit('test_echo', {'fail': True}, user_id=1)
+        job = self.queue.wait(job_id, timeout=10)
+        self.assertEqual(job['status'], 'failed')
+        self.assertEqual(job['error'], 'boom')
+        self.assertIsNone(job['artifact_path'])
+        self.assertEqual(list((Path(self.artifacts.name) / 'jobs').iterdir()), [])
+
+    def test_unknown_kind_and_interrupted_jobs(self):
+        with self.assertRaises(ValueError):
+            self.queue.submit('no_such_job')
+        stale = job_store.create_job('test_echo', {'text': 'x'})
+        self.assertEqual(job_store.fail_interrupted_jobs(), 1)
+        self.assertEqual(job_store.get_job(stale)['status'], 'failed')
+
+    def test_purge_removes_old_finished_jobs(self):
+        job_id = self.queue.submit('test_echo', {'text': 'x'}, user_id=1)
+        path = Path(self.queue.wait(job_id, timeout=10)['artifact_path'])
+        self.conn.execute("UPDATE jobs SET finished_at = datetime('now', '-2 days')")
+        self.conn.commit()
+        self.queue.purge_expired()
+        self.assertIsNone(job_store.get_job(job_id))
+        self.assertFalse(path.exists())
+
+
+class JobRoutesTest(JobsTestCase):
+    def setUp(self):
+        super().setUp()
+        from app import app
+        self.client = app.test_client()
+        with self.client.session_transaction() as sess:
+            sess['user_id'] = 1
+            sess['role'] = 'admin'
+
+    def job_id_from(self, response):
+        self.assertEqual(response.status_code, 302)
+        self.assertIn('/jobs/', response.location)
+        return response.location.rsplit('/', 1)[1]
+
+    def test_background_export_and_download(self):
+        self.add_pump(1)
+        for day in range(1, 8):
+            self.add_event(1, 'ON' if day % 2 else 'OFF', f'1403/07/{day:02d} 08:00')
+        response = self.client.get('/report/full-history/export?from_date=1403/07/01'
+                                   '&to_date=1403/07/30&pump_id=all&format=csv&background=1')
+        job_id = self.job_id_from(response)
+        self.queue.wait(job_id, timeout=10)
+
+        status = self.client.get(f'/api/jobs/{job_id}').get_json()
+        self.assertTrue(status['success'])
+        self.assertEqual(status['job']['status'], 'succeeded')
+        self.assertEqual(status['job']['progress'], {'done': 7, 'total': 7, 'percent': 100})
+        self.assertEqual(status['job']['result']['rows'], 7)
+
+        download = self.client.get(status['job']['download_url'])
+        rows = list(csv.reader(io.StringIO(download.data.decode('utf-8-sig'))))
+        download.close()
+        self.assertEqual(len(rows), 8)
+        self.assertIn('full_history_1403-07-01_to_1403-07-30.csv', download.headers['Content-Disposition'])
+        self.assertEqual(self.client.get(f'/jobs/{job_id}').status_code, 200)
+
+    def test_large_full_history_export_switches_to_background(self):
+        self.add_pump(1)
+        self.add_event(1, 'ON', '1403/07/01 08:00')
+        self.add_event(1, 'OFF', '1403/07/01 09:00')
+        with mock.patch('config.Config.EXPORT_SYNC_ROW_LIMIT', 1):
+            response = self.client.get('/report/full-history/export?from_date=1403/07/01'
+                                       '&to_date=1403/07/30&pump_id=all')
+        job = self.queue.wait(self.job_id_from(response), timeout=10)
+        self.assertEqual(job['status'], 'succeeded')
+        self.assertTrue(job['artifact_name'].endswith('.xlsx'))
+
+    def test_jobs_are_private_to_their_owner(self):
+        job_id = self.queue.submit('test_echo', {'text': 'x'}, user_id=1)
+        self.queue.wait(job_id, timeout=10)
+        with self.client.session_transaction() as sess:
+            sess['user_id'] = 2
+            sess['role'] = 'user'
+        self.assertEqual(self.client.get(f'/api/jobs/{job_id}').status_code, 404)
+        self.assertEqual(self.client.get('/api/jobs').get_json()['jobs'], [])
+
+    def test_history_import_runs_as_job(self):
+        self.add_pump(1, well_status='active')
+        self.add_pump(2, well_status='active')
+        df = pd.DataFrame({
+            'Pump_Number': [1, 1, 2, 2],
+            'Action': ['ON', 'OFF', 'ON', 'ON'],
+            'Date_Jalali': ['1403/07/10'] * 4,
+            'Time_Jalali': ['08:00', '12:30', '09:15', '17:45'],
+            'Reason': ['x'] * 4,
+        })
+        upload = io.BytesIO()
+        df.to_excel(upload, index=False)
+        upload.seek(0)
+
+        response = self.client.post('/admin/import-history',
+                                    data={'excel_file': (upload, 'history.xlsx')},
+                                    content_type='multipart/form-data')
+        job = self.queue.wait(self.job_id_from(response), timeout=10)
+
+        self.assertEqual(job['status'], 'succeeded')
+        self.assertEqual(job['result']['success_count'], 2)
+        self.assertEqual(job['result']['error_count'], 1)  # pump 2: ON after ON
+        rows = self.conn.execute('SELECT pump_id, action FROM pump_history ORDER BY id').fetchall()
+        self.assertEqual([tuple(r) for r in rows], [(1, 'ON'), (1, 'OFF')])
+        status = self.conn.execute('SELECT status FROM pumps WHERE id = 1').fetchone()[0]
+        self.assertEqual(status, 0)
+
+    def test_large_history_import_job_leaves_database_writable_while_checking(self):
+        import sqlite3
+
+        pumps = range(1, 301)
+        for pump_id in pumps:
+            self.add_pump(pump_id, well_status='active')
+        # an operator's event still waiting in the journal when the import starts
+        from database.operations import change_pump_status
+        self.assertTrue(change_pump_status(7, 'ON', 1, 'x', '', manual_time=True,
+                                           action_date_jalali='1403/06/01', action_time='08:00')['success'])
+        rows = [(pump_id, 'ON' if n % 2 == 0 else 'OFF', f'1403/07/{n + 1:02d}', '08:00', 'x')
+                for pump_id in pumps for n in range(20)]
+        path = Path(self.artifacts.name) / 'history.csv'
+        pd.DataFrame(rows, columns=['Pump_Number', 'Action', 'Date_Jalali', 'Time_Jalali', 'Reason']) \
+            .to_csv(path, index=False, encoding='utf-8-sig')
+
+        blocked = []
+        real_update = job_store.update_job_progress
+
+        def update_job_progress(*args, **kwargs):
+            # a writer that does not wait: fails if the import holds the write lock
+            probe = sqlite3.connect(str(self.db_path), timeout=0)
+            try:
+                probe.execute('BEGIN IMMEDIATE')
+                probe.rollback()
+            except sqlite3.OperationalError:
+                blocked.append(args)
+            finally:
+                probe.close()
+            return real_update(*args, **kwargs)
+
+        with mock.patch.object(job_queue, 'PROGRESS_INTERVAL', 0), \
+                mock.patch.object(job_store, 'update_job_progress', side_effect=update_job_progress) as update:
+            job_id = self.queue.submit('import_history', {'path': str(path)}, user_id=1)
+            job = self.queue.wait(job_id, timeout=60)
+
+        self.assertEqual(job['status'], 'succeeded', job['error'])
+        # pump 7 starts with ON right after the operator's ON: only that pump is refused
+        self.assertEqual(job['result']['success_count'], 5980)
+        self.assertEqual(job['result']['error_count'], 1)
+        self.assertIn('پمپ 7', job['result']['errors'][0])
+        self.assertGreater(update.call_count, 300)
+        self.assertEqual(blocked, [])
+        self.conn.rollback()
+        history = self.conn.execute('SELECT action FROM pump_history WHERE pump_id = 7').fetchall()
+        self.assertEqual([r[0] for r in history], ['ON'])
+        self.assertEqual(self.conn.execute('SELECT COUNT(*) FROM pump_event_journal').fetchone()[0], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
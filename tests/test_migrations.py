@@ -0,0 +1,57 @@
+import sqlite3
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import create_database as cd
+from database.migrate import apply_migrations, discover_migrations, pending_migrations
+
+
+class MigrationRunnerTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.conn = sqlite3.connect(str(Path(self.tmpdir.name) / 'migrate_test.db'))
+        cd.create_tables(self.conn)
+        self.conn.commit()
+
+    def tearDown(self):
+        self.conn.close()
+        self.tmpdir.cleanup()
+
+    def test_applies_all_migrations_once(self):
+        applied = apply_migrations(self.conn, verbose=False)
+        self.assertEqual(applied, [m[0] for m in discover_migrations()])
+        self.assertEqual(pending_migrations(self.conn), [])
+        # re-running is a no-op
+        self.assertEqual(apply_migrations(self.conn, verbose=False), [])
+
+    def test_run_refuses_to_start_with_pending_migrations(self):
+        import contextlib
+        import io
+        import run
+
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            self.assertFalse(run.check_pending_migrations(self.conn))
+        self.assertIn('database.migrate', out.getvalue())
+        apply_migrations(self.conn, verbose=False)
+        self.assertTrue(run.check_pending_migrations(self.conn))
+
+    def test_pump_history_queries_use_index(self):
+        apply_migrations(self.conn, verbose=False)
+        plan = self.conn.execute('''
+            EXPLAIN QUERY PLAN
+            SELECT action FROM pump_history
+            WHERE pump_id = ? ORDER BY event_time DESC, id DESC LIMIT 1
+        ''', (1,)).fetchall()
+        detail = ' '.join(row[-1] for row in plan)
+        self.assertIn('idx_pump_history_pump_time', detail)
+        self.assertNotIn('TEMP B-TREE', detail)
+
+
+if __name__ == '__main__':
+    unittest.main()
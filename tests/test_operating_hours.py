@@ -0,0 +1,67 @@
+import unittest
+
+from tests.helpers import TempDatabaseTestCase
+from database.operating_hours import compute_daily_operating_seconds, jalali_month_bounds
+from database.daily_hours import rebuild_daily_hours
+from database.reports import get_operating_hours_report
+
+
+class OperatingHoursEngineTest(TempDatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        for pump_id in (1, 2, 3, 4):
+            self.add_pump(pump_id)
+        # pump 1: on overnight across the day boundary
+        self.add_event(1, 'ON', '1403/07/01 20:00')
+        self.add_event(1, 'OFF', '1403/07/02 02:00')
+        # pump 2: switched on before the window and never off
+        self.add_event(2, 'ON', '1403/06/20 08:00')
+        # pump 3: two short runs on the same day
+        self.add_event(3, 'ON', '1403/07/02 08:00')
+        self.add_event(3, 'OFF', '1403/07/02 09:30')
+        self.add_event(3, 'ON', '1403/07/02 12:00')
+        self.add_event(3, 'OFF', '1403/07/02 12:15')
+        # pump 4: no history at all
+        rebuild_daily_hours()
+
+    def test_per_day_seconds_and_counts(self):
+        days, per_pump = compute_daily_operating_seconds('1403/07/01', '1403/07/03')
+        self.assertEqual(days, ['1403/07/01', '1403/07/02', '1403/07/03'])
+        self.assertEqual(per_pump[1], [[4 * 3600, 1, 0], [2 * 3600, 0, 1], [0, 0, 0]])
+        self.assertEqual([d[0] for d in per_pump[2]], [86400, 86400, 86400])
+        self.assertEqual(per_pump[3][1], [105 * 60, 2, 2])
+        self.assertEqual(per_pump[4], [[0, 0, 0]] * 3)
+
+    def test_pump_filter(self):
+        _, per_pump = compute_daily_operating_seconds('1403/07/02', '1403/07/02', pump_ids=[3])
+        self.assertEqual(list(per_pump), [3])
+
+    def test_month_bounds(self):
+        self.assertEqual(
+            [d.strftime('%Y/%m/%d') for d in jalali_month_bounds('1403/07')],
+            ['1403/07/01', '1403/07/30']
+        )
+        self.assertEqual(jalali_month_bounds('1403/12')[1].strftime('%Y/%m/%d'), '1403/12/30')
+
+    def test_report_daily_and_monthly(self):
+        daily = get_operating_hours_report('1403/07/02', None, 'daily')
+        self.assertEqual(
+            daily,
+            [
+                {'pump_number': 1, 'operating_hours': 2.0},
+                {'pump_number': 2, 'operating_hours': 24.0},
+                {'pump_number': 3, 'operating_hours': 1.75},
+                {'pump_number': 4, 'operating_hours': 0.0},
+            ]
+        )
+        monthly = {r['pump_number']: r['operating_hours']
+                   for r in get_operating_hours_report(None, '1403/07', 'monthly')}
+        self.assertEqual(monthly[1], 6.0)
+        self.assertEqual(monthly[2], 30 * 24.0)
+
+    def test_invalid_input_returns_empty(self):
+        self.assertEqual(get_operating_hours_report('1403/13/40', None, 'daily'), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
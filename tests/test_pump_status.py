@@ -0,0 +1,106 @@
+import unittest
+
+from tests.helpers import TempDatabaseTestCase
+from database.operations import update_pump_current_status
+from database.fleet_revision import get_fleet_revision
+from database.pump_status import get_fleet_status_at, get_fleet_status_series, refresh_current_status
+from database.reports import get_status_at_time_report, get_status_series_report
+from utils.date_utils import jalali_to_gregorian
+
+
+class FleetStatusTest(TempDatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        for pump_id in (1, 2, 3):
+            self.add_pump(pump_id)
+        self.add_event(1, 'ON', '1403/07/01 08:00')
+        self.add_event(1, 'OFF', '1403/07/01 14:00')
+        self.add_event(2, 'ON', '1403/06/30 22:00')
+        # pump 3 has no history before 1403/07/02
+        self.add_event(3, 'ON', '1403/07/02 01:00')
+
+    def at(self, jalali_datetime):
+        return jalali_to_gregorian(f'{jalali_datetime}:00')
+
+    def test_status_at_single_time(self):
+        states = get_fleet_status_at(self.at('1403/07/01 12:00'))
+        self.assertEqual([(s['pump_number'], s['status']) for s in states], [(1, 'ON'), (2, 'ON')])
+        # an event exactly at the target time is already in effect
+        states = get_fleet_status_at(self.at('1403/07/01 14:00'))
+        self.assertEqual(states[0]['status'], 'OFF')
+
+    def test_series_matches_single_lookups(self):
+        times = [self.at(f'1403/07/01 {h:02d}:00') for h in range(0, 24, 3)] + [self.at('1403/07/02 02:00')]
+        series = get_fleet_status_series(times)
+        for at_time in times:
+            expected = {s['pump_id']: s['status'] for s in get_fleet_status_at(at_time)}
+            actual = {pump_id: s['status'] for pump_id, s in series[at_time].items()}
+            self.assertEqual(actual, expected, at_time)
+
+    def test_reports(self):
+        off = get_status_at_time_report('1403/07/01', '15:00', 'off')
+        self.assertEqual([r['pump_number'] for r in off], [1])
+        self.assertEqual(off[0]['last_change'], '1403/07/01 14:00:00')
+
+        sheet = get_status_series_report('1403/07/01', 360)
+        self.assertEqual(sheet['times'], ['00:00', '06:00', '12:00', '18:00'])
+        self.assertEqual([r['statuses'] for r in sheet['rows']], [
+            [None, None, 'ON', 'OFF'],
+            ['ON', 'ON', 'ON', 'ON'],
+            [None, None, None, None],
+        ])
+
+    def test_update_current_status_covers_all_pumps(self):
+        # pump ids beyond the original 58-pump field must be updated as well
+        self.add_pump(120)
+        self.add_event(120, 'ON', '1403/07/03 06:00')
+        self.add_pump(121)
+        update_pump_current_status()
+
+        rows = {r['id']: (r['status'], r['last_change']) for r in
+                self.conn.execute('SELECT id, status, last_change FROM pumps')}
+        self.assertEqual(rows[1], (0, '2024-09-22 14:00:00'))
+        self.assertEqual(rows[3][0], 1)
+        self.assertEqual(rows[120], (1, '2024-09-24 06:00:00'))
+        self.assertEqual(rows[121][0], 0)
+
+        # pumps without history are not rewritten (or counted) again
+        revision = get_fleet_revision(self.conn)
+        self.assertEqual(update_pump_current_status(), 0)
+        self.assertEqual(get_fleet_revision(self.conn), revision)
+        self.conn.execute('UPDATE pumps SET status = 1 WHERE id = 121')
+        self.conn.commit()
+        self.assertEqual(update_pump_current_status(), 1)
+        # a repair changes dashboard data, so cached snapshots are invalidated
+        self.assertEqual(get_fleet_revision(self.conn), revision + 1)
+        self.assertEqual(self.conn.execute('SELECT status FROM pumps WHERE id = 121').fetchone()[0], 0)
+
+    def test_refresh_only_touches_listed_pumps(self):
+        update_pump_current_status()
+        self.add_event(1, 'ON', '1403/07/03 07:00')
+        self.add_event(2, 'OFF', '1403/07/03 07:00')
+
+        self.assertEqual(refresh_current_status(self.conn, [1]), 1)
+        self.conn.commit()
+        status = dict(self.conn.execute('SELECT id, status FROM pumps'))
+        self.assertEqual(status, {1: 1, 2: 1, 3: 1})
+
+        # already in sync: nothing is rewritten
+        self.assertEqual(refresh_current_status(self.conn, [1, 3]), 0)
+        self.assertEqual(update_pump_current_status(), 1)
+
+    def test_deleting_last_record_restores_previous_status(self):
+        from blueprints.records_management import delete_pump_record
+        update_pump_current_status()
+        record_id = self.add_event(2, 'OFF', '1403/07/03 07:00')
+        self.conn.execute("UPDATE pumps SET status = 0 WHERE id = 2")
+        self.conn.commit()
+
+        ok, _ = delete_pump_record(record_id, 'اشتباه', 1)
+        self.assertTrue(ok)
+        row = self.conn.execute('SELECT status, last_change FROM pumps WHERE id = 2').fetchone()
+        self.assertEqual(tuple(row), (1, '2024-09-20 22:00:00'))
+
+
+if __name__ == '__main__':
+    unittest.main()
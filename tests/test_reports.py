@@ -0,0 +1,58 @@
+import unittest
+
+from tests.helpers import TempDatabaseTestCase
+from database.reports import get_full_history_page, get_full_history_report, iter_full_history
+
+
+class FullHistoryPagingTest(TempDatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        for pump_id in (1, 2):
+            self.add_pump(pump_id)
+        for day in range(1, 6):
+            self.add_event(1, 'ON', f'1403/07/{day:02d} 08:00')
+            self.add_event(2, 'ON', f'1403/07/{day:02d} 08:00')  # same event_time as pump 1
+            self.add_event(1, 'OFF', f'1403/07/{day:02d} 17:30')
+        # outside the requested range
+        self.add_event(2, 'OFF', '1403/08/01 09:00')
+
+    def keys(self, rows):
+        return [(r['event_time'], r['id']) for r in rows]
+
+    def test_iter_matches_single_query_order(self):
+        expected = self.conn.execute('''
+            SELECT event_time, id FROM pump_history
+            WHERE event_time < '2024-10-22'
+            ORDER BY event_time DESC, id DESC
+        ''').fetchall()
+        rows = list(iter_full_history('1403/07/01', '1403/07/30', 'all', batch_size=4))
+        self.assertEqual(self.keys(rows), [tuple(r) for r in expected])
+        self.assertEqual(rows[0]['action_date'], '1403/07/05')
+        self.assertEqual(rows[0]['action_time'], '17:30')
+        self.assertEqual(rows[0]['action_persian'], 'خاموش')
+        self.assertEqual(get_full_history_report('1403/07/01', '1403/07/30', 'all'), rows)
+
+    def test_pages_cover_range_without_gaps_or_duplicates(self):
+        collected, cursor = [], None
+        while True:
+            page = get_full_history_page('1403/07/01', '1403/07/30', 'all', cursor, page_size=4)
+            self.assertEqual(page['total'], 15)
+            self.assertLessEqual(len(page['rows']), 4)
+            collected.extend(page['rows'])
+            cursor = page['next_cursor']
+            if cursor is None:
+                break
+        self.assertEqual(self.keys(collected), self.keys(iter_full_history('1403/07/01', '1403/07/30')))
+
+    def test_pump_filter_and_invalid_input(self):
+        rows = list(iter_full_history('1403/07/01', '1403/08/30', '2', batch_size=2))
+        self.assertEqual([r['pump_number'] for r in rows], [2] * 6)
+        self.assertEqual(list(iter_full_history('1403/07/01', '1403/07/30', '99')), [])
+        self.assertEqual(list(iter_full_history(None, '1403/07/30', 'all')), [])
+        # a malformed cursor restarts from the newest event
+        page = get_full_history_page('1403/07/01', '1403/07/30', 'all', 'garbage', page_size=3)
+        self.assertEqual(page['rows'][0]['action_date'], '1403/07/05')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+import os
+import time
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+from tests.test_backup import BackupTestCase
+from utils import snapshot_store
+from utils.backup_utils import list_backups, restore_backup, verify_database_file
+from utils.snapshot_store import (
+    collect_garbage, create_snapshot, list_snapshots, materialize_snapshot,
+    prune_snapshots, select_retained,
+)
+
+
+class SnapshotStoreTest(BackupTestCase):
+    def setUp(self):
+        super().setUp()
+        for pump_id in range(1, 51):
+            for day in range(1, 29):
+                self.add_event(pump_id, 'ON', f'1402/01/{day:02d} 08:00')
+                self.add_event(pump_id, 'OFF', f'1402/01/{day:02d} 16:00')
+        self.conn.commit()
+
+    def chunk_files(self):
+        return sorted((snapshot_store.snapshot_dir() / 'chunks').glob('*/*.z'))
+
+    def test_consecutive_snapshots_share_unchanged_chunks(self):
+        first = create_snapshot(chunk_pages=2)
+        self.assertEqual(first['new_chunks'], len(set(first['chunks'])))
+
+        self.add_event(7, 'ON', '1402/02/01 08:00')
+        self.conn.commit()
+        second = create_snapshot(chunk_pages=2)
+
+        self.assertGreater(len(second['chunks']), 10)
+        self.assertLess(second['new_chunks'], len(second['chunks']) // 2)
+        self.assertEqual(len(self.chunk_files()),
+                         len(set(first['chunks']) | set(second['chunks'])))
+        self.assertEqual([m['id'] for m in list_snapshots()], [second['id'], first['id']])
+
+    def test_materialized_snapshot_restores_database(self):
+        manifest = create_snapshot(chunk_pages=4)
+        rebuilt = materialize_snapshot(manifest['id'], os.path.join(self.backups.name, 'rebuilt.db'))
+        self.assertIsNone(verify_database_file(rebuilt))
+        self.assertEqual(self.pump_count(rebuilt), 50)
+
+        entry = snapshot_store.SNAPSHOT_PREFIX + manifest['id']
+        self.assertIn(entry, list_backups())
+        self.conn.execute('DELETE FROM pumps')
+        self.conn.commit()
+        self.conn.close()
+        restore_backup(entry)
+        self.assertEqual(self.pump_count(str(self.db_path)), 50)
+
+    def test_corrupted_chunk_is_rejected(self):
+        manifest = create_snapshot(chunk_pages=4)
+        self.chunk_files()[0].write_bytes(b'not a chunk')
+        with self.assertRaises(Exception):
+            materialize_snapshot(manifest['id'], os.path.join(self.backups.name, 'rebuilt.db'))
+        self.assertFalse(os.path.exists(os.path.join(self.backups.name, 'rebuilt.db')))
+
+    def test_prune_and_collect_garbage(self):
+        first = create_snapshot(chunk_pages=2)
+        self.conn.execute('DELETE FROM pump_history WHERE pump_id > 10')
+        self.conn.commit()
+        self.conn.execute('VACUUM')
+        second = create_snapshot(chunk_pages=2)
+        only_first = set(first['chunks']) - set(second['chunks'])
+        self.assertTrue(only_first)
+
+        with mock.patch.object(snapshot_store, 'select_retained', return_value={second['id']}):
+            self.assertEqual(prune_snapshots(), [first['id']])
+        # fresh chunks are protected by the grace period
+        self.assertEqual(collect_garbage()[0], 0)
+        old = time.time() - snapshot_store.GC_GRACE_SECONDS - 10
+        for path in self.chunk_files():
+            os.utime(path, (old, old))
+        removed, freed = collect_garbage()
+
+        self.assertEqual(removed, len(only_first))
+        self.assertGreater(freed, 0)
+        self.assertEqual({p.stem for p in self.chunk_files()}, set(second['chunks']))
+        rebuilt = materialize_snapshot(second['id'], os.path.join(self.backups.name, 'rebuilt.db'))
+        self.assertIsNone(verify_database_file(rebuilt))
+
+
+class RetentionTest(unittest.TestCase):
+    def manifests(self, times):
+        return [{'id': t.strftime('%Y%m%d%H%M%S'), 'created_at': t.isoformat(timespec='seconds')}
+                for t in times]
+
+    def test_hourly_daily_monthly_buckets(self):
+        now = datetime(2024, 6, 15, 12, 30)
+        times = [now - timedelta(minutes=20 * i) for i in range(24 * 3 * 60)]  # every 20 min for 60 days
+        keep = select_retained(self.manifests(times), now=now, hourly=6, daily=7, monthly=3)
+        kept = sorted(datetime.strptime(k, '%Y%m%d%H%M%S') for k in keep)
+
+        recent = [t for t in kept if now - t < timedelta(hours=6)]
+        self.assertEqual(len(recent), 6)
+        self.assertEqual(len({t.date() for t in kept if (now.date() - t.date()).days < 7}), 7)
+        self.assertEqual({(t.year, t.month) for t in kept}, {(2024, 4), (2024, 5), (2024, 6)})
+        # newest of each bucket: the April one is the last snapshot of April
+        april = [t for t in times if t.month == 4]
+        self.assertIn(max(april), kept)
+        self.assertEqual(len(kept), len(set(kept)))
+        self.assertLessEqual(len(kept), 6 + 7 + 3)
+
+    def test_newest_snapshot_always_kept(self):
+        old = datetime(2020, 1, 1)
+        keep = select_retained(self.manifests([old]), now=datetime(2024, 1, 1),
+                               hourly=0, daily=0, monthly=0)
+        self.assertEqual(keep, {'20200101000000'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,27 @@
+"""Background job handlers for the admin backup screen (see utils.job_queue).
+
+Kept apart from utils.backup_utils because the job queue itself imports
+backup_utils (for BACKUP_DIR).
+"""
+from .backup_utils import create_backup, restore_backup
+from .job_queue import job_handler
+from .snapshot_store import snapshot_and_prune
+
+
+@job_handler('backup')
+def _run_backup_job(ctx):
+    ctx.progress(0, message='Copying database pages', force=True)
+    path = create_backup(compress=ctx.params.get('compress'), progress=ctx.progress)
+    return {'path': path}
+
+
+@job_handler('snapshot')
+def _run_snapshot_job(ctx):
+    ctx.progress(0, message='Copying database pages', force=True)
+    return snapshot_and_prune(progress=lambda done, total, message: ctx.progress(done, total, message))
+
+
+@job_handler('restore')
+def _run_restore_job(ctx):
+    return restore_backup(ctx.params['backup_file'],
+                          progress=lambda done, total, message: ctx.progress(done, total, message, force=True))
@@ -1,36 +1,346 @@
+import gzip
+import os
 import shutil
+import sqlite3
+import time
 from datetime import datetime
 from pathlib import Path
 
+from config import get_config
+
 # Adjust paths relative to project root
 ROOT = Path(__file__).resolve().parents[1]
-DB_PATH = ROOT / "pump_management.db"
 BACKUP_DIR = ROOT / "database_backups"
 
+# restarts of a paged backup (source written meanwhile) before copying in one step
+BACKUP_MAX_RESTARTS = 3
 
-def create_backup():
-    """Create a timestamped copy of the SQLite database and return its path."""
-    BACKUP_DIR.mkdir(parents=True, exist_ok=True)
+
+def live_database_path():
+    """Path of the database file the app's connection pool serves.
+
+    Backups and restores must work on this file (config DATABASE_PATH,
+    resolved when the pool was configured), not on a path of their own.
+    """
+    from database.connection import get_pool
+
+    return Path(get_pool().db_path).resolve()
+
+
+def _checkpoint_wal():
+    """Fold the WAL file back into the main database file.
+
+    The app runs SQLite in WAL mode, so recent commits may live only in
+    `pump_management.db-wal` until a checkpoint; a plain file copy of the main
+    database would miss them.
+    """
+    conn = sqlite3.connect(str(live_database_path()))
+    try:
+        conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    finally:
+        conn.close()
+
+
+class _TooManyRestarts(Exception):
+    pass
+
+
+def _backup_database(src, dst, pages_per_step, pause, progress=None):
+    """Copy ``src`` into ``dst`` with the SQLite online backup API.
+
+    The copy is made ``pages_per_step`` pages at a time, sleeping ``pause``
+    seconds between steps so writers get the database (and the disk) in
+    between. SQLite restarts a paged backup whenever another connection
+    writes to the source; after BACKUP_MAX_RESTARTS restarts the copy is
+    finished in a single step instead, which in WAL mode only holds a read
+    snapshot and does not block writers either.
+    """
+    state = {'remaining': None, 'restarts': 0}
+
+    def on_step(status, remaining, total):
+        if state['remaining'] is not None and remaining > state['remaining']:
+            state['restarts'] += 1
+            if state['restarts'] > BACKUP_MAX_RESTARTS:
+                raise _TooManyRestarts()
+        state['remaining'] = remaining
+        if progress:
+            progress(total - remaining, total)
+        if remaining and pause:
+            time.sleep(pause)
+
+    try:
+        src.backup(dst, pages=pages_per_step, progress=on_step)
+    except _TooManyRestarts:
+        src.backup(dst, pages=-1)
+    return state['restarts']
+
+
+def verify_database_file(path, quick=False):
+    """Run ``PRAGMA integrity_check`` (or ``quick_check``) on a database file.
+
+    Returns None when the file is healthy, otherwise the reported problems.
+    """
+    conn = sqlite3.connect(f'file:{Path(path).as_posix()}?mode=ro', uri=True)
+    try:
+        pragma = 'quick_check' if quick else 'integrity_check'
+        rows = [row[0] for row in conn.execute(f'PRAGMA {pragma}')]
+    except sqlite3.DatabaseError as e:
+        return str(e)
+    finally:
+        conn.close()
+    return None if rows == ['ok'] else '; '.join(rows[:10])
+
+
+def _compress_file(src, dst, block_size=1024 * 1024):
+    with open(src, 'rb') as fin, gzip.open(dst, 'wb', compresslevel=6) as fout:
+        shutil.copyfileobj(fin, fout, block_size)
+
+
+def _next_backup_path(suffix=''):
     ts = datetime.now().strftime("%Y%m%d%H%M%S")
-    dst = BACKUP_DIR / f"pump_management.db.bak_{ts}"
-    shutil.copy2(DB_PATH, dst)
+    dst = BACKUP_DIR / f"pump_management.db.bak_{ts}{suffix}"
+    counter = 1
+    while dst.exists():
+        dst = BACKUP_DIR / f"pump_management.db.bak_{ts}_{counter}{suffix}"
+        counter += 1
+    return dst
+
+
+def copy_database_to(dst, progress=None, pages_per_step=None, pause=None):
+    """Write a verified, standalone online backup of the live database to ``dst``.
+
+    Uses ``sqlite3.Connection.backup`` (a consistent snapshot, including
+    commits still in the WAL) instead of copying the file and checks the copy
+    with ``PRAGMA integrity_check``. Defaults come from config:
+    BACKUP_PAGES_PER_STEP and BACKUP_STEP_PAUSE.
+    progress: optional callable(done_pages, total_pages).
+    """
+    cfg = get_config()
+    if pages_per_step is None:
+        pages_per_step = getattr(cfg, 'BACKUP_PAGES_PER_STEP', 256)
+    if pause is None:
+        pause = getattr(cfg, 'BACKUP_STEP_PAUSE', 0.005)
+
+    src = sqlite3.connect(str(live_database_path()))
+    try:
+        target = sqlite3.connect(str(dst))
+        try:
+            _backup_database(src, target, pages_per_step, pause, progress)
+            # a standalone copy: no -wal/-shm files needed to open it
+            target.execute('PRAGMA journal_mode=DELETE')
+        finally:
+            target.close()
+    finally:
+        src.close()
+
+    problems = verify_database_file(dst)
+    if problems:
+        raise RuntimeError(f'Backup failed integrity check: {problems}')
+
+
+def create_backup(compress=None, progress=None, pages_per_step=None, pause=None):
+    """Take an online backup of the live database and return its path.
+
+    The copy is made and verified by ``copy_database_to`` and optionally
+    gzipped (``.gz`` suffix; default from config BACKUP_COMPRESS).
+    progress: optional callable(done_pages, total_pages).
+    """
+    if compress is None:
+        compress = getattr(get_config(), 'BACKUP_COMPRESS', False)
+
+    BACKUP_DIR.mkdir(parents=True, exist_ok=True)
+    dst = _next_backup_path('.gz' if compress else '')
+    # dot-prefixed work files never show up in list_backups
+    partial = BACKUP_DIR / f'.{dst.name}.partial'
+    snapshot = BACKUP_DIR / f'.{dst.name}.snapshot' if compress else partial
+    try:
+        copy_database_to(snapshot, progress, pages_per_step, pause)
+        if compress:
+            _compress_file(snapshot, partial)
+            snapshot.unlink()
+        os.replace(partial, dst)
+    except BaseException:
+        for leftover in (snapshot, partial):
+            leftover.unlink(missing_ok=True)
+        raise
     return str(dst)
 
 
 def list_backups():
-    """Return a sorted list of backup file paths (newest first)."""
-    if not BACKUP_DIR.exists():
-        return []
-    files = sorted(BACKUP_DIR.glob("pump_management.db.bak_*"), reverse=True)
-    return [str(p) for p in files]
+    """Return backups newest first: full backup file paths, then store snapshots.
+
+    Snapshots (see utils.snapshot_store) are listed as ``snapshot:<id>``;
+    restore_backup accepts both forms.
+    """
+    from .snapshot_store import SNAPSHOT_PREFIX, list_snapshots
+
+    files = sorted(BACKUP_DIR.glob("pump_management.db.bak_*"), reverse=True) if BACKUP_DIR.exists() else []
+    return [str(p) for p in files] + [SNAPSHOT_PREFIX + m['id'] for m in list_snapshots()]
+
+
+# tables a file must have to be accepted as a pump database
+RESTORE_REQUIRED_TABLES = ('pumps', 'pump_history', 'wells', 'users')
+
+
+def _stage_candidate(backup_path, staged):
+    """Write the database file of a backup (plain, .gz or snapshot) to ``staged``."""
+    from .snapshot_store import SNAPSHOT_PREFIX, materialize_snapshot
+
+    backup_path = str(backup_path)
+    if backup_path.startswith(SNAPSHOT_PREFIX):
+        materialize_snapshot(backup_path[len(SNAPSHOT_PREFIX):], staged)
+    elif backup_path.endswith('.gz'):
+        with gzip.open(backup_path, 'rb') as fin, open(staged, 'wb') as fout:
+            shutil.copyfileobj(fin, fout, 1024 * 1024)
+    else:
+        shutil.copyfile(backup_path, staged)
+    conn = sqlite3.connect(str(staged))
+    try:
+        # older backups were plain copies of a WAL-mode file
+        conn.execute('PRAGMA journal_mode=DELETE')
+    finally:
+        conn.close()
+
+
+def _check_candidate(path, quick):
+    """Problems that make ``path`` unfit to replace the live database, or None."""
+    problems = verify_database_file(path, quick=quick)
+    if problems:
+        return problems
+    conn = sqlite3.connect(f'file:{Path(path).as_posix()}?mode=ro', uri=True)
+    try:
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    finally:
+        conn.close()
+    missing = [name for name in RESTORE_REQUIRED_TABLES if name not in tables]
+    return f"missing tables: {', '.join(missing)}" if missing else None
+
+
+def _table_columns(conn, schema, table):
+    return [row[1] for row in conn.execute(f'PRAGMA {schema}.table_info({table})')]
+
+
+def _migrate_candidate(staged):
+    """Bring the staged file up to the current schema; returns the versions applied.
+
+    Backups taken before a migration lack tables the app cannot run without
+    (jobs, the event journal, ...), so they are upgraded the same way
+    ``py -m database.migrate`` upgrades the live database.
+    """
+    from database.migrate import apply_migrations, pending_migrations
+
+    conn = sqlite3.connect(str(staged))
+    try:
+        applied = apply_migrations(conn, verbose=False)
+        if pending_migrations(conn):
+            raise RuntimeError('Backup could not be upgraded to the current schema')
+    finally:
+        conn.close()
+    return applied
 
 
-def restore_backup(backup_path):
-    """Restore a backup. Before restoring, create an emergency backup and return its path.
+def _carry_over_live_state(staged, live_path):
+    """Copy operational state of the live database into the restored file.
 
-    Note: it's caller's responsibility to ensure the app is in a safe state for restore.
+    The background job table describes this process, not the restored data
+    (the restore job's own row must survive the swap), and the fleet
+    revision must move past both files' values so every cache and open
+    dashboard sees the restore as a change.
     """
-    # create emergency backup
-    emergency = create_backup()
-    shutil.copy2(backup_path, DB_PATH)
-    return str(emergency)
+    conn = sqlite3.connect(str(staged))
+    try:
+        conn.execute('ATTACH DATABASE ? AS live', (str(live_path),))
+        try:
+            conn.execute('''
+                UPDATE main.fleet_revision
+                SET revision = MAX(revision, COALESCE((SELECT revision FROM live.fleet_revision WHERE id = 1), 0)) + 1
+                WHERE id = 1
+            ''')
+        except sqlite3.OperationalError:
+            pass
+        live_columns = set(_table_columns(conn, 'live', 'jobs'))
+        columns = [c for c in _table_columns(conn, 'main', 'jobs') if c in live_columns]
+        if columns:
+            names = ', '.join(columns)
+            conn.execute('DELETE FROM main.jobs')
+            conn.execute(f'INSERT INTO main.jobs ({names}) SELECT {names} FROM live.jobs')
+        conn.commit()
+        conn.execute('DETACH DATABASE live')
+    finally:
+        conn.close()
+
+
+def restore_backup(backup_path, progress=None, quick_check=None, drain_timeout=None):
+    """Replace the live database with a backup (file path, .gz or ``snapshot:<id>``).
+
+    1. the backup is written to a staging file next to the database,
+       checked (``integrity_check``, or ``quick_check`` with RESTORE_QUICK_CHECK)
+       and upgraded with any schema migrations it predates;
+    2. an emergency online backup of the live database is taken;
+    3. the connection pool is paused: new requests wait, in-flight ones get
+       RESTORE_DRAIN_TIMEOUT seconds to finish (otherwise nothing changes);
+    4. the staged file is renamed over the database in one atomic step.
+
+    Requests only wait during steps 3-4. A failure before the rename leaves
+    the live database untouched.
+    progress: optional callable(done_steps, total_steps, message).
+    Returns ``{'restored_from', 'emergency', 'migrated', 'timings'}``
+    (``migrated``: migration versions applied to the backup; timings in seconds).
+    """
+    from database.connection import get_pool
+
+    cfg = get_config()
+    if quick_check is None:
+        quick_check = getattr(cfg, 'RESTORE_QUICK_CHECK', False)
+    if drain_timeout is None:
+        drain_timeout = getattr(cfg, 'RESTORE_DRAIN_TIMEOUT', 10)
+
+    timings = {}
+    started = time.perf_counter()
+    last = [started]
+
+    def report(done, message):
+        if progress:
+            progress(done, 4, message)
+
+    def lap(name):
+        now = time.perf_counter()
+        timings[name] = round(now - last[0], 3)
+        last[0] = now
+
+    pool = get_pool()
+    live_path = live_database_path()
+    staged = live_path.with_name(f'.{live_path.name}.restore')
+    try:
+        report(0, 'Preparing the backup file')
+        _stage_candidate(backup_path, staged)
+        lap('stage')
+
+        report(1, 'Checking the backup file')
+        problems = _check_candidate(staged, quick_check)
+        if problems:
+            raise RuntimeError(f'Backup failed integrity check: {problems}')
+        migrated = _migrate_candidate(staged)
+        lap('verify')
+
+        report(2, 'Backing up the current database')
+        emergency = create_backup()
+        lap('emergency_backup')
+
+        report(3, 'Replacing the database')
+        # no progress writes in here: they would wait for the paused pool
+        with pool.paused(drain_timeout):
+            lap('drain')
+            _carry_over_live_state(staged, live_path)
+            # an empty WAL guarantees no frames of the old database get
+            # replayed on top of the restored file
+            _checkpoint_wal()
+            os.replace(staged, live_path)
+            lap('swap')
+    finally:
+        staged.unlink(missing_ok=True)
+
+    timings['total'] = round(time.perf_counter() - started, 3)
+    report(4, 'Restore finished')
+    return {'restored_from': str(backup_path), 'emergency': str(emergency),
+            'migrated': migrated, 'timings': timings}
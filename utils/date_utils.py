@@ -1,12 +1,139 @@
+import re
+import threading
+from datetime import date, datetime
+from functools import lru_cache
+
 import jdatetime
-from datetime import datetime
 
-def gregorian_to_jalali(gregorian_date):
+# Jalali years covered by the precomputed day table (Gregorian 1921-03-21 .. 2121-03-20).
+# Values outside this range (or in unusual formats) fall back to jdatetime.
+JALALI_MIN_YEAR = 1300
+JALALI_MAX_YEAR = 1499
+
+_DATE_CACHE_SIZE = 8192
+
+_JALALI_DATETIME_RE = re.compile(r'^(\d{4})/(\d{1,2})/(\d{1,2}) (\d{1,2}):(\d{2})(?::(\d{2}))?$')
+
+
+class _DayTable:
     """
-    Convert Gregorian date to Jalali
-    Input: Gregorian date string (YYYY-MM-DD HH:MM:SS)
-    Output: Jalali date string (YYYY/MM/DD HH:MM:SS)
+    Lookup tables between Gregorian day ordinals and Jalali dates, built once on
+    first use: one 'YYYY/MM/DD' label per day, plus the ordinal of each
+    Jalali new year for the reverse direction.
     """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ready = False
+
+    def _build(self):
+        year_starts = [
+            jdatetime.date(year, 1, 1).togregorian().toordinal()
+            for year in range(JALALI_MIN_YEAR, JALALI_MAX_YEAR + 2)
+        ]
+        labels = []
+        for index, year in enumerate(range(JALALI_MIN_YEAR, JALALI_MAX_YEAR + 1)):
+            year_length = year_starts[index + 1] - year_starts[index]
+            for day_of_year in range(year_length):
+                month, day = _month_day(day_of_year)
+                labels.append(f'{year:04d}/{month:02d}/{day:02d}')
+        self.year_starts = year_starts
+        self.labels = labels
+        self.first_ordinal = year_starts[0]
+        self.last_ordinal = year_starts[-1] - 1
+
+    def ensure(self):
+        if not self._ready:
+            with self._lock:
+                if not self._ready:
+                    self._build()
+                    self._ready = True
+        return self
+
+
+def _month_day(day_of_year):
+    """Jalali month/day for a 0-based day of the year (6×31, 5×30, then Esfand)."""
+    if day_of_year < 186:
+        return day_of_year // 31 + 1, day_of_year % 31 + 1
+    day_of_year -= 186
+    return day_of_year // 30 + 7, day_of_year % 30 + 1
+
+
+def _month_offset(month):
+    return (month - 1) * 31 if month <= 7 else 186 + (month - 7) * 30
+
+
+_table = _DayTable()
+
+
+def _valid_time(text, start):
+    """Validate 'HH:MM:SS' at text[start:] the same way datetime() would."""
+    hour, minute, second = text[start:start + 2], text[start + 3:start + 5], text[start + 6:start + 8]
+    return (
+        hour <= '23' and minute <= '59' and second <= '59'
+        and (hour + minute + second).isdigit()
+    )
+
+
+@lru_cache(maxsize=_DATE_CACHE_SIZE)
+def _jalali_date_label(gregorian_date_part):
+    """'YYYY-MM-DD' -> 'YYYY/MM/DD' (Jalali), or None when outside the table."""
+    try:
+        year, month, day = map(int, gregorian_date_part.split('-'))
+        ordinal = date(year, month, day).toordinal()
+    except ValueError:
+        return None
+    return _label_for_ordinal(ordinal)
+
+
+def _label_for_ordinal(ordinal):
+    table = _table.ensure()
+    if table.first_ordinal <= ordinal <= table.last_ordinal:
+        return table.labels[ordinal - table.first_ordinal]
+    return None
+
+
+@lru_cache(maxsize=_DATE_CACHE_SIZE)
+def _gregorian_date_label(jalali_date_part):
+    """'YYYY/MM/DD' (Jalali) -> 'YYYY-MM-DD', or None when invalid/outside the table."""
+    try:
+        year, month, day = map(int, jalali_date_part.split('/'))
+    except ValueError:
+        return None
+    if not (JALALI_MIN_YEAR <= year <= JALALI_MAX_YEAR and 1 <= month <= 12 and day >= 1):
+        return None
+    table = _table.ensure()
+    index = year - JALALI_MIN_YEAR
+    year_length = table.year_starts[index + 1] - table.year_starts[index]
+    month_length = 31 if month <= 6 else 30 if month <= 11 else year_length - 336
+    if day > month_length:
+        return None
+    ordinal = table.year_starts[index] + _month_offset(month) + day - 1
+    return date.fromordinal(ordinal).isoformat()
+
+
+def _fast_gregorian_to_jalali(value):
+    """Table-based conversion; returns None when the input needs the jdatetime path."""
+    if isinstance(value, str):
+        if len(value) == 19 and value[10] == ' ' and value[13] == ':' and value[16] == ':':
+            if not _valid_time(value, 11):
+                return None
+            label = _jalali_date_label(value[:10])
+            return f'{label} {value[11:]}' if label else None
+        if len(value) == 10:
+            label = _jalali_date_label(value)
+            return f'{label} 00:00:00' if label else None
+        return None
+    if isinstance(value, datetime):
+        label = _label_for_ordinal(value.toordinal())
+        if label is None:
+            return None
+        return f'{label} {value.hour:02d}:{value.minute:02d}:{value.second:02d}'
+    return None
+
+
+def _jdatetime_gregorian_to_jalali(gregorian_date):
+    """Original jdatetime-based conversion (fallback and benchmark baseline)."""
     try:
         if isinstance(gregorian_date, str):
             if ' ' in gregorian_date:
@@ -19,20 +146,32 @@ def gregorian_to_jalali(gregorian_date):
                 greg_date = datetime(year, month, day)
         else:
             greg_date = gregorian_date
-        
+
         jalali_date = jdatetime.datetime.fromgregorian(datetime=greg_date)
         return jalali_date.strftime('%Y/%m/%d %H:%M:%S')
-    
+
     except Exception as e:
         print(f"Error converting to Jalali: {e}")
         return gregorian_date
 
-def jalali_to_gregorian(jalali_date_str):
+
+def gregorian_to_jalali(gregorian_date, include_time=True):
     """
-    Convert Jalali date to Gregorian
-    Input: Jalali date string (YYYY/MM/DD HH:MM:SS)
-    Output: Gregorian date string (YYYY-MM-DD HH:MM:SS)
+    Convert Gregorian date to Jalali
+    Input: Gregorian date string (YYYY-MM-DD HH:MM:SS) or datetime
+    Output: Jalali date string (YYYY/MM/DD HH:MM:SS), or only YYYY/MM/DD when
+    include_time is False. Invalid input is returned unchanged.
     """
+    result = _fast_gregorian_to_jalali(gregorian_date)
+    if result is None:
+        result = _jdatetime_gregorian_to_jalali(gregorian_date)
+    if not include_time and isinstance(result, str) and result is not gregorian_date:
+        return result[:10]
+    return result
+
+
+def _jdatetime_jalali_to_gregorian(jalali_date_str):
+    """Original jdatetime-based conversion (fallback and benchmark baseline)."""
     try:
         if ' ' in jalali_date_str:
             date_part, time_part = jalali_date_str.split(' ')
@@ -42,14 +181,147 @@ def jalali_to_gregorian(jalali_date_str):
         else:
             year, month, day = map(int, jalali_date_str.split('/'))
             jalali_date = jdatetime.datetime(year, month, day)
-        
+
         greg_date = jalali_date.togregorian()
         return greg_date.strftime('%Y-%m-%d %H:%M:%S')
-    
+
     except Exception as e:
         print(f"Error converting to Gregorian: {e}")
         return jalali_date_str
 
+
+def jalali_to_gregorian(jalali_date_str):
+    """
+    Convert Jalali date to Gregorian
+    Input: Jalali date string (YYYY/MM/DD HH:MM:SS)
+    Output: Gregorian date string (YYYY-MM-DD HH:MM:SS)
+    """
+    if isinstance(jalali_date_str, str):
+        value = jalali_date_str
+        if len(value) == 19 and value[10] == ' ' and value[13] == ':' and value[16] == ':':
+            if _valid_time(value, 11):
+                label = _gregorian_date_label(value[:10])
+                if label:
+                    return f'{label} {value[11:]}'
+        elif len(value) == 10:
+            label = _gregorian_date_label(value)
+            if label:
+                return f'{label} 00:00:00'
+    return _jdatetime_jalali_to_gregorian(jalali_date_str)
+
+
+def parse_jalali_datetime(text):
+    """Strictly convert Jalali 'YYYY/MM/DD HH:MM[:SS]' to Gregorian 'YYYY-MM-DD HH:MM:SS'.
+
+    Unlike jalali_to_gregorian, which hands back unparseable input unchanged,
+    this returns None for anything that is not a real Jalali date and time.
+    """
+    match = _JALALI_DATETIME_RE.match(str(text or '').strip())
+    if not match:
+        return None
+    year, month, day, hour, minute, second = (int(part or 0) for part in match.groups())
+    try:
+        moment = jdatetime.datetime(year, month, day, hour, minute, second).togregorian()
+    except (ValueError, OverflowError):
+        return None
+    return moment.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def gregorian_to_jalali_many(values, include_time=True):
+    """Convert an iterable of Gregorian dates/strings; None values stay None."""
+    return [
+        None if value is None else gregorian_to_jalali(value, include_time)
+        for value in values
+    ]
+
+
+def jalali_to_gregorian_many(values):
+    """Convert an iterable of Jalali strings; None values stay None."""
+    return [None if value is None else jalali_to_gregorian(value) for value in values]
+
+
+def gregorian_to_jalali_array(values, include_time=True):
+    """
+    Vectorized conversion for NumPy arrays and pandas Series/Index.
+
+    datetime64 data is converted with array arithmetic (day table lookup plus
+    time-of-day from the remainder); string/object data is converted once per
+    distinct value. Returns the same container type (Series keeps its index);
+    missing values become None.
+    """
+    import numpy as np
+
+    try:
+        import pandas as pd
+    except ImportError:  # pragma: no cover - pandas is a hard dependency of the app
+        pd = None
+
+    if pd is not None and isinstance(values, (pd.Series, pd.Index)):
+        converted = _convert_array(np.asarray(values), include_time, np, pd)
+        if isinstance(values, pd.Series):
+            return pd.Series(converted, index=values.index, name=values.name, dtype=object)
+        return pd.Index(converted, name=values.name, dtype=object)
+    return _convert_array(np.asarray(values), include_time, np, pd)
+
+
+def _convert_array(array, include_time, np, pd):
+    if np.issubdtype(array.dtype, np.datetime64):
+        return _convert_datetime64(array, include_time, np)
+
+    flat = array.ravel()
+    if pd is not None:
+        codes, uniques = pd.factorize(flat, use_na_sentinel=True)
+    else:
+        uniques, codes = np.unique(flat.astype(str), return_inverse=True)
+    converted_uniques = np.array(
+        [gregorian_to_jalali(value, include_time) for value in uniques] + [None],
+        dtype=object,
+    )
+    # code -1 (missing value) maps to the trailing None
+    return converted_uniques[codes].reshape(array.shape)
+
+
+def _convert_datetime64(array, include_time, np):
+    table = _table.ensure()
+    seconds = array.astype('datetime64[s]')
+    missing = np.isnat(seconds)
+    days = seconds.astype('datetime64[D]')
+    epoch_ordinal = date(1970, 1, 1).toordinal()
+    ordinals = days.astype(np.int64) + epoch_ordinal
+    in_table = ~missing & (ordinals >= table.first_ordinal) & (ordinals <= table.last_ordinal)
+
+    result = np.full(array.shape, None, dtype=object)
+    day_labels = _day_labels_array(np)[ordinals[in_table] - table.first_ordinal]
+    if include_time:
+        time_of_day = (seconds[in_table] - days[in_table]).astype(np.int64)
+        result[in_table] = day_labels + _time_labels_array(np)[time_of_day]
+    else:
+        result[in_table] = day_labels
+
+    # dates outside the table go through the scalar path
+    outside = ~missing & ~in_table
+    if outside.any():
+        result[outside] = [
+            gregorian_to_jalali(value.astype(datetime), include_time)
+            for value in seconds[outside]
+        ]
+    return result
+
+
+@lru_cache(maxsize=1)
+def _day_labels_array(np):
+    return np.array(_table.ensure().labels, dtype=object)
+
+
+@lru_cache(maxsize=1)
+def _time_labels_array(np):
+    """' HH:MM:SS' for every second of the day, indexed by seconds since midnight."""
+    return np.array(
+        [f' {s // 3600:02d}:{s // 60 % 60:02d}:{s % 60:02d}' for s in range(86400)],
+        dtype=object,
+    )
+
+
 def get_current_jalali():
     """Get current Jalali date and time"""
     now = jdatetime.datetime.now()
@@ -58,4 +330,4 @@ def get_current_jalali():
 def get_current_gregorian():
     """Get current Gregorian date and time"""
     now = datetime.now()
-    return now.strftime('%Y-%m-%d %H:%M:%S')
\ No newline at end of file
+    return now.strftime('%Y-%m-%d %H:%M:%S')
@@ -1,139 +1,368 @@
 import pandas as pd
+import csv
+import importlib
 import io
 import json
-from flask import send_file, flash, redirect
-from database.reports import get_operating_hours_report, get_status_at_time_report, get_full_history_report
+import tempfile
+import unicodedata
+from itertools import chain, islice
+from urllib.parse import quote
+from flask import Response, send_file, flash, redirect, stream_with_context
+from database.reports import get_operating_hours_report, get_status_at_time_report, iter_full_history, count_full_history
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.utils import get_column_letter
-from openpyxl.styles import Font, Alignment, PatternFill
+from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
 from database.wells_operations import get_all_wells, get_well_maintenance_operations, get_well_by_id
 from utils.date_utils import gregorian_to_jalali
+from utils.job_queue import job_handler, submit_job
+
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+# عرض ستون‌ها از روی سرستون و این تعداد ردیف اول محاسبه می‌شود (در حالت
+# write-only عرض ستون باید قبل از نوشتن اولین ردیف مشخص باشد)
+WIDTH_SAMPLE_ROWS = 1000
+# فایل خروجی تا این اندازه در حافظه و بیشتر از آن روی دیسک نگه داشته می‌شود
+SPOOL_MAX_BYTES = 8 * 1024 * 1024
+
+_TITLE_FONT = Font(size=14, bold=True)
+_TITLE_ALIGNMENT = Alignment(horizontal='center', vertical='center')
+# همان قالب سرستون pandas.DataFrame.to_excel
+_HEADER_FONT = Font(bold=True)
+_HEADER_ALIGNMENT = Alignment(horizontal='center', vertical='top')
+_HEADER_BORDER = Border(*(Side(style='thin'),) * 4)
+_HIGHLIGHT_FILL = PatternFill(start_color='FFFF00', end_color='FFFF00', fill_type='solid')
+
+# قالب‌های خروجی قابل انتخاب با پارامتر format=: (پسوند فایل، mimetype)
+EXPORT_FORMATS = {
+    'xlsx': ('.xlsx', XLSX_MIMETYPE),
+    'csv': ('.csv', 'text/csv; charset=utf-8'),
+    'parquet': ('.parquet', 'application/vnd.apache.parquet'),
+    'arrow': ('.arrow', 'application/vnd.apache.arrow.file'),
+}
+DEFAULT_EXPORT_FORMAT = 'xlsx'
+# قالب‌های ستونی به pyarrow نیاز دارند که وابستگی اختیاری است
+_ARROW_FORMATS = ('parquet', 'arrow')
+CSV_CHUNK_ROWS = 1000
+ARROW_BATCH_ROWS = 10000
+
+def _dataframe_spec(df, title, sheet_name, filename):
+    return {
+        'columns': [str(col) for col in df.columns],
+        'rows': df.itertuples(index=False, name=None),
+        'total': len(df),
+        'title': title,
+        'sheet_name': sheet_name,
+        'filename': filename,
+    }
 
-def export_operating_hours_to_excel(date_jalali, month_jalali, report_type):
-    """خروجی اکسل برای گزارش ساعات کارکرد"""
+def operating_hours_export_spec(date_jalali, month_jalali, report_type):
+    """مشخصات خروجی گزارش ساعات کارکرد، یا None اگر داده‌ای نباشد"""
     results = get_operating_hours_report(date_jalali, month_jalali, report_type)
-    
     if not results:
-        from flask import flash, redirect
-        flash('هیچ داده‌ای برای دانلود وجود ندارد', 'warning')
-        return redirect('/report/operating-hours')
-    
-    df = pd.DataFrame(results)
+        return None
     
     if report_type == 'daily':
         period_title = f"گزارش ساعات کارکرد روزانه - تاریخ: {date_jalali}"
-        filename = f'operating_hours_daily_{date_jalali.replace("/", "-")}.xlsx'
+        filename = f'operating_hours_daily_{date_jalali.replace("/", "-")}'
     else:
         period_title = f"گزارش ساعات کارکرد ماهانه - ماه: {month_jalali}"
-        filename = f'operating_hours_monthly_{month_jalali.replace("/", "-")}.xlsx'
+        filename = f'operating_hours_monthly_{month_jalali.replace("/", "-")}'
     
-    output = create_excel_with_title(df, period_title, 'گزارش ساعات کارکرد')
-    output.seek(0)
-    
-    return send_file(
-        output,
-        as_attachment=True,
-        download_name=filename,
-        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
+    return _dataframe_spec(pd.DataFrame(results), period_title, 'گزارش ساعات کارکرد', filename)
 
-def export_status_report_to_excel(date_jalali, time, display_type):
-    """خروجی اکسل برای گزارش وضعیت در زمان خاص"""
+def status_report_export_spec(date_jalali, time, display_type):
+    """مشخصات خروجی گزارش وضعیت در زمان خاص، یا None اگر داده‌ای نباشد"""
     results = get_status_at_time_report(date_jalali, time, display_type)
-    
     if not results:
-        from flask import flash, redirect
-        flash('هیچ داده‌ای برای دانلود وجود ندارد', 'warning')
-        return redirect('/report/status-at-time')
+        return None
     
-    df = pd.DataFrame(results)
     period_title = f"گزارش وضعیت پمپ‌ها - تاریخ: {date_jalali} - ساعت: {time}"
-    filename = f'status_report_{date_jalali}_{time}.xlsx'.replace('/', '-').replace(':', '-')
-    
-    output = create_excel_with_title(df, period_title, 'گزارش وضعیت')
-    output.seek(0)
+    filename = f'status_report_{date_jalali}_{time}'.replace('/', '-').replace(':', '-')
+    return _dataframe_spec(pd.DataFrame(results), period_title, 'گزارش وضعیت', filename)
+
+FULL_HISTORY_COLUMNS = ['شماره پمپ', 'نام پمپ', 'وضعیت', 'تاریخ', 'ساعت', 'علت', 'توضیحات', 'کاربر']
+
+def _full_history_values(row):
+    return [row['pump_number'], row['name'], row['action_persian'], row['action_date'],
+            row['action_time'], row['reason'], row['notes'] or '', row['user_name']]
+
+def full_history_export_spec(from_date_jalali, to_date_jalali, pump_id, with_total=False):
+    """
+    مشخصات خروجی تاریخچه کامل (ردیف‌ها به صورت جریانی، بدون DataFrame)، یا None
+    اگر داده‌ای نباشد. with_total: شمارش ردیف‌ها برای نمایش پیشرفت (یک کوئری اضافه)
+    """
+    rows = iter_full_history(from_date_jalali, to_date_jalali, pump_id)
+    first = next(rows, None)
+    if first is None:
+        return None
     
-    return send_file(
-        output,
-        as_attachment=True,
-        download_name=filename,
-        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
+    return {
+        'columns': FULL_HISTORY_COLUMNS,
+        'rows': (_full_history_values(row) for row in chain([first], rows)),
+        'total': count_full_history(from_date_jalali, to_date_jalali, pump_id) if with_total else None,
+        'title': f"تاریخچه تغییرات - از {from_date_jalali} تا {to_date_jalali}",
+        'sheet_name': 'تاریخچه تغییرات',
+        'filename': f'full_history_{from_date_jalali}_to_{to_date_jalali}'.replace('/', '-'),
+    }
 
-def export_full_history_to_excel(from_date_jalali, to_date_jalali, pump_id):
-    """خروجی اکسل برای گزارش تاریخچه کامل"""
-    results = get_full_history_report(from_date_jalali, to_date_jalali, pump_id)
+def _export_report(spec_builder, args, export_format, redirect_to, empty_message='هیچ داده‌ای برای دانلود وجود ندارد'):
+    format_error = check_export_format(export_format)
+    if format_error:
+        flash(format_error, 'warning')
+        return redirect(redirect_to)
     
-    if not results:
-        from flask import flash, redirect
-        flash('هیچ داده‌ای برای دانلود وجود ندارد', 'warning')
-        return redirect('/report/full-history')
+    spec = spec_builder(*args)
+    if spec is None:
+        flash(empty_message, 'warning')
+        return redirect(redirect_to)
     
-    data = []
-    for row in results:
-        data.append({
-            'شماره پمپ': row['pump_number'],
-            'نام پمپ': row['name'],
-            'وضعیت': row['action_persian'],
-            'تاریخ': row['action_date'],
-            'ساعت': row['action_time'],
-            'علت': row['reason'],
-            'توضیحات': row['notes'] or '',
-            'کاربر': row['user_name']
-        })
+    return send_export(spec['columns'], spec['rows'], spec['title'], spec['sheet_name'],
+                       spec['filename'], export_format)
+
+def export_operating_hours_to_excel(date_jalali, month_jalali, report_type, export_format=DEFAULT_EXPORT_FORMAT):
+    """خروجی اکسل (یا CSV/Parquet) برای گزارش ساعات کارکرد"""
+    return _export_report(operating_hours_export_spec, (date_jalali, month_jalali, report_type),
+                          export_format, '/report/operating-hours')
+
+def export_status_report_to_excel(date_jalali, time, display_type, export_format=DEFAULT_EXPORT_FORMAT):
+    """خروجی اکسل (یا CSV/Parquet) برای گزارش وضعیت در زمان خاص"""
+    return _export_report(status_report_export_spec, (date_jalali, time, display_type),
+                          export_format, '/report/status-at-time')
+
+def export_full_history_to_excel(from_date_jalali, to_date_jalali, pump_id, export_format=DEFAULT_EXPORT_FORMAT):
+    """خروجی اکسل (یا CSV/Parquet) برای گزارش تاریخچه کامل"""
+    return _export_report(full_history_export_spec, (from_date_jalali, to_date_jalali, pump_id),
+                          export_format, '/report/full-history')
+
+def check_export_format(export_format):
+    """پیام خطا برای قالب خروجی نامعتبر یا در دسترس نبودن pyarrow؛ در غیر این صورت None"""
+    if export_format not in EXPORT_FORMATS:
+        return f'قالب خروجی نامعتبر است: {export_format}'
+    if export_format in _ARROW_FORMATS and _load_pyarrow() is None:
+        return 'برای خروجی Parquet/Arrow کتابخانه pyarrow باید نصب باشد'
+    return None
+
+def _load_pyarrow():
+    """import تنبل pyarrow (وابستگی اختیاری)؛ در صورت نصب نبودن None"""
+    try:
+        return importlib.import_module('pyarrow')
+    except ImportError:
+        return None
+
+def _download_name_options(download_name):
+    """
+    پارامترهای هدر Content-Disposition مانند send_file در werkzeug: نام ASCII
+    به صورت quoted و نام غیر ASCII (فارسی) با filename*=UTF-8''... (RFC 5987)
+    """
+    try:
+        download_name.encode('ascii')
+    except UnicodeEncodeError:
+        simple = unicodedata.normalize('NFKD', download_name).encode('ascii', 'ignore').decode('ascii')
+        return {'filename': simple, 'filename*': f"UTF-8''{quote(download_name, safe='!#$&+^`|~')}"}
+    return {'filename': download_name}
+
+def send_export(columns, rows, title, sheet_name, filename, export_format=DEFAULT_EXPORT_FORMAT, highlights=None):
+    """
+    ارسال خروجی گزارش در قالب درخواستی (xlsx، csv، parquet یا arrow).
+
+    columns/rows/title/sheet_name/highlights مانند write_excel_stream هستند؛ عنوان و
+    رنگ‌آمیزی فقط در اکسل استفاده می‌شوند. filename بدون پسوند است. قالب باید قبلاً
+    با check_export_format بررسی شده باشد.
+    """
+    extension, mimetype = EXPORT_FORMATS[export_format]
+    download_name = filename + extension
     
-    df = pd.DataFrame(data)
-    period_title = f"تاریخچه تغییرات - از {from_date_jalali} تا {to_date_jalali}"
-    filename = f'full_history_{from_date_jalali}_to_{to_date_jalali}.xlsx'.replace('/', '-')
+    if export_format == 'csv':
+        response = Response(stream_with_context(_csv_stream(columns, rows)), mimetype=mimetype)
+        response.headers.set('Content-Disposition', 'attachment', **_download_name_options(download_name))
+        return response
     
-    output = create_excel_with_title(df, period_title, 'تاریخچه تغییرات')
-    output.seek(0)
+    if export_format in _ARROW_FORMATS:
+        output = write_arrow_stream(columns, rows, export_format)
+    else:
+        output = write_excel_stream(columns, rows, title, sheet_name, highlights)
     
     return send_file(
         output,
         as_attachment=True,
-        download_name=filename,
-        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        download_name=download_name,
+        mimetype=mimetype
     )
 
-def create_excel_with_title(df, title, sheet_name):
-    """ایجاد فایل اکسل با عنوان"""
-    output = io.BytesIO()
-    
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        df.to_excel(writer, sheet_name=sheet_name, index=False)
-        
-        workbook = writer.book
-        worksheet = writer.sheets[sheet_name]
-        
-        # اضافه کردن عنوان
-        worksheet.insert_rows(1)
-        worksheet['A1'] = title
-
-        # merge title across all dataframe columns (handle variable width)
-        if df.shape[1] >= 1:
-            last_col = get_column_letter(df.shape[1])
-            worksheet.merge_cells(f'A1:{last_col}1')
-
-        # style title
-        worksheet['A1'].font = Font(size=14, bold=True)
-        worksheet['A1'].alignment = Alignment(horizontal='center', vertical='center')
-
-        # auto-size columns based on content
-        for idx, col in enumerate(df.columns, start=1):
-            col_letter = get_column_letter(idx)
-            # compute max length in column (including header)
-            try:
-                max_length = max(df[col].astype(str).map(len).max(), len(str(col)))
-            except Exception:
-                max_length = len(str(col))
+def write_export_file(columns, rows, title, sheet_name, export_format, path, highlights=None):
+    """نوشتن خروجی در قالب درخواستی مستقیماً در فایل path (برای کارهای پس‌زمینه)"""
+    with open(path, 'wb') as output:
+        if export_format == 'csv':
+            for chunk in _csv_stream(columns, rows):
+                output.write(chunk)
+        elif export_format in _ARROW_FORMATS:
+            write_arrow_stream(columns, rows, export_format, output)
+        else:
+            write_excel_stream(columns, rows, title, sheet_name, highlights, output)
+    return path
 
-            adjusted_width = (max_length or 0) + 2
-            worksheet.column_dimensions[col_letter].width = adjusted_width
+def _csv_stream(columns, rows):
+    """
+    تولید تدریجی CSV (UTF-8 با BOM تا اکسل متن فارسی را درست نمایش دهد).
+    ردیف‌ها در دسته‌های CSV_CHUNK_ROWS تایی به بایت تبدیل و ارسال می‌شوند.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write('\ufeff')
+    writer.writerow(columns)
+    
+    rows = iter(rows)
+    chunk_rows = CSV_CHUNK_ROWS
+    while True:
+        chunk = list(islice(rows, chunk_rows))
+        writer.writerows(
+            ['' if value is None else value for value in map(_excel_value, row)]
+            for row in chunk
+        )
+        data = buffer.getvalue()
+        if data:
+            yield data.encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+        if len(chunk) < chunk_rows:
+            return
+
+def _arrow_column(pa, values, column_type=None):
+    """ساخت ستون Arrow؛ ستون با انواع ناسازگار (مثلاً عدد و متن) به متن تبدیل می‌شود"""
+    try:
+        return pa.array(values, type=column_type)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        if column_type is not None and not pa.types.is_string(column_type):
+            raise
+        return pa.array([None if v is None else str(v) for v in values], type=pa.string())
+
+def write_arrow_stream(columns, rows, export_format='parquet', output=None):
+    """
+    نوشتن جریانی خروجی ستونی (Parquet یا فایل Arrow IPC) در دسته‌های ARROW_BATCH_ROWS تایی.
 
+    نوع ستون‌ها از اولین دسته تعیین می‌شود (ستون کاملاً خالی متنی در نظر گرفته
+    می‌شود) و هر دسته بلافاصله نوشته می‌شود، پس فقط یک دسته در حافظه است.
+    خروجی: output (فایل باینری مقصد، اختیاری) یا SpooledTemporaryFile در ابتدای فایل
+    """
+    pa = _load_pyarrow()
+    if pa is None:
+        raise RuntimeError('pyarrow is required for Parquet/Arrow export')
+    
+    columns = [str(col) for col in columns]
+    if output is None:
+        output = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+    sink = pa.PythonFile(output, mode='w')
+    schema = None
+    writer = None
+    rows = iter(rows)
+    try:
+        while True:
+            chunk = [[_excel_value(v) for v in row] for row in islice(rows, ARROW_BATCH_ROWS)]
+            if not chunk and writer is not None:
+                break
+            values = [[row[idx] if idx < len(row) else None for row in chunk]
+                      for idx in range(len(columns))]
+            if schema is None:
+                arrays = [_arrow_column(pa, column_values) for column_values in values]
+                schema = pa.schema([
+                    pa.field(name, pa.string() if pa.types.is_null(array.type) else array.type)
+                    for name, array in zip(columns, arrays)
+                ])
+                if export_format == 'parquet':
+                    writer = importlib.import_module('pyarrow.parquet').ParquetWriter(sink, schema)
+                else:
+                    writer = pa.ipc.new_file(sink, schema)
+            arrays = [_arrow_column(pa, column_values, field.type)
+                      for column_values, field in zip(values, schema)]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            if len(chunk) < ARROW_BATCH_ROWS:
+                break
+    finally:
+        if writer is not None:
+            writer.close()
     output.seek(0)
+    return output
+
+def _excel_value(value):
+    """مقادیر خالی pandas (NaN/NaT) به سلول خالی تبدیل می‌شوند"""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    return value
+
+def _display_width(value):
+    return len(str(value)) if value is not None else 0
 
+def write_excel_stream(columns, rows, title, sheet_name, highlights=None, output=None):
+    """
+    نوشتن جریانی فایل اکسل با عنوان (openpyxl در حالت write-only).
+
+    columns: عنوان ستون‌ها، rows: iterable از لیست مقادیر هر ردیف به ترتیب ستون‌ها
+    highlights: اختیاری، {شماره ردیف داده (از صفر): مجموعه شماره ستون‌ها (از صفر)}
+    برای رنگ‌آمیزی سلول‌های تغییرکرده. output: اختیاری، فایل باینری مقصد.
+
+    ردیف عنوان قبل از داده‌ها نوشته می‌شود (بدون insert_rows) و عرض ستون‌ها از
+    روی WIDTH_SAMPLE_ROWS ردیف اول محاسبه می‌شود، بنابراین ردیف‌ها فقط یک بار
+    پیمایش و بلافاصله روی دیسک نوشته می‌شوند و هیچ‌وقت کل داده در حافظه نیست.
+    خروجی: output یا SpooledTemporaryFile در ابتدای فایل (قابل ارسال با send_file)
+    """
+    columns = list(columns)
+    rows = iter(rows)
+    sample = [[_excel_value(v) for v in row] for row in islice(rows, WIDTH_SAMPLE_ROWS)]
+    
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet(sheet_name)
+    
+    widths = [len(str(col)) for col in columns]
+    for row in sample:
+        for idx, value in enumerate(row[:len(widths)]):
+            widths[idx] = max(widths[idx], _display_width(value))
+    for idx, width in enumerate(widths, start=1):
+        worksheet.column_dimensions[get_column_letter(idx)].width = width + 2
+    
+    title_cell = WriteOnlyCell(worksheet, value=title)
+    title_cell.font = _TITLE_FONT
+    title_cell.alignment = _TITLE_ALIGNMENT
+    worksheet.append([title_cell])
+    if columns:
+        worksheet.merged_cells.add(f'A1:{get_column_letter(len(columns))}1')
+    
+    header = []
+    for col in columns:
+        cell = WriteOnlyCell(worksheet, value=col)
+        cell.font = _HEADER_FONT
+        cell.alignment = _HEADER_ALIGNMENT
+        cell.border = _HEADER_BORDER
+        header.append(cell)
+    worksheet.append(header)
+    
+    highlights = highlights or {}
+    remaining = ([_excel_value(v) for v in row] for row in rows)
+    for row_idx, values in enumerate(chain(sample, remaining)):
+        marked = highlights.get(row_idx)
+        if marked:
+            values = list(values)
+            for col_idx in marked:
+                if col_idx < len(values):
+                    cell = WriteOnlyCell(worksheet, value=values[col_idx])
+                    cell.fill = _HIGHLIGHT_FILL
+                    values[col_idx] = cell
+        worksheet.append(values)
+    
+    if output is None:
+        output = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+    workbook.save(output)
+    output.seek(0)
     return output
 
+def create_excel_with_title(df, title, sheet_name):
+    """ایجاد فایل اکسل با عنوان"""
+    return write_excel_stream(
+        [str(col) for col in df.columns],
+        df.itertuples(index=False, name=None),
+        title,
+        sheet_name
+    )
+
 def create_sample_excel_file():
     """ایجاد فایل نمونه برای آپلود"""
     sample_data = {
@@ -157,17 +386,15 @@ def create_sample_excel_file():
         output,
         as_attachment=True,
         download_name='pump_history_sample.xlsx',
-        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        mimetype=XLSX_MIMETYPE
     )
 
-def export_wells_to_excel():
-    """صادرات اکسل برای مشخصات چاه‌ها (لیست چاه‌ها)"""
+def wells_export_spec():
+    """مشخصات خروجی لیست چاه‌ها، یا None اگر چاهی نباشد"""
     wells = get_all_wells()
 
     if not wells:
-        from flask import flash, redirect
-        flash('هیچ چاهی برای دانلود وجود ندارد', 'warning')
-        return redirect('/wells')
+        return None
 
     data = []
     for w in wells:
@@ -197,17 +424,15 @@ def export_wells_to_excel():
 
     df = pd.DataFrame(data)
     period_title = "مشخصات چاه‌ها"
-    filename = f'wells_list_{pd.Timestamp.now().strftime("%Y%m%d_%H%M%S")}.xlsx'
+    filename = f'wells_list_{pd.Timestamp.now().strftime("%Y%m%d_%H%M%S")}'
 
-    output = create_excel_with_title(df, period_title, 'چاه‌ها')
-    output.seek(0)
+    return _dataframe_spec(df, period_title, 'چاه‌ها', filename)
 
-    return send_file(
-        output,
-        as_attachment=True,
-        download_name=filename,
-        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
+
+def export_wells_to_excel(export_format=DEFAULT_EXPORT_FORMAT):
+    """صادرات اکسل (یا CSV/Parquet) برای مشخصات چاه‌ها (لیست چاه‌ها)"""
+    return _export_report(wells_export_spec, (), export_format, '/wells',
+                          'هیچ چاهی برای دانلود وجود ندارد')
 
 
 def export_well_history_to_excel(well_id):
@@ -298,64 +523,80 @@ def export_well_history_to_excel(well_id):
     # filename
     filename = f'well_{well_number}_history_{pd.Timestamp.now().strftime("%Y%m%d_%H%M%S")}.xlsx'
 
-    output = io.BytesIO()
-    highlight_fill = PatternFill(start_color='FFFF00', end_color='FFFF00', fill_type='solid')
-
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        sheet_name = 'تاریخچه تعمیرات'
-        df.to_excel(writer, sheet_name=sheet_name, index=False)
-
-        workbook = writer.book
-        worksheet = writer.sheets[sheet_name]
-
-        # Insert title row
-        worksheet.insert_rows(1)
-        worksheet['A1'] = f"تاریخچه تعمیرات چاه {well_number}"
-        last_col = get_column_letter(df.shape[1]) if df.shape[1] >= 1 else 'A'
-        worksheet.merge_cells(f'A1:{last_col}1')
-        worksheet['A1'].font = Font(size=14, bold=True)
-        worksheet['A1'].alignment = Alignment(horizontal='center', vertical='center')
-
-        # auto-size
-        for idx, col in enumerate(df.columns, start=1):
-            col_letter = get_column_letter(idx)
-            try:
-                max_length = max(df[col].astype(str).map(len).max(), len(str(col)))
-            except Exception:
-                max_length = len(str(col))
-            worksheet.column_dimensions[col_letter].width = (max_length or 0) + 2
-
-        # Apply highlights for changed fields
-        # header row is now at row 2, data starts at row 3
-        header_to_col = {str(df.columns[i]): i + 1 for i in range(len(df.columns))}
-
-        for row_idx, changed in enumerate(changed_lists, start=0):
-            excel_row = row_idx + 3
-            for field_key in changed:
-                # map field_key to Persian header if present
-                # find matching header label from well_fields
-                label = None
-                for k, lab in well_fields:
-                    if k == field_key:
-                        label = lab
-                        break
-                # also handle notes and other direct fields
-                if field_key == 'notes' or field_key == 'reason':
-                    label = 'یادداشت'
-
-                if label and label in header_to_col:
-                    col_idx = header_to_col[label]
-                    try:
-                        cell = worksheet.cell(row=excel_row, column=col_idx)
-                        cell.fill = highlight_fill
-                    except Exception:
-                        pass
-
-    output.seek(0)
+    # Highlights for changed fields: {data row index: {column index}}
+    header_to_col = {str(df.columns[i]): i for i in range(len(df.columns))}
+    field_labels = dict(well_fields)
+    field_labels['notes'] = field_labels['reason'] = 'یادداشت'
+
+    highlights = {}
+    for row_idx, changed in enumerate(changed_lists):
+        marked = {
+            header_to_col[field_labels[field_key]]
+            for field_key in changed
+            if field_labels.get(field_key) in header_to_col
+        }
+        if marked:
+            highlights[row_idx] = marked
+
+    output = write_excel_stream(
+        [str(col) for col in df.columns],
+        df.itertuples(index=False, name=None),
+        f"تاریخچه تعمیرات چاه {well_number}",
+        'تاریخچه تعمیرات',
+        highlights
+    )
 
     return send_file(
         output,
         as_attachment=True,
         download_name=filename,
-        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
\ No newline at end of file
+        mimetype=XLSX_MIMETYPE
+    )
+
+
+# --- خروجی در پس‌زمینه ----------------------------------------------------
+
+# گزارش‌هایی که می‌توانند به صورت کار پس‌زمینه ساخته شوند: نام → (سازنده مشخصات، صفحه بازگشت)
+BACKGROUND_EXPORTS = {
+    'operating_hours': (operating_hours_export_spec, '/report/operating-hours'),
+    'status_at_time': (status_report_export_spec, '/report/status-at-time'),
+    'full_history': (full_history_export_spec, '/report/full-history'),
+    'wells': (wells_export_spec, '/wells'),
+}
+
+def export_in_background(report, args, export_format, user_id):
+    """
+    ثبت خروجی گزارش به صورت کار پس‌زمینه و هدایت به صفحه وضعیت کار.
+    args: dict آرگومان‌های سازنده مشخصات گزارش (BACKGROUND_EXPORTS)
+    """
+    redirect_to = BACKGROUND_EXPORTS[report][1]
+    format_error = check_export_format(export_format)
+    if format_error:
+        flash(format_error, 'warning')
+        return redirect(redirect_to)
+    
+    job_id = submit_job('export', {'report': report, 'args': args, 'format': export_format}, user_id)
+    return redirect(f'/jobs/{job_id}')
+
+@job_handler('export')
+def _run_export_job(ctx):
+    report = ctx.params['report']
+    export_format = ctx.params.get('format', DEFAULT_EXPORT_FORMAT)
+    format_error = check_export_format(export_format)
+    if format_error:
+        raise ValueError(format_error)
+    
+    spec_builder = BACKGROUND_EXPORTS[report][0]
+    ctx.progress(0, message='در حال خواندن داده‌ها', force=True)
+    spec = spec_builder(**(ctx.params.get('args') or {}))
+    if spec is None:
+        raise ValueError('هیچ داده‌ای برای دانلود وجود ندارد')
+    
+    extension, mimetype = EXPORT_FORMATS[export_format]
+    path = ctx.artifact_path(extension)
+    download_name = spec['filename'] + extension
+    ctx.set_artifact(path, download_name, mimetype)
+    rows = ctx.track(spec['rows'], total=spec['total'], message='در حال ساخت فایل خروجی')
+    write_export_file(spec['columns'], rows, spec['title'], spec['sheet_name'], export_format, path)
+    return {'download_name': download_name, 'rows': ctx.done}
+
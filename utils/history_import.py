@@ -0,0 +1,413 @@
+"""واردسازی تاریخچه روشن/خاموش پمپ‌ها از فایل اکسل یا CSV (صفحه admin/import-history)
+
+منطق از blueprints/admin.py جدا شده تا به صورت کار پس‌زمینه (utils.job_queue)
+اجرا شود و درخواست وب تا پایان پردازش pandas منتظر نماند.
+"""
+import heapq
+import re
+from datetime import datetime
+
+import pandas as pd
+
+from database.models import get_db_connection
+from database.daily_hours import refresh_pump_days
+from database.pump_status import refresh_current_status
+from database.fleet_revision import bump_fleet_revision
+from database.event_journal import fold_pending_events
+from utils.date_utils import gregorian_to_jalali, jalali_to_gregorian_many
+from utils.job_queue import job_handler
+from utils.table_reader import iter_table_chunks
+
+REQUIRED_COLUMNS = ['Pump_Number', 'Action', 'Reason', 'Date_Jalali', 'Time_Jalali']
+VALID_ACTIONS = ('ON', 'OFF')
+
+_DATE_PATTERN = re.compile(r'(\d{4})/(\d{1,2})/(\d{1,2})')
+_TIME_PATTERN = re.compile(r'(\d{1,2})(?::(\d{1,2}))?(?::(\d{1,2}))?')
+
+
+def missing_history_columns(df):
+    return [col for col in REQUIRED_COLUMNS if col not in df.columns]
+
+
+def _text_column(df, column):
+    return df[column].astype(str).str.strip()
+
+
+def _map_unique(values, func):
+    """
+    اعمال func روی مقادیر یکتای ستون و بازگرداندن به طول اصلی؛ تاریخ و ساعت‌های
+    یک فایل بسیار تکراری‌اند، پس هر مقدار فقط یک بار پردازش می‌شود.
+    """
+    unique = pd.Index(values.unique())
+    mapped = pd.Series([func(value) for value in unique], dtype=object)
+    return pd.Series(mapped.to_numpy()[unique.get_indexer(values)], index=values.index)
+
+
+def _canonical_date(text):
+    """'1403/7/1' -> ('1403/07/01', '2024-09-22')، یا None برای تاریخ نامعتبر"""
+    match = _DATE_PATTERN.fullmatch(text)
+    if not match:
+        return None
+    year, month, day = match.groups()
+    label = f'{year}/{month.zfill(2)}/{day.zfill(2)}'
+    gregorian = jalali_to_gregorian_many([label])[0]
+    # jalali_to_gregorian برای تاریخ نامعتبر همان ورودی را برمی‌گرداند
+    if gregorian == label:
+        return None
+    return label, gregorian[:10]
+
+
+def _canonical_time(text):
+    """'8:05' -> '08:05:00'، یا None برای ساعت نامعتبر"""
+    match = _TIME_PATTERN.fullmatch(text)
+    if not match:
+        return None
+    hour, minute, second = (int(part or 0) for part in match.groups())
+    if hour > 23 or minute > 59 or second > 59:
+        return None
+    return f'{hour:02d}:{minute:02d}:{second:02d}'
+
+
+def normalize_history_frame(df, sheet=None):
+    """
+    تبدیل برداری ستون‌های فایل به رویدادهای آماده درج.
+
+    خروجی: (events, errors)؛ events یک DataFrame با ستون‌های row_index، pump_number،
+    action، event_time (میلادی)، jalali_time، reason و notes است و errors لیست
+    (row_index، پیام) ردیف‌هایی که قابل تبدیل نبودند. ردیف اکسل هر رکورد
+    df.index + 2 است؛ اگر sheet داده شود نام شیت هم به شماره خط اضافه می‌شود.
+    """
+    row_index = pd.Series(df.index, index=df.index) + 2
+    raw_pump = df['Pump_Number']
+    pump_number = pd.to_numeric(raw_pump, errors='coerce')
+    action = _text_column(df, 'Action').str.upper()
+    dates = _map_unique(_text_column(df, 'Date_Jalali'), _canonical_date)
+    clock = _map_unique(_text_column(df, 'Time_Jalali'), _canonical_time)
+
+    checks = [
+        (pump_number.notna(), 'شماره پمپ نامعتبر است'),
+        (action.isin(VALID_ACTIONS), 'عملیات باید ON یا OFF باشد'),
+        (dates.notna(), 'تاریخ شمسی نامعتبر است'),
+        (clock.notna(), 'ساعت نامعتبر است'),
+    ]
+    valid = pd.Series(True, index=df.index)
+    errors = []
+    for ok, message in checks:
+        failed = valid & ~ok
+        for index in failed[failed].index:
+            errors.append((int(row_index[index]), f'پمپ {raw_pump[index]} - خطا در پردازش داده ({message})'))
+        valid &= ok
+    errors.sort()
+    if sheet is not None:
+        row_index = row_index.astype(str) + f' (شیت {sheet})'
+        errors = [(f'{row} (شیت {sheet})', message) for row, message in errors]
+
+    dates, clock = dates[valid], clock[valid]
+    notes = ''
+    if 'Notes' in df.columns:
+        notes = df.loc[valid, 'Notes'].where(df.loc[valid, 'Notes'].notna(), '').astype(str)
+    events = pd.DataFrame({
+        'row_index': row_index[valid],
+        'pump_number': pump_number[valid].astype(int),
+        'action': action[valid],
+        'event_time': dates.str[1] + ' ' + clock,
+        'jalali_time': dates.str[0] + ' ' + clock,
+        'reason': _text_column(df, 'Reason')[valid],
+        'notes': notes,
+    })
+    return events, errors
+
+
+def _existing_window(conn, pump_id, first_time, last_time):
+    """
+    رویدادهای موجود پمپ که برای بررسی ترتیب لازم‌اند: همه رویدادهای بازه
+    [first_time, last_time] به‌علاوه آخرین رویداد قبل و اولین رویداد بعد از آن،
+    به ترتیب (event_time، id). بقیه تاریخچه روی درستی درج اثری ندارد.
+    """
+    rows = conn.execute('''
+        SELECT * FROM (
+            SELECT id, action, event_time FROM pump_history
+            WHERE pump_id = ? AND event_time < ?
+            ORDER BY event_time DESC, id DESC LIMIT 1
+        )
+        UNION ALL
+        SELECT id, action, event_time FROM pump_history
+        WHERE pump_id = ? AND event_time BETWEEN ? AND ?
+        UNION ALL
+        SELECT * FROM (
+            SELECT id, action, event_time FROM pump_history
+            WHERE pump_id = ? AND event_time > ?
+            ORDER BY event_time, id LIMIT 1
+        )
+    ''', (pump_id, first_time, pump_id, first_time, last_time, pump_id, last_time)).fetchall()
+    rows.sort(key=lambda row: (row['event_time'], row['id']))
+    return [(row['event_time'], row['action'], None) for row in rows]
+
+
+def _timeline_errors(pump_num, existing, new_events):
+    """
+    ادغام دو جریان مرتب (موجود و جدید) و یافتن رویدادهای پشت سر هم با عملیات یکسان.
+    هر رویداد (event_time، action، source) است؛ source برای رویداد جدید
+    (شماره خط، زمان شمسی) و برای رویداد موجود None است. رویداد موجود در زمان
+    برابر قبل از رویداد جدید قرار می‌گیرد.
+    """
+    errors = []
+    prev = None
+    for current in heapq.merge(existing, new_events, key=lambda event: event[0]):
+        if prev is not None and prev[1] == current[1] and (prev[2] or current[2]):
+            prev_jalali = prev[2][1] if prev[2] else gregorian_to_jalali(prev[0])
+            current_jalali = current[2][1] if current[2] else gregorian_to_jalali(current[0])
+            row = current[2][0] if current[2] else 'موجود'
+            errors.append(
+                f'خط {row}: پمپ {pump_num}: {current[1]} در {current_jalali} - مغایرت منطقی '
+                f'(پمپ از {prev_jalali} در حالت {prev[1]} بوده)'
+            )
+        prev = current
+    return errors
+
+
+def _create_stage(conn):
+    """جدول‌های موقت (فقط روی همین اتصال) برای ردیف‌های تبدیل‌شده و پمپ‌های پذیرفته‌شده"""
+    _drop_stage(conn)
+    conn.execute('''
+        CREATE TEMP TABLE history_import_stage (
+            seq INTEGER PRIMARY KEY,
+            row_index TEXT,
+            pump_number INTEGER NOT NULL,
+            action TEXT NOT NULL,
+            event_time TEXT NOT NULL,
+            jalali_time TEXT NOT NULL,
+            reason TEXT,
+            notes TEXT
+        )
+    ''')
+    conn.execute('''
+        CREATE TEMP TABLE history_import_accepted (
+            pump_number INTEGER PRIMARY KEY,
+            pump_id INTEGER NOT NULL
+        )
+    ''')
+
+
+def _drop_stage(conn):
+    conn.execute('DROP TABLE IF EXISTS temp.history_import_stage')
+    conn.execute('DROP TABLE IF EXISTS temp.history_import_accepted')
+
+
+def _stage_events(conn, events):
+    """افزودن رویدادهای یک تکه به جدول موقت (ترتیب درج = ترتیب فایل)"""
+    conn.executemany(
+        '''INSERT INTO history_import_stage
+           (row_index, pump_number, action, event_time, jalali_time, reason, notes)
+           VALUES (?, ?, ?, ?, ?, ?, ?)''',
+        zip(events['row_index'].astype(str), events['pump_number'].tolist(), events['action'],
+            events['event_time'], events['jalali_time'], events['reason'], events['notes'])
+    )
+
+
+def _load_pumps(conn):
+    return {
+        row['pump_number']: row
+        for row in conn.execute('''
+            SELECT p.id, p.pump_number, w.status AS well_status
+            FROM pumps p
+            LEFT JOIN wells w ON w.pump_id = p.id
+        ''')
+    }
+
+
+def _check_pump(conn, pump_num, pump, group):
+    """
+    بررسی رویدادهای جدول موقت یک پمپ نسبت به تاریخچه موجود.
+    خروجی: (پنجره تاریخچه موجود، لیست پیام‌های خطا)
+    """
+    staged = conn.execute('''
+        SELECT row_index, action, event_time, jalali_time
+        FROM history_import_stage
+        WHERE pump_number = ?
+        ORDER BY event_time, seq
+    ''', (pump_num,)).fetchall()
+
+    existing = []
+    if pump:
+        existing = _existing_window(conn, pump['id'], group['first_time'], group['last_time'])
+    timeline_errors = _timeline_errors(
+        pump_num, existing,
+        [(row['event_time'], row['action'], (row['row_index'], row['jalali_time'])) for row in staged]
+    )
+    if timeline_errors:
+        return existing, timeline_errors
+
+    if not pump:
+        return existing, [f'خط {row["row_index"]}: پمپ با شماره {pump_num} یافت نشد' for row in staged]
+    if pump['well_status'] is not None and pump['well_status'] != 'active':
+        return existing, [
+            f'خط {row["row_index"]}: پمپ {pump_num} - چاه در حالت "{pump["well_status"]}" است و امکان ثبت رکورد ندارد'
+            for row in staged
+        ]
+    return existing, []
+
+
+def _apply_stage(conn, user_id, progress=None):
+    """
+    بررسی رویدادهای جدول موقت (پمپ به پمپ، به ترتیب زمان) و درج رویدادهای
+    پمپ‌های بدون خطا در pump_history. commit نمی‌کند.
+
+    بررسی طولانی بدون قفل نوشتن انجام می‌شود (گزارش پیشرفت کار و ثبت وضعیت
+    اپراتورها در این مدت منتظر نمی‌مانند). فقط پیش از درج، قفل نوشتن گرفته،
+    ژورنال رویدادها ادغام و پمپ‌هایی که تاریخچه‌شان در این فاصله تغییر کرده
+    دوباره بررسی می‌شوند.
+    خروجی: (تعداد ردیف‌های درج‌شده، لیست پیام‌های خطا)
+    """
+    # ردیف‌های تبدیل‌شده در جدول‌های موقت می‌مانند؛ خواندن‌های بعدی در تراکنش باز
+    # (و snapshot قدیمی) انجام نمی‌شوند
+    conn.commit()
+    conn.execute('''
+        CREATE INDEX temp.idx_history_import_stage
+        ON history_import_stage (pump_number, event_time, seq)
+    ''')
+    groups = conn.execute('''
+        SELECT pump_number, MIN(event_time) AS first_time, MAX(event_time) AS last_time
+        FROM history_import_stage
+        GROUP BY pump_number
+        ORDER BY pump_number
+    ''').fetchall()
+    pumps = _load_pumps(conn)
+
+    errors = []
+    checked = {}
+    for done, group in enumerate(groups):
+        if progress:
+            progress(done, len(groups))
+        pump_num = group['pump_number']
+        existing, pump_errors = _check_pump(conn, pump_num, pumps.get(pump_num), group)
+        if pump_errors:
+            errors.extend(pump_errors)
+            continue
+        checked[pump_num] = (group, pumps[pump_num], existing)
+
+    if progress:
+        progress(len(groups), len(groups))
+    if not checked:
+        return 0, errors
+
+    # از اینجا تا commit قفل نوشتن نگه داشته می‌شود: بدون گزارش پیشرفت
+    fold_pending_events(conn)
+    pumps = _load_pumps(conn)
+    inserted_spans = {}
+    for pump_num, (group, checked_pump, existing) in checked.items():
+        pump = pumps.get(pump_num)
+        changed = pump is None or tuple(pump) != tuple(checked_pump) or existing != _existing_window(
+            conn, pump['id'], group['first_time'], group['last_time'])
+        if changed:
+            _, pump_errors = _check_pump(conn, pump_num, pump, group)
+            if pump_errors:
+                errors.extend(pump_errors)
+                continue
+        conn.execute('INSERT INTO history_import_accepted (pump_number, pump_id) VALUES (?, ?)',
+                     (pump_num, pump['id']))
+        inserted_spans[pump['id']] = (group['first_time'], group['last_time'])
+
+    if not inserted_spans:
+        return 0, errors
+
+    # همان قالبی که sqlite3 برای datetime می‌نویسد
+    recorded_time = datetime.now().isoformat(' ')
+    cur = conn.execute('''
+        INSERT INTO pump_history
+        (pump_id, user_id, action, event_time, recorded_time, reason, notes, manual_time)
+        SELECT a.pump_id, ?, s.action, s.event_time, ?, s.reason, s.notes, 1
+        FROM history_import_stage s
+        JOIN history_import_accepted a ON a.pump_number = s.pump_number
+        ORDER BY s.pump_number, s.event_time, s.seq
+    ''', (user_id, recorded_time))
+    for pump_id, (first_time, last_time) in inserted_spans.items():
+        refresh_pump_days(conn, pump_id, first_time, last_time)
+    refresh_current_status(conn, inserted_spans)
+    bump_fleet_revision(conn)
+    return cur.rowcount, errors
+
+
+def _import_chunks(chunks, user_id, progress=None):
+    """
+    تبدیل و ثبت تکه‌ها در جدول موقت، سپس بررسی و درج همه در یک تراکنش.
+    chunks: iterable از (نام شیت یا None، DataFrame)
+    """
+    error_messages = []
+    error_count = 0
+    conn = get_db_connection()
+    try:
+        _create_stage(conn)
+        data_sheet = None
+        skipped_sheets = {}
+        rows_read = 0
+        for sheet, chunk in chunks:
+            missing_columns = missing_history_columns(chunk)
+            if missing_columns:
+                # شیت‌های دیگر کارپوشه (راهنما، خلاصه و ...) نادیده گرفته می‌شوند؛
+                # فقط شیتی که بخشی از ستون‌ها را دارد گزارش می‌شود
+                if sheet not in skipped_sheets and len(missing_columns) < len(REQUIRED_COLUMNS):
+                    error_messages.append(f'شیت {sheet}: ستون‌های ضروری وجود ندارند: {", ".join(missing_columns)}')
+                    error_count += 1
+                skipped_sheets.setdefault(sheet, missing_columns)
+                continue
+            if rows_read == 0 and data_sheet is None:
+                data_sheet = sheet
+
+            events, parse_errors = normalize_history_frame(
+                chunk, sheet=sheet if sheet != data_sheet else None
+            )
+            _stage_events(conn, events)
+            error_messages.extend(f'خط {row}: {message}' for row, message in parse_errors)
+            error_count += len(parse_errors)
+            rows_read += len(chunk)
+            if progress:
+                progress(0, None, f'{rows_read} ردیف خوانده شد، {error_count} خطا')
+
+        if data_sheet is None and skipped_sheets:
+            missing_columns = next(iter(skipped_sheets.values()))
+            raise ValueError(f'ستون‌های ضروری وجود ندارند: {", ".join(missing_columns)}')
+
+        success_count, apply_errors = _apply_stage(conn, user_id, progress)
+        error_messages.extend(apply_errors)
+        error_count += len(apply_errors)
+        if success_count:
+            conn.commit()
+    finally:
+        try:
+            conn.rollback()
+            _drop_stage(conn)
+        finally:
+            conn.close()
+
+    return {'success_count': success_count, 'error_count': error_count, 'errors': error_messages}
+
+
+def import_history_dataframe(df, user_id, progress=None):
+    """
+    بررسی و درج رویدادهای df در pump_history (همه در یک تراکنش).
+
+    ستون‌ها به صورت برداری تبدیل و در یک جدول موقت ثبت می‌شوند؛ سپس
+    رویدادهای هر پمپ با پنجره مرتب تاریخچه موجود ادغام و از نظر ترتیب منطقی
+    ON/OFF بررسی می‌شوند. پمپی که مغایرت دارد یا چاهش فعال نیست وارد نمی‌شود و
+    بقیه با یک INSERT ... SELECT درج می‌شوند.
+    progress: اختیاری، تابع (تعداد پمپ‌های پردازش‌شده، کل پمپ‌ها)
+    خروجی: {'success_count', 'error_count', 'errors': [پیام‌ها]}
+    """
+    return _import_chunks([(None, df)], user_id, progress)
+
+
+def import_history_file(path, user_id, progress=None, chunk_rows=None):
+    """
+    مثل import_history_dataframe ولی فایل (xlsx یا csv) تکه‌تکه خوانده می‌شود
+    (utils.table_reader) و همه شیت‌هایی که ستون‌های لازم را دارند وارد می‌شوند؛
+    حافظه مصرفی به اندازه یک تکه و رویدادهای یک پمپ محدود است.
+    """
+    chunks = iter_table_chunks(path, chunk_rows=chunk_rows, all_sheets=True)
+    return _import_chunks(chunks, user_id, progress)
+
+
+@job_handler('import_history')
+def _run_import_history_job(ctx):
+    ctx.progress(0, message='در حال خواندن فایل', force=True)
+    return import_history_file(ctx.params['path'], ctx.user_id, ctx.progress)
@@ -2,9 +2,17 @@ import pandas as pd
 from io import BytesIO
 from pathlib import Path
 from datetime import datetime
-import sqlite3
+import hashlib
 import uuid
-from .backup_utils import BACKUP_DIR, DB_PATH
+from .backup_utils import BACKUP_DIR
+from database.fleet_revision import bump_fleet_revision
+from database.import_staging import (
+    create_staged_upload, finish_staged_upload, find_staged_upload, get_staged_upload,
+    iter_staged_wells, mark_upload_applied, purge_staged_uploads, stage_well_rows,
+)
+from database.models import get_db_connection
+from .job_queue import job_handler
+from .table_reader import iter_table_chunks
 
 
 TEMPLATE_COLUMNS = [
@@ -38,105 +46,134 @@ def generate_template_bytes():
     return bio.getvalue()
 
 
-def save_upload_file(file_storage):
+def save_upload_file(file_storage, suffix='.xlsx'):
     """Save uploaded file to BACKUP_DIR/imports with a uuid name and return path."""
     imports_dir = Path(BACKUP_DIR) / 'imports'
     imports_dir.mkdir(parents=True, exist_ok=True)
-    fname = f"upload_{datetime.now().strftime('%Y%m%d%H%M%S')}_{uuid.uuid4().hex}.xlsx"
+    fname = f"upload_{datetime.now().strftime('%Y%m%d%H%M%S')}_{uuid.uuid4().hex}{suffix}"
     dst = imports_dir / fname
     file_storage.save(str(dst))
     return str(dst)
 
 
-def parse_and_validate(file_path, max_wells=1000, preview_limit=200):
-    """Parse uploaded excel and return summary and preview rows.
+def iter_validated_chunks(file_path, max_wells=1000, chunk_rows=None):
+    """Read an uploaded xlsx/csv file in bounded chunks (see utils.table_reader)
+    and validate each one.
+
+    Yields ``(chunk_row_count, valid_rows, errors)`` per chunk; valid rows are
+    normalized dicts (including their spreadsheet ``row_number``), errors are
+    ``{row, msg}`` dicts.
+    """
+    mapping = None
+    for _, df in iter_table_chunks(file_path, chunk_rows=chunk_rows):
+        if mapping is None:
+            # normalize columns
+            cols = {str(c).lower().strip(): c for c in df.columns}
+            mapping = {}
+            for expected in TEMPLATE_COLUMNS:
+                if expected in cols:
+                    mapping[expected] = cols[expected]
+        rows = []
+        errors = []
+        for idx, r in df.iterrows():
+            rn = int(idx) + 2  # excel row (header=1)
+            try:
+                well_number = None
+                if 'well_number' in mapping:
+                    val = r[mapping['well_number']]
+                    if pd.isna(val):
+                        raise ValueError('well_number is required')
+                    well_number = int(val)
+                else:
+                    raise ValueError('well_number column missing')
+
+                if not (1 <= well_number <= max_wells):
+                    raise ValueError(f'well_number {well_number} out of range 1..{max_wells}')
+
+                # well name: optional now — default to 'چاه شماره {well_number}' when missing
+                name = ''
+                if 'well_name' in mapping:
+                    name = r[mapping['well_name']]
+                if pd.isna(name) or str(name).strip() == '':
+                    name = f'چاه شماره {well_number}'
+
+                # fields (optional)
+                well_location = str(r[mapping['well_location']]) if 'well_location' in mapping and not pd.isna(r[mapping['well_location']]) else ''
+                total_depth = str(r[mapping['total_depth']]) if 'total_depth' in mapping and not pd.isna(r[mapping['total_depth']]) else ''
+                pump_installation_depth = str(r[mapping['pump_installation_depth']]) if 'pump_installation_depth' in mapping and not pd.isna(r[mapping['pump_installation_depth']]) else ''
+                well_diameter = str(r[mapping['well_diameter']]) if 'well_diameter' in mapping and not pd.isna(r[mapping['well_diameter']]) else ''
+                current_pump_brand = str(r[mapping['current_pump_brand']]) if 'current_pump_brand' in mapping and not pd.isna(r[mapping['current_pump_brand']]) else ''
+                current_pump_model = str(r[mapping['current_pump_model']]) if 'current_pump_model' in mapping and not pd.isna(r[mapping['current_pump_model']]) else ''
+                current_pump_power = str(r[mapping['current_pump_power']]) if 'current_pump_power' in mapping and not pd.isna(r[mapping['current_pump_power']]) else ''
+                current_pipe_material = str(r[mapping['current_pipe_material']]) if 'current_pipe_material' in mapping and not pd.isna(r[mapping['current_pipe_material']]) else ''
+                current_pipe_diameter = str(r[mapping['current_pipe_diameter']]) if 'current_pipe_diameter' in mapping and not pd.isna(r[mapping['current_pipe_diameter']]) else ''
+                current_pipe_length_m = r[mapping['current_pipe_length_m']] if 'current_pipe_length_m' in mapping and not pd.isna(r[mapping['current_pipe_length_m']]) else ''
+                main_cable_specs = str(r[mapping['main_cable_specs']]) if 'main_cable_specs' in mapping and not pd.isna(r[mapping['main_cable_specs']]) else ''
+                well_cable_specs = str(r[mapping['well_cable_specs']]) if 'well_cable_specs' in mapping and not pd.isna(r[mapping['well_cable_specs']]) else ''
+                current_panel_specs = str(r[mapping['current_panel_specs']]) if 'current_panel_specs' in mapping and not pd.isna(r[mapping['current_panel_specs']]) else ''
+                status = str(r[mapping['status']]) if 'status' in mapping and not pd.isna(r[mapping['status']]) else 'active'
+                notes = str(r[mapping['notes']]) if 'notes' in mapping and not pd.isna(r[mapping['notes']]) else ''
+
+                # pump_number defaults to well_number to preserve invariant pump_id==pump_number==well.id
+                pump_number = well_number
+
+                row = {
+                    'well_number': well_number,
+                    'well_name': str(name),
+                    'well_location': well_location,
+                    'total_depth': total_depth,
+                    'pump_installation_depth': pump_installation_depth,
+                    'well_diameter': well_diameter,
+                    'current_pump_brand': current_pump_brand,
+                    'current_pump_model': current_pump_model,
+                    'current_pump_power': current_pump_power,
+                    'current_pipe_material': current_pipe_material,
+                    'current_pipe_diameter': current_pipe_diameter,
+                    'current_pipe_length_m': current_pipe_length_m,
+                    'main_cable_specs': main_cable_specs,
+                    'well_cable_specs': well_cable_specs,
+                    'current_panel_specs': current_panel_specs,
+                    'status': status,
+                    'pump_number': pump_number,
+                    'row_number': rn
+                }
+                rows.append(row)
+            except Exception as e:
+                errors.append({'row': rn, 'msg': str(e)})
+        yield len(df), rows, errors
+
+
+def parse_and_validate(file_path, max_wells=1000, preview_limit=200, chunk_rows=None, progress=None):
+    """Parse an uploaded xlsx/csv file and return summary and preview rows.
+
+    The file is read in bounded chunks instead of loading the whole workbook
+    into one DataFrame; only the first ``preview_limit`` valid rows are kept.
+    progress: optional callable(rows_read, total, message) called per chunk.
 
     Returns dict: { total_rows, errors: [{row, msg}], rows: [dict,...], summary }
     """
-    df = pd.read_excel(file_path, sheet_name=0, engine='openpyxl')
-    # normalize columns
-    cols = {c.lower().strip(): c for c in df.columns}
-    mapping = {}
-    for expected in TEMPLATE_COLUMNS:
-        if expected in cols:
-            mapping[expected] = cols[expected]
     rows = []
     errors = []
-    for idx, r in df.iterrows():
-        rn = int(idx) + 2  # excel row (header=1)
-        try:
-            well_number = None
-            if 'well_number' in mapping:
-                val = r[mapping['well_number']]
-                if pd.isna(val):
-                    raise ValueError('well_number is required')
-                well_number = int(val)
-            else:
-                raise ValueError('well_number column missing')
-
-            if not (1 <= well_number <= max_wells):
-                raise ValueError(f'well_number {well_number} out of range 1..{max_wells}')
-
-            # well name: optional now — default to 'چاه شماره {well_number}' when missing
-            name = ''
-            if 'well_name' in mapping:
-                name = r[mapping['well_name']]
-            if pd.isna(name) or str(name).strip() == '':
-                name = f'چاه شماره {well_number}'
-
-            # fields (optional)
-            well_location = str(r[mapping['well_location']]) if 'well_location' in mapping and not pd.isna(r[mapping['well_location']]) else ''
-            total_depth = str(r[mapping['total_depth']]) if 'total_depth' in mapping and not pd.isna(r[mapping['total_depth']]) else ''
-            pump_installation_depth = str(r[mapping['pump_installation_depth']]) if 'pump_installation_depth' in mapping and not pd.isna(r[mapping['pump_installation_depth']]) else ''
-            well_diameter = str(r[mapping['well_diameter']]) if 'well_diameter' in mapping and not pd.isna(r[mapping['well_diameter']]) else ''
-            current_pump_brand = str(r[mapping['current_pump_brand']]) if 'current_pump_brand' in mapping and not pd.isna(r[mapping['current_pump_brand']]) else ''
-            current_pump_model = str(r[mapping['current_pump_model']]) if 'current_pump_model' in mapping and not pd.isna(r[mapping['current_pump_model']]) else ''
-            current_pump_power = str(r[mapping['current_pump_power']]) if 'current_pump_power' in mapping and not pd.isna(r[mapping['current_pump_power']]) else ''
-            current_pipe_material = str(r[mapping['current_pipe_material']]) if 'current_pipe_material' in mapping and not pd.isna(r[mapping['current_pipe_material']]) else ''
-            current_pipe_diameter = str(r[mapping['current_pipe_diameter']]) if 'current_pipe_diameter' in mapping and not pd.isna(r[mapping['current_pipe_diameter']]) else ''
-            current_pipe_length_m = r[mapping['current_pipe_length_m']] if 'current_pipe_length_m' in mapping and not pd.isna(r[mapping['current_pipe_length_m']]) else ''
-            main_cable_specs = str(r[mapping['main_cable_specs']]) if 'main_cable_specs' in mapping and not pd.isna(r[mapping['main_cable_specs']]) else ''
-            well_cable_specs = str(r[mapping['well_cable_specs']]) if 'well_cable_specs' in mapping and not pd.isna(r[mapping['well_cable_specs']]) else ''
-            current_panel_specs = str(r[mapping['current_panel_specs']]) if 'current_panel_specs' in mapping and not pd.isna(r[mapping['current_panel_specs']]) else ''
-            status = str(r[mapping['status']]) if 'status' in mapping and not pd.isna(r[mapping['status']]) else 'active'
-            notes = str(r[mapping['notes']]) if 'notes' in mapping and not pd.isna(r[mapping['notes']]) else ''
-
-            # pump_number defaults to well_number to preserve invariant pump_id==pump_number==well.id
-            pump_number = well_number
-
-            row = {
-                'well_number': well_number,
-                'well_name': str(name),
-                'well_location': well_location,
-                'total_depth': total_depth,
-                'pump_installation_depth': pump_installation_depth,
-                'well_diameter': well_diameter,
-                'current_pump_brand': current_pump_brand,
-                'current_pump_model': current_pump_model,
-                'current_pump_power': current_pump_power,
-                'current_pipe_material': current_pipe_material,
-                'current_pipe_diameter': current_pipe_diameter,
-                'current_pipe_length_m': current_pipe_length_m,
-                'main_cable_specs': main_cable_specs,
-                'well_cable_specs': well_cable_specs,
-                'current_panel_specs': current_panel_specs,
-                'status': status,
-                'pump_number': pump_number
-            }
-            rows.append(row)
-        except Exception as e:
-            errors.append({'row': rn, 'msg': str(e)})
+    total_rows = 0
+    valid_rows = 0
+    for chunk_len, chunk_valid, chunk_errors in iter_validated_chunks(file_path, max_wells, chunk_rows):
+        total_rows += chunk_len
+        valid_rows += len(chunk_valid)
+        rows.extend(chunk_valid[:max(0, preview_limit - len(rows))])
+        errors.extend(chunk_errors)
+        if progress:
+            progress(total_rows, None, f'Validated {total_rows} rows, {len(errors)} errors')
 
     summary = {
-        'total_rows': len(df),
-        'valid_rows': len(rows),
+        'total_rows': total_rows,
+        'valid_rows': valid_rows,
         'error_count': len(errors)
     }
     return {
         'summary': summary,
         'errors': errors,
-        'rows_preview': rows[:preview_limit],
-        'all_rows_count': len(rows)
+        'rows_preview': rows,
+        'all_rows_count': valid_rows
     }
 
 
@@ -150,82 +187,215 @@ def _set_sqlite_sequence(conn, table_name, seq_val):
         conn.rollback()
 
 
-def apply_rows_to_db(file_path, policy='merge', max_wells=1000):
-    """Apply parsed rows to the DB. Only 'merge' policy is supported.
+def file_sha256(file_path, block_size=1024 * 1024):
+    """Hex SHA-256 of a file, read in blocks."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
 
-    Returns dict with result counts and messages.
+
+def stage_upload(file_path, user_id=None, max_wells=1000, chunk_rows=None, progress=None):
+    """Validate an uploaded file once and persist its normalized rows plus the
+    insert/update dry-run in the import staging tables.
+
+    A file whose content (SHA-256) was already staged and not yet applied is
+    not parsed again; the existing upload id is returned instead.
+    Returns the upload id.
     """
-    parsed = parse_and_validate(file_path, max_wells=max_wells, preview_limit=1000000)
-    if parsed['summary']['error_count'] > 0:
-        return {'ok': False, 'msg': 'Validation errors present', 'errors': parsed['errors']}
-
-    # Only merge mode is supported now. Reject any explicit overwrite requests.
-    if policy != 'merge':
-        return {'ok': False, 'msg': "Policy 'overwrite' is not supported. Use 'merge' instead."}
-
-    rows = parsed['rows_preview'] if parsed['all_rows_count'] == len(parsed['rows_preview']) else parsed['rows_preview']
-    # open DB
-    conn = sqlite3.connect(str(DB_PATH))
-    conn.row_factory = sqlite3.Row
-    cur = conn.cursor()
+    file_hash = file_sha256(file_path)
+    conn = get_db_connection()
+    try:
+        for stale_path in purge_staged_uploads(conn):
+            if stale_path != str(file_path):
+                Path(stale_path).unlink(missing_ok=True)
+        conn.commit()
+
+        upload_id = find_staged_upload(conn, file_hash, max_wells)
+        if upload_id:
+            return upload_id
+
+        upload_id = uuid.uuid4().hex
+        create_staged_upload(conn, upload_id, file_hash, str(file_path), user_id, max_wells)
+        total_rows = 0
+        valid_rows = 0
+        errors = []
+        for chunk_len, rows, chunk_errors in iter_validated_chunks(file_path, max_wells, chunk_rows):
+            stage_well_rows(conn, upload_id, rows)
+            total_rows += chunk_len
+            valid_rows += len(rows)
+            errors.extend(chunk_errors)
+            if progress:
+                progress(total_rows, None, f'Validated {total_rows} rows, {len(errors)} errors')
+        finish_staged_upload(conn, upload_id, total_rows, valid_rows, errors)
+        conn.commit()
+        return upload_id
+    finally:
+        conn.close()
+
+
+def staged_upload_preview(upload_id, preview_limit=200):
+    """Summary, errors, first rows and exact dry-run counts of a staged upload
+    (same shape as parse_and_validate plus ``dry_run``), or None."""
+    conn = get_db_connection()
     try:
+        upload = get_staged_upload(conn, upload_id)
+        if upload is None:
+            return None
+        rows = iter_staged_wells(conn, upload_id, limit=preview_limit)
+        conn.commit()
+    finally:
+        conn.close()
+    return {
+        'upload_id': upload_id,
+        'summary': {
+            'total_rows': upload['total_rows'],
+            'valid_rows': upload['valid_rows'],
+            'error_count': len(upload['errors'])
+        },
+        'errors': upload['errors'],
+        'rows_preview': rows,
+        'all_rows_count': upload['valid_rows'],
+        'dry_run': {'insert': upload['insert_count'], 'update': upload['update_count']},
+        'applied': upload['applied_at'] is not None,
+    }
+
+
+# staged row values that differ from the current well / pump (NULL-safe)
+_WELL_CHANGED = """
+    w.well_number IS NOT s.well_number OR w.name IS NOT s.well_name
+    OR w.location IS NOT s.well_location OR w.total_depth IS NOT s.total_depth
+    OR w.pump_id IS NOT s.pump_number
+"""
+_PUMP_CHANGED = """
+    p.pump_number IS NOT s.pump_number OR p.name IS NOT 'پمپ شماره ' || s.pump_number
+    OR p.location IS NOT s.well_location
+"""
+
+
+def apply_staged_upload(upload_id, policy='merge', progress=None):
+    """Apply the rows staged by stage_upload. Only 'merge' policy is supported.
+
+    The rows are not parsed or validated again. Wells and pumps are written
+    with one set-based ``INSERT ... SELECT ... ON CONFLICT DO UPDATE`` each,
+    in a single transaction; rows whose values already match are not touched,
+    so ``updated_at`` and the fleet revision only move when something changed.
+    progress: optional callable(done_rows, total_rows).
+    Returns dict with inserted/updated/unchanged counts and messages.
+    """
+    conn = get_db_connection()
+    try:
+        upload = get_staged_upload(conn, upload_id)
+        if upload is None:
+            return {'ok': False, 'msg': 'Staged upload not found (it may have expired); upload the file again'}
+        if upload['applied_at'] is not None:
+            return {'ok': False, 'msg': 'This upload has already been applied'}
+        if upload['errors']:
+            return {'ok': False, 'msg': 'Validation errors present', 'errors': upload['errors']}
+
+        # Only merge mode is supported now. Reject any explicit overwrite requests.
+        if policy != 'merge':
+            return {'ok': False, 'msg': "Policy 'overwrite' is not supported. Use 'merge' instead."}
+
         # ensure wells table has pump_id column (older DBs may not)
         try:
-            cur.execute("SELECT pump_id FROM wells LIMIT 1")
+            conn.execute("SELECT pump_id FROM wells LIMIT 1")
         except Exception:
             # add the column if it doesn't exist
             try:
-                cur.execute('ALTER TABLE wells ADD COLUMN pump_id INTEGER')
-                conn.commit()
+                conn.execute('ALTER TABLE wells ADD COLUMN pump_id INTEGER')
                 # populate pump_id for existing rows to match id
-                cur.execute('UPDATE wells SET pump_id = id WHERE pump_id IS NULL')
+                conn.execute('UPDATE wells SET pump_id = id WHERE pump_id IS NULL')
                 conn.commit()
             except Exception:
                 conn.rollback()
 
-        # apply rows
-        inserted = 0
-        updated = 0
-        for r in rows:
-            wid = int(r['well_number'])
-            pnum = int(r['pump_number'])
-            # pump name: if provided use it, otherwise default to 'پمپ شماره {pnum}'
-            pname = r.get('pump_name') if isinstance(r, dict) and r.get('pump_name') else f'پمپ شماره {pnum}'
-            # wells: id is AUTOINCREMENT but we explicitly set id to well_number to preserve invariant
-            cur.execute('SELECT id FROM wells WHERE id = ?', (wid,))
-            existing_well = cur.fetchone()
-            if existing_well:
-                # update
-                cur.execute('''UPDATE wells SET
-                    well_number = ?, name = ?, location = ?, total_depth = ?, pump_id = ?, updated_at = CURRENT_TIMESTAMP
-                    WHERE id = ?''', (wid, r['well_name'], r['well_location'], r['total_depth'], pnum, wid))
-                updated += 1
-            else:
-                cur.execute('''INSERT INTO wells (id, well_number, name, location, total_depth, pump_id)
-                    VALUES (?, ?, ?, ?, ?, ?)''', (wid, wid, r['well_name'], r['well_location'], r['total_depth'], pnum))
-                inserted += 1
-
-            # pumps (id == pump_number)
-            cur.execute('SELECT id FROM pumps WHERE id = ?', (pnum,))
-            existing_pump = cur.fetchone()
-            if existing_pump:
-                cur.execute('''UPDATE pumps SET pump_number = ?, name = ?, location = ? WHERE id = ?''', (pnum, pname, r['well_location'], pnum))
-            else:
-                cur.execute('''INSERT INTO pumps (id, pump_number, name, location) VALUES (?, ?, ?, ?)''', (pnum, pnum, pname, r['well_location']))
+        counts = conn.execute(f'''
+            SELECT COUNT(*) AS total,
+                   COALESCE(SUM(w.id IS NULL), 0) AS inserted,
+                   COALESCE(SUM(w.id IS NOT NULL AND ({_WELL_CHANGED})), 0) AS updated
+            FROM import_staged_wells s
+            LEFT JOIN wells w ON w.id = s.well_number
+            WHERE s.upload_id = ?
+        ''', (upload_id,)).fetchone()
+        total, inserted, updated = counts['total'], counts['inserted'], counts['updated']
+        if progress:
+            progress(0, total)
+
+        # wells: id is AUTOINCREMENT but we explicitly set id to well_number to preserve invariant
+        conn.execute('''
+            INSERT INTO wells (id, well_number, name, location, total_depth, pump_id)
+            SELECT s.well_number, s.well_number, s.well_name, s.well_location, s.total_depth, s.pump_number
+            FROM import_staged_wells s
+            WHERE s.upload_id = ?
+            ORDER BY s.row_number
+            ON CONFLICT (id) DO UPDATE SET
+                well_number = excluded.well_number, name = excluded.name, location = excluded.location,
+                total_depth = excluded.total_depth, pump_id = excluded.pump_id, updated_at = CURRENT_TIMESTAMP
+            WHERE wells.well_number IS NOT excluded.well_number OR wells.name IS NOT excluded.name
+               OR wells.location IS NOT excluded.location OR wells.total_depth IS NOT excluded.total_depth
+               OR wells.pump_id IS NOT excluded.pump_id
+        ''', (upload_id,))
+
+        # pumps (id == pump_number); name defaults to 'پمپ شماره {pump_number}'
+        pumps_changed = conn.execute(f'''
+            SELECT COUNT(*) FROM import_staged_wells s
+            LEFT JOIN pumps p ON p.id = s.pump_number
+            WHERE s.upload_id = ? AND (p.id IS NULL OR {_PUMP_CHANGED})
+        ''', (upload_id,)).fetchone()[0]
+        conn.execute('''
+            INSERT INTO pumps (id, pump_number, name, location)
+            SELECT s.pump_number, s.pump_number, 'پمپ شماره ' || s.pump_number, s.well_location
+            FROM import_staged_wells s
+            WHERE s.upload_id = ?
+            ORDER BY s.row_number
+            ON CONFLICT (id) DO UPDATE SET
+                pump_number = excluded.pump_number, name = excluded.name, location = excluded.location
+            WHERE pumps.pump_number IS NOT excluded.pump_number OR pumps.name IS NOT excluded.name
+               OR pumps.location IS NOT excluded.location
+        ''', (upload_id,))
 
+        mark_upload_applied(conn, upload_id)
+        if inserted or updated or pumps_changed:
+            bump_fleet_revision(conn)
         conn.commit()
+        if progress:
+            progress(total, total)
 
         # set sqlite_sequence for wells and pumps to avoid future conflicts
-        cur.execute('SELECT MAX(id) as m FROM wells')
-        max_w = cur.fetchone()['m'] or 0
-        cur.execute('SELECT MAX(id) as m FROM pumps')
-        max_p = cur.fetchone()['m'] or 0
+        max_w = conn.execute('SELECT MAX(id) as m FROM wells').fetchone()['m'] or 0
+        max_p = conn.execute('SELECT MAX(id) as m FROM pumps').fetchone()['m'] or 0
         _set_sqlite_sequence(conn, 'wells', max_w)
         _set_sqlite_sequence(conn, 'pumps', max_p)
 
-        return {'ok': True, 'inserted': inserted, 'updated': updated, 'total': inserted + updated}
+        return {'ok': True, 'inserted': inserted, 'updated': updated, 'unchanged': total - inserted - updated,
+                'total': total}
     except Exception as e:
         conn.rollback()
         return {'ok': False, 'msg': str(e)}
     finally:
         conn.close()
+
+
+def apply_rows_to_db(file_path, policy='merge', max_wells=1000, progress=None):
+    """Validate, stage and apply a file in one step (see stage_upload and
+    apply_staged_upload). Returns dict with result counts and messages."""
+    upload_id = stage_upload(file_path, max_wells=max_wells)
+    return apply_staged_upload(upload_id, policy=policy, progress=progress)
+
+
+@job_handler('wells_apply')
+def _run_wells_apply_job(ctx):
+    """Background version of the admin setup "apply upload" step."""
+    ctx.progress(0, message='Applying staged rows', force=True)
+    res = apply_staged_upload(
+        ctx.params['upload_id'],
+        policy=ctx.params.get('policy', 'merge'),
+        progress=ctx.progress,
+    )
+    if not res.get('ok'):
+        details = [f"row {e.get('row')}: {e.get('msg')}" for e in (res.get('errors') or [])[:10]]
+        raise ValueError('; '.join(['خطا در اعمال داده‌ها: ' + str(res.get('msg', 'unknown'))] + details))
+    return res
+
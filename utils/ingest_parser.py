@@ -0,0 +1,133 @@
+"""Parsing of machine-posted pump events (PLC/SCADA ingestion API).
+
+Two body formats are accepted:
+
+* JSON lines (``application/x-ndjson``, ``application/jsonl``): one object per
+  line, ``{"key": "...", "pump_id": 12, "action": "ON", "time": "..."}``;
+  ``reason`` and ``notes`` are optional.
+  A plain JSON array of such objects is accepted too (``line`` is then the
+  1-based item position).
+* Compact CSV (``text/csv``): ``key,pump_id,action,time`` per line, with an
+  optional header line. ``key`` may be empty.
+
+``time`` is ISO 8601 (``2024-05-01 08:00:00``, ``2024-05-01T08:00:00+03:30``)
+or Unix epoch seconds. Aware times are converted to server local time, which
+is how ``pump_history.event_time`` is stored.
+"""
+import csv
+import io
+import json
+from datetime import datetime
+
+JSON_LINES_TYPES = ('application/x-ndjson', 'application/jsonl', 'application/json-lines',
+                    'application/json')
+CSV_TYPES = ('text/csv', 'application/csv', 'text/plain')
+CSV_FIELDS = ('key', 'pump_id', 'action', 'time')
+# longest idempotency key accepted
+MAX_KEY_LENGTH = 128
+
+
+def parse_event_time(value):
+    """Normalize an event time to 'YYYY-MM-DD HH:MM:SS' local time; raises ValueError."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        moment = datetime.fromtimestamp(value)
+    else:
+        text = str(value or '').strip()
+        if not text:
+            raise ValueError('missing time')
+        try:
+            moment = datetime.fromtimestamp(float(text))
+        except ValueError:
+            moment = datetime.fromisoformat(text)
+    if moment.tzinfo is not None:
+        moment = moment.astimezone().replace(tzinfo=None)
+    return moment.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def normalize_event(record, line):
+    """Validate one raw record. Returns (event dict, None) or (None, error message)."""
+    if not isinstance(record, dict):
+        return None, 'expected an object'
+    key = record.get('key')
+    key = str(key).strip() if key not in (None, '') else None
+    if key and len(key) > MAX_KEY_LENGTH:
+        return None, f'key longer than {MAX_KEY_LENGTH} characters'
+    try:
+        pump_id = int(str(record.get('pump_id')).strip())
+    except (TypeError, ValueError):
+        return None, 'invalid pump_id'
+    action = str(record.get('action') or '').strip().upper()
+    if action not in ('ON', 'OFF'):
+        return None, 'action must be ON or OFF'
+    try:
+        event_time = parse_event_time(record.get('time'))
+    except (TypeError, ValueError, OverflowError, OSError):
+        return None, 'invalid time'
+    return {
+        'line': line,
+        'key': key,
+        'pump_id': pump_id,
+        'action': action,
+        'event_time': event_time,
+        'reason': record.get('reason'),
+        'notes': record.get('notes'),
+    }, None
+
+
+def _iter_json_lines(text):
+    for line, raw in enumerate(text.splitlines(), 1):
+        if not raw.strip():
+            continue
+        try:
+            yield line, json.loads(raw)
+        except ValueError:
+            yield line, None
+
+
+def _iter_json_array(text):
+    try:
+        items = json.loads(text)
+    except ValueError:
+        items = None
+    if not isinstance(items, list):
+        yield 1, None
+        return
+    yield from enumerate(items, 1)
+
+
+def _iter_csv(text):
+    reader = csv.reader(io.StringIO(text))
+    for row in reader:
+        line = reader.line_num
+        if not row or not any(cell.strip() for cell in row):
+            continue
+        if line == 1 and [cell.strip().lower() for cell in row[:4]] == list(CSV_FIELDS):
+            continue
+        yield line, dict(zip(CSV_FIELDS, (cell.strip() for cell in row)))
+
+
+def parse_ingest_body(text, content_type):
+    """Split a request body into (events, errors).
+
+    events: normalized dicts in body order (``line`` is the 1-based body line).
+    errors: ``{'line', 'error'}`` dicts for lines that could not be used.
+    Raises ValueError for an unsupported content type.
+    """
+    mimetype = (content_type or '').split(';')[0].strip().lower()
+    if mimetype in JSON_LINES_TYPES and text.lstrip().startswith('['):
+        records = _iter_json_array(text)
+    elif mimetype in JSON_LINES_TYPES:
+        records = _iter_json_lines(text)
+    elif mimetype in CSV_TYPES:
+        records = _iter_csv(text)
+    else:
+        raise ValueError(f'unsupported content type: {mimetype or "none"}')
+
+    events, errors = [], []
+    for line, record in records:
+        event, error = normalize_event(record, line) if record is not None else (None, 'invalid JSON')
+        if error:
+            errors.append({'line': line, 'error': error})
+        else:
+            events.append(event)
+    return events, errors
@@ -0,0 +1,160 @@
+"""Local background job queue (thread pool + the SQLite `jobs` table).
+
+Heavy operations (large exports, history imports, wells uploads) are
+submitted here instead of running inside the request thread. Each job kind
+is a handler registered with ``@job_handler('kind')``; it receives a
+``JobContext`` for progress reporting and for the path of its output file,
+and returns a JSON-serialisable result dict.
+
+Job state lives in the database (see ``database/jobs.py``), so any worker
+can answer ``/api/jobs/<id>``; the queue itself is in-process and jobs left
+queued/running by a previous run are marked failed on startup.
+"""
+import importlib
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from config import get_config
+from database import jobs as job_store
+from .backup_utils import BACKUP_DIR
+
+JOBS_DIR = Path(BACKUP_DIR) / 'jobs'
+# minimum seconds between two progress writes of the same job
+PROGRESS_INTERVAL = 0.5
+
+logger = logging.getLogger(__name__)
+
+_HANDLERS = {}
+# modules whose @job_handler registrations must be loaded before jobs run
+HANDLER_MODULES = ('utils.backup_jobs', 'utils.export_utils', 'utils.history_import', 'utils.import_utils')
+
+
+def job_handler(kind):
+    """Register ``func(ctx)`` as the handler for jobs of this kind."""
+    def decorator(func):
+        _HANDLERS[kind] = func
+        return func
+    return decorator
+
+
+class JobContext:
+    """What a running handler sees: its params, progress reporting and output file."""
+
+    def __init__(self, job_id, params, user_id):
+        self.job_id = job_id
+        self.params = params or {}
+        self.user_id = user_id
+        self.artifact = None
+        self.done = 0
+        self._last_write = 0.0
+
+    def progress(self, done, total=None, message=None, force=False):
+        """Report progress; writes are throttled to one per PROGRESS_INTERVAL."""
+        self.done = done
+        now = time.monotonic()
+        if not force and now - self._last_write < PROGRESS_INTERVAL:
+            return
+        self._last_write = now
+        job_store.update_job_progress(self.job_id, done, total, message)
+
+    def track(self, iterable, total=None, message=None):
+        """Yield from ``iterable`` while reporting how many items were consumed."""
+        if total is not None or message is not None:
+            self.progress(0, total, message, force=True)
+        done = 0
+        for item in iterable:
+            yield item
+            done += 1
+            if done % 100 == 0:
+                self.progress(done)
+        self.progress(done, force=True)
+
+    def artifact_path(self, suffix):
+        """Path for this job's output file (``suffix`` includes the dot)."""
+        JOBS_DIR.mkdir(parents=True, exist_ok=True)
+        return JOBS_DIR / f'{self.job_id}{suffix}'
+
+    def set_artifact(self, path, download_name, mimetype):
+        self.artifact = (str(path), download_name, mimetype)
+
+
+class JobQueue:
+    """Thread pool that runs registered handlers and records their outcome."""
+
+    def __init__(self, max_workers=2, retention_hours=24):
+        for module in HANDLER_MODULES:
+            importlib.import_module(module)
+        self.retention_hours = retention_hours
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self._futures = {}
+        self._lock = threading.Lock()
+
+    def submit(self, kind, params=None, user_id=None):
+        """Queue a job and return its id."""
+        if kind not in _HANDLERS:
+            raise ValueError(f'unknown job kind: {kind}')
+        self.purge_expired()
+        job_id = job_store.create_job(kind, params, user_id)
+        future = self._executor.submit(self._run, job_id, kind, params, user_id)
+        with self._lock:
+            self._futures[job_id] = future
+        future.add_done_callback(lambda _: self._forget(job_id))
+        return job_id
+
+    def wait(self, job_id, timeout=None):
+        """Block until a job submitted by this queue finishes; returns the job row."""
+        with self._lock:
+            future = self._futures.get(job_id)
+        if future is not None:
+            future.result(timeout)
+        return job_store.get_job(job_id)
+
+    def purge_expired(self):
+        for path in job_store.purge_jobs(self.retention_hours):
+            Path(path).unlink(missing_ok=True)
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+    def _forget(self, job_id):
+        with self._lock:
+            self._futures.pop(job_id, None)
+
+    def _run(self, job_id, kind, params, user_id):
+        ctx = JobContext(job_id, params, user_id)
+        try:
+            job_store.mark_job_running(job_id)
+            result = _HANDLERS[kind](ctx)
+            job_store.finish_job(job_id, result, ctx.artifact)
+        except Exception as e:
+            logger.exception('job %s (%s) failed', job_id, kind)
+            if ctx.artifact:
+                Path(ctx.artifact[0]).unlink(missing_ok=True)
+            job_store.fail_job(job_id, e)
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue():
+    """The process-wide queue; created on first use (config: JOB_WORKERS, JOB_RETENTION_HOURS)."""
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                cfg = get_config()
+                job_store.fail_interrupted_jobs()
+                _queue = JobQueue(
+                    max_workers=getattr(cfg, 'JOB_WORKERS', 2),
+                    retention_hours=getattr(cfg, 'JOB_RETENTION_HOURS', 24),
+                )
+    return _queue
+
+
+def submit_job(kind, params=None, user_id=None):
+    return get_job_queue().submit(kind, params, user_id)
+
@@ -0,0 +1,281 @@
+"""Incremental, deduplicated database snapshots.
+
+A snapshot is an online backup of the database (see backup_utils) split into
+fixed-size chunks of whole pages. Each chunk is stored once under the
+SHA-256 of its content, zlib-compressed:
+
+    database_backups/snapshots/chunks/ab/abcdef....z
+    database_backups/snapshots/manifests/<snapshot id>.json
+
+The manifest lists the chunk hashes in file order, so consecutive snapshots
+of a history table that mostly grows at the end share all unchanged chunks
+and each new snapshot only costs the pages that changed.
+
+``prune_snapshots`` applies an hourly/daily/monthly retention schedule and
+``collect_garbage`` removes chunks no manifest references any more.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import zlib
+from datetime import datetime
+from pathlib import Path
+
+from config import get_config
+from . import backup_utils
+
+MANIFEST_VERSION = 1
+# unreferenced chunks younger than this are kept: a snapshot being written
+# (possibly by another process) may not have saved its manifest yet
+GC_GRACE_SECONDS = 3600
+SNAPSHOT_PREFIX = 'snapshot:'
+
+
+def snapshot_dir():
+    return Path(backup_utils.BACKUP_DIR) / 'snapshots'
+
+
+def _chunk_path(digest):
+    return snapshot_dir() / 'chunks' / digest[:2] / f'{digest}.z'
+
+
+def _manifest_path(snapshot_id):
+    return snapshot_dir() / 'manifests' / f'{snapshot_id}.json'
+
+
+def _setting(name, default):
+    return getattr(get_config(), name, default)
+
+
+def _write_atomic(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f'.{path.name}.{os.getpid()}.tmp')
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _store_chunk(data):
+    """Store one chunk if it is new; returns (digest, stored bytes written)."""
+    digest = hashlib.sha256(data).hexdigest()
+    path = _chunk_path(digest)
+    if path.exists():
+        # keeps a reused chunk out of reach of a concurrent collect_garbage
+        os.utime(path)
+        return digest, 0
+    compressed = zlib.compress(data, 6)
+    _write_atomic(path, compressed)
+    return digest, len(compressed)
+
+
+def _page_size(path):
+    conn = sqlite3.connect(f'file:{Path(path).as_posix()}?mode=ro', uri=True)
+    try:
+        return conn.execute('PRAGMA page_size').fetchone()[0]
+    finally:
+        conn.close()
+
+
+def create_snapshot(progress=None, chunk_pages=None):
+    """Take a verified online backup and add it to the store as a snapshot.
+
+    progress: optional callable(done, total, message).
+    Returns the manifest dict (``id``, ``size``, ``new_chunks``,
+    ``new_bytes`` ...).
+    """
+    chunk_pages = chunk_pages or _setting('SNAPSHOT_CHUNK_PAGES', 64)
+    root = snapshot_dir()
+    (root / 'manifests').mkdir(parents=True, exist_ok=True)
+    created = datetime.now()
+    snapshot_id = created.strftime('%Y%m%d%H%M%S')
+    counter = 1
+    while _manifest_path(snapshot_id).exists():
+        snapshot_id = f"{created.strftime('%Y%m%d%H%M%S')}_{counter}"
+        counter += 1
+
+    work = root / f'.{snapshot_id}.db'
+    try:
+        backup_utils.copy_database_to(
+            work, progress=(lambda done, total: progress(done, total, 'Copying database pages'))
+            if progress else None
+        )
+        page_size = _page_size(work)
+        chunk_size = page_size * chunk_pages
+        size = work.stat().st_size
+        chunks = []
+        new_chunks = 0
+        new_bytes = 0
+        with open(work, 'rb') as f:
+            for data in iter(lambda: f.read(chunk_size), b''):
+                digest, written = _store_chunk(data)
+                chunks.append(digest)
+                if written:
+                    new_chunks += 1
+                    new_bytes += written
+                if progress:
+                    progress(len(chunks), -(-size // chunk_size), 'Storing chunks')
+    finally:
+        work.unlink(missing_ok=True)
+
+    manifest = {
+        'version': MANIFEST_VERSION,
+        'id': snapshot_id,
+        'created_at': created.isoformat(timespec='seconds'),
+        'page_size': page_size,
+        'chunk_size': chunk_size,
+        'size': size,
+        'chunks': chunks,
+        'new_chunks': new_chunks,
+        'new_bytes': new_bytes,
+    }
+    _write_atomic(_manifest_path(snapshot_id), json.dumps(manifest).encode('utf-8'))
+    return manifest
+
+
+def load_manifest(snapshot_id):
+    path = _manifest_path(snapshot_id)
+    if not path.exists():
+        return None
+    return json.loads(path.read_text(encoding='utf-8'))
+
+
+def list_snapshots():
+    """Manifests of all snapshots, newest first."""
+    manifests_dir = snapshot_dir() / 'manifests'
+    if not manifests_dir.exists():
+        return []
+    manifests = []
+    for path in manifests_dir.glob('*.json'):
+        try:
+            manifests.append(json.loads(path.read_text(encoding='utf-8')))
+        except (OSError, ValueError):
+            continue
+    manifests.sort(key=lambda m: (m['created_at'], m['id']), reverse=True)
+    return manifests
+
+
+def materialize_snapshot(snapshot_id, dst):
+    """Rebuild the database file of a snapshot at ``dst``; every chunk is hash-checked."""
+    manifest = load_manifest(snapshot_id)
+    if manifest is None:
+        raise FileNotFoundError(f'snapshot {snapshot_id} not found')
+    dst = Path(dst)
+    tmp = dst.with_name(f'.{dst.name}.tmp')
+    try:
+        with open(tmp, 'wb') as out:
+            for digest in manifest['chunks']:
+                data = zlib.decompress(_chunk_path(digest).read_bytes())
+                if hashlib.sha256(data).hexdigest() != digest:
+                    raise ValueError(f'snapshot {snapshot_id}: chunk {digest} is corrupted')
+                out.write(data)
+        if tmp.stat().st_size != manifest['size']:
+            raise ValueError(f'snapshot {snapshot_id}: rebuilt size does not match the manifest')
+        os.replace(tmp, dst)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    return str(dst)
+
+
+def select_retained(manifests, now=None, hourly=None, daily=None, monthly=None):
+    """Ids to keep under the retention schedule.
+
+    The newest snapshot of each of the last ``hourly`` hours, ``daily`` days
+    and ``monthly`` months (counted back from ``now``) is kept; the newest
+    snapshot overall is always kept.
+    """
+    now = now or datetime.now()
+    hourly = _setting('SNAPSHOT_KEEP_HOURLY', 24) if hourly is None else hourly
+    daily = _setting('SNAPSHOT_KEEP_DAILY', 14) if daily is None else daily
+    monthly = _setting('SNAPSHOT_KEEP_MONTHLY', 12) if monthly is None else monthly
+
+    def hour_index(t):
+        return (now - t.replace(minute=0, second=0, microsecond=0)).total_seconds() // 3600
+
+    def day_index(t):
+        return (now.date() - t.date()).days
+
+    def month_index(t):
+        return (now.year - t.year) * 12 + now.month - t.month
+
+    rules = (
+        (hourly, hour_index, lambda t: t.strftime('%Y%m%d%H')),
+        (daily, day_index, lambda t: t.strftime('%Y%m%d')),
+        (monthly, month_index, lambda t: t.strftime('%Y%m')),
+    )
+    keep = set()
+    ordered = sorted(manifests, key=lambda m: (m['created_at'], m['id']), reverse=True)
+    if ordered:
+        keep.add(ordered[0]['id'])
+    for limit, index, bucket in rules:
+        seen = set()
+        for manifest in ordered:
+            created = datetime.fromisoformat(manifest['created_at'])
+            key = bucket(created)
+            if key in seen or index(created) >= limit:
+                continue
+            seen.add(key)
+            keep.add(manifest['id'])
+    return keep
+
+
+def prune_snapshots(now=None):
+    """Delete the manifests the retention schedule no longer keeps; returns their ids."""
+    manifests = list_snapshots()
+    keep = select_retained(manifests, now=now)
+    removed = []
+    for manifest in manifests:
+        if manifest['id'] not in keep:
+            _manifest_path(manifest['id']).unlink(missing_ok=True)
+            removed.append(manifest['id'])
+    return removed
+
+
+def collect_garbage(grace_seconds=GC_GRACE_SECONDS):
+    """Delete chunks no manifest references. Returns (chunks removed, bytes freed)."""
+    chunks_dir = snapshot_dir() / 'chunks'
+    if not chunks_dir.exists():
+        return 0, 0
+    referenced = set()
+    for manifest in list_snapshots():
+        referenced.update(manifest['chunks'])
+    cutoff = time.time() - grace_seconds
+    removed = 0
+    freed = 0
+    for path in chunks_dir.glob('*/*.z'):
+        if path.stem in referenced:
+            continue
+        stat = path.stat()
+        if stat.st_mtime > cutoff:
+            continue
+        path.unlink(missing_ok=True)
+        removed += 1
+        freed += stat.st_size
+    return removed, freed
+
+
+def snapshot_and_prune(progress=None):
+    """Take a snapshot, apply the retention schedule and collect garbage."""
+    manifest = create_snapshot(progress=progress)
+    pruned = prune_snapshots()
+    removed_chunks, freed = collect_garbage()
+    return {
+        'id': manifest['id'],
+        'size': manifest['size'],
+        'chunks': len(manifest['chunks']),
+        'new_chunks': manifest['new_chunks'],
+        'new_bytes': manifest['new_bytes'],
+        'pruned': pruned,
+        'removed_chunks': removed_chunks,
+        'freed_bytes': freed,
+    }
+
+
+def store_usage():
+    """(number of snapshots, sum of their database sizes, bytes actually on disk)."""
+    manifests = list_snapshots()
+    chunks_dir = snapshot_dir() / 'chunks'
+    stored = sum(p.stat().st_size for p in chunks_dir.glob('*/*.z')) if chunks_dir.exists() else 0
+    return len(manifests), sum(m['size'] for m in manifests), stored
@@ -0,0 +1,101 @@
+"""Chunked readers for uploaded spreadsheets (xlsx/xlsm via openpyxl read-only mode, csv).
+
+Imports used to call ``pd.read_excel`` on the whole workbook, which expands a
+16 MB upload into several hundred MB of cells before a single row is checked.
+``iter_table_chunks`` yields bounded-size DataFrames instead, so callers can
+validate and stage rows as they go.
+
+Each chunk keeps the source position in its index: ``index + 2`` is the
+spreadsheet row (or csv line) of the record, matching the row numbers the
+import screens have always reported (header on row 1).
+"""
+from pathlib import Path
+
+import pandas as pd
+from openpyxl import load_workbook
+
+# rows per yielded DataFrame
+TABLE_CHUNK_ROWS = 5000
+
+CSV_SUFFIXES = ('.csv',)
+# formats openpyxl can stream; anything else (.xls) goes through pandas in one piece
+STREAMING_EXCEL_SUFFIXES = ('.xlsx', '.xlsm')
+TABLE_SUFFIXES = CSV_SUFFIXES + STREAMING_EXCEL_SUFFIXES + ('.xls',)
+
+
+def _header_names(cells):
+    names = []
+    for position, cell in enumerate(cells):
+        name = str(cell).strip() if cell is not None else ''
+        names.append(name or f'Unnamed: {position}')
+    return names
+
+
+def _iter_worksheet(worksheet, chunk_rows):
+    rows = worksheet.iter_rows(values_only=True)
+    header = next(rows, None)
+    if header is None:
+        return
+    columns = _header_names(header)
+    width = len(columns)
+
+    batch, index = [], []
+    for offset, values in enumerate(rows):
+        if values is None or all(value is None for value in values):
+            continue
+        values = tuple(values[:width]) + (None,) * (width - len(values))
+        batch.append(values)
+        index.append(offset)
+        if len(batch) >= chunk_rows:
+            yield pd.DataFrame(batch, columns=columns, index=index)
+            batch, index = [], []
+    if batch:
+        yield pd.DataFrame(batch, columns=columns, index=index)
+
+
+def _iter_excel(path, chunk_rows, all_sheets):
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        worksheets = workbook.worksheets if all_sheets else workbook.worksheets[:1]
+        for worksheet in worksheets:
+            for chunk in _iter_worksheet(worksheet, chunk_rows):
+                yield worksheet.title, chunk
+    finally:
+        workbook.close()
+
+
+def _iter_csv(path, chunk_rows):
+    reader = pd.read_csv(path, chunksize=chunk_rows, dtype=str, encoding='utf-8-sig',
+                         skipinitialspace=True)
+    with reader:
+        for chunk in reader:
+            chunk.columns = [str(column).strip() for column in chunk.columns]
+            yield None, chunk
+
+
+def _iter_legacy_excel(path, chunk_rows, all_sheets):
+    sheets = pd.read_excel(path, sheet_name=None if all_sheets else [0])
+    for name, df in sheets.items():
+        for start in range(0, len(df), chunk_rows):
+            yield (name if all_sheets else None), df.iloc[start:start + chunk_rows]
+
+
+def iter_table_chunks(path, chunk_rows=None, all_sheets=False):
+    """Yield ``(sheet_name, DataFrame)`` chunks of at most ``chunk_rows`` rows.
+
+    ``sheet_name`` is None for csv input. Only the first worksheet is read
+    unless ``all_sheets`` is set. Completely empty rows are skipped.
+    """
+    chunk_rows = chunk_rows or TABLE_CHUNK_ROWS
+    suffix = Path(path).suffix.lower()
+    if suffix in CSV_SUFFIXES:
+        return _iter_csv(path, chunk_rows)
+    if suffix in STREAMING_EXCEL_SUFFIXES:
+        return _iter_excel(path, chunk_rows, all_sheets)
+    return _iter_legacy_excel(path, chunk_rows, all_sheets)
+
+
+def upload_suffix(filename, default='.xlsx'):
+    """Lower-cased suffix of an uploaded filename if it is a supported table format."""
+    suffix = Path(filename or '').suffix.lower()
+    return suffix if suffix in TABLE_SUFFIXES else default